@@ -0,0 +1,103 @@
+"""
+Benchmark suite: microbenchmarks and end-to-end queries on TPC-H like data
+
+    python -m PQL.benchmarks run --scale 0.01 --output current.json
+    python -m PQL.benchmarks run --filter micro/ --output current.json
+    python -m PQL.benchmarks compare baseline.json current.json --threshold 0.1
+
+compare exits with status 1 when a benchmark got slower than the threshold.
+"""
+
+import argparse
+import sys
+
+from PQL.benchmarks.data import generate
+from PQL.benchmarks.harness import (
+    DEFAULT_REPEAT,
+    DEFAULT_THRESHOLD,
+    Timing,
+    compare_results,
+    format_time,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+from PQL.benchmarks.micro import micro_benchmarks
+from PQL.benchmarks.queries import query_benchmarks
+
+
+def run(options: argparse.Namespace) -> int:
+    data = generate(options.scale, options.seed)
+    benchmarks = micro_benchmarks(data=data) + query_benchmarks(data=data)
+    if options.filter:
+        benchmarks = [
+            benchmark for benchmark in benchmarks if options.filter in benchmark.key
+        ]
+
+    def report(name: str, timing: Timing) -> None:
+        print(
+            f"{name:<36} best {format_time(timing.best)}"
+            f"  median {format_time(timing.median)}  x{timing.number}",
+            flush=True,
+        )
+
+    results = run_benchmarks(benchmarks, options.repeat, report)
+    if options.output:
+        save_results(
+            results,
+            options.output,
+            scale=options.scale,
+            seed=options.seed,
+            repeat=options.repeat,
+        )
+    return 0
+
+
+def compare(options: argparse.Namespace) -> int:
+    baseline, current = load_results(options.baseline), load_results(options.current)
+    changes = compare_results(baseline, current)
+    if baseline["meta"].get("scale") != current["meta"].get("scale"):
+        print("warning: the runs used different scale factors", file=sys.stderr)
+
+    regressions = 0
+    for change in changes:
+        regressed = change.regressed(options.threshold)
+        regressions += regressed
+        print(
+            f"{change.name:<36} {format_time(change.baseline)}"
+            f" -> {format_time(change.current)}  {change.ratio:6.2f}x"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    print(f"{regressions} of {len(changes)} benchmarks regressed")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = arguments.add_subparsers(dest="command", required=True)
+
+    run_command = commands.add_parser("run", help="time the benchmarks")
+    run_command.add_argument("--scale", type=float, default=0.01)
+    run_command.add_argument("--seed", type=int, default=0)
+    run_command.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_command.add_argument("--filter", help="only benchmarks whose name has this")
+    run_command.add_argument("--output", help="write the results to this JSON file")
+    run_command.set_defaults(handler=run)
+
+    compare_command = commands.add_parser("compare", help="flag regressions")
+    compare_command.add_argument("baseline")
+    compare_command.add_argument("current")
+    compare_command.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="slowdown of the best time that counts as a regression",
+    )
+    compare_command.set_defaults(handler=compare)
+
+    options = arguments.parse_args()
+    sys.exit(options.handler(options))
+
+
+if __name__ == "__main__":
+    main()
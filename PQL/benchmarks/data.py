@@ -0,0 +1,278 @@
+"""
+Deterministic TPC-H like data at a scale factor
+
+Table shapes and row counts follow TPC-H, scale 1 is 150,000 customers, 1.5
+million orders and about 6 million line items. Columns are trimmed to the types
+the engines have (INT, STR, FLOAT), dates are INT days since 1992-01-01. Every
+table draws from its own random.Random seeded with the seed and the table name,
+so the same scale and seed always give the same rows.
+
+    python -m PQL.benchmarks.data --scale 0.01
+"""
+
+import argparse
+import random
+from typing import Any, Iterator
+
+from PQL.engine_v1.models.schema_models import Column, Database, Scehma, Table
+from PQL.engine_v2.dataframe.models import Column as FrameColumn
+from PQL.engine_v2.dataframe.models import Dataframe
+from PQL.engine_v2.dataframe.models import Schema as FrameSchema
+
+SCHEMAS: dict[str, tuple[tuple[str, str], ...]] = {
+    "region": (("r_regionkey", "INT"), ("r_name", "STR")),
+    "nation": (("n_nationkey", "INT"), ("n_name", "STR"), ("n_regionkey", "INT")),
+    "supplier": (
+        ("s_suppkey", "INT"),
+        ("s_name", "STR"),
+        ("s_nationkey", "INT"),
+        ("s_acctbal", "FLOAT"),
+    ),
+    "customer": (
+        ("c_custkey", "INT"),
+        ("c_name", "STR"),
+        ("c_nationkey", "INT"),
+        ("c_acctbal", "FLOAT"),
+        ("c_mktsegment", "STR"),
+    ),
+    "part": (
+        ("p_partkey", "INT"),
+        ("p_name", "STR"),
+        ("p_brand", "STR"),
+        ("p_size", "INT"),
+        ("p_retailprice", "FLOAT"),
+    ),
+    "orders": (
+        ("o_orderkey", "INT"),
+        ("o_custkey", "INT"),
+        ("o_orderstatus", "STR"),
+        ("o_totalprice", "FLOAT"),
+        ("o_orderdate", "INT"),
+        ("o_orderpriority", "STR"),
+    ),
+    "lineitem": (
+        ("l_orderkey", "INT"),
+        ("l_partkey", "INT"),
+        ("l_suppkey", "INT"),
+        ("l_linenumber", "INT"),
+        ("l_quantity", "INT"),
+        ("l_extendedprice", "FLOAT"),
+        ("l_discount", "FLOAT"),
+        ("l_tax", "FLOAT"),
+        ("l_returnflag", "STR"),
+        ("l_linestatus", "STR"),
+        ("l_shipdate", "INT"),
+        ("l_shipmode", "STR"),
+    ),
+}
+
+BASE_ROWS = {
+    "supplier": 10_000,
+    "customer": 150_000,
+    "part": 200_000,
+    "orders": 1_500_000,
+}
+"""Rows at scale 1, line items are 1 to 7 per order"""
+
+REGIONS = ("AFRICA", "AMERICA", "ASIA", "EUROPE", "MIDDLE EAST")
+NATIONS = (
+    ("ALGERIA", 0),
+    ("ARGENTINA", 1),
+    ("BRAZIL", 1),
+    ("CANADA", 1),
+    ("EGYPT", 4),
+    ("ETHIOPIA", 0),
+    ("FRANCE", 3),
+    ("GERMANY", 3),
+    ("INDIA", 2),
+    ("INDONESIA", 2),
+    ("IRAN", 4),
+    ("IRAQ", 4),
+    ("JAPAN", 2),
+    ("JORDAN", 4),
+    ("KENYA", 0),
+    ("MOROCCO", 0),
+    ("MOZAMBIQUE", 0),
+    ("PERU", 1),
+    ("CHINA", 2),
+    ("ROMANIA", 3),
+    ("SAUDI ARABIA", 4),
+    ("VIETNAM", 2),
+    ("RUSSIA", 3),
+    ("UNITED KINGDOM", 3),
+    ("UNITED STATES", 1),
+)
+SEGMENTS = ("AUTOMOBILE", "BUILDING", "FURNITURE", "HOUSEHOLD", "MACHINERY")
+PRIORITIES = ("1-URGENT", "2-HIGH", "3-MEDIUM", "4-NOT SPECIFIED", "5-LOW")
+SHIP_MODES = ("AIR", "FOB", "MAIL", "RAIL", "REG AIR", "SHIP", "TRUCK")
+COLORS = ("almond", "blue", "coral", "green", "ivory", "linen", "navy", "plum")
+
+ORDER_DAYS = 2405
+"""Order dates span 1992-01-01 to 1998-08-02"""
+CURRENT_DAY = 1263
+"""1995-06-17, line items shipped before it are returned or filled"""
+
+
+def row_counts(scale: float) -> dict[str, int]:
+    if scale <= 0:
+        raise ValueError("Scale factor must be positive")
+    counts = {"region": len(REGIONS), "nation": len(NATIONS)}
+    for name, rows in BASE_ROWS.items():
+        counts[name] = max(1, round(rows * scale))
+    return counts
+
+
+def _random(seed: int, name: str) -> random.Random:
+    return random.Random(f"{seed}:{name}")
+
+
+def _retail_price(partkey: int) -> float:
+    return (90_000 + (partkey // 10) % 20_001 + 100 * (partkey % 1_000)) / 100
+
+
+def _suppliers(count: int, seed: int) -> Iterator[tuple[Any, ...]]:
+    rng = _random(seed, "supplier")
+    for key in range(1, count + 1):
+        yield (
+            key,
+            f"Supplier#{key:09d}",
+            rng.randrange(len(NATIONS)),
+            round(rng.uniform(-999.99, 9999.99), 2),
+        )
+
+
+def _customers(count: int, seed: int) -> Iterator[tuple[Any, ...]]:
+    rng = _random(seed, "customer")
+    for key in range(1, count + 1):
+        yield (
+            key,
+            f"Customer#{key:09d}",
+            rng.randrange(len(NATIONS)),
+            round(rng.uniform(-999.99, 9999.99), 2),
+            rng.choice(SEGMENTS),
+        )
+
+
+def _parts(count: int, seed: int) -> Iterator[tuple[Any, ...]]:
+    rng = _random(seed, "part")
+    for key in range(1, count + 1):
+        yield (
+            key,
+            " ".join(rng.sample(COLORS, 3)),
+            f"Brand#{rng.randint(1, 5)}{rng.randint(1, 5)}",
+            rng.randint(1, 50),
+            _retail_price(key),
+        )
+
+
+def _orders_and_lineitems(
+    counts: dict[str, int], seed: int
+) -> tuple[list[tuple[Any, ...]], list[tuple[Any, ...]]]:
+    """Generated together, an order's status and total come from its line items"""
+    rng = _random(seed, "orders")
+    orders: list[tuple[Any, ...]] = []
+    lineitems: list[tuple[Any, ...]] = []
+    parts, suppliers = counts["part"], counts["supplier"]
+
+    for key in range(1, counts["orders"] + 1):
+        orderdate = rng.randrange(ORDER_DAYS - 151)
+        total = 0.0
+        statuses = set()
+        for number in range(1, rng.randint(1, 7) + 1):
+            partkey = rng.randint(1, parts)
+            quantity = rng.randint(1, 50)
+            price = round(quantity * _retail_price(partkey), 2)
+            discount = rng.randint(0, 10) / 100
+            tax = rng.randint(0, 8) / 100
+            shipdate = orderdate + rng.randint(1, 121)
+            if shipdate <= CURRENT_DAY:
+                returnflag, linestatus = rng.choice("RA"), "F"
+            else:
+                returnflag, linestatus = "N", "O"
+            statuses.add(linestatus)
+            total += price * (1 + tax) * (1 - discount)
+            lineitems.append(
+                (
+                    key,
+                    partkey,
+                    rng.randint(1, suppliers),
+                    number,
+                    quantity,
+                    price,
+                    discount,
+                    tax,
+                    returnflag,
+                    linestatus,
+                    shipdate,
+                    rng.choice(SHIP_MODES),
+                )
+            )
+        status = statuses.pop() if len(statuses) == 1 else "P"
+        orders.append(
+            (
+                key,
+                rng.randint(1, counts["customer"]),
+                status,
+                round(total, 2),
+                orderdate,
+                rng.choice(PRIORITIES),
+            )
+        )
+    return orders, lineitems
+
+
+def generate(scale: float = 0.01, seed: int = 0) -> dict[str, list[tuple[Any, ...]]]:
+    """Rows of every table, keyed by table name"""
+    counts = row_counts(scale)
+    orders, lineitems = _orders_and_lineitems(counts, seed)
+    return {
+        "region": list(enumerate(REGIONS)),
+        "nation": [
+            (key, name, region) for key, (name, region) in enumerate(NATIONS)
+        ],
+        "supplier": list(_suppliers(counts["supplier"], seed)),
+        "customer": list(_customers(counts["customer"], seed)),
+        "part": list(_parts(counts["part"], seed)),
+        "orders": orders,
+        "lineitem": lineitems,
+    }
+
+
+def tpch_database(
+    scale: float = 0.01, seed: int = 0, data: dict[str, list[tuple]] | None = None
+) -> Database:
+    """engine_v1 Database with every table, data defaults to generate(scale, seed)"""
+    data = generate(scale, seed) if data is None else data
+    database = Database("tpch")
+    for name, columns in SCHEMAS.items():
+        table = Table(name, Scehma(Column(column, kind) for column, kind in columns))
+        table.bulk_load(data[name])
+        database.add_table(table)
+    return database
+
+
+def tpch_dataframes(
+    scale: float = 0.01, seed: int = 0, data: dict[str, list[tuple]] | None = None
+) -> dict[str, Dataframe]:
+    """engine_v2 Dataframe of every table, data defaults to generate(scale, seed)"""
+    data = generate(scale, seed) if data is None else data
+    frames = {}
+    for name, columns in SCHEMAS.items():
+        fields = tuple(FrameColumn(name=column, type=kind) for column, kind in columns)
+        schema = FrameSchema(columns=fields)
+        frames[name] = Dataframe.from_rows(schema, data[name])
+    return frames
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arguments.add_argument("--scale", type=float, default=0.01)
+    arguments.add_argument("--seed", type=int, default=0)
+    options = arguments.parse_args()
+
+    for name, rows in generate(options.scale, options.seed).items():
+        print(f"{name:<10} {len(rows):>10,} rows")
+
+
+if __name__ == "__main__":
+    main()
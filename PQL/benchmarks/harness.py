@@ -0,0 +1,132 @@
+"""
+Timing, result files and regression checks shared by the benchmark suite
+
+A result file is JSON:
+
+    {
+        "meta": {"python": "3.11.7", "scale": 0.01, "seed": 0, ...},
+        "results": {"micro/tokenize": {"best": 0.0012, "median": ..., ...}, ...}
+    }
+
+Times are seconds per call. compare_results matches two files by benchmark name
+and flags every benchmark whose best time grew by more than the threshold, the
+best of several runs is the least noisy figure on a shared machine.
+"""
+
+import json
+import platform
+import statistics
+import timeit
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+"""Slowdown of the best time, as a fraction, above which compare flags a benchmark"""
+
+
+@dataclass
+class Benchmark:
+    name: str
+    function: Callable[[], object]
+    group: str
+    """micro or query, results are keyed group/name"""
+
+    @property
+    def key(self) -> str:
+        return f"{self.group}/{self.name}"
+
+
+@dataclass
+class Timing:
+    best: float
+    median: float
+    repeat: int
+    number: int
+    """Calls per timed run, picked so a run takes at least 0.2s"""
+
+
+def time_function(
+    function: Callable[[], object], repeat: int = DEFAULT_REPEAT
+) -> Timing:
+    """Per call times of function over repeat runs, see timeit.Timer.autorange"""
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    runs = [total / number for total in timer.repeat(repeat, number)]
+    return Timing(min(runs), statistics.median(runs), repeat, number)
+
+
+def run_benchmarks(
+    benchmarks: list[Benchmark],
+    repeat: int = DEFAULT_REPEAT,
+    report: Callable[[str, Timing], Any] | None = None,
+) -> dict[str, Timing]:
+    """Times every benchmark in order, report is called after each one"""
+    results: dict[str, Timing] = {}
+    for benchmark in benchmarks:
+        timing = time_function(benchmark.function, repeat)
+        results[benchmark.key] = timing
+        if report is not None:
+            report(benchmark.key, timing)
+    return results
+
+
+def save_results(
+    results: dict[str, Timing], path: str | Path, **meta: Any
+) -> dict[str, Any]:
+    document = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            **meta,
+        },
+        "results": {name: asdict(timing) for name, timing in results.items()},
+    }
+    Path(path).write_text(json.dumps(document, indent=2) + "\n")
+    return document
+
+
+def load_results(path: str | Path) -> dict[str, Any]:
+    document = json.loads(Path(path).read_text())
+    if not isinstance(document, dict) or "results" not in document:
+        raise ValueError(f"'{path}' is not a benchmark result file")
+    return document
+
+
+@dataclass
+class Change:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        """current / baseline, above 1 is slower"""
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def regressed(self, threshold: float = DEFAULT_THRESHOLD) -> bool:
+        return self.ratio > 1 + threshold
+
+
+def compare_results(
+    baseline: dict[str, Any], current: dict[str, Any]
+) -> list[Change]:
+    """Best times of the benchmarks both result documents have"""
+    before, after = baseline["results"], current["results"]
+    return [
+        Change(name, before[name]["best"], after[name]["best"])
+        for name in after
+        if name in before
+    ]
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
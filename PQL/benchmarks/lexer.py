@@ -0,0 +1,87 @@
+"""
+Lexer throughput on generated multi-megabyte queries
+
+    python -m PQL.benchmarks.lexer --size-mb 4 --repeat 3
+"""
+
+import argparse
+import random
+import time
+from collections import deque
+from typing import Callable
+
+from PQL.engine_v1.lexer import scan, tokenize
+from PQL.engine_v2.lexer import Lexer
+
+COLUMNS = ("id", "Name", "AGE", "salary", "dept_id", "created_at")
+OPERATORS = ("=", "<", ">", "<=", ">=", "<>")
+
+
+def generate_query(size: int, seed: int = 0) -> str:
+    """
+    Deterministic SELECT of roughly size characters, a long select list and a long
+    WHERE of mixed case keywords, identifiers, numbers and string literals
+    """
+    rng = random.Random(seed)
+    select: list[str] = []
+    where: list[str] = []
+    length = 0
+    while length < size:
+        column = rng.choice(COLUMNS)
+        select.append(f"t{rng.randrange(8)}.{column}")
+        if rng.random() < 0.5:
+            literal = str(rng.randrange(1_000_000))
+        else:
+            literal = f"'Value {rng.randrange(1_000)}'"
+        where.append(f"{column} {rng.choice(OPERATORS)} {literal}")
+        length += len(select[-1]) + len(where[-1]) + 7
+
+    keyword = rng.choice(("AND", "and", "Or"))
+    return (
+        f"SELECT {', '.join(select)} FROM accounts t0"
+        f" WHERE {f' {keyword} '.join(where)} LIMIT 10"
+    )
+
+
+def measure(function: Callable[[str], object], text: str, repeat: int) -> float:
+    """Best wall time of repeat runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(size_mb: float = 4.0, repeat: int = 3, seed: int = 0) -> dict[str, float]:
+    """Throughput of each lexer entry point in MB/s"""
+    text = generate_query(int(size_mb * 1_000_000), seed)
+    v2_lexer = Lexer()
+    # v2 only knows comparisons, not arithmetic, so both share this query shape
+    candidates: dict[str, Callable[[str], object]] = {
+        "engine_v1.scan": lambda query: deque(scan(query), maxlen=0),
+        "engine_v1.tokenize": tokenize,
+        "engine_v2.scan": lambda query: deque(v2_lexer.scan(query), maxlen=0),
+        "engine_v2.tokenize": v2_lexer.tokenize,
+    }
+    megabytes = len(text) / 1_000_000
+    return {
+        name: megabytes / measure(function, text, repeat)
+        for name, function in candidates.items()
+    }
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arguments.add_argument("--size-mb", type=float, default=4.0)
+    arguments.add_argument("--repeat", type=int, default=3)
+    arguments.add_argument("--seed", type=int, default=0)
+    options = arguments.parse_args()
+
+    results = run(options.size_mb, options.repeat, options.seed)
+    for name, throughput in results.items():
+        print(f"{name:<20} {throughput:8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
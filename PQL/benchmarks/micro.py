@@ -0,0 +1,58 @@
+"""
+Microbenchmarks of the hot entry points of both engines
+
+Each benchmark times one call on data prepared up front: tokenize and
+Parser.parse on a generated query, Table.filter and Table.project on the
+lineitem table, Dataframe.__getitem__ and Dataframe.filter on its Dataframe.
+"""
+
+from typing import Any
+
+from PQL.benchmarks.data import generate, tpch_database, tpch_dataframes
+from PQL.benchmarks.harness import Benchmark
+from PQL.benchmarks.lexer import generate_query
+from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.models.schema_models import Column, Condition, Literal
+from PQL.engine_v1.parser import Parser
+
+QUERY_SIZE = 20_000
+"""Characters of the query tokenize and Parser.parse run on"""
+
+
+def micro_benchmarks(
+    scale: float = 0.01,
+    seed: int = 0,
+    data: dict[str, list[tuple[Any, ...]]] | None = None,
+) -> list[Benchmark]:
+    data = generate(scale, seed) if data is None else data
+    lineitem = tpch_database(data=data).tables["lineitem"]
+    frame = tpch_dataframes(data=data)["lineitem"]
+
+    query = generate_query(QUERY_SIZE, seed)
+    tokens = tokenize(query)
+
+    # TPC-H Q6 like: about 2% of the line items pass
+    conditions = [
+        Condition(Column("l_quantity", "INT"), "<", Literal("quantity", 24)),
+        Condition(Column("l_discount", "FLOAT"), ">=", Literal("low", 0.05)),
+        Condition(Column("l_discount", "FLOAT"), "<=", Literal("high", 0.07)),
+    ]
+    projection = ["l_orderkey", "l_extendedprice", "l_discount"]
+    quantity, discount = frame["l_quantity"], frame["l_discount"]
+    mask = (quantity < 24) & (discount >= 0.05) & (discount <= 0.07)
+
+    return [
+        Benchmark("tokenize", lambda: tokenize(query), "micro"),
+        Benchmark("Parser.parse", lambda: Parser(tokens).parse(), "micro"),
+        Benchmark("Table.filter", lambda: lineitem.filter(conditions), "micro"),
+        Benchmark("Table.project", lambda: lineitem.project(projection), "micro"),
+        Benchmark("Dataframe.__getitem__", lambda: frame[projection], "micro"),
+        Benchmark("Dataframe.filter", lambda: frame.filter(mask), "micro"),
+        Benchmark(
+            "Dataframe.filter+mask",
+            lambda: frame.filter(
+                (quantity < 24) & (discount >= 0.05) & (discount <= 0.07)
+            ),
+            "micro",
+        ),
+    ]
@@ -0,0 +1,79 @@
+"""
+End-to-end query benchmarks on the TPC-H like database
+
+Queries are TPC-H queries cut down to the SQL engine_v1 supports, dates are the
+INT days of data.py. Each call runs through run_query, so the plan cache is warm
+after the first one and the timings cover execution.
+"""
+
+from typing import Any
+
+from PQL.benchmarks.data import generate, tpch_database
+from PQL.benchmarks.harness import Benchmark
+from PQL.engine_v1.engine import run_query
+
+QUERIES = {
+    "q1_pricing_summary": (
+        "SELECT l_returnflag, l_linestatus, SUM(l_quantity) AS sum_qty,"
+        " SUM(l_extendedprice) AS sum_base_price,"
+        " SUM(l_extendedprice * (1 - l_discount)) AS sum_disc_price,"
+        " AVG(l_quantity) AS avg_qty, AVG(l_discount) AS avg_disc,"
+        " COUNT(*) AS count_order"
+        " FROM lineitem WHERE l_shipdate <= 2300"
+        " GROUP BY l_returnflag, l_linestatus ORDER BY l_returnflag, l_linestatus"
+    ),
+    "q3_shipping_priority": (
+        "SELECT o.o_orderkey, SUM(l.l_extendedprice * (1 - l.l_discount)) AS revenue,"
+        " o.o_orderdate"
+        " FROM customer c JOIN orders o ON c.c_custkey = o.o_custkey"
+        " JOIN lineitem l ON l.l_orderkey = o.o_orderkey"
+        " WHERE c.c_mktsegment = 'BUILDING' AND o.o_orderdate < 1170"
+        " AND l.l_shipdate > 1170"
+        " GROUP BY o.o_orderkey, o.o_orderdate"
+        " ORDER BY revenue DESC, o.o_orderdate LIMIT 10"
+    ),
+    "q5_local_supplier_volume": (
+        "SELECT n.n_name, SUM(l.l_extendedprice * (1 - l.l_discount)) AS revenue"
+        " FROM customer c JOIN orders o ON c.c_custkey = o.o_custkey"
+        " JOIN lineitem l ON l.l_orderkey = o.o_orderkey"
+        " JOIN supplier s ON l.l_suppkey = s.s_suppkey"
+        " AND c.c_nationkey = s.s_nationkey"
+        " JOIN nation n ON s.s_nationkey = n.n_nationkey"
+        " JOIN region r ON n.n_regionkey = r.r_regionkey"
+        " WHERE r.r_name = 'ASIA' AND o.o_orderdate >= 731 AND o.o_orderdate < 1096"
+        " GROUP BY n.n_name ORDER BY revenue DESC"
+    ),
+    "q6_forecast_revenue": (
+        "SELECT SUM(l_extendedprice * l_discount) AS revenue FROM lineitem"
+        " WHERE l_shipdate >= 731 AND l_shipdate < 1096"
+        " AND l_discount >= 0.05 AND l_discount <= 0.07 AND l_quantity < 24"
+    ),
+    "q10_returned_items": (
+        "SELECT c.c_custkey, c.c_name,"
+        " SUM(l.l_extendedprice * (1 - l.l_discount)) AS revenue, n.n_name"
+        " FROM customer c JOIN orders o ON c.c_custkey = o.o_custkey"
+        " JOIN lineitem l ON l.l_orderkey = o.o_orderkey"
+        " JOIN nation n ON c.c_nationkey = n.n_nationkey"
+        " WHERE o.o_orderdate >= 639 AND o.o_orderdate < 731"
+        " AND l.l_returnflag = 'R'"
+        " GROUP BY c.c_custkey, c.c_name, n.n_name ORDER BY revenue DESC LIMIT 20"
+    ),
+    "large_orders_top_100": (
+        "SELECT o_orderkey, o_totalprice FROM orders WHERE o_totalprice > 400000"
+        " ORDER BY o_totalprice DESC LIMIT 100"
+    ),
+    "point_lookup": "SELECT * FROM orders WHERE o_orderkey = 4242",
+}
+
+
+def query_benchmarks(
+    scale: float = 0.01,
+    seed: int = 0,
+    data: dict[str, list[tuple[Any, ...]]] | None = None,
+) -> list[Benchmark]:
+    data = generate(scale, seed) if data is None else data
+    database = tpch_database(data=data)
+    return [
+        Benchmark(name, lambda sql=sql: run_query(sql, database), "query")
+        for name, sql in QUERIES.items()
+    ]
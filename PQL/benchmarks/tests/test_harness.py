@@ -0,0 +1,60 @@
+import pytest
+
+from PQL.benchmarks.data import generate, row_counts
+from PQL.benchmarks.harness import (
+    Change,
+    Timing,
+    compare_results,
+    load_results,
+    save_results,
+)
+
+
+def document(**best: float) -> dict:
+    return {"results": {name: {"best": time} for name, time in best.items()}}
+
+
+def test_compare_flags_slowdowns_above_the_threshold():
+    baseline = document(scan=1.0, sort=1.0, join=2.0, dropped=1.0)
+    current = document(scan=1.05, sort=1.2, join=1.0, added=1.0)
+
+    changes = {change.name: change for change in compare_results(baseline, current)}
+
+    assert set(changes) == {"scan", "sort", "join"}
+    assert [name for name, change in changes.items() if change.regressed()] == [
+        "sort"
+    ]
+    assert changes["scan"].regressed(threshold=0.01)
+    assert not changes["sort"].regressed(threshold=0.5)
+    assert changes["join"].ratio == 0.5
+    assert Change("new", 0.0, 1.0).regressed()
+
+
+def test_results_round_trip_through_files(tmp_path):
+    path = tmp_path / "results.json"
+    save_results({"micro/tokenize": Timing(0.5, 0.6, 5, 10)}, path, scale=0.01)
+
+    loaded = load_results(path)
+
+    assert loaded["meta"]["scale"] == 0.01
+    assert loaded["results"]["micro/tokenize"]["best"] == 0.5
+    (change,) = compare_results(loaded, loaded)
+    assert change.ratio == 1 and not change.regressed()
+
+
+def test_load_results_rejects_other_files(tmp_path):
+    path = tmp_path / "other.json"
+    path.write_text('{"timings": {}}')
+
+    with pytest.raises(ValueError):
+        load_results(path)
+
+
+def test_generate_is_deterministic_per_seed():
+    data = generate(scale=0.001, seed=7)
+
+    assert data == generate(scale=0.001, seed=7)
+    assert data != generate(scale=0.001, seed=8)
+    counts = row_counts(0.001)
+    for name in ("region", "nation", "supplier", "customer", "part", "orders"):
+        assert len(data[name]) == counts[name]
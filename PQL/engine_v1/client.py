@@ -0,0 +1,284 @@
+"""
+Client library of the query server (server.py)
+
+    async with ConnectionPool(port=7878) as pool:
+        users = await pool.query("SELECT name FROM users WHERE age > 30")
+
+        stream = await pool.stream("SELECT * FROM events")
+        async for rows in stream:
+            ...
+
+Requests issued concurrently on one Connection are pipelined: they are all sent
+right away and their responses are matched back by request id. A ConnectionPool
+spreads requests over up to size connections.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from PQL.engine_v1.models.schema_models import Column, Row, Scehma, Table
+from PQL.engine_v1.protocol import (
+    CANCEL,
+    COLUMNS,
+    DEFAULT_PORT,
+    DONE,
+    ERROR,
+    PING,
+    QUERY,
+    ROWS,
+    ProtocolError,
+    encode_message,
+    read_message,
+)
+
+DEFAULT_POOL_SIZE = 4
+
+RESPONSE_BUFFER = 8
+"""
+Frames buffered per response, a stream that isn't consumed stops the connection
+from reading further so the server stops sending
+"""
+
+
+class QueryError(Exception):
+    """The server failed to run a request"""
+
+    def __init__(self, kind: str, message: str) -> None:
+        super().__init__(f"{kind}: {message}")
+        self.kind = kind
+        """Name of the exception raised on the server"""
+        self.message = message
+
+
+class ResultStream:
+    """Response to a query, iterates the result rows chunk by chunk"""
+
+    def __init__(
+        self,
+        connection: "Connection",
+        request_id: int,
+        responses: "asyncio.Queue[tuple[int, Any]]",
+    ) -> None:
+        self.connection = connection
+        self.request_id = request_id
+        self.name = ""
+        self.columns: list[Column] = []
+        self.rows = 0
+        """Rows received so far"""
+        self.finished = False
+        self._responses = responses
+
+    async def _next_message(self) -> tuple[int, Any]:
+        kind, payload = await self._responses.get()
+        if kind in (DONE, ERROR):
+            self.finished = True
+        if kind == ERROR:
+            raise QueryError(payload["type"], payload["message"])
+        return kind, payload
+
+    async def open(self) -> "ResultStream":
+        """Waits for the result's columns"""
+        kind, payload = await self._next_message()
+        if kind != COLUMNS:
+            raise ProtocolError("Expected the result columns")
+        self.name = payload["name"]
+        self.columns = [Column(name, col_type) for name, col_type in payload["columns"]]
+        return self
+
+    def __aiter__(self) -> AsyncIterator[list[tuple[Any, ...]]]:
+        return self
+
+    async def __anext__(self) -> list[tuple[Any, ...]]:
+        if self.finished:
+            raise StopAsyncIteration
+        kind, payload = await self._next_message()
+        if kind == DONE:
+            raise StopAsyncIteration
+        if kind != ROWS:
+            raise ProtocolError("Expected a chunk of rows")
+        self.rows += len(payload)
+        return [tuple(values) for values in payload]
+
+    async def table(self) -> Table:
+        """Collects the remaining rows into a Table"""
+        rows = [Row(values) async for chunk in self for values in chunk]
+        table = Table(self.name, Scehma(self.columns))
+        table.rows = rows
+        return table
+
+    async def close(self) -> None:
+        """Stops the server from sending the rest of the result"""
+        if self.finished:
+            return
+        self.connection._cancel(self.request_id)
+        try:
+            while not self.finished:
+                await self._next_message()
+        except QueryError:
+            pass
+
+    async def __aenter__(self) -> "ResultStream":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+
+class Connection:
+    """One connection to a server, concurrent requests on it are pipelined"""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 1
+        self._responses: dict[int, asyncio.Queue[tuple[int, Any]]] = {}
+        self._error: BaseException | None = None
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def open(
+        cls,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        path: str | Path | None = None,
+    ) -> "Connection":
+        """Connects to host:port, or to the Unix socket path when given"""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(str(path))
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    @property
+    def pending(self) -> int:
+        """Requests sent whose response isn't complete yet"""
+        return len(self._responses)
+
+    @property
+    def closed(self) -> bool:
+        return self._receiver.done()
+
+    def _send(
+        self, kind: int, payload: Any
+    ) -> tuple[int, "asyncio.Queue[tuple[int, Any]]"]:
+        """Sends a request, returns its id and the queue its response arrives in"""
+        if self.closed:
+            raise ConnectionError("Connection is closed") from self._error
+        request_id = self._next_id
+        self._next_id += 1
+        responses = self._responses[request_id] = asyncio.Queue(RESPONSE_BUFFER)
+        self._writer.write(encode_message(request_id, kind, payload))
+        return request_id, responses
+
+    def _cancel(self, request_id: int) -> None:
+        if not self.closed:
+            self._writer.write(encode_message(request_id, CANCEL, None))
+
+    async def _receive(self) -> None:
+        try:
+            while (message := await read_message(self._reader)) is not None:
+                request_id, kind, payload = message
+                responses = self._responses.get(request_id)
+                if responses is None:
+                    raise ProtocolError(f"Response to unknown request {request_id}")
+                if kind in (DONE, ERROR):
+                    del self._responses[request_id]
+                await responses.put((kind, payload))
+            self._error = ConnectionError("Server closed the connection")
+        except (ConnectionError, ProtocolError) as error:
+            self._error = error
+        finally:
+            # Wake every waiter, their responses will never complete
+            failure = {"type": "ConnectionError", "message": str(self._error)}
+            for responses in self._responses.values():
+                while responses.full():
+                    responses.get_nowait()
+                responses.put_nowait((ERROR, failure))
+            self._responses.clear()
+            self._writer.close()
+
+    async def stream(self, sql: str) -> ResultStream:
+        """Runs sql, the result is read as it arrives"""
+        request_id, responses = self._send(QUERY, sql)
+        await self._writer.drain()
+        return await ResultStream(self, request_id, responses).open()
+
+    async def query(self, sql: str) -> Table:
+        """Runs sql and collects the whole result"""
+        return await (await self.stream(sql)).table()
+
+    async def ping(self) -> None:
+        _, responses = self._send(PING, None)
+        await self._writer.drain()
+        kind, payload = await responses.get()
+        if kind == ERROR:
+            raise QueryError(payload["type"], payload["message"])
+
+    async def close(self) -> None:
+        if not self.closed:
+            self._writer.close()
+            await asyncio.gather(self._receiver, return_exceptions=True)
+
+
+class ConnectionPool:
+    """
+    Up to size connections to one server
+
+    Every request goes to the open connection with the fewest requests in
+    flight, another connection is only opened while all of them are busy.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        path: str | Path | None = None,
+        size: int = DEFAULT_POOL_SIZE,
+    ) -> None:
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.host = host
+        self.port = port
+        self.path = path
+        self.size = size
+        self.connections: list[Connection] = []
+        self._lock = asyncio.Lock()
+
+    async def connection(self) -> Connection:
+        async with self._lock:
+            self.connections = [
+                connection for connection in self.connections if not connection.closed
+            ]
+            least_busy = min(
+                self.connections,
+                key=lambda connection: connection.pending,
+                default=None,
+            )
+            if least_busy is None or (
+                least_busy.pending and len(self.connections) < self.size
+            ):
+                least_busy = await Connection.open(self.host, self.port, self.path)
+                self.connections.append(least_busy)
+            return least_busy
+
+    async def query(self, sql: str) -> Table:
+        return await (await self.connection()).query(sql)
+
+    async def stream(self, sql: str) -> ResultStream:
+        return await (await self.connection()).stream(sql)
+
+    async def ping(self) -> None:
+        await (await self.connection()).ping()
+
+    async def close(self) -> None:
+        connections, self.connections = self.connections, []
+        await asyncio.gather(*(connection.close() for connection in connections))
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
@@ -0,0 +1,208 @@
+from operator import itemgetter, neg
+from typing import Any, Callable
+
+from PQL.engine_v1.models.parser_models import (
+    BinaryExpr,
+    Expr,
+    FunctionCall,
+    ParamExpr,
+    UnaryExpr,
+)
+from PQL.engine_v1.models.schema_models import BINARY_OPERATIONS
+from PQL.engine_v1.semantic_resolver import (
+    ConstExpr,
+    SlotExpr,
+    has_parameters,
+    parameter_value,
+    resolve_parameters,
+)
+
+Compiled = Callable[[tuple[Any, ...]], Any]
+"""An expression compiled against a row layout, called with a row's values"""
+
+CompiledRow = Callable[[tuple[Any, ...]], tuple[Any, ...]]
+
+
+def compile_expr(bound: Expr) -> Compiled:
+    """
+    Compiles an expression bound by Scope.bind into a closure over row values
+
+    Operator lookup and slot resolution happen once here instead of once per row,
+    the closure follows the same NULL rules as engine.evaluate
+    """
+    if isinstance(bound, SlotExpr):
+        return itemgetter(bound.index)
+    if isinstance(bound, ConstExpr):
+        value = bound.value
+        return lambda values: value
+    if isinstance(bound, ParamExpr):
+        # Read at evaluation time, operators use prepare_expr to read it once
+        index = bound.index
+        return lambda values: parameter_value(index)
+
+    if isinstance(bound, BinaryExpr):
+        if bound.op == "AND":
+            return _compile_and(compile_expr(bound.left), compile_expr(bound.right))
+        if bound.op == "OR":
+            return _compile_or(compile_expr(bound.left), compile_expr(bound.right))
+        return _compile_binary(bound)
+
+    if isinstance(bound, UnaryExpr):
+        operand = compile_expr(bound.operand)
+        # The only operators a NULL operand doesn't make NULL
+        if bound.op == "IS NULL":
+            return lambda values: operand(values) is None
+        if bound.op == "IS NOT NULL":
+            return lambda values: operand(values) is not None
+        if bound.op == "-":
+            function: Callable[[Any], Any] = neg
+        elif bound.op == "NOT":
+            function = _not
+        else:
+            raise ValueError(f"Unsupported operation: {bound.op}")
+
+        def unary(values: tuple[Any, ...]) -> Any:
+            value = operand(values)
+            return None if value is None else function(value)
+
+        return unary
+
+    if isinstance(bound, FunctionCall) and bound.name == "COALESCE":
+        return _compile_coalesce([compile_expr(arg) for arg in bound.args])
+
+    raise TypeError(f"Expression is not bound: {bound!r}")
+
+
+def compile_row(bound: list[Expr]) -> CompiledRow:
+    """Compiles a list of bound expressions into one closure building a tuple"""
+    if all(isinstance(expr, SlotExpr) for expr in bound):
+        indices = [expr.index for expr in bound]  # type: ignore
+        if len(indices) > 1:
+            return itemgetter(*indices)
+        if len(indices) == 1:
+            index = indices[0]
+            return lambda values: (values[index],)
+        return lambda values: ()
+
+    functions = [compile_expr(expr) for expr in bound]
+    return lambda values: tuple([function(values) for function in functions])
+
+
+def prepare_expr(bound: Expr) -> Callable[[], Compiled]:
+    """
+    compile_expr for operators built before their parameter values are known,
+    call the result once per execution
+
+    Parameters are bound to constants when it's called, so a cached plan gets
+    the same slot / constant specializations as a plan of literals
+    """
+    if not has_parameters(bound):
+        compiled = compile_expr(bound)
+        return lambda: compiled
+    return lambda: compile_expr(resolve_parameters(bound))
+
+
+def prepare_row(bound: list[Expr]) -> Callable[[], CompiledRow]:
+    """compile_row counterpart of prepare_expr"""
+    if not any(has_parameters(expr) for expr in bound):
+        compiled = compile_row(bound)
+        return lambda: compiled
+    return lambda: compile_row([resolve_parameters(expr) for expr in bound])
+
+
+def _compile_coalesce(arguments: list[Compiled]) -> Compiled:
+    def coalesce(values: tuple[Any, ...]) -> Any:
+        for argument in arguments:
+            value = argument(values)
+            if value is not None:
+                return value
+        return None
+
+    return coalesce
+
+
+def _not(value: Any) -> bool:
+    return not value
+
+
+def _compile_binary(bound: BinaryExpr) -> Compiled:
+    function = BINARY_OPERATIONS.get(bound.op)
+    if function is None:
+        raise ValueError(f"Unsupported operation: {bound.op}")
+
+    left, right = bound.left, bound.right
+
+    # Column against constant is by far the most common predicate shape, skip
+    # the extra call for the constant side
+    if isinstance(left, SlotExpr) and isinstance(right, ConstExpr):
+        index, constant = left.index, right.value
+        if constant is None:
+            return lambda values: None
+
+        def slot_const(values: tuple[Any, ...]) -> Any:
+            value = values[index]
+            return None if value is None else function(value, constant)
+
+        return slot_const
+
+    if isinstance(left, ConstExpr) and isinstance(right, SlotExpr):
+        constant, index = left.value, right.index
+        if constant is None:
+            return lambda values: None
+
+        def const_slot(values: tuple[Any, ...]) -> Any:
+            value = values[index]
+            return None if value is None else function(constant, value)
+
+        return const_slot
+
+    if isinstance(left, SlotExpr) and isinstance(right, SlotExpr):
+        left_index, right_index = left.index, right.index
+
+        def slot_slot(values: tuple[Any, ...]) -> Any:
+            left_value = values[left_index]
+            right_value = values[right_index]
+            if left_value is None or right_value is None:
+                return None
+            return function(left_value, right_value)
+
+        return slot_slot
+
+    left_fn, right_fn = compile_expr(left), compile_expr(right)
+
+    def binary(values: tuple[Any, ...]) -> Any:
+        left_value = left_fn(values)
+        if left_value is None:
+            return None
+        right_value = right_fn(values)
+        if right_value is None:
+            return None
+        return function(left_value, right_value)
+
+    return binary
+
+
+def _compile_and(left: Compiled, right: Compiled) -> Compiled:
+    def conjunction(values: tuple[Any, ...]) -> Any:
+        left_value = left(values)
+        if left_value is not None and not left_value:
+            return False
+        right_value = right(values)
+        if right_value is not None and not right_value:
+            return False
+        return None if left_value is None or right_value is None else True
+
+    return conjunction
+
+
+def _compile_or(left: Compiled, right: Compiled) -> Compiled:
+    def disjunction(values: tuple[Any, ...]) -> Any:
+        left_value = left(values)
+        if left_value is not None and left_value:
+            return True
+        right_value = right(values)
+        if right_value is not None and right_value:
+            return True
+        return None if left_value is None or right_value is None else False
+
+    return disjunction
@@ -1 +1,708 @@
 # Functions to query data
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Any, Iterator
+
+from PQL.engine_v1.compiler import compile_expr, prepare_expr, prepare_row
+from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.models.parser_models import (
+    BinaryExpr,
+    ColumnExpr,
+    ExplainQuery,
+    Expr,
+    FunctionCall,
+    OrderByItem,
+    Query,
+    SelectItem,
+    SelectQuery,
+    StarExpr,
+    TableRef,
+)
+from PQL.engine_v1.models.index_models import Index, KeyRange
+from PQL.engine_v1.models.schema_models import (
+    Column,
+    Database,
+    Row,
+    Scehma,
+    Table,
+)
+from PQL.engine_v1.operators.aggregate import hash_aggregate
+from PQL.engine_v1.operators.join import JoinSide, hash_join
+from PQL.engine_v1.operators.sort import (
+    DEFAULT_MAX_ROWS_IN_MEMORY,
+    external_sort,
+    top_n,
+)
+from PQL.engine_v1.parser import Parser
+from PQL.engine_v1.semantic_resolver import (
+    OutputColumn,
+    Scope,
+    SlotExpr,
+    format_expr,
+    split_conjuncts,
+)
+
+
+def evaluate(bound: Expr, values: tuple[Any, ...]) -> Any:
+    """
+    Evaluates an expression bound by Scope.bind against one row's values
+
+    NULL (None) operands make comparisons and arithmetic NULL, AND / OR follow SQL
+    three valued logic. Operators compile their expressions once with
+    compiler.compile_expr instead of calling this per row.
+    """
+    return compile_expr(bound)(values)
+
+
+class Operator(ABC):
+    """
+    Base class for physical operators
+
+    Operators form a tree, rows() lazily pulls rows from the children through
+    generators so rows flow through the whole pipeline one at a time and nothing
+    is materialized unless the operator needs it (sort, aggregate, join build)
+    """
+
+    scope: Scope
+
+    estimated_rows: float | None = None
+    """Cardinality estimate, filled in by the planner"""
+    estimated_cost: float | None = None
+    """Cumulative cost estimate of this subtree, filled in by the planner"""
+
+    @abstractmethod
+    def rows(self) -> Iterator[Row]:
+        """Pulls the operator's output rows, each call runs it again"""
+
+    def __iter__(self) -> Iterator[Row]:
+        return self.rows()
+
+    def children(self) -> list["Operator"]:
+        return []
+
+    def describe(self) -> str:
+        """One line summary used in plan dumps"""
+        return type(self).__name__
+
+    def size_hint(self) -> int | None:
+        """Upper bound of the rows this operator produces, None when unknown"""
+        return None
+
+
+class TableScan(Operator):
+    """
+    Reads the rows of a table
+
+    comparisons are `column op value` predicates of the filters above the scan,
+    given by column position. Chunks whose zone map rules them out are skipped
+    (see Table.scan), the filters still check every row that is read.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        alias: str | None = None,
+        comparisons: list[tuple[int, str, Expr]] | None = None,
+    ) -> None:
+        self.table = table
+        self.alias = alias or table.name
+        self.scope = Scope(
+            [OutputColumn(self.alias, col.name, col.col_type) for col in table.columns]
+        )
+        self.comparisons = comparisons or []
+        self._values = [
+            (position, op, compile_expr(value))
+            for position, op, value in self.comparisons
+        ]
+
+    def key_ranges(self) -> dict[int, KeyRange] | None:
+        """Keys of each compared column, None when no row can match"""
+        ranges: dict[int, KeyRange] = {}
+        for position, op, value in self._values:
+            comparison = KeyRange.from_comparison(op, value(()))
+            if comparison is None:
+                return None
+            if position in ranges:
+                comparison = ranges[position].intersect(comparison)
+            ranges[position] = comparison
+        return ranges
+
+    def rows(self) -> Iterator[Row]:
+        if not self._values:
+            return self.table.scan()
+        ranges = self.key_ranges()
+        if ranges is None:
+            return iter(())
+        return self.table.scan(ranges)
+
+    def describe(self) -> str:
+        description = f"TableScan {self.table.name}"
+        if self.alias != self.table.name:
+            description += f" AS {self.alias}"
+        if self.comparisons:
+            columns = self.scope.columns
+            comparisons = " AND ".join(
+                f"{columns[position].name} {op} {format_expr(value)}"
+                for position, op, value in self.comparisons
+            )
+            description += f" zones ({comparisons})"
+        return description
+
+    def size_hint(self) -> int | None:
+        return self.table.count_rows()
+
+
+class IndexScan(Operator):
+    """
+    Reads the rows of a table through an index
+
+    comparisons are the `column op value` predicates the index answers, values are
+    bound constants or parameters, so the key range is only built when rows() runs
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        index: Index,
+        comparisons: list[tuple[str, Expr]],
+        alias: str | None = None,
+    ) -> None:
+        self.table = table
+        self.index = index
+        self.comparisons = comparisons
+        self.alias = alias or table.name
+        self.scope = Scope(
+            [OutputColumn(self.alias, col.name, col.col_type) for col in table.columns]
+        )
+        self._values = [(op, compile_expr(value)) for op, value in comparisons]
+
+    def key_range(self) -> KeyRange | None:
+        """Keys matching every comparison, None when no row can match"""
+        key_range = KeyRange()
+        for op, value in self._values:
+            comparison = KeyRange.from_comparison(op, value(()))
+            if comparison is None:
+                return None
+            try:
+                key_range = key_range.intersect(comparison)
+            except TypeError:
+                return None
+        return key_range
+
+    def rows(self) -> Iterator[Row]:
+        key_range = self.key_range()
+        if key_range is None:
+            return iter(())
+        if not self.index.supports_ranges and not key_range.is_point:
+            # Hash indexes are only chosen for equality, so this range is empty
+            return iter(())
+        try:
+            return iter(self.table.index_lookup(self.index, key_range))
+        except TypeError:
+            # A key of another type than the column's, which equals none of its
+            # values, as the filter would find without the index
+            return iter(())
+
+    def describe(self) -> str:
+        name = self.table.name
+        if self.alias != self.table.name:
+            name += f" AS {self.alias}"
+        comparisons = " AND ".join(
+            f"{self.index.column} {op} {format_expr(value)}"
+            for op, value in self.comparisons
+        )
+        return f"IndexScan {name} USING {self.index.name} ({comparisons})"
+
+
+class SubqueryScan(Operator):
+    """Exposes a subquery's output under the subquery alias"""
+
+    def __init__(self, child: Operator, alias: str) -> None:
+        self.child = child
+        self.alias = alias
+        self.scope = Scope(
+            [
+                OutputColumn(alias, column.name, column.col_type)
+                for column in child.scope.columns
+            ]
+        )
+
+    def rows(self) -> Iterator[Row]:
+        return self.child.rows()
+
+    def children(self) -> list[Operator]:
+        return [self.child]
+
+    def describe(self) -> str:
+        return f"SubqueryScan {self.alias}"
+
+    def size_hint(self) -> int | None:
+        return self.child.size_hint()
+
+
+class Filter(Operator):
+    def __init__(self, child: Operator, predicate: Expr) -> None:
+        self.child = child
+        self.predicate = predicate
+        self.scope = child.scope
+        self._predicate = prepare_expr(child.scope.bind(predicate))
+
+    def rows(self) -> Iterator[Row]:
+        predicate = self._predicate()
+        for row in self.child.rows():
+            if predicate(row.row):
+                yield row
+
+    def children(self) -> list[Operator]:
+        return [self.child]
+
+    def describe(self) -> str:
+        return f"Filter {format_expr(self.predicate)}"
+
+    def size_hint(self) -> int | None:
+        return self.child.size_hint()
+
+
+class Project(Operator):
+    def __init__(self, child: Operator, items: list[SelectItem]) -> None:
+        self.child = child
+        self.items = items
+
+        bound: list[Expr] = []
+        columns: list[OutputColumn] = []
+        for item in items:
+            if isinstance(item.expr, StarExpr):
+                for index in child.scope.expand_star(item.expr):
+                    bound.append(SlotExpr(index))
+                    columns.append(child.scope.columns[index])
+                continue
+
+            expr = child.scope.bind(item.expr)
+            bound.append(expr)
+
+            if item.alias:
+                columns.append(
+                    OutputColumn(None, item.alias, child.scope.infer_type(expr))
+                )
+            elif isinstance(expr, SlotExpr):
+                columns.append(child.scope.columns[expr.index])
+            else:
+                columns.append(
+                    OutputColumn(
+                        None, format_expr(item.expr), child.scope.infer_type(expr)
+                    )
+                )
+
+        self.bound = bound
+        self._project = prepare_row(bound)
+        self.scope = Scope(columns)
+
+    def rows(self) -> Iterator[Row]:
+        project = self._project()
+        for row in self.child.rows():
+            yield Row(project(row.row))
+
+    def children(self) -> list[Operator]:
+        return [self.child]
+
+    def describe(self) -> str:
+        items = [
+            format_expr(item.expr) + (f" AS {item.alias}" if item.alias else "")
+            for item in self.items
+        ]
+        return f"Project {', '.join(items)}"
+
+    def size_hint(self) -> int | None:
+        return self.child.size_hint()
+
+
+class Limit(Operator):
+    def __init__(self, child: Operator, count: int) -> None:
+        if count < 0:
+            raise ValueError("LIMIT must not be negative")
+        self.child = child
+        self.count = count
+        self.scope = child.scope
+
+    def rows(self) -> Iterator[Row]:
+        # islice stops pulling from the child as soon as count rows were produced
+        return islice(self.child.rows(), self.count)
+
+    def children(self) -> list[Operator]:
+        return [self.child]
+
+    def describe(self) -> str:
+        return f"Limit {self.count}"
+
+    def size_hint(self) -> int | None:
+        hint = self.child.size_hint()
+        return self.count if hint is None else min(hint, self.count)
+
+
+def _column_name(column: OutputColumn) -> str:
+    return f"{column.table}.{column.name}" if column.table else column.name
+
+
+class HashJoin(Operator):
+    def __init__(
+        self,
+        left: Operator,
+        right: Operator,
+        join_type: str,
+        left_keys: list[int],
+        right_keys: list[int],
+        build_side: JoinSide | None = None,
+    ) -> None:
+        self.left = left
+        self.right = right
+        self.join_type = join_type
+        self.left_keys = left_keys
+        self.right_keys = right_keys
+        self.scope = left.scope + right.scope
+
+        if build_side is None:
+            left_size, right_size = left.size_hint(), right.size_hint()
+            # Without estimates build on the right, usually the joined in dimension
+            if left_size is not None and (right_size is None or left_size < right_size):
+                build_side = "LEFT"
+            else:
+                build_side = "RIGHT"
+        self.build_side: JoinSide = build_side
+
+    def rows(self) -> Iterator[Row]:
+        return hash_join(
+            self.left.rows(),
+            self.right.rows(),
+            self.left_keys,
+            self.right_keys,
+            self.join_type,  # type: ignore
+            left_width=len(self.left.scope.columns),
+            right_width=len(self.right.scope.columns),
+            build_side=self.build_side,
+        )
+
+    def children(self) -> list[Operator]:
+        return [self.left, self.right]
+
+    def describe(self) -> str:
+        left, right = self.left.scope.columns, self.right.scope.columns
+        keys = ", ".join(
+            f"{_column_name(left[left_key])} = {_column_name(right[right_key])}"
+            for left_key, right_key in zip(self.left_keys, self.right_keys)
+        )
+        return f"HashJoin {self.join_type} build={self.build_side} on {keys}"
+
+
+class NestedLoopJoin(Operator):
+    """Join for conditions without equi-join keys, the right input is materialized"""
+
+    def __init__(
+        self, left: Operator, right: Operator, join_type: str, condition: Expr
+    ) -> None:
+        self.left = left
+        self.right = right
+        self.join_type = join_type
+        self.condition = condition
+        self.scope = left.scope + right.scope
+        self._condition = prepare_expr(self.scope.bind(condition))
+
+    def rows(self) -> Iterator[Row]:
+        condition = self._condition()
+        keep_left = self.join_type in ("LEFT", "FULL")
+        keep_right = self.join_type in ("RIGHT", "FULL")
+        left_padding = (None,) * len(self.left.scope.columns)
+        right_padding = (None,) * len(self.right.scope.columns)
+
+        inner = [row.row for row in self.right.rows()]
+        matched = bytearray(len(inner))
+
+        for row in self.left.rows():
+            found = False
+            for position, right_values in enumerate(inner):
+                values = row.row + right_values
+                if condition(values):
+                    found = True
+                    matched[position] = 1
+                    yield Row(values)
+            if keep_left and not found:
+                yield Row(row.row + right_padding)
+
+        if keep_right:
+            for position, right_values in enumerate(inner):
+                if not matched[position]:
+                    yield Row(left_padding + right_values)
+
+    def children(self) -> list[Operator]:
+        return [self.left, self.right]
+
+    def describe(self) -> str:
+        return f"NestedLoopJoin {self.join_type} on {format_expr(self.condition)}"
+
+
+AGGREGATE_TYPES = {"COUNT": "INT", "AVG": "FLOAT"}
+
+
+class HashAggregate(Operator):
+    """
+    GROUP BY operator, output rows are the group keys followed by the aggregates
+
+    Expressions equal to a group key or aggregate bind to its output column, which
+    is how HAVING, ORDER BY and the select list refer to them
+    """
+
+    def __init__(
+        self, child: Operator, group_by: list[Expr], aggregates: list[FunctionCall]
+    ) -> None:
+        self.child = child
+        self.group_by = group_by
+        self.aggregates = aggregates
+
+        # Group keys then aggregate arguments, bound to the child's rows
+        self.inputs = [child.scope.bind(expr) for expr in group_by]
+        columns: list[OutputColumn] = []
+        for expr, bound in zip(group_by, self.inputs):
+            if isinstance(bound, SlotExpr):
+                columns.append(child.scope.columns[bound.index])
+            else:
+                columns.append(
+                    OutputColumn(None, format_expr(expr), child.scope.infer_type(bound))
+                )
+
+        self.specs: list[tuple[Any, int | None]] = []
+        for aggregate in aggregates:
+            function = aggregate.name.upper()
+            if len(aggregate.args) != 1:
+                raise ValueError(f"{function} takes exactly one argument")
+
+            arg = aggregate.args[0]
+            if isinstance(arg, StarExpr):
+                if function != "COUNT":
+                    raise ValueError(f"{function}(*) is not supported")
+                self.specs.append((function, None))
+                col_type = "INT"
+            else:
+                bound = child.scope.bind(arg)
+                self.specs.append((function, len(self.inputs)))
+                self.inputs.append(bound)
+                col_type = AGGREGATE_TYPES.get(function) or child.scope.infer_type(
+                    bound
+                )
+
+            columns.append(OutputColumn(None, format_expr(aggregate), col_type))
+
+        self.scope = Scope(columns, computed=[*group_by, *aggregates])
+
+    def rows(self) -> Iterator[Row]:
+        inputs = prepare_row(self.inputs)()
+        decorated = (Row(inputs(row.row)) for row in self.child.rows())
+        return hash_aggregate(decorated, range(len(self.group_by)), self.specs)
+
+    def children(self) -> list[Operator]:
+        return [self.child]
+
+    def describe(self) -> str:
+        groups = ", ".join(format_expr(expr) for expr in self.group_by)
+        aggregates = ", ".join(format_expr(expr) for expr in self.aggregates)
+        return f"HashAggregate group=[{groups}] aggregates=[{aggregates}]"
+
+
+class Sort(Operator):
+    def __init__(
+        self,
+        child: Operator,
+        order_by: list[OrderByItem],
+        max_rows_in_memory: int = DEFAULT_MAX_ROWS_IN_MEMORY,
+    ) -> None:
+        self.child = child
+        self.order_by = order_by
+        self.max_rows_in_memory = max_rows_in_memory
+        self.scope = child.scope
+        self._bound = [child.scope.bind(item.expr) for item in order_by]
+
+    def rows(self) -> Iterator[Row]:
+        directions = [item.direction for item in self.order_by]
+
+        if all(isinstance(expr, SlotExpr) for expr in self._bound):
+            keys = [
+                (expr.index, direction)  # type: ignore
+                for expr, direction in zip(self._bound, directions)
+            ]
+            return external_sort(self.child.rows(), keys, self.max_rows_in_memory)
+
+        return self._sort_computed(directions)
+
+    def _sort_computed(self, directions: list[Any]) -> Iterator[Row]:
+        # Append the computed keys to each row, sort on them, then strip them again
+        width = len(self.scope.columns)
+        compute = prepare_row(self._bound)()
+        decorated = (Row(row.row + compute(row.row)) for row in self.child.rows())
+        keys = [(width + i, direction) for i, direction in enumerate(directions)]
+        for row in external_sort(decorated, keys, self.max_rows_in_memory):
+            yield Row(row.row[:width])
+
+    def children(self) -> list[Operator]:
+        return [self.child]
+
+    def describe(self) -> str:
+        keys = ", ".join(
+            f"{format_expr(item.expr)} {item.direction}" for item in self.order_by
+        )
+        return f"Sort {keys}"
+
+    def size_hint(self) -> int | None:
+        return self.child.size_hint()
+
+
+class TopN(Operator):
+    """
+    First count rows in ORDER BY order, ORDER BY and LIMIT count run together
+
+    Holds a heap of count rows (see operators.sort.top_n) instead of sorting the
+    whole input. A presorted child already produces its rows in ORDER BY order,
+    an index scan of an ordered index on the key, and is read up to count rows.
+    """
+
+    def __init__(
+        self,
+        child: Operator,
+        order_by: list[OrderByItem],
+        count: int,
+        presorted: bool = False,
+    ) -> None:
+        if count < 0:
+            raise ValueError("LIMIT must not be negative")
+        self.child = child
+        self.order_by = order_by
+        self.count = count
+        self.presorted = presorted
+        self.scope = child.scope
+        self._bound = [child.scope.bind(item.expr) for item in order_by]
+
+    def rows(self) -> Iterator[Row]:
+        if self.presorted:
+            return islice(self.child.rows(), self.count)
+
+        directions = [item.direction for item in self.order_by]
+        if all(isinstance(expr, SlotExpr) for expr in self._bound):
+            keys = [
+                (expr.index, direction)  # type: ignore
+                for expr, direction in zip(self._bound, directions)
+            ]
+            return iter(top_n(self.child.rows(), keys, self.count))
+
+        return self._top_computed(directions)
+
+    def _top_computed(self, directions: list[Any]) -> Iterator[Row]:
+        # Same decoration as Sort._sort_computed
+        width = len(self.scope.columns)
+        compute = prepare_row(self._bound)()
+        decorated = (Row(row.row + compute(row.row)) for row in self.child.rows())
+        keys = [(width + i, direction) for i, direction in enumerate(directions)]
+        for row in top_n(decorated, keys, self.count):
+            yield Row(row.row[:width])
+
+    def children(self) -> list[Operator]:
+        return [self.child]
+
+    def describe(self) -> str:
+        keys = ", ".join(
+            f"{format_expr(item.expr)} {item.direction}" for item in self.order_by
+        )
+        description = f"TopN {self.count} {keys}"
+        return description + " presorted" if self.presorted else description
+
+    def size_hint(self) -> int | None:
+        hint = self.child.size_hint()
+        return self.count if hint is None else min(hint, self.count)
+
+
+def find_table(database: Database, name: str) -> Table:
+    table = database.get_table(name)
+    if table is None:
+        # The lexer upper cases identifiers, fall back to a case insensitive lookup
+        table = next(
+            (
+                candidate
+                for key, candidate in database.tables.items()
+                if key.upper() == name.upper()
+            ),
+            None,
+        )
+    if table is None:
+        raise ValueError(f"Table '{name}' does not exist")
+    return table
+
+
+def equi_join_keys(
+    condition: Expr, left: Scope, right: Scope
+) -> tuple[list[int], list[int], list[Expr]]:
+    """
+    Splits a join condition into equi-join key pairs and the remaining predicates
+
+    A conjunct is a key pair when it is `column = column` with one column from
+    each side.
+    """
+    left_keys: list[int] = []
+    right_keys: list[int] = []
+    residual: list[Expr] = []
+
+    for conjunct in split_conjuncts(condition):
+        if (
+            isinstance(conjunct, BinaryExpr)
+            and conjunct.op == "="
+            and isinstance(conjunct.left, ColumnExpr)
+            and isinstance(conjunct.right, ColumnExpr)
+        ):
+            for first, second in (
+                (conjunct.left, conjunct.right),
+                (conjunct.right, conjunct.left),
+            ):
+                left_index = left.find_column(first)
+                right_index = right.find_column(second)
+                if left_index is not None and right_index is not None:
+                    left_keys.append(left_index)
+                    right_keys.append(right_index)
+                    break
+            else:
+                residual.append(conjunct)
+        else:
+            residual.append(conjunct)
+
+    return left_keys, right_keys, residual
+
+
+def result_name(query: SelectQuery | ExplainQuery) -> str:
+    """Name of the Table a query's result is materialized into"""
+    if isinstance(query, ExplainQuery):
+        return "EXPLAIN"
+    if isinstance(query.from_, TableRef):
+        return query.from_.name
+    return query.from_.alias or "RESULT"
+
+
+def materialize(plan: Operator, name: str) -> Table:
+    """Runs a plan and collects its rows into a Table"""
+    schema = Scehma(
+        Column(column.name, column.col_type or "STR") for column in plan.scope.columns
+    )
+    return Table.from_result(name, schema, plan.rows())
+
+
+def execute(query: Query, database: Database) -> Table:
+    """Runs a parsed query and materializes the result as a Table"""
+    if not isinstance(query, (SelectQuery, ExplainQuery)):
+        raise SyntaxError("Only SELECT and EXPLAIN queries can be executed")
+
+    # The planner builds on the operators defined here
+    from PQL.engine_v1.planner import Planner
+
+    with database.snapshot():
+        plan = Planner(database).plan(query)
+        return materialize(plan, result_name(query))
+
+
+def run_query(sql: str, database: Database) -> Table:
+    """tokenize -> parse -> execute, plans are reused through the plan cache"""
+    from PQL.engine_v1.plan_cache import DEFAULT_PLAN_CACHE
+
+    return DEFAULT_PLAN_CACHE.execute(sql, database)
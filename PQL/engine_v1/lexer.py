@@ -1,63 +1,128 @@
 import re
+from typing import Iterator
 
-from PQL.engine_v1.models.lexer_models import Token
+from PQL.engine_v1.models.lexer_models import Span, Token
+
+KEYWORDS = (
+    "SELECT",
+    "FROM",
+    "JOIN",
+    "ON",
+    "WHERE",
+    "GROUP",
+    "BY",
+    "HAVING",
+    "ORDER",
+    "LIMIT",
+    "ASC",
+    "DESC",
+    "AS",
+    "AND",
+    "OR",
+    "NOT",
+    "INNER",
+    "LEFT",
+    "RIGHT",
+    "FULL",
+    "OUTER",
+    "EXPLAIN",
+    "ANALYZE",
+    "IS",
+)
+
+KEYWORD_KINDS: dict[str, str] = {
+    **{keyword: keyword for keyword in KEYWORDS},
+    "TRUE": "BOOLEAN",
+    "FALSE": "BOOLEAN",
+    "NULL": "NULL",
+}
+"""
+Identifier text to token kind, keywords are scanned as identifiers and looked up
+here instead of each getting its own regex alternative
+"""
+
+# Upper and lower case spellings resolve without building a new string, only
+# mixed case words like `Select` fall back to upper()
+KEYWORD_SPELLINGS: dict[str, str] = {
+    **KEYWORD_KINDS,
+    **{word.lower(): kind for word, kind in KEYWORD_KINDS.items()},
+}
+
+PUNCTUATION: dict[str, str] = {
+    ",": "COMMA",
+    "*": "STAR",
+    "(": "LPAREN",
+    ")": "RPAREN",
+    ".": "DOT",
+    "+": "ARITH",
+    "-": "ARITH",
+    "/": "ARITH",
+    "%": "ARITH",
+}
 
 TOKEN_SPEC = [
-    ("SELECT", r"SELECT\b"),
-    ("FROM", r"FROM\b"),
-    ("JOIN", r"JOIN\b"),
-    ("ON", r"ON\b"),
-    ("WHERE", r"WHERE\b"),
-    ("GROUP", r"GROUP\b"),
-    ("BY", r"BY\b"),
-    ("HAVING", r"HAVING\b"),
-    ("ORDER", r"ORDER\b"),
-    ("LIMIT", r"LIMIT\b"),
-    ("AS", r"AS\b"),
-    ("COMMA", r","),
-    ("STAR", r"\*"),
-    ("LPAREN", r"\("),
-    ("RPAREN", r"\)"),
-    ("DOT", r"\."),
-    ("OP", r"<=|>=|!=|=|<|>"),
+    ("IDENT", r"[a-zA-Z_][a-zA-Z0-9_]*"),
     # Used to catch illegal identifiers before processing to simplify logic
-    ("INVALID_NUMBER", r"\d+[a-zA-Z_]+"),
-    ("NUMBER", r"\d+(\.\d+)?"),
+    ("INVALID_NUMBER", r"\d+[a-zA-Z_]"),
+    ("NUMBER", r"\d+(?:\.\d+)?"),
     ("STRING", r"'[^']*'"),
-    ("IDENT", r"[a-zA-Z_][a-zA-Z0-9_]*"),
-    ("WS", r"\s+"),
+    ("OP", r"<>|<=|>=|!=|=|<|>"),
+    ("PUNCT", r"[,*().+\-/%]"),
+    ("INVALID", r"."),
 ]
 
+# Leading whitespace is folded into each match instead of being a token of its
+# own, INVALID matches any other character so finditer never skips input. Trailing
+# whitespace matches the end of the text, with no group set.
 MASTER_RE = re.compile(
-    "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPEC), re.IGNORECASE
+    r"\s*(?:%s|\Z)"
+    % "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPEC),
+    re.DOTALL,
 )
 
 
-def tokenize(text: str) -> list[Token]:
-    text = text.upper()
-    tokens: list[Token] = []
-    pos = 0
-    length = len(text)
-
-    while pos < length:
-        match = MASTER_RE.match(text, pos)
-        if not match:
+def scan(text: str) -> Iterator[Span]:
+    """
+    Lazily yields the (kind, start, end) span of every token in text
+
+    Nothing is copied or case folded, token text is `text[start:end]` and
+    keywords are matched case insensitively
+    """
+    keywords = KEYWORD_SPELLINGS
+    for match in MASTER_RE.finditer(text):
+        kind = match.lastgroup
+        if kind is None:
+            return
+        start, end = match.span(kind)
+        if kind == "IDENT":
+            word = match.group(kind)
+            kind = keywords.get(word) or KEYWORD_KINDS.get(word.upper(), "IDENT")
+        elif kind == "PUNCT":
+            kind = PUNCTUATION[text[start]]
+        elif kind == "INVALID_NUMBER":
+            raise SyntaxError("Numbers + Letters string detected")
+        elif kind == "INVALID":
             raise SyntaxError(
-                f"Invalid token at position {pos}: {text[pos : pos + 10]!r}"
+                f"Invalid token at position {start}: {text[start : start + 10]!r}"
             )
 
-        kind = match.lastgroup
-        value = match.group()
+        yield kind, start, end  # type: ignore
 
-        if not kind:
-            raise SyntaxError("Unkown argument")
 
-        if kind == "INVALID_NUMBER":
-            raise SyntaxError("Numbers + Letters string detected")
+def token_value(text: str, span: Span) -> str:
+    """
+    Token text for span as the parser expects it
 
-        if kind != "WS":
-            tokens.append(Token(kind, value))
+    Keywords, booleans and identifiers are upper cased, names are resolved case
+    insensitively anyway, string literals keep the case they were written in
+    """
+    kind, start, end = span
+    if kind in KEYWORD_KINDS:
+        return kind
+    if kind == "IDENT" or kind == "BOOLEAN":
+        return text[start:end].upper()
+    return text[start:end]
 
-        pos = match.end()
 
-    return tokens
+def tokenize(text: str) -> list[Token]:
+    return [Token(span[0], token_value(text, span)) for span in scan(text)]
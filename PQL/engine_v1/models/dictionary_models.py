@@ -0,0 +1,130 @@
+"""
+Dictionary encoding of STR columns
+
+Rows are tuples of Python objects, so a value's code is the one str object the
+column dictionary holds for it: every row with the same value references that
+object instead of a copy of its own. There are no integer codes, operators keep
+comparing and grouping the values themselves. Low-cardinality columns shrink to one
+pointer per row plus the distinct values, equality of two values from the
+column short-circuits on identity, and hash joins and aggregates hash each
+distinct value once (str caches its hash) instead of once per row.
+
+The dictionary also tells scans when an equality filter can't match at all: a
+key it doesn't hold is in no row of the table.
+
+High-cardinality columns gain neither, once a dictionary has seen enough values
+to tell it's dropped and the column is stored as it comes. Query results aren't
+encoded at all.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from PQL.engine_v1.models.schema_models import Row
+
+DICTIONARY_TYPES = ("STR",)
+"""Column types encoded through a dictionary"""
+
+DICTIONARY_LIMIT = 1 << 16
+"""Distinct values a dictionary takes, values past it are stored as they come"""
+
+DICTIONARY_SAMPLE = 4096
+"""Values a dictionary encodes before it's judged, see ColumnDictionary.review"""
+
+DICTIONARY_MAX_RATIO = 0.5
+"""Distinct values per encoded value above which a dictionary doesn't pay off"""
+
+
+class ColumnDictionary:
+    """
+    Distinct values of one column of a table
+
+    Only ever added to, rows deleted or replaced leave their values behind, so
+    it holds every value of every committed state of the table. Dropped, and
+    never used again, once its column has too many distinct values.
+    """
+
+    def __init__(self, limit: int = DICTIONARY_LIMIT) -> None:
+        self.limit = limit
+        self.values: dict[str, str] = {}
+        self.complete = True
+        """False once a value was turned away because the dictionary was full"""
+        self.encoded = 0
+        """Values encode_rows ran through the dictionary"""
+        self.dropped = False
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self.values
+
+    def encode(self, value: Any) -> Any:
+        """The dictionary's object for value, added when new and there is room"""
+        if type(value) is not str:
+            # NULL, or a value that was never checked against the column type
+            return value
+        encoded = self.values.get(value)
+        if encoded is not None:
+            return encoded
+        if len(self.values) >= self.limit:
+            self.complete = False
+            return value
+        self.values[value] = value
+        return value
+
+    def rules_out(self, key: Any) -> bool:
+        """Whether key is known to be in no row, see Table._rules_out"""
+        # Read before complete, drop clears complete before the values
+        values = self.values
+        return self.complete and type(key) is str and key not in values
+
+    def review(self, count: int) -> None:
+        """Counts count more encoded values, drops a dictionary that doesn't pay"""
+        self.encoded += count
+        if (
+            self.encoded >= DICTIONARY_SAMPLE
+            and len(self.values) > self.encoded * DICTIONARY_MAX_RATIO
+        ):
+            self.drop()
+
+    def drop(self) -> None:
+        """Stops encoding, the values are released"""
+        self.dropped = True
+        self.complete = False
+        self.limit = 0
+        self.values = {}
+
+
+def encode_rows(
+    rows: list["Row"], dictionaries: dict[int, ColumnDictionary]
+) -> list["Row"]:
+    """
+    rows with their values pointed at the dictionaries' objects, keyed by
+    position. Rows holding a value to replace are copied, the caller's are left
+    as they are.
+    """
+    active = [
+        (position, dictionary)
+        for position, dictionary in dictionaries.items()
+        if not dictionary.dropped
+    ]
+    if not active:
+        return rows
+    encoders = [(position, dictionary.encode) for position, dictionary in active]
+    result = list(rows)
+    for index, row in enumerate(rows):
+        values = row.row
+        encoded = None
+        for position, encode in encoders:
+            value = values[position]
+            code = encode(value)
+            if code is not value:
+                if encoded is None:
+                    encoded = list(values)
+                encoded[position] = code
+        if encoded is not None:
+            result[index] = type(row)(tuple(encoded))
+    for _, dictionary in active:
+        dictionary.review(len(rows))
+    return result
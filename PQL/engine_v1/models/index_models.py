@@ -0,0 +1,302 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from PQL.engine_v1.models.schema_models import Row
+
+INDEX_KINDS = ("HASH", "SORTED")
+
+
+@dataclass(frozen=True)
+class KeyRange:
+    """
+    Keys between low and high, a None bound is unbounded
+
+    A point lookup is the range [key, key]
+    """
+
+    low: Any = None
+    high: Any = None
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+
+    @classmethod
+    def point(cls, key: Any) -> "KeyRange":
+        return cls(key, key)
+
+    @classmethod
+    def from_comparison(cls, op: str, key: Any) -> "KeyRange | None":
+        """Range matching `column op key`, None when op can't use an index"""
+        if key is None:
+            return None
+        if op == "=":
+            return cls.point(key)
+        if op == ">":
+            return cls(low=key, low_inclusive=False)
+        if op == ">=":
+            return cls(low=key)
+        if op == "<":
+            return cls(high=key, high_inclusive=False)
+        if op == "<=":
+            return cls(high=key)
+        return None
+
+    @property
+    def is_point(self) -> bool:
+        return (
+            self.low is not None
+            and self.low_inclusive
+            and self.high_inclusive
+            and self.low == self.high
+        )
+
+    def intersect(self, other: "KeyRange") -> "KeyRange":
+        low, low_inclusive = self.low, self.low_inclusive
+        if other.low is not None:
+            if low is None or other.low > low:
+                low, low_inclusive = other.low, other.low_inclusive
+            elif other.low == low:
+                low_inclusive = low_inclusive and other.low_inclusive
+
+        high, high_inclusive = self.high, self.high_inclusive
+        if other.high is not None:
+            if high is None or other.high < high:
+                high, high_inclusive = other.high, other.high_inclusive
+            elif other.high == high:
+                high_inclusive = high_inclusive and other.high_inclusive
+
+        return KeyRange(low, high, low_inclusive, high_inclusive)
+
+    def contains(self, key: Any) -> bool:
+        if key is None:
+            return False
+        if self.low is not None and (
+            key < self.low if self.low_inclusive else key <= self.low
+        ):
+            return False
+        if self.high is not None and (
+            key > self.high if self.high_inclusive else key >= self.high
+        ):
+            return False
+        return True
+
+    def __str__(self) -> str:
+        if self.is_point:
+            return f"= {self.low!r}"
+        bounds = []
+        if self.low is not None:
+            bounds.append(f"{'>=' if self.low_inclusive else '>'} {self.low!r}")
+        if self.high is not None:
+            bounds.append(f"{'<=' if self.high_inclusive else '<'} {self.high!r}")
+        return " AND ".join(bounds) or "ALL"
+
+
+class Index(ABC):
+    """
+    Secondary index over one column of a table
+
+    Indexes map keys to the Row objects holding them, not to positions, so deleting
+    a row doesn't renumber every entry after it. NULL keys are not indexed since
+    no comparison matches them.
+    """
+
+    kind: str
+    supports_ranges: bool
+    """Whether scan accepts ranges or only point lookups"""
+
+    def __init__(self, name: str, column: str, position: int) -> None:
+        self.name = name
+        self.column = column
+        self.position = position
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name}, column={self.column})"
+
+    @abstractmethod
+    def build(self, rows: Iterable["Row"]) -> None:
+        """Replaces the entries with the keys of rows"""
+
+    @abstractmethod
+    def insert(self, row: "Row") -> None:
+        """Adds the entry of row"""
+
+    @abstractmethod
+    def remove(self, row: "Row") -> None:
+        """Removes the entry of row, ValueError if it has none"""
+
+    @abstractmethod
+    def scan(self, key_range: KeyRange) -> Iterator["Row"]:
+        """Rows with keys in key_range"""
+
+
+class HashIndex(Index):
+    """Equality lookups in O(1)"""
+
+    kind = "HASH"
+    supports_ranges = False
+
+    def __init__(self, name: str, column: str, position: int) -> None:
+        super().__init__(name, column, position)
+        self._buckets: dict[Any, list["Row"]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def build(self, rows: Iterable["Row"]) -> None:
+        self._buckets = {}
+        for row in rows:
+            self.insert(row)
+
+    def insert(self, row: "Row") -> None:
+        key = row.row[self.position]
+        if key is None:
+            return
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [row]
+        else:
+            bucket.append(row)
+
+    def remove(self, row: "Row") -> None:
+        key = row.row[self.position]
+        if key is None:
+            return
+        bucket = self._buckets.get(key, [])
+        for position, candidate in enumerate(bucket):
+            if candidate is row:
+                del bucket[position]
+                if not bucket:
+                    del self._buckets[key]
+                return
+        raise ValueError(f"Row is not in index {self.name}")
+
+    def scan(self, key_range: KeyRange) -> Iterator["Row"]:
+        if not key_range.is_point:
+            raise ValueError("Hash indexes only support equality lookups")
+        return iter(self._buckets.get(key_range.low, ()))
+
+
+class SortedIndex(Index):
+    """
+    Ordered index for equality and range lookups in O(log n)
+
+    Keys are kept in a list of sorted blocks (a flat B-tree): lookups bisect the
+    block maxima then the block, inserts and deletes only shift one block
+    """
+
+    kind = "SORTED"
+    supports_ranges = True
+
+    BLOCK_SIZE = 1024
+    """Blocks are split once they grow past twice this size"""
+
+    def __init__(self, name: str, column: str, position: int) -> None:
+        super().__init__(name, column, position)
+        self._keys: list[list[Any]] = []
+        self._rows: list[list["Row"]] = []
+        self._maxes: list[Any] = []
+
+    def __len__(self) -> int:
+        return sum(len(block) for block in self._keys)
+
+    def build(self, rows: Iterable["Row"]) -> None:
+        position = self.position
+        # Stable sort on the key alone, equal keys keep table order
+        entries = sorted(
+            ((row.row[position], row) for row in rows if row.row[position] is not None),
+            key=itemgetter(0),
+        )
+        size = self.BLOCK_SIZE
+        self._keys = [
+            [key for key, _ in entries[start : start + size]]
+            for start in range(0, len(entries), size)
+        ]
+        self._rows = [
+            [row for _, row in entries[start : start + size]]
+            for start in range(0, len(entries), size)
+        ]
+        self._maxes = [block[-1] for block in self._keys]
+
+    def insert(self, row: "Row") -> None:
+        key = row.row[self.position]
+        if key is None:
+            return
+
+        if not self._maxes:
+            self._keys.append([key])
+            self._rows.append([row])
+            self._maxes.append(key)
+            return
+
+        # Equal keys keep insertion order, new rows go after existing ones
+        block = min(bisect_right(self._maxes, key), len(self._maxes) - 1)
+        keys = self._keys[block]
+        offset = bisect_right(keys, key)
+        keys.insert(offset, key)
+        self._rows[block].insert(offset, row)
+        self._maxes[block] = keys[-1]
+
+        if len(keys) > 2 * self.BLOCK_SIZE:
+            half = len(keys) // 2
+            rows = self._rows[block]
+            self._keys[block : block + 1] = [keys[:half], keys[half:]]
+            self._rows[block : block + 1] = [rows[:half], rows[half:]]
+            self._maxes[block : block + 1] = [keys[half - 1], keys[-1]]
+
+    def remove(self, row: "Row") -> None:
+        key = row.row[self.position]
+        if key is None:
+            return
+
+        block = bisect_left(self._maxes, key)
+        while block < len(self._maxes):
+            keys, rows = self._keys[block], self._rows[block]
+            offset = bisect_left(keys, key)
+            while offset < len(keys) and keys[offset] == key:
+                if rows[offset] is row:
+                    del keys[offset]
+                    del rows[offset]
+                    if keys:
+                        self._maxes[block] = keys[-1]
+                    else:
+                        del self._keys[block]
+                        del self._rows[block]
+                        del self._maxes[block]
+                    return
+                offset += 1
+            if offset < len(keys):
+                break
+            block += 1
+        raise ValueError(f"Row is not in index {self.name}")
+
+    def scan(self, key_range: KeyRange) -> Iterator["Row"]:
+        """Rows with keys in key_range, in key order"""
+        low, high = key_range.low, key_range.high
+
+        if low is None:
+            block, offset = 0, 0
+        else:
+            find = bisect_left if key_range.low_inclusive else bisect_right
+            block = find(self._maxes, low)
+            if block == len(self._maxes):
+                return
+            offset = find(self._keys[block], low)
+
+        for current in range(block, len(self._keys)):
+            keys = self._keys[current]
+            if high is None:
+                end = len(keys)
+            else:
+                find = bisect_right if key_range.high_inclusive else bisect_left
+                end = find(keys, high)
+            yield from self._rows[current][offset:end]
+            if end < len(keys):
+                return
+            offset = 0
+
+
+INDEX_TYPES: dict[str, type[Index]] = {"HASH": HashIndex, "SORTED": SortedIndex}
+
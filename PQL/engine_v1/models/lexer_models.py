@@ -1,4 +1,12 @@
+Span = tuple[str, int, int]
+"""Token kind and its [start, end) offsets in the query text, see lexer.scan"""
+
+
 class Token:
+    """Materialized view of a span, what the parser consumes"""
+
+    __slots__ = ("kind", "value")
+
     def __init__(self, kind: str, value: str) -> None:
         self.kind = kind
         self.value = value
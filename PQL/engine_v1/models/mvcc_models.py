@@ -0,0 +1,274 @@
+"""
+Multi-version concurrency control for engine_v1 tables
+
+Every committed change publishes a new TableState, an immutable view of the
+table's rows stamped with a commit version. Readers pick states up without
+taking a lock, so a scan keeps seeing the rows as of the moment it started while
+writers carry on, and writers never wait for readers.
+
+Database.snapshot pins the state of every table of a database at once, queries
+run inside it see one consistent database however long they take.
+Database.transaction buffers mutations and publishes all of them under a single
+version when the block exits, a transaction whose tables were changed by
+someone else in the meantime fails with TransactionConflict instead (first
+committer wins).
+
+States share row lists where they can: appends extend the list of the latest
+state in place, older states only look at the prefix they were published with,
+deletes and replacements publish a new list.
+
+Changes of durable tables are staged first and published once the write-ahead
+log synced their record (see wal), writers build on the staged state meanwhile.
+"""
+
+import threading
+from contextvars import ContextVar
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, TypeVar
+
+if TYPE_CHECKING:
+    from PQL.engine_v1.models.schema_models import Database, Row, Table
+
+T = TypeVar("T")
+
+COMMIT_LOCK = threading.Lock()
+"""
+Held while new states are published or a snapshot captures them, never for
+longer than a few reference swaps
+"""
+
+_last_version = 0
+
+
+def next_version() -> int:
+    """Version of a new commit, has to be called with COMMIT_LOCK held"""
+    global _last_version
+    _last_version += 1
+    return _last_version
+
+
+class TableState:
+    """Rows of a table as of one commit: the first length rows of rows"""
+
+    __slots__ = ("rows", "length", "version", "_tuple")
+
+    def __init__(self, rows: list["Row"], length: int, version: int) -> None:
+        self.rows = rows
+        self.length = length
+        self.version = version
+        self._tuple: tuple["Row", ...] | None = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator["Row"]:
+        return islice(self.rows, self.length)
+
+    def row(self, position: int) -> "Row":
+        if position < 0 or position >= self.length:
+            raise IndexError(f"Row index {position} out of range")
+        return self.rows[position]
+
+    def as_tuple(self) -> tuple["Row", ...]:
+        if self._tuple is None:
+            self._tuple = tuple(islice(self.rows, self.length))
+        return self._tuple
+
+
+def publish(changes: Iterable[tuple["Table", list["Row"], int]]) -> int:
+    """
+    Makes the new rows of every table visible at once, returns their version.
+    Callers hold the write locks of the tables.
+    """
+    with COMMIT_LOCK:
+        version = next_version()
+        for table, rows, length in changes:
+            table._state = TableState(rows, length, version)
+    return version
+
+
+def stage(
+    changes: Iterable[tuple["Table", list["Row"], int]],
+) -> list[tuple["Table", TableState]]:
+    """
+    New states of the tables under one version, writers build on them right away
+    but readers only see them once publish_staged is called. Used for logged
+    changes, which must not be seen before their log record is synced.
+    Callers hold the write locks of the tables.
+    """
+    with COMMIT_LOCK:
+        version = next_version()
+        states = [
+            (table, TableState(rows, length, version))
+            for table, rows, length in changes
+        ]
+        for table, state in states:
+            table._staged = state
+    return states
+
+
+def publish_staged(states: list[tuple["Table", TableState]]) -> None:
+    """Makes states returned by stage visible at once"""
+    with COMMIT_LOCK:
+        for table, state in states:
+            table._state = state
+            if table._staged is state:
+                table._staged = None
+
+
+class Snapshot:
+    """The states of a set of tables, captured atomically"""
+
+    def __init__(self, states: dict["Table", TableState | None]) -> None:
+        self.states = states
+
+    @classmethod
+    def capture(cls, database: "Database") -> "Snapshot":
+        with COMMIT_LOCK:
+            return cls({table: table._state for table in database.tables.values()})
+
+    def state_of(self, table: "Table") -> TableState | None:
+        """
+        State of table in this snapshot, tables created after it was taken are
+        seen as they are now. None means a storage.PagedTable read from its file.
+        """
+        return self.states.get(table, table._state)
+
+
+class TransactionConflict(RuntimeError):
+    """A table written by a transaction was changed by another commit since"""
+
+
+class PendingWrite:
+    """Changes a transaction made to one table, only the transaction sees them"""
+
+    def __init__(self, base: TableState) -> None:
+        self.base = base
+        self.version = base.version
+        """Version the transaction read, the table must still be at it on commit"""
+        self.appended: list["Row"] = []
+        self.rows: list["Row"] | None = None
+        """Private copy of the rows, only made once rows are deleted or replaced"""
+
+    def append(self, rows: list["Row"]) -> None:
+        if self.rows is None:
+            self.appended.extend(rows)
+        else:
+            self.rows.extend(rows)
+
+    def delete(self, position: int) -> None:
+        rows = self.state().rows
+        if position < 0 or position >= len(rows):
+            raise IndexError(f"Row index {position} out of range")
+        # A new list, scans the transaction started earlier keep their rows
+        self.rows = rows[:position] + rows[position + 1 :]
+
+    def replace(self, rows: list["Row"]) -> None:
+        self.rows, self.appended = rows, []
+
+    def state(self) -> TableState:
+        """What the transaction itself reads from the table"""
+        if self.rows is None:
+            self.rows = [*self.base, *self.appended]
+            self.appended = []
+        return TableState(self.rows, len(self.rows), self.version)
+
+
+class Transaction:
+    """
+    Mutations of a database's tables made inside Database.transaction, published
+    together by commit
+    """
+
+    def __init__(self, database: "Database") -> None:
+        self.database = database
+        self.snapshot = Snapshot.capture(database)
+        self.writes: dict["Table", PendingWrite] = {}
+        self.records: list[dict[str, Any]] = []
+        """Log records of the buffered mutations, written as one on commit"""
+        self.closed = False
+
+    def covers(self, table: "Table") -> bool:
+        return not self.closed and self.database.tables.get(table.name) is table
+
+    def pending(self, table: "Table") -> PendingWrite:
+        write = self.writes.get(table)
+        if write is None:
+            base = self.snapshot.state_of(table)
+            if base is None:
+                # Still on file, loading it doesn't change its version
+                base = table._committed_state()
+            write = self.writes[table] = PendingWrite(base)
+        return write
+
+    def log(self, record: dict[str, Any] | None) -> None:
+        """Buffers the record of a mutation, None when the database has no log"""
+        if record is not None:
+            self.records.append(record)
+
+    def commit(self) -> None:
+        """Publishes every buffered mutation, through the database's log if any"""
+        if self.closed:
+            raise ValueError("Transaction is already closed")
+        self.closed = True
+        if not self.writes:
+            return
+
+        tables = sorted(self.writes, key=id)
+        wal = self.database.wal
+        if wal is None:
+            self._apply(tables, publish)
+        else:
+            # Log then table locks, the order single mutations take them in
+            record = {"op": "transaction", "records": self.records}
+            wal.write(record, lambda: self._apply(tables, stage), publish_staged)
+
+    def _apply(
+        self,
+        tables: list["Table"],
+        install: Callable[[list[tuple["Table", list["Row"], int]]], T],
+    ) -> T:
+        locks = [table._write_lock for table in tables]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for table in tables:
+                if table._committed_state().version != self.writes[table].version:
+                    raise TransactionConflict(
+                        f"Table '{table.name}' was changed by another commit"
+                    )
+            return install(
+                [table._apply_pending(self.writes[table]) for table in tables]
+            )
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def rollback(self) -> None:
+        """Drops every buffered mutation"""
+        self.closed = True
+        self.writes.clear()
+        self.records.clear()
+
+
+ACTIVE_SNAPSHOT: ContextVar[Snapshot | None] = ContextVar(
+    "active_snapshot", default=None
+)
+ACTIVE_TRANSACTION: ContextVar[Transaction | None] = ContextVar(
+    "active_transaction", default=None
+)
+
+
+def visible_state(table: "Table") -> TableState | None:
+    """State of table the current context reads, see Snapshot.state_of"""
+    transaction = ACTIVE_TRANSACTION.get()
+    if transaction is not None:
+        write = transaction.writes.get(table)
+        if write is not None:
+            return write.state()
+        return transaction.snapshot.state_of(table)
+
+    snapshot = ACTIVE_SNAPSHOT.get()
+    if snapshot is not None:
+        return snapshot.state_of(table)
+    return table._state
@@ -34,7 +34,9 @@ class FromItem(Node):
 @dataclass
 class BinaryExpr(Expr):
     left: Expr
-    op: Literal["+", "-", "*", "/", "=", "!=", "<", "<=", ">", ">=", "AND", "OR"]
+    op: Literal[
+        "+", "-", "*", "/", "%", "=", "!=", "<", "<=", ">", ">=", "AND", "OR"
+    ]
     right: Expr
 
 
@@ -55,6 +57,26 @@ class ColumnExpr(Expr):
     name: str
 
 
+@dataclass
+class FunctionCall(Expr):
+    name: str
+    args: List[Expr]
+
+
+@dataclass
+class ParamExpr(Expr):
+    """A literal lifted out of the query by the plan cache, index into its values"""
+
+    index: int
+
+
+@dataclass
+class StarExpr(Expr):
+    """SELECT * or SELECT table.*, also the argument of COUNT(*)"""
+
+    table: Optional[str] = None
+
+
 @dataclass
 class TableRef(FromItem):
     name: str
@@ -100,3 +122,13 @@ class SelectQuery(Query):
 
     # Only used when this query is referenced as a subquery
     alias: Optional[str] = None
+
+
+@dataclass
+class ExplainQuery(Query):
+    """EXPLAIN [ANALYZE] query, its result is the query's plan"""
+
+    query: SelectQuery
+    analyze: bool = False
+    memory: bool = False
+    """EXPLAIN ANALYZE MEMORY, also measure each operator's peak memory"""
@@ -1,4 +1,32 @@
-from typing import Any, Callable, Iterable
+import operator
+import threading
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+from PQL.engine_v1.models.dictionary_models import (
+    DICTIONARY_TYPES,
+    ColumnDictionary,
+    encode_rows,
+)
+from PQL.engine_v1.models.index_models import INDEX_KINDS, INDEX_TYPES, Index, KeyRange
+from PQL.engine_v1.models.mvcc_models import (
+    ACTIVE_SNAPSHOT,
+    ACTIVE_TRANSACTION,
+    COMMIT_LOCK,
+    PendingWrite,
+    Snapshot,
+    TableState,
+    Transaction,
+    publish,
+    publish_staged,
+    stage,
+    visible_state,
+)
+from PQL.engine_v1.models.zone_models import ZONE_ROWS, ZoneMap
+
+if TYPE_CHECKING:
+    from PQL.engine_v1.wal import WriteAheadLog
 
 
 class Value:
@@ -9,9 +37,46 @@ class ExpressionItem:
     pass
 
 
+def _and(left: Any, right: Any) -> Any:
+    return left and right
+
+
+def _or(left: Any, right: Any) -> Any:
+    return left or right
+
+
+def _not(left: Any, right: Any) -> bool:
+    return not left
+
+
+BINARY_OPERATIONS: dict[str, Callable[[Any, Any], Any]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<>": operator.ne,
+}
+
+OPERATIONS: dict[str, Callable[[Any, Any], Any]] = {
+    **BINARY_OPERATIONS,
+    "AND": _and,
+    "OR": _or,
+    "NOT": _not,
+}
+
+
 class Operation:
     def __init__(self, operation: str) -> None:
         self.operation = operation
+        # Looked up once, resolve runs per row
+        self.function = OPERATIONS.get(operation)
 
     def resolve(
         self, left: ExpressionItem, right: ExpressionItem | None
@@ -27,35 +92,9 @@ class Operation:
     def _operation(
         self,
     ) -> Callable[[ExpressionItem, ExpressionItem | None], ExpressionItem]:
-        if self.operation == "+":
-            return lambda left, right: left + right  # type: ignore
-        elif self.operation == "-":
-            return lambda left, right: left - right  # type: ignore
-        elif self.operation == "*":
-            return lambda left, right: left * right  # type: ignore
-        elif self.operation == "/":
-            return lambda left, right: left / right  # type: ignore
-        elif self.operation == "%":
-            return lambda left, right: left % right  # type: ignore
-        elif self.operation == "AND":
-            return lambda left, right: left and right  # type: ignore
-        elif self.operation == "OR":
-            return lambda left, right: left or right  # type: ignore
-        elif self.operation == "NOT":
-            return lambda left, right: not left  # type: ignore
-        elif self.operation == ">":
-            return lambda left, right: left > right  # type: ignore
-        elif self.operation == "<":
-            return lambda left, right: left < right  # type: ignore
-        elif self.operation == ">=":
-            return lambda left, right: left >= right  # type: ignore
-        elif self.operation == "<=":
-            return lambda left, right: left <= right  # type: ignore
-        elif self.operation == "=":
-            return lambda left, right: left == right  # type: ignore
-        elif self.operation == "!=" or self.operation == "<>":
-            return lambda left, right: left != right  # type: ignore
-        raise ValueError(f"Unsupported operation: {self.operation}")
+        if self.function is None:
+            raise ValueError(f"Unsupported operation: {self.operation}")
+        return self.function
 
 
 class Literal(ExpressionItem):
@@ -93,6 +132,30 @@ class Expression(ExpressionItem):
 
         return self.operation.resolve(left, right)
 
+    def compile(self, schema: "Scehma") -> Callable[[Row], Any]:
+        """
+        Builds a callable evaluating this expression against a row of schema,
+        columns are resolved to ordinals up front
+        """
+        function = self.operation._operation()
+        left = _compile_operand(self.left, schema)
+        right = _compile_operand(self.right, schema)
+        return lambda row: function(left(row), right(row))
+
+
+def _compile_operand(
+    item: ExpressionItem | None, schema: "Scehma"
+) -> Callable[[Row], Any]:
+    if isinstance(item, Column):
+        index = schema.index.get(item.name)
+        if index is None:
+            raise ValueError(f"Column '{item.name}' does not exist in the schema")
+        return lambda row: row.row[index]
+    if isinstance(item, Expression):
+        return item.compile(schema)
+    value = item.value if isinstance(item, Literal) else item
+    return lambda row: value
+
 
 class Column(ExpressionItem):
     """
@@ -191,18 +254,238 @@ class Condition:
 
         return result
 
+    def compile(self, schema: Scehma) -> Callable[[Row], bool]:
+        """
+        Builds a callable equivalent to evaluate(row, schema), the operation and
+        column ordinals are resolved once instead of for every row
+        """
+        for operand in (self.left, self.right):
+            if not isinstance(operand, (Column, Literal, Expression)):
+                raise TypeError("Operands must be a Column, Literal, or Expression")
+
+        function = self.operation._operation()
+
+        # Column compared with a literal, the usual filter shape
+        if isinstance(self.left, Column) and isinstance(self.right, Literal):
+            index = schema.index.get(self.left.name)
+            if index is None:
+                raise ValueError(
+                    f"Column '{self.left.name}' does not exist in the schema"
+                )
+            value = self.right.value
+            return lambda row: function(row.row[index], value)
+
+        left = _compile_operand(self.left, schema)
+        right = _compile_operand(self.right, schema)
+        return lambda row: function(left(row), right(row))
+
+
+FLIPPED_OPERATIONS = {"=": "=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+BULK_LOAD_BATCH_SIZE = 10_000
+"""Rows validated and appended together by Table.bulk_load"""
+
 
 class Table:
     def __init__(self, name: str, schema: Scehma) -> None:
         self.name = name
         self.columns = schema.columns
-        self.rows: tuple[Row, ...] = ()
+        self.indexes: dict[str, Index] = {}
+        self.schema_version = 0
+        """Bumped whenever cached plans over this table become stale"""
+        self.wal: "WriteAheadLog | None" = None
+        """Set on tables of durable databases, mutations are logged through it"""
+        # Readers use the published state (see mvcc_models) without locking,
+        # writers serialize on the write lock and publish a new state
+        self._write_lock = threading.RLock()
+        self._state: TableState | None = TableState([], 0, 0)
+        self._staged: TableState | None = None
+        """Logged change not synced yet, writers build on it, see mvcc_models.stage"""
+        self.zone_rows = ZONE_ROWS
+        """Rows per zone map chunk, see zone_models"""
+        self._zones: ZoneMap | None = None
+        self._positions: tuple[list[Row], dict[int, int]] | None = None
+        """Row list and the position of each of its rows by id, see _row_positions"""
+        self.dictionaries: dict[int, ColumnDictionary] = {
+            position: ColumnDictionary()
+            for position, column in enumerate(self.columns)
+            if column.col_type in DICTIONARY_TYPES
+        }
+        """Dictionaries of the STR columns keyed by position, see dictionary_models"""
+
+    @classmethod
+    def from_result(cls, name: str, schema: Scehma, rows: Iterable[Row]) -> "Table":
+        """
+        Table holding a query's result rows as they are: nothing is logged,
+        indexed or encoded, and rows shared with other tables aren't touched
+        """
+        table = cls(name, schema)
+        table.dictionaries = {}
+        rows = list(rows)
+        table._state = TableState(rows, len(rows), 0)
+        return table
+
+    def _committed_state(self) -> TableState:
+        """Latest staged or published state, what writers change"""
+        staged = self._staged
+        if staged is not None:
+            return staged
+        return self._published_state()
+
+    def _published_state(self) -> TableState:
+        """Latest published state"""
+        assert self._state is not None
+        return self._state
+
+    def _visible_state(self) -> TableState:
+        """State the current snapshot or transaction reads"""
+        state = visible_state(self)
+        assert state is not None
+        return state
+
+    def _transaction(self) -> Transaction | None:
+        """The active transaction, if it covers this table"""
+        transaction = ACTIVE_TRANSACTION.get()
+        if transaction is None or not transaction.covers(self):
+            return None
+        return transaction
+
+    @property
+    def rows(self) -> tuple[Row, ...]:
+        return self._visible_state().as_tuple()
+
+    @rows.setter
+    def rows(self, rows: Iterable[Row]) -> None:
+        rows = list(rows)
+        transaction = self._transaction()
+        record = None
+        if self._logging(transaction):
+            record = {
+                "op": "replace",
+                "table": self.name,
+                "rows": [row.row for row in rows],
+            }
+        if transaction is not None:
+            transaction.pending(self).replace(rows)
+            transaction.log(record)
+            return
+        self._commit(record, lambda: self._replace_rows(rows))
+
+    def _replace_rows(self, rows: list[Row]) -> tuple[list[Row], int]:
+        rows = encode_rows(rows, self.dictionaries)
+        for index in self.indexes.values():
+            index.build(rows)
+        self._zones = None
+        return rows, len(rows)
+
+    def _logging(self, transaction: Transaction | None) -> bool:
+        """
+        Whether mutations are written to a log, log records holding rows are only
+        built then
+        """
+        if transaction is not None:
+            return transaction.database.wal is not None
+        return self.wal is not None
+
+    def _commit(
+        self,
+        record: dict[str, Any] | None,
+        change: Callable[[], tuple[list[Row], int]],
+    ) -> None:
+        """
+        Runs change under the write lock and publishes the rows it returns, change
+        updates the indexes itself. Through the write-ahead log if the table has
+        one, the rows are then published once record is synced.
+        """
+        if self.wal is None:
+            with self._write_lock:
+                rows, length = change()
+                publish([(self, rows, length)])
+            return
+
+        assert record is not None
+
+        def apply() -> list[tuple[Table, TableState]]:
+            with self._write_lock:
+                rows, length = change()
+                return stage([(self, rows, length)])
+
+        self.wal.write(record, apply, publish_staged)
+
+    def _apply_pending(self, pending: PendingWrite) -> tuple["Table", list[Row], int]:
+        """Applies a transaction's changes to the indexes, see Transaction.commit"""
+        if pending.rows is None:
+            rows, length = self._append_rows(pending.appended)
+        else:
+            rows, length = self._replace_rows(pending.rows)
+        return self, rows, length
+
+    def _rows_in(self, state: TableState | None) -> Iterator[Row]:
+        assert state is not None
+        return iter(state)
+
+    def scan(self, ranges: dict[int, KeyRange] | None = None) -> Iterator[Row]:
+        """
+        Iterates the rows, unlike rows this doesn't have to hold them all in memory
+        at once (see storage.PagedTable)
+
+        ranges maps column positions to the keys a filter on top accepts, chunks
+        whose zone map rules all of them out are skipped. The rows returned still
+        have to be filtered.
+        """
+        state = visible_state(self)
+        if ranges and self._rules_out(state, ranges):
+            return iter(())
+        zones = self._zone_map(state) if ranges else None
+        if zones is None:
+            return self._rows_in(state)
+        assert state is not None and ranges is not None
+        rows = state.rows
+        return chain.from_iterable(
+            rows[start:stop] for start, stop in zones.spans(ranges, len(state))
+        )
+
+    def _rules_out(self, state: TableState | None, ranges: dict[int, KeyRange]) -> bool:
+        """
+        Whether a string key of a point range is missing from its column's
+        dictionary, then no row matches. Only the latest state is known to have
+        been encoded, a transaction's pending rows haven't been yet.
+        """
+        if state is None or state is not self._state:
+            return False
+        for position, key_range in ranges.items():
+            dictionary = self.dictionaries.get(position)
+            if (
+                dictionary is not None
+                and key_range.is_point
+                and dictionary.rules_out(key_range.low)
+            ):
+                return True
+        return False
+
+    def _zone_map(self, state: TableState | None) -> ZoneMap | None:
+        """
+        Zone map of the latest row list, built on first use, None for states
+        reading another list (from before a delete) or a file
+        """
+        if state is None or not state.length:
+            return None
+        zones = self._zones
+        if zones is None or zones.rows is not state.rows:
+            with self._write_lock:
+                latest = self._state
+                if latest is None or latest.rows is not state.rows:
+                    return None
+                zones = self._zones
+                if zones is None or zones.rows is not latest.rows:
+                    zones = self._zones = ZoneMap.build(
+                        latest.rows, latest.length, len(self.columns), self.zone_rows
+                    )
+        return zones
 
     def __getitem__(self, row_ident: str | int) -> Row:
         if isinstance(row_ident, int):
-            if row_ident < 0 or row_ident >= len(self.rows):
-                raise IndexError(f"Row index {row_ident} out of range")
-            return self.rows[row_ident]
+            return self._visible_state().row(row_ident)
         else:
             raise TypeError("Row identifier must be an integer index")
 
@@ -210,12 +493,252 @@ class Table:
         if len(row.row) != len(self.columns):
             raise ValueError("Row length does not match table schema length")
 
-        self.rows = self.rows + (row,)
+        record = {"op": "insert", "table": self.name, "row": row.row}
+        transaction = self._transaction()
+        if transaction is not None:
+            transaction.pending(self).append([row])
+            transaction.log(record)
+            return
+        self._commit(record, lambda: self._append_rows([row]))
+
+    def _append_rows(self, rows: list[Row]) -> tuple[list[Row], int]:
+        state = self._committed_state()
+        current = state.rows
+        # Rows past the latest state were left by a failed change, older states
+        # only read their own prefix of the list
+        del current[state.length :]
+        rows = encode_rows(rows, self.dictionaries)
+        current.extend(rows)
+
+        zones = self._zones
+        if zones is not None and zones.rows is current:
+            if zones.length > state.length:
+                # Covers rows of the failed change, built again when next used
+                self._zones = None
+            else:
+                zones.extend(len(current))
+
+        for index in self.indexes.values():
+            # Re-sorting everything beats many single inserts for large batches
+            if len(rows) * 8 > len(current):
+                index.build(current)
+            else:
+                for row in rows:
+                    index.insert(row)
+
+        return current, len(current)
+
+    def load_batch(self, batch: Iterable[Row | tuple[Any, ...]]) -> int:
+        """
+        Appends a batch of rows (Row objects or plain tuples) in one step, the
+        batch is validated as a whole before anything is appended. Returns the
+        number of rows loaded.
+        """
+        rows = [row if isinstance(row, Row) else Row(tuple(row)) for row in batch]
+        if not rows:
+            return 0
+
+        width = len(self.columns)
+        if any(len(row.row) != width for row in rows):
+            raise ValueError("Row length does not match table schema length")
+
+        transaction = self._transaction()
+        record = None
+        if self._logging(transaction):
+            record = {
+                "op": "load",
+                "table": self.name,
+                "rows": [row.row for row in rows],
+            }
+        if transaction is not None:
+            transaction.pending(self).append(rows)
+            transaction.log(record)
+        else:
+            self._commit(record, lambda: self._append_rows(rows))
+        return len(rows)
+
+    def bulk_load(
+        self,
+        rows: Iterable[Row | tuple[Any, ...]],
+        batch_size: int = BULK_LOAD_BATCH_SIZE,
+    ) -> int:
+        """
+        Loads rows from any iterable (a generator, a file reader...) in batches of
+        batch_size, see load_batch. Returns the number of rows loaded.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        loaded = 0
+        iterator = iter(rows)
+        while batch := list(islice(iterator, batch_size)):
+            loaded += self.load_batch(batch)
+        return loaded
 
     def delete_row_by_index(self, index: int) -> None:
-        if index < 0 or index >= len(self.rows):
-            raise IndexError(f"Row index {index} out of range")
-        self.rows = self.rows[:index] + self.rows[index + 1 :]
+        record = {"op": "delete", "table": self.name, "index": index}
+        transaction = self._transaction()
+        if transaction is not None:
+            transaction.pending(self).delete(index)
+            transaction.log(record)
+            return
+        self._commit(record, lambda: self._remove_row(index))
+
+    def _remove_row(self, index: int) -> tuple[list[Row], int]:
+        state = self._committed_state()
+        row = state.row(index)
+        # A new list, readers of older states keep iterating theirs
+        rows = state.rows[:index]
+        rows.extend(islice(state.rows, index + 1, state.length))
+        for table_index in self.indexes.values():
+            table_index.remove(row)
+        self._zones = None
+        return rows, len(rows)
+
+    def create_index(
+        self, column_name: str, kind: str = "HASH", name: str | None = None
+    ) -> Index:
+        """
+        Equivalent to CREATE INDEX, HASH indexes serve equality lookups and SORTED
+        indexes serve equality and range lookups. The index is kept up to date by
+        add_row and delete_row_by_index, filters pick it up automatically.
+        """
+        kind = kind.upper()
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unsupported index kind: {kind}")
+
+        positions = [
+            position
+            for position, column in enumerate(self.columns)
+            if column.name == column_name
+        ]
+        if not positions:
+            raise ValueError(f"Column '{column_name}' does not exist in the schema")
+
+        name = name or f"{self.name}_{column_name}_{kind.lower()}"
+        if name in self.indexes:
+            raise ValueError(f"Index '{name}' already exists")
+
+        index = INDEX_TYPES[kind](name, column_name, positions[0])
+        with self._write_lock:
+            index.build(self._committed_state())
+            # Replaced rather than changed, readers may be iterating it
+            self.indexes = {**self.indexes, name: index}
+        self.schema_version += 1
+        return index
+
+    def drop_index(self, name: str) -> None:
+        with self._write_lock:
+            if name not in self.indexes:
+                raise ValueError(f"Index '{name}' does not exist")
+            self.indexes = {
+                key: index for key, index in self.indexes.items() if key != name
+            }
+        self.schema_version += 1
+
+    def index_lookup(
+        self, index: Index, key_range: KeyRange, table_order: bool = False
+    ) -> list[Row]:
+        """
+        Rows of key_range in index as of the current snapshot, in key order for
+        indexes supporting ranges unless table_order asks for the order the
+        table holds them in
+
+        Indexes only describe the latest state, so they are read under the write
+        lock, which is held for the time it takes to copy the matches. Readers of
+        an older state, or while a newer one is staged, filter their own rows
+        instead.
+        """
+        state = visible_state(self)
+        with self._write_lock:
+            if state is self._state and self._staged is None:
+                rows = list(index.scan(key_range))
+                if table_order and index.supports_ranges and len(rows) > 1:
+                    positions = self._row_positions(state)
+                    rows.sort(key=lambda row: positions[id(row)])
+                return rows
+
+        position = index.position
+        rows = [
+            row for row in self._rows_in(state) if key_range.contains(row.row[position])
+        ]
+        if index.supports_ranges and not table_order:
+            rows.sort(key=lambda row: row.row[position])
+        return rows
+
+    def _row_positions(self, state: TableState) -> dict[int, int]:
+        """
+        Position of every row of the latest state by id, called with the write
+        lock held. Kept across appends, which extend the same list.
+        """
+        cached = self._positions
+        if cached is None or cached[0] is not state.rows:
+            cached = self._positions = (state.rows, {})
+        rows, positions = cached
+        # Covers the rows appended since, a row added twice keeps its first place
+        for position in range(len(positions), state.length):
+            positions.setdefault(id(rows[position]), position)
+        return positions
+
+    def find_index(self, position: int, ranged: bool) -> Index | None:
+        """
+        Best index on the column at position, ranged lookups need an index that
+        supports ranges, point lookups prefer hash indexes
+        """
+        candidates = [
+            index
+            for index in self.indexes.values()
+            if index.position == position and (index.supports_ranges or not ranged)
+        ]
+        candidates.sort(key=lambda index: index.kind != "HASH")
+        return candidates[0] if candidates else None
+
+    def _condition_ranges(self, conditions: list[Condition]) -> dict[int, KeyRange]:
+        """Keys of `column op literal` conditions, keyed by column position"""
+        ranges: dict[int, KeyRange] = {}
+        for condition in conditions:
+            left, right = condition.left, condition.right
+            operation = condition.operation.operation
+            if isinstance(left, Literal) and isinstance(right, Column):
+                left, right = right, left
+                operation = FLIPPED_OPERATIONS.get(operation, "")
+            if not isinstance(left, Column) or not isinstance(right, Literal):
+                continue
+
+            key_range = KeyRange.from_comparison(operation, right.value)
+            positions = [
+                position
+                for position, column in enumerate(self.columns)
+                if column.name == left.name
+            ]
+            if key_range is None or not positions:
+                continue
+            position = positions[0]
+            if position in ranges:
+                key_range = ranges[position].intersect(key_range)
+            ranges[position] = key_range
+        return ranges
+
+    def _index_candidates(
+        self, conditions: list[Condition], ranges: dict[int, KeyRange] | None = None
+    ) -> list[Row] | None:
+        """
+        Rows an index narrows conditions down to, None when no index applies.
+        Conditions still have to be checked against the returned rows.
+        """
+        if not self.indexes:
+            return None
+        if ranges is None:
+            ranges = self._condition_ranges(conditions)
+
+        # Point lookups first, they are the most selective
+        for position, key_range in sorted(
+            ranges.items(), key=lambda item: not item[1].is_point
+        ):
+            index = self.find_index(position, not key_range.is_point)
+            if index is not None:
+                return self.index_lookup(index, key_range, table_order=True)
+        return None
 
     def project(self, column_names: list[str]) -> "Table":
         """Returns a new table projected to the given column names"""
@@ -233,38 +756,44 @@ class Table:
         projected_table = Table(self.name, projected_schema)
 
         projected_rows = list[Row]()
-        for row in self.rows:
+        for row in self.scan():
             projected_values = tuple(
                 row.row[projected_schema.index[col_name]] for col_name in column_names
             )
             projected_rows.append(Row(projected_values))
 
-        projected_table.rows = tuple(projected_rows)
+        projected_table.rows = projected_rows
         return projected_table
 
     def filter(self, conditions: list[Condition]) -> "Table":
         """
         Filters the table based on a list of conditions and returns a new table.
         """
-        filtered_table = Table(self.name, Scehma(self.columns))
+        schema = Scehma(self.columns)
+        filtered_table = Table(self.name, schema)
 
-        filtered_rows: list[Row] = []
-        for row in self.rows:
-            if all(
-                condition.evaluate(row, Scehma(self.columns))
-                for condition in conditions
-            ):
-                filtered_rows.append(row)
+        predicates = [condition.compile(schema) for condition in conditions]
+        ranges = self._condition_ranges(conditions)
+        candidates = self._index_candidates(conditions, ranges)
+        rows = self.scan(ranges) if candidates is None else candidates
 
-        filtered_table.rows = tuple(filtered_rows)
+        if len(predicates) == 1:
+            (predicate,) = predicates
+            filtered_rows = [row for row in rows if predicate(row)]
+        else:
+            filtered_rows = [
+                row for row in rows if all(predicate(row) for predicate in predicates)
+            ]
+
+        filtered_table.rows = filtered_rows
         return filtered_table
 
     def count_rows(self) -> int:
         """Equivalent to COUNT(*)"""
-        return len(self.rows)
+        return len(self._visible_state())
 
     def __repr__(self) -> str:
-        return f"Table(name={self.name}, columns={[col.name for col in self.columns]}, rows={len(self.rows)})"
+        return f"Table(name={self.name}, columns={[col.name for col in self.columns]}, rows={self.count_rows()})"
 
     def print_rows(self, limit: int | None = 200) -> None:
         rows_to_print = self.rows if limit is None else self.rows[:limit]
@@ -276,9 +805,80 @@ class Database:
     def __init__(self, name: str) -> None:
         self.name = name
         self.tables: dict[str, Table] = {}
+        self.schema_version = 0
+        """Bumped when tables are added or replaced, see plan_cache"""
+        self.wal: "WriteAheadLog | None" = None
+        """Set by wal.DurableStore, tables added later log through it as well"""
+
+    @contextmanager
+    def snapshot(self) -> Iterator[Snapshot]:
+        """
+        Pins the current state of every table, reads inside the block see the
+        database as it was when it was entered. Nested blocks reuse the outer
+        snapshot, inside a transaction this is the transaction's snapshot.
+        """
+        transaction = ACTIVE_TRANSACTION.get()
+        active = ACTIVE_SNAPSHOT.get() if transaction is None else transaction.snapshot
+        if active is not None:
+            yield active
+            return
+
+        snapshot = Snapshot.capture(self)
+        token = ACTIVE_SNAPSHOT.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            ACTIVE_SNAPSHOT.reset(token)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """
+        Buffers the mutations of this database's tables made inside the block,
+        they are committed together when it exits and dropped if it raises.
+        Reads inside the block see the snapshot it started from plus its own
+        changes. Raises TransactionConflict if another commit changed a table the
+        block wrote to in the meantime.
+
+            with db.transaction():
+                accounts.delete_row_by_index(0)
+                ledger.add_row(Row((1, -100)))
+        """
+        if ACTIVE_TRANSACTION.get() is not None:
+            raise ValueError("Transactions can't be nested")
+
+        transaction = Transaction(self)
+        token = ACTIVE_TRANSACTION.set(transaction)
+        try:
+            yield transaction
+        except BaseException:
+            transaction.rollback()
+            raise
+        finally:
+            ACTIVE_TRANSACTION.reset(token)
+        if not transaction.closed:
+            transaction.commit()
 
     def add_table(self, table: Table) -> None:
-        self.tables[table.name] = table
+        if self.wal is None:
+            self._attach_table(table)
+            return
+
+        record = {
+            "op": "create",
+            "table": table.name,
+            "columns": [(column.name, column.col_type) for column in table.columns],
+            "rows": [row.row for row in table.scan()],
+        }
+        # Readers find the table once its record is synced
+        self.wal.write(record, lambda: table, self._attach_table)
+
+    def _attach_table(self, table: Table) -> None:
+        table.wal = self.wal
+        with COMMIT_LOCK:
+            # Replaced rather than changed, snapshots iterate it
+            self.tables = {**self.tables, table.name: table}
+        self.schema_version += 1
 
     def get_table(self, name: str) -> Table | None:
         return self.tables.get(name)
+
@@ -0,0 +1,198 @@
+"""
+Zone maps: per chunk minimum, maximum and NULL count of every column
+
+A table's rows are cut into chunks of ZONE_ROWS consecutive rows. Scans given the
+key ranges a filter needs skip every chunk whose zone rules out a match, which
+for naturally clustered columns (timestamps, auto-increment ids) is most of them.
+
+Zones only ever widen as rows are appended, so a zone map also describes every
+prefix of its row list, which is what older MVCC states read.
+"""
+
+from typing import TYPE_CHECKING, Any, Iterator
+
+from PQL.engine_v1.models.index_models import KeyRange
+
+if TYPE_CHECKING:
+    from PQL.engine_v1.models.schema_models import Row
+
+ZONE_ROWS = 1024
+"""Rows per zone map chunk"""
+
+
+class _Unordered:
+    """Bound of a zone whose values can't be compared with each other"""
+
+    def __repr__(self) -> str:
+        return "UNORDERED"
+
+
+UNORDERED: Any = _Unordered()
+
+
+def _merge(old: Any, new: Any, pick: Any) -> Any:
+    if old is None:
+        return new
+    if new is None:
+        return old
+    if old is UNORDERED or new is UNORDERED:
+        return UNORDERED
+    try:
+        return pick(old, new)
+    except TypeError:
+        return UNORDERED
+
+
+def _bounds(values: list[Any]) -> tuple[Any, Any]:
+    """Smallest and largest of values, None for an empty list"""
+    if not values:
+        return None, None
+    try:
+        return min(values), max(values)
+    except TypeError:
+        return UNORDERED, UNORDERED
+
+
+def may_match(key_range: KeyRange, low: Any, high: Any) -> bool:
+    """Whether a zone with values between low and high can hold a key of key_range"""
+    if low is None:
+        # Only NULLs, which never compare equal or ordered to anything
+        return False
+    if low is UNORDERED:
+        return True
+    try:
+        if key_range.high is not None and (
+            low > key_range.high
+            or (low == key_range.high and not key_range.high_inclusive)
+        ):
+            return False
+        if key_range.low is not None and (
+            high < key_range.low
+            or (high == key_range.low and not key_range.low_inclusive)
+        ):
+            return False
+    except TypeError:
+        return True
+    return True
+
+
+class ZoneMap:
+    """
+    Zones of the chunks of one row list, column major: mins[column][chunk]
+
+    rows is the list described, a table builds a new zone map when it replaces
+    its list and extends this one as rows are appended to it
+    """
+
+    def __init__(
+        self, rows: list["Row"], width: int, chunk_rows: int = ZONE_ROWS
+    ) -> None:
+        if chunk_rows < 1:
+            raise ValueError("Zone map chunks need at least one row")
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+        self.length = 0
+        """Rows of the list the zones cover"""
+        self.mins: list[list[Any]] = [[] for _ in range(width)]
+        self.maxs: list[list[Any]] = [[] for _ in range(width)]
+        self.nulls: list[list[int]] = [[] for _ in range(width)]
+
+    @classmethod
+    def build(
+        cls, rows: list["Row"], length: int, width: int, chunk_rows: int = ZONE_ROWS
+    ) -> "ZoneMap":
+        zones = cls(rows, width, chunk_rows)
+        zones.extend(length)
+        return zones
+
+    def __len__(self) -> int:
+        """Number of chunks"""
+        return -(-self.length // self.chunk_rows)
+
+    def extend(self, length: int) -> None:
+        """Adds the rows of the list from the covered length up to length"""
+        size = self.chunk_rows
+        if length == self.length + 1 and self.length % size:
+            self._add_row(self.length // size)
+            return
+        while self.length < length:
+            chunk, offset = divmod(self.length, size)
+            stop = min(length, self.length + size - offset)
+            values = [row.row for row in self.rows[self.length : stop]]
+            for column, column_values in enumerate(zip(*values)):
+                present = [value for value in column_values if value is not None]
+                low, high = _bounds(present)
+                nulls = len(column_values) - len(present)
+                if offset:
+                    mins, maxs = self.mins[column], self.maxs[column]
+                    if low is not None and mins[chunk] is not UNORDERED:
+                        mins[chunk] = _merge(mins[chunk], low, min)
+                        maxs[chunk] = _merge(maxs[chunk], high, max)
+                    if nulls:
+                        self.nulls[column][chunk] += nulls
+                else:
+                    self.mins[column].append(low)
+                    self.maxs[column].append(high)
+                    self.nulls[column].append(nulls)
+            self.length = stop
+
+    def _add_row(self, chunk: int) -> None:
+        """extend for one row going to an existing chunk, the add_row case"""
+        values = self.rows[self.length].row
+        for column, value in enumerate(values):
+            if value is None:
+                self.nulls[column][chunk] += 1
+                continue
+            mins, maxs = self.mins[column], self.maxs[column]
+            low, high = mins[chunk], maxs[chunk]
+            if low is None:
+                mins[chunk] = maxs[chunk] = value
+            elif low is not UNORDERED:
+                try:
+                    if value < low:
+                        mins[chunk] = value
+                    elif value > high:
+                        maxs[chunk] = value
+                except TypeError:
+                    mins[chunk] = maxs[chunk] = UNORDERED
+        self.length += 1
+
+    def zone(self, column: int, chunk: int) -> tuple[Any, Any, int]:
+        """(min, max, NULL count) of a column in a chunk"""
+        return (
+            self.mins[column][chunk],
+            self.maxs[column][chunk],
+            self.nulls[column][chunk],
+        )
+
+    def spans(
+        self, ranges: dict[int, KeyRange], length: int
+    ) -> Iterator[tuple[int, int]]:
+        """
+        [start, stop) positions of the first length rows that may hold rows with
+        a key in every range, keyed by column. Adjacent chunks are merged.
+        """
+        size = self.chunk_rows
+        covered = min(length, self.length)
+        columns = [
+            (key_range, self.mins[column], self.maxs[column])
+            for column, key_range in ranges.items()
+        ]
+
+        start: int | None = None
+        for chunk in range(-(-covered // size)):
+            keep = all(
+                may_match(key_range, mins[chunk], maxs[chunk])
+                for key_range, mins, maxs in columns
+            )
+            if keep and start is None:
+                start = chunk * size
+            elif not keep and start is not None:
+                yield start, chunk * size
+                start = None
+
+        if start is not None:
+            yield start, min(covered, length)
+        # Rows the zones don't cover yet can't be ruled out
+        if covered < length:
+            yield covered, length
@@ -0,0 +1,218 @@
+from abc import ABC, abstractmethod
+from operator import itemgetter
+from typing import Any, Callable, Iterable, Iterator, Literal, Sequence
+
+from PQL.engine_v1.models.schema_models import Row
+
+AggregateFunction = Literal["COUNT", "SUM", "AVG", "MIN", "MAX"]
+
+
+class Accumulator(ABC):
+    """Fixed size running state of one aggregate for one group"""
+
+    __slots__ = ()
+
+    @abstractmethod
+    def add(self, value: Any) -> None:
+        """Feeds one input value, NULL (None) included"""
+
+    @abstractmethod
+    def result(self) -> Any:
+        """Aggregate of the values fed so far"""
+
+    @abstractmethod
+    def merge(self, other: "Accumulator") -> None:
+        """Folds in the state of an accumulator fed a different part of the input"""
+
+
+class CountAccumulator(Accumulator):
+    __slots__ = ("count",)
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def add(self, value: Any) -> None:
+        if value is not None:
+            self.count += 1
+
+    def result(self) -> int:
+        return self.count
+
+    def merge(self, other: "CountAccumulator") -> None:  # type: ignore[override]
+        self.count += other.count
+
+
+class SumAccumulator(Accumulator):
+    __slots__ = ("total",)
+
+    def __init__(self) -> None:
+        self.total: Any = None
+
+    def add(self, value: Any) -> None:
+        if value is not None:
+            self.total = value if self.total is None else self.total + value
+
+    def result(self) -> Any:
+        return self.total
+
+    def merge(self, other: "SumAccumulator") -> None:  # type: ignore[override]
+        self.add(other.total)
+
+
+class AvgAccumulator(Accumulator):
+    __slots__ = ("total", "count")
+
+    def __init__(self) -> None:
+        self.total: Any = 0
+        self.count = 0
+
+    def add(self, value: Any) -> None:
+        if value is not None:
+            self.total += value
+            self.count += 1
+
+    def result(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def merge(self, other: "AvgAccumulator") -> None:  # type: ignore[override]
+        self.total += other.total
+        self.count += other.count
+
+
+class MinAccumulator(Accumulator):
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: Any = None
+
+    def add(self, value: Any) -> None:
+        if value is not None and (self.value is None or value < self.value):
+            self.value = value
+
+    def result(self) -> Any:
+        return self.value
+
+    def merge(self, other: "MinAccumulator") -> None:  # type: ignore[override]
+        self.add(other.value)
+
+
+class MaxAccumulator(Accumulator):
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: Any = None
+
+    def add(self, value: Any) -> None:
+        if value is not None and (self.value is None or value > self.value):
+            self.value = value
+
+    def result(self) -> Any:
+        return self.value
+
+    def merge(self, other: "MaxAccumulator") -> None:  # type: ignore[override]
+        self.add(other.value)
+
+
+ACCUMULATORS: dict[str, type[Accumulator]] = {
+    "COUNT": CountAccumulator,
+    "SUM": SumAccumulator,
+    "AVG": AvgAccumulator,
+    "MIN": MinAccumulator,
+    "MAX": MaxAccumulator,
+}
+
+
+Groups = dict[tuple[Any, ...], list[Accumulator]]
+"""Group key to the accumulators of its aggregates, in first seen order"""
+
+
+def partial_aggregate(
+    rows: Iterable[Row],
+    group_keys: Sequence[int],
+    aggregates: Sequence[tuple[AggregateFunction, int | None]],
+) -> Groups:
+    """
+    Accumulator state per group for rows, see hash_aggregate
+
+    Partial states of consecutive parts of the input combine with merge_groups,
+    which is how parallel.ParallelAggregate aggregates morsels independently
+    """
+    factories: list[type[Accumulator]] = []
+    for function, _ in aggregates:
+        factory = ACCUMULATORS.get(function)
+        if factory is None:
+            raise ValueError(f"Unsupported aggregate function: {function}")
+        factories.append(factory)
+
+    # COUNT(*) counts rows, feed it a constant instead of a column value
+    getters: list[Callable[[tuple[Any, ...]], Any]] = [
+        itemgetter(index) if index is not None else (lambda _: 1)
+        for _, index in aggregates
+    ]
+    steps = list(enumerate(getters))
+
+    def new_state() -> list[Accumulator]:
+        return [factory() for factory in factories]
+
+    groups: Groups = {}
+    if not group_keys:
+        groups[()] = new_state()
+
+    group_key: Callable[[tuple[Any, ...]], tuple[Any, ...]] = (
+        (lambda values: tuple(values[i] for i in group_keys))
+        if group_keys
+        else (lambda _: ())
+    )
+
+    for row in rows:
+        values = row.row
+        key = group_key(values)
+        state = groups.get(key)
+        if state is None:
+            state = groups[key] = new_state()
+        for position, getter in steps:
+            state[position].add(getter(values))
+
+    return groups
+
+
+def merge_groups(groups: Groups, other: Groups) -> None:
+    """
+    Folds the partial state other into groups, groups only seen in other are
+    appended so merging parts in input order keeps first seen group order
+    """
+    for key, state in other.items():
+        existing = groups.get(key)
+        if existing is None:
+            groups[key] = state
+        else:
+            for accumulator, partial in zip(existing, state):
+                accumulator.merge(partial)
+
+
+def finish_groups(
+    groups: Groups, having: Callable[[Row], bool] | None = None
+) -> Iterator[Row]:
+    """Output rows of the group states, the group key then the aggregate results"""
+    for key, state in groups.items():
+        output = Row(key + tuple(accumulator.result() for accumulator in state))
+        if having is None or having(output):
+            yield output
+
+
+def hash_aggregate(
+    rows: Iterable[Row],
+    group_keys: Sequence[int],
+    aggregates: Sequence[tuple[AggregateFunction, int | None]],
+    having: Callable[[Row], bool] | None = None,
+) -> Iterator[Row]:
+    """
+    Groups a row stream on group_keys and computes aggregates per group
+
+    aggregates are (function, column index) pairs, a column index of None is
+    COUNT(*). Rows are consumed one at a time so memory is O(groups). Output rows
+    are the group key values followed by the aggregate results, in first seen
+    group order, and only the ones passing having are emitted. Without group_keys
+    the whole input is a single group, which is emitted even for empty input.
+    """
+    yield from finish_groups(partial_aggregate(rows, group_keys, aggregates), having)
@@ -0,0 +1,121 @@
+from operator import itemgetter
+from typing import Any, Callable, Iterable, Iterator, Literal, Sequence
+
+from PQL.engine_v1.models.schema_models import Row
+
+JoinType = Literal["INNER", "LEFT", "RIGHT", "FULL"]
+JoinSide = Literal["LEFT", "RIGHT"]
+
+JOIN_TYPES = ("INNER", "LEFT", "RIGHT", "FULL")
+
+
+def _size(rows: Iterable[Row]) -> float:
+    """Row count of a materialized input, streams are assumed to be unbounded"""
+    try:
+        return len(rows)  # type: ignore
+    except TypeError:
+        return float("inf")
+
+
+def _key_getter(indices: Sequence[int]) -> Callable[[tuple[Any, ...]], Any]:
+    if not indices:
+        raise ValueError("Hash join requires at least one key column")
+    # single keys stay scalar, both sides always use the same number of keys
+    return itemgetter(*indices)
+
+
+def hash_join(
+    left: Iterable[Row],
+    right: Iterable[Row],
+    left_keys: Sequence[int],
+    right_keys: Sequence[int],
+    join_type: JoinType = "INNER",
+    *,
+    left_width: int,
+    right_width: int,
+    build_side: JoinSide | None = None,
+) -> Iterator[Row]:
+    """
+    Equi-joins two row streams on left_keys = right_keys
+
+    The build side is fully loaded into a hash table and the probe side is streamed
+    against it, so the join runs in O(len(left) + len(right) + output). When
+    build_side is not given the smaller input is used, output rows are always laid
+    out as left values followed by right values, and missing sides of outer joins
+    are padded with None. NULL keys never match.
+    """
+    if join_type not in JOIN_TYPES:
+        raise ValueError(f"Unsupported join type: {join_type}")
+    if len(left_keys) != len(right_keys):
+        raise ValueError("Join key counts do not match")
+
+    if build_side is None:
+        build_side = "LEFT" if _size(left) <= _size(right) else "RIGHT"
+
+    if build_side == "LEFT":
+        build, probe = left, right
+        build_key, probe_key = _key_getter(left_keys), _key_getter(right_keys)
+        keep_build = join_type in ("LEFT", "FULL")
+        keep_probe = join_type in ("RIGHT", "FULL")
+        build_padding, probe_padding = (None,) * right_width, (None,) * left_width
+
+        def combine(build_row: Row, probe_row: Row) -> Row:
+            return Row(build_row.row + probe_row.row)
+
+        def pad_build(row: Row) -> Row:
+            return Row(row.row + build_padding)
+
+        def pad_probe(row: Row) -> Row:
+            return Row(probe_padding + row.row)
+
+    else:
+        build, probe = right, left
+        build_key, probe_key = _key_getter(right_keys), _key_getter(left_keys)
+        keep_build = join_type in ("RIGHT", "FULL")
+        keep_probe = join_type in ("LEFT", "FULL")
+        build_padding, probe_padding = (None,) * left_width, (None,) * right_width
+
+        def combine(build_row: Row, probe_row: Row) -> Row:
+            return Row(probe_row.row + build_row.row)
+
+        def pad_build(row: Row) -> Row:
+            return Row(build_padding + row.row)
+
+        def pad_probe(row: Row) -> Row:
+            return Row(row.row + probe_padding)
+
+    if len(left_keys) == 1:
+        has_null: Callable[[Any], bool] = lambda key: key is None  # noqa: E731
+    else:
+        has_null = lambda key: None in key  # noqa: E731
+
+    # Build: key -> positions in build_rows
+    build_rows: list[Row] = []
+    table: dict[Any, list[int]] = {}
+    for row in build:
+        key = build_key(row.row)
+        if not has_null(key):
+            table.setdefault(key, []).append(len(build_rows))
+        build_rows.append(row)
+
+    matched = bytearray(len(build_rows)) if keep_build else None
+
+    # Probe
+    for row in probe:
+        key = probe_key(row.row)
+        positions = None if has_null(key) else table.get(key)
+
+        if positions is None:
+            if keep_probe:
+                yield pad_probe(row)
+            continue
+
+        for position in positions:
+            if matched is not None:
+                matched[position] = 1
+            yield combine(build_rows[position], row)
+
+    if matched is not None:
+        for position, row in enumerate(build_rows):
+            if not matched[position]:
+                yield pad_build(row)
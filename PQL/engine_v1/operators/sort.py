@@ -0,0 +1,184 @@
+import heapq
+import pickle
+import tempfile
+from itertools import islice
+from typing import IO, Any, Callable, Iterable, Iterator, Literal, Sequence
+
+from PQL.engine_v1.models.schema_models import Row
+
+Direction = Literal["ASC", "DESC"]
+
+DEFAULT_MAX_ROWS_IN_MEMORY = 100_000
+"""Rows held in memory before a sorted run is spilled to disk"""
+
+MERGE_FAN_IN = 64
+"""Maximum number of runs merged at once, bounds open files and read buffers"""
+
+SPILL_BATCH_SIZE = 1_000
+"""Rows pickled together in a run file"""
+
+
+class _Descending:
+    """Key wrapper that inverts ordering, used when ASC and DESC keys are mixed"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+def sort_key(
+    keys: Sequence[tuple[int, Direction]],
+) -> tuple[Callable[[Row], Any], bool]:
+    """
+    Builds a key function for the given (column index, direction) pairs
+
+    Returns the key and whether it must be applied in reverse. NULLs sort last for
+    ASC and first for DESC.
+    """
+    if not keys:
+        raise ValueError("Sort requires at least one key")
+    for _, direction in keys:
+        if direction not in ("ASC", "DESC"):
+            raise ValueError(f"Unsupported sort direction: {direction}")
+
+    indices = [index for index, _ in keys]
+    directions = {direction for _, direction in keys}
+
+    if len(directions) == 1:
+
+        def key(row: Row) -> Any:
+            values = row.row
+            return tuple((values[i] is None, values[i]) for i in indices)
+
+        return key, directions == {"DESC"}
+
+    descending = [direction == "DESC" for _, direction in keys]
+
+    def mixed_key(row: Row) -> Any:
+        values = row.row
+        return tuple(
+            _Descending((values[i] is None, values[i]))
+            if desc
+            else (values[i] is None, values[i])
+            for i, desc in zip(indices, descending)
+        )
+
+    return mixed_key, False
+
+
+def _write_run(rows: list[Row], spill_dir: str | None) -> IO[bytes]:
+    run = tempfile.TemporaryFile(dir=spill_dir)
+    for start in range(0, len(rows), SPILL_BATCH_SIZE):
+        batch = [row.row for row in rows[start : start + SPILL_BATCH_SIZE]]
+        pickle.dump(batch, run, protocol=pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run: IO[bytes]) -> Iterator[Row]:
+    try:
+        while True:
+            try:
+                batch = pickle.load(run)
+            except EOFError:
+                return
+            for values in batch:
+                yield Row(values)
+    finally:
+        run.close()
+
+
+def _merge_runs(
+    runs: list[IO[bytes]],
+    key: Callable[[Row], Any],
+    reverse: bool,
+    spill_dir: str | None,
+) -> Iterator[Row]:
+    # Merge in passes until every remaining run can be read at the same time
+    while len(runs) > MERGE_FAN_IN:
+        merged: list[IO[bytes]] = []
+        for start in range(0, len(runs), MERGE_FAN_IN):
+            group = runs[start : start + MERGE_FAN_IN]
+            stream = heapq.merge(
+                *(_read_run(run) for run in group), key=key, reverse=reverse
+            )
+            merged.append(_write_stream(stream, spill_dir))
+        runs = merged
+
+    yield from heapq.merge(*(_read_run(run) for run in runs), key=key, reverse=reverse)
+
+
+def _write_stream(rows: Iterator[Row], spill_dir: str | None) -> IO[bytes]:
+    run = tempfile.TemporaryFile(dir=spill_dir)
+    while batch := [row.row for row in islice(rows, SPILL_BATCH_SIZE)]:
+        pickle.dump(batch, run, protocol=pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def external_sort(
+    rows: Iterable[Row],
+    keys: Sequence[tuple[int, Direction]],
+    max_rows_in_memory: int = DEFAULT_MAX_ROWS_IN_MEMORY,
+    spill_dir: str | None = None,
+) -> Iterator[Row]:
+    """
+    Sorts a row stream by keys while holding at most max_rows_in_memory rows
+
+    Inputs that fit the budget are sorted in memory. Larger inputs are cut into
+    sorted runs written to temporary files in spill_dir, which are then k-way
+    merged back as a stream.
+    """
+    if max_rows_in_memory < 1:
+        raise ValueError("max_rows_in_memory must be positive")
+
+    key, reverse = sort_key(keys)
+    iterator = iter(rows)
+    runs: list[IO[bytes]] = []
+
+    try:
+        while True:
+            buffer = list(islice(iterator, max_rows_in_memory))
+            buffer.sort(key=key, reverse=reverse)
+
+            if not runs and len(buffer) < max_rows_in_memory:
+                # Everything fit in memory, no need to touch the disk
+                yield from buffer
+                return
+
+            if buffer:
+                runs.append(_write_run(buffer, spill_dir))
+            if len(buffer) < max_rows_in_memory:
+                break
+            del buffer
+
+        yield from _merge_runs(runs, key, reverse, spill_dir)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def top_n(
+    rows: Iterable[Row], keys: Sequence[tuple[int, Direction]], count: int
+) -> list[Row]:
+    """
+    First count rows of the row stream sorted by keys
+
+    Keeps a heap of the count best rows seen so far, O(n log count) time and
+    O(count) memory instead of sorting the whole input. Ties keep input order,
+    as in external_sort.
+    """
+    if count < 0:
+        raise ValueError("count must not be negative")
+
+    key, reverse = sort_key(keys)
+    if reverse:
+        return heapq.nlargest(count, rows, key=key)
+    return heapq.nsmallest(count, rows, key=key)
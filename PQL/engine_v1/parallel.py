@@ -0,0 +1,374 @@
+"""
+Morsel-driven parallel execution for engine_v1
+
+parallelize rewrites a physical plan so the pipelines reading large tables run
+on a process pool. The table is cut into morsels (row ranges, or page ranges of
+a storage.PagedTable, which workers map themselves instead of receiving rows),
+every worker runs the pipeline's filters and then its projection or a partial
+aggregate on one morsel, and the results are merged back in morsel order. Row
+order is therefore the same as a serial scan, ORDER BY and LIMIT above the
+parallel operator behave exactly as before.
+
+Query parameters live in a contextvar that worker processes don't see, so they
+are sent along with every morsel.
+"""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import count, islice
+from operator import itemgetter
+from typing import Any, Iterable, Iterator, Sequence
+
+from PQL.engine_v1.compiler import prepare_expr, prepare_row
+from PQL.engine_v1.engine import Filter, HashAggregate, Operator, Project, TableScan
+from PQL.engine_v1.models.parser_models import Expr
+from PQL.engine_v1.models.schema_models import Row, Table
+from PQL.engine_v1.operators.aggregate import (
+    Groups,
+    finish_groups,
+    merge_groups,
+    partial_aggregate,
+)
+from PQL.engine_v1.semantic_resolver import (
+    QUERY_PARAMETERS,
+    bind_parameters,
+    format_expr,
+)
+from PQL.engine_v1.storage import PagedTable
+
+DEFAULT_PARALLELISM = 1
+"""Worker processes per parallel operator, 1 keeps execution serial"""
+
+DEFAULT_MORSEL_SIZE = 10_000
+"""Rows per morsel, tables that fit in one morsel are scanned serially"""
+
+MORSELS_IN_FLIGHT_PER_WORKER = 2
+"""
+Morsels submitted ahead of the one being merged, bounds memory and lets LIMIT
+stop a scan early
+"""
+
+
+@dataclass
+class Fragment:
+    """Pipeline every worker runs on its morsel, bound to the scanned table's rows"""
+
+    predicates: list[Expr] = field(default_factory=list)
+    projection: list[Expr] | None = None
+    inputs: list[Expr] | None = None
+    """Group keys then aggregate arguments, set for partial aggregation"""
+    group_count: int = 0
+    specs: list[tuple[Any, int | None]] = field(default_factory=list)
+
+
+@dataclass
+class Morsel:
+    """Either the values of a range of rows or a page range of a paged table file"""
+
+    values: list[tuple[Any, ...]] | None = None
+    path: str | None = None
+    file_id: int = 0
+    first_page: int = 0
+    last_page: int = 0
+
+
+# Paged tables opened by this (worker) process, keyed by path and inode
+_opened_tables: dict[tuple[str, int], PagedTable] = {}
+
+
+def _morsel_values(morsel: Morsel) -> Iterable[tuple[Any, ...]]:
+    if morsel.values is not None:
+        return morsel.values
+
+    assert morsel.path is not None
+    key = (morsel.path, morsel.file_id)
+    table = _opened_tables.get(key)
+    if table is None:
+        table = PagedTable(morsel.path)
+        if table.file_id != morsel.file_id:
+            table.close()
+            raise RuntimeError(f"'{morsel.path}' was replaced during a parallel scan")
+        _opened_tables[key] = table
+    return (row.row for row in table.scan_pages(morsel.first_page, morsel.last_page))
+
+
+def run_fragment(
+    fragment: Fragment, morsel: Morsel, parameters: Sequence[Any]
+) -> tuple[int, list[tuple[Any, ...]] | Groups]:
+    """
+    Runs in a worker: the number of rows the morsel held, and its output rows or
+    its partial group states
+    """
+    with bind_parameters(parameters):
+        scanned = count()
+        # zip pulls the counter after every row, it ends at the morsel's rows
+        values: Iterable[tuple[Any, ...]] = map(
+            itemgetter(0), zip(_morsel_values(morsel), scanned)
+        )
+        for predicate in fragment.predicates:
+            values = filter(prepare_expr(predicate)(), values)
+
+        result: list[tuple[Any, ...]] | Groups
+        if fragment.inputs is not None:
+            inputs = prepare_row(fragment.inputs)()
+            result = partial_aggregate(
+                (Row(inputs(row)) for row in values),
+                range(fragment.group_count),
+                fragment.specs,
+            )
+        elif fragment.projection is not None:
+            project = prepare_row(fragment.projection)()
+            result = [project(row) for row in values]
+        else:
+            result = list(values)
+        return next(scanned), result
+
+
+_pools: dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by every parallel operator with this many workers"""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+
+def shutdown_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+
+class MorselScan(Operator):
+    """
+    Base class of the parallel operators: cuts the table of scan into morsels and
+    runs a Fragment on each in a process pool, results come back in table order
+    """
+
+    def __init__(
+        self,
+        scan: TableScan,
+        predicates: list[Expr],
+        workers: int,
+        morsel_size: int = DEFAULT_MORSEL_SIZE,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("Parallel operators need at least one worker")
+        if morsel_size < 1:
+            raise ValueError("Morsel size must be at least 1")
+        self.scan = scan
+        self.table: Table = scan.table
+        self.predicates = predicates
+        self.workers = workers
+        self.morsel_size = morsel_size
+        self.fragment = Fragment([scan.scope.bind(expr) for expr in predicates])
+        self.rows_scanned = 0
+        """Rows of the morsels of the latest run, the input EXPLAIN ANALYZE reports"""
+
+    def morsels(self) -> Iterator[Morsel]:
+        table = self.table
+        if isinstance(table, PagedTable) and table.reads_file:
+            try:
+                replaced = os.stat(table.path).st_ino != table.file_id
+            except OSError:
+                replaced = True
+            if not replaced:
+                ranges = self.scan.key_ranges()
+                if ranges is None:
+                    return
+                rows_per_page = table.count_rows() / max(table.page_count, 1)
+                pages = max(1, round(self.morsel_size / max(rows_per_page, 1)))
+                # Pages the zones rule out are never sent to a worker
+                spans = table.page_spans(ranges) if ranges else [(0, table.page_count)]
+                for first_page, last_page in spans:
+                    for first in range(first_page, last_page, pages):
+                        yield Morsel(
+                            path=str(table.path),
+                            file_id=table.file_id,
+                            first_page=first,
+                            last_page=min(first + pages, last_page),
+                        )
+                return
+
+        # Table.scan skips the chunks the scan's zone maps rule out
+        rows = self.scan.rows()
+        while morsel := [row.row for row in islice(rows, self.morsel_size)]:
+            yield Morsel(values=morsel)
+
+    def results(self) -> Iterator[Any]:
+        """Fragment results of every morsel, in morsel order"""
+        parameters = list(QUERY_PARAMETERS.get(()))
+        self.rows_scanned = 0
+        pool = get_pool(self.workers)
+        morsels = self.morsels()
+        pending: deque[Future] = deque(
+            pool.submit(run_fragment, self.fragment, morsel, parameters)
+            for morsel in islice(morsels, self.workers * MORSELS_IN_FLIGHT_PER_WORKER)
+        )
+        try:
+            while pending:
+                scanned, result = pending.popleft().result()
+                self.rows_scanned += scanned
+                morsel = next(morsels, None)
+                if morsel is not None:
+                    pending.append(
+                        pool.submit(run_fragment, self.fragment, morsel, parameters)
+                    )
+                yield result
+        finally:
+            # A consumer that stopped early (LIMIT) doesn't wait for the rest
+            for future in pending:
+                future.cancel()
+
+    def children(self) -> list[Operator]:
+        return [self.scan]
+
+    def size_hint(self) -> int | None:
+        return self.scan.size_hint()
+
+    def _describe(self, name: str) -> str:
+        description = f"{name} workers={self.workers} morsel={self.morsel_size}"
+        if self.predicates:
+            conditions = " AND ".join(format_expr(expr) for expr in self.predicates)
+            description += f" filter={conditions}"
+        return description
+
+
+class ParallelScan(MorselScan):
+    """Scan, filters and optionally a projection, run per morsel"""
+
+    def __init__(
+        self,
+        scan: TableScan,
+        predicates: list[Expr],
+        project: Project | None,
+        workers: int,
+        morsel_size: int = DEFAULT_MORSEL_SIZE,
+    ) -> None:
+        super().__init__(scan, predicates, workers, morsel_size)
+        self.project = project
+        if project is None:
+            self.scope = scan.scope
+        else:
+            self.scope = project.scope
+            self.fragment.projection = project.bound
+
+    def rows(self) -> Iterator[Row]:
+        for values in self.results():
+            for row in values:
+                yield Row(row)
+
+    def describe(self) -> str:
+        description = self._describe("ParallelScan")
+        if self.project is not None:
+            description += f" {self.project.describe()}"
+        return description
+
+
+class ParallelAggregate(MorselScan):
+    """
+    Scan, filters and a partial aggregate per morsel, the partial group states
+    are merged in morsel order so groups come out in first seen order
+    """
+
+    def __init__(
+        self,
+        scan: TableScan,
+        predicates: list[Expr],
+        aggregate: HashAggregate,
+        workers: int,
+        morsel_size: int = DEFAULT_MORSEL_SIZE,
+    ) -> None:
+        super().__init__(scan, predicates, workers, morsel_size)
+        self.aggregate = aggregate
+        self.scope = aggregate.scope
+        self.fragment.inputs = aggregate.inputs
+        self.fragment.group_count = len(aggregate.group_by)
+        self.fragment.specs = aggregate.specs
+
+    def rows(self) -> Iterator[Row]:
+        group_keys = range(len(self.aggregate.group_by))
+        # Starts with the empty input's groups, the single group of a global aggregate
+        groups = partial_aggregate((), group_keys, self.aggregate.specs)
+        for partial in self.results():
+            merge_groups(groups, partial)
+        yield from finish_groups(groups)
+
+    def describe(self) -> str:
+        return f"{self._describe('ParallelAggregate')} {self.aggregate.describe()}"
+
+
+def _scan_pipeline(operator: Operator) -> tuple[TableScan, list[Expr]] | None:
+    """The table scan and filters of a chain of Filters over a TableScan"""
+    predicates: list[Expr] = []
+    while isinstance(operator, Filter):
+        predicates.insert(0, operator.predicate)
+        operator = operator.child
+    if type(operator) is not TableScan:
+        return None
+    return operator, predicates
+
+
+def parallelize(
+    plan: Operator,
+    workers: int = DEFAULT_PARALLELISM,
+    morsel_size: int = DEFAULT_MORSEL_SIZE,
+) -> Operator:
+    """
+    Replaces the scan pipelines of tables larger than one morsel with parallel
+    operators: Filters over a TableScan, optionally topped by a Project or a
+    HashAggregate. Everything above them is left as is.
+    """
+    if workers < 2:
+        return plan
+
+    def replace(operator: Operator) -> Operator:
+        if isinstance(operator, (Project, HashAggregate)):
+            pipeline = _scan_pipeline(operator.child)
+            if pipeline is not None and _worth_it(pipeline[0], morsel_size):
+                scan, predicates = pipeline
+                parallel: Operator
+                if isinstance(operator, Project):
+                    parallel = ParallelScan(
+                        scan, predicates, operator, workers, morsel_size
+                    )
+                else:
+                    parallel = ParallelAggregate(
+                        scan, predicates, operator, workers, morsel_size
+                    )
+                return _annotated(parallel, operator, workers)
+
+        pipeline = _scan_pipeline(operator)
+        if pipeline is not None:
+            scan, predicates = pipeline
+            if not _worth_it(scan, morsel_size):
+                return operator
+            parallel = ParallelScan(scan, predicates, None, workers, morsel_size)
+            return _annotated(parallel, operator, workers)
+
+        for attribute in ("child", "left", "right"):
+            child = getattr(operator, attribute, None)
+            if isinstance(child, Operator):
+                setattr(operator, attribute, replace(child))
+        return operator
+
+    return replace(plan)
+
+
+def _worth_it(scan: TableScan, morsel_size: int) -> bool:
+    return scan.table.count_rows() > morsel_size
+
+
+def _annotated(parallel: Operator, replaced: Operator, workers: int) -> Operator:
+    parallel.estimated_rows = replaced.estimated_rows
+    if replaced.estimated_cost is not None:
+        parallel.estimated_cost = replaced.estimated_cost / workers
+    return parallel
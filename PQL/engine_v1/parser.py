@@ -1,15 +1,27 @@
 from PQL.engine_v1.models.lexer_models import Token
 from PQL.engine_v1.models.parser_models import (
+    BinaryExpr,
     ColumnExpr,
+    ExplainQuery,
     Expr,
+    FromItem,
+    FunctionCall,
     Join,
     LiteralExpr,
+    OrderByItem,
+    ParamExpr,
     Query,
     SelectItem,
     SelectQuery,
+    StarExpr,
+    SubqueryRef,
     TableRef,
+    UnaryExpr,
 )
 
+JOIN_KINDS = ("INNER", "LEFT", "RIGHT", "FULL")
+SELECT_ITEM_STARTS = ("IDENT", "NUMBER", "STRING", "BOOLEAN", "LPAREN", "NOT", "ARITH")
+
 
 class Parser:
     tokens: list[Token]
@@ -42,6 +54,18 @@ class Parser:
         self.pos += 1
         return token
 
+    def match_value(
+        self, expected_kind: str, values: tuple[str, ...]
+    ) -> Token | None:
+        """
+        Like match, but the token value must also be one of values, used for ARITH
+        """
+        token = self.current()
+        if not token or token.kind != expected_kind or token.value not in values:
+            return None
+        self.pos += 1
+        return token
+
     def parse(self) -> Query:
         current = self.current()
 
@@ -52,23 +76,125 @@ class Parser:
 
         match kind:
             case "SELECT":
-                return self.parse_select()
+                query = self.parse_select()
+
+            case "EXPLAIN":
+                query = self.parse_explain()
 
             case _:
                 raise SyntaxError("Invalid query type")
 
+        if trailing := self.current():
+            raise SyntaxError(f"Unexpected token after query: {trailing}")
+
+        return query
+
+    def parse_explain(self) -> ExplainQuery:
+        self.eat("EXPLAIN")
+        analyze = self.match("ANALYZE") is not None
+        # Not a keyword, MEMORY stays usable as a name everywhere else
+        memory = analyze and self.match_value("IDENT", ("MEMORY",)) is not None
+        return ExplainQuery(
+            query=self.parse_select(), analyze=analyze, memory=memory
+        )
+
     def parse_select(self) -> SelectQuery:
         self.eat("SELECT")
         columns = self.parse_select_columns()
         self.eat("FROM")
         from_table = self.parse_from_statement()
 
-        joins: list[Join] = []  # future JOIN parsing
-        where = None  # future WHERE parsing
+        joins: list[Join] = []
+        while join := self.parse_join():
+            joins.append(join)
+
+        where = self.parse_expression() if self.match("WHERE") else None
+
+        group_by = None
+        if self.match("GROUP"):
+            self.eat("BY")
+            group_by = self.parse_expression_list()
 
-        return SelectQuery(select=columns, from_=from_table, joins=joins, where=where)
+        having = self.parse_expression() if self.match("HAVING") else None
 
+        order_by = None
+        if self.match("ORDER"):
+            self.eat("BY")
+            order_by = self.parse_order_by()
+
+        limit = int(self.eat("NUMBER").value) if self.match("LIMIT") else None
+
+        return SelectQuery(
+            select=columns,
+            from_=from_table,
+            joins=joins,
+            where=where,
+            group_by=group_by,
+            having=having,
+            order_by=order_by,
+            limit=limit,
+        )
+
+    def parse_expression_list(self) -> list[Expr]:
+        items = [self.parse_expression()]
+        while self.match("COMMA"):
+            items.append(self.parse_expression())
+        return items
+
+    # Precedence, loosest first: OR, AND, NOT, comparison, + -, * / %, unary -
     def parse_expression(self) -> Expr:
+        expr = self.parse_and()
+        while self.match("OR"):
+            expr = BinaryExpr(left=expr, op="OR", right=self.parse_and())
+        return expr
+
+    def parse_and(self) -> Expr:
+        expr = self.parse_not()
+        while self.match("AND"):
+            expr = BinaryExpr(left=expr, op="AND", right=self.parse_not())
+        return expr
+
+    def parse_not(self) -> Expr:
+        if self.match("NOT"):
+            return UnaryExpr(op="NOT", operand=self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> Expr:
+        expr = self.parse_additive()
+        if op := self.match("OP"):
+            operator = "!=" if op.value == "<>" else op.value
+            right = self.parse_additive()
+            expr = BinaryExpr(left=expr, op=operator, right=right)  # type: ignore
+        if self.match("IS"):
+            op = "IS NOT NULL" if self.match("NOT") else "IS NULL"
+            self.eat("NULL")
+            expr = UnaryExpr(op=op, operand=expr)
+        return expr
+
+    def parse_additive(self) -> Expr:
+        expr = self.parse_term()
+        while op := self.match_value("ARITH", ("+", "-")):
+            right = self.parse_term()
+            expr = BinaryExpr(left=expr, op=op.value, right=right)  # type: ignore
+        return expr
+
+    def parse_term(self) -> Expr:
+        expr = self.parse_unary()
+        while True:
+            if self.match("STAR"):
+                expr = BinaryExpr(left=expr, op="*", right=self.parse_unary())
+            elif op := self.match_value("ARITH", ("/", "%")):
+                right = self.parse_unary()
+                expr = BinaryExpr(left=expr, op=op.value, right=right)  # type: ignore
+            else:
+                return expr
+
+    def parse_unary(self) -> Expr:
+        if self.match_value("ARITH", ("-",)):
+            return UnaryExpr(op="-", operand=self.parse_unary())
+        return self.parse_primary()
+
+    def parse_primary(self) -> Expr:
         tok = self.current()
         if not tok:
             raise SyntaxError("Unexpected end of input")
@@ -79,18 +205,33 @@ class Parser:
             return expr
         elif tok.kind == "IDENT":
             ident = self.eat("IDENT").value
+            if self.match("LPAREN"):
+                return self.parse_function_call(ident)
             if self.match("DOT"):
                 col = self.eat("IDENT").value
                 return ColumnExpr(table=ident, name=col)  # type: ignore
             else:
                 return ColumnExpr(table=None, name=ident)
-        elif tok.kind in ("NUMBER", "STRING"):
-            return LiteralExpr(value=self.eat(tok.kind).👌👌👌value)
+        elif tok.kind in ("NUMBER", "STRING", "BOOLEAN", "NULL"):
+            # Literals keep their token text, see semantic_resolver.literal_value
+            return LiteralExpr(value=self.eat(tok.kind).value)
+        elif tok.kind == "PARAM":
+            # Only produced by plan_cache.normalize, never by the lexer
+            return ParamExpr(index=int(self.eat("PARAM").value))
         else:
             raise SyntaxError(f"Invalid expression: {tok}")
 
-    # TODO Support Expressions like (SALARY + BONUS) * 0.77 AS NET_EARNINGS
-    # Keeping simple as columns and literals for now
+    def parse_function_call(self, name: str) -> FunctionCall:
+        # Opening paren has already been matched
+        if self.match("STAR"):
+            args: list[Expr] = [StarExpr()]
+        elif self.current() and self.current().kind == "RPAREN":  # type: ignore
+            args = []
+        else:
+            args = self.parse_expression_list()
+        self.eat("RPAREN")
+        return FunctionCall(name=name, args=args)
+
     def parse_select_columns(self) -> list[SelectItem]:
         items: list[SelectItem] = []
 
@@ -99,33 +240,41 @@ class Parser:
             if not tok:
                 raise SyntaxError("Unexpected end of input")
 
-            if tok.kind == "IDENT":
-                ident = self.eat("IDENT").value
-
-                if self.match("DOT"):
-                    col = self.eat("IDENT").value
-                    expr = ColumnExpr(table=ident, name=col)  # type: ignore
-                else:
-                    expr = ColumnExpr(table=None, name=ident)
-
-            elif tok.kind in ("NUMBER", "STRING"):
-                expr = LiteralExpr(value=self.eat(tok.kind).value)
-
+            if self.match("STAR"):
+                items.append(SelectItem(StarExpr()))
+            elif (
+                tok.kind == "IDENT"
+                and self.pos + 2 < len(self.tokens)
+                and self.tokens[self.pos + 1].kind == "DOT"
+                and self.tokens[self.pos + 2].kind == "STAR"
+            ):
+                self.pos += 3
+                items.append(SelectItem(StarExpr(table=tok.value)))
             else:
-                raise SyntaxError(f"Invalid select item: {tok}")
+                if tok.kind not in SELECT_ITEM_STARTS:
+                    raise SyntaxError(f"Invalid select item: {tok}")
+
+                expr = self.parse_expression()
 
-            alias = None
-            if self.match("AS"):
-                alias = self.eat("IDENT").value
+                alias = None
+                if self.match("AS"):
+                    alias = self.eat("IDENT").value
 
-            items.append(SelectItem(expr, alias))
+                items.append(SelectItem(expr, alias))
 
             if not self.match("COMMA"):
                 break
 
         return items
 
-    def parse_from_statement(self) -> TableRef:
+    def parse_from_statement(self) -> FromItem:
+        if self.match("LPAREN"):
+            query = self.parse_select()
+            self.eat("RPAREN")
+            self.match("AS")
+            alias = self.eat("IDENT").value
+            return SubqueryRef(query=query, alias=alias)
+
         current = self.eat("IDENT")
         alias = None
 
@@ -134,5 +283,45 @@ class Parser:
                 alias = alias_token.value
             else:
                 raise SyntaxError("Invalid from alias")
+        elif alias_token := self.match("IDENT"):
+            alias = alias_token.value
 
         return TableRef(name=current.value, alias=alias)
+
+    def parse_join(self) -> Join | None:
+        tok = self.current()
+        if not tok:
+            return None
+
+        if tok.kind == "JOIN":
+            join_type = "INNER"
+        elif tok.kind in JOIN_KINDS:
+            self.pos += 1
+            join_type = tok.kind
+            if join_type != "INNER":
+                self.match("OUTER")
+        else:
+            return None
+
+        self.eat("JOIN")
+        right = self.parse_from_statement()
+        self.eat("ON")
+        condition = self.parse_expression()
+
+        return Join(type=join_type, right=right, condition=condition)  # type: ignore
+
+    def parse_order_by(self) -> list[OrderByItem]:
+        items: list[OrderByItem] = []
+
+        while True:
+            expr = self.parse_expression()
+            if self.match("DESC"):
+                items.append(OrderByItem(expr, "DESC"))
+            else:
+                self.match("ASC")
+                items.append(OrderByItem(expr, "ASC"))
+
+            if not self.match("COMMA"):
+                break
+
+        return items
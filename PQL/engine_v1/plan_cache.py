@@ -0,0 +1,245 @@
+import random
+import threading
+import weakref
+from collections import OrderedDict, deque
+from time import perf_counter
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+from PQL.engine_v1.engine import (
+    IndexScan,
+    Operator,
+    TableScan,
+    materialize,
+    result_name,
+)
+from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.models.lexer_models import Token
+from PQL.engine_v1.models.parser_models import ExplainQuery, SelectQuery
+from PQL.engine_v1.models.schema_models import Database, Table
+from PQL.engine_v1.parallel import DEFAULT_PARALLELISM
+from PQL.engine_v1.parser import Parser
+from PQL.engine_v1.planner import Planner
+from PQL.engine_v1.profiler import QueryProfile, instrument
+from PQL.engine_v1.semantic_resolver import bind_parameters, literal_value
+
+DEFAULT_PLAN_CACHE_SIZE = 512
+"""Plans kept by the default cache before the least recently used is evicted"""
+
+PROFILES_KEPT = 100
+"""Profiles of sampled queries a cache keeps, see PlanCache.profile_rate"""
+
+LITERAL_KINDS = ("NUMBER", "STRING", "BOOLEAN")
+CLAUSE_KINDS = (
+    "SELECT",
+    "FROM",
+    "JOIN",
+    "ON",
+    "WHERE",
+    "GROUP",
+    "HAVING",
+    "ORDER",
+    "LIMIT",
+)
+
+PARAMETERIZED_CLAUSES = ("WHERE", "ON", "HAVING")
+"""
+Literals are only lifted out of predicates, literals in the select list, GROUP BY
+or ORDER BY name output columns and match each other, and LIMIT is structural
+"""
+
+NormalizedKey = tuple[tuple[str, str], ...]
+
+
+def normalize(tokens: list[Token]) -> tuple[NormalizedKey, list[Token], list[Any]]:
+    """
+    Replaces predicate literals with PARAM tokens
+
+    Returns the cache key (the token kinds and values of the normalized query), the
+    normalized tokens for the parser and the parameter values. Equal literals share
+    one parameter, so `a = 5 AND b = 5` and `a = 5 AND b = 7` are different shapes.
+    """
+    key: list[tuple[str, str]] = []
+    template: list[Token] = []
+    values: list[Any] = []
+    slots: dict[tuple[type, Any], int] = {}
+
+    # Clause each parenthesis depth is in, subqueries open their own SELECT
+    clauses: list[str | None] = [None]
+
+    for token in tokens:
+        kind = token.kind
+        if kind == "LPAREN":
+            clauses.append(clauses[-1])
+        elif kind == "RPAREN" and len(clauses) > 1:
+            clauses.pop()
+        elif kind in CLAUSE_KINDS:
+            clauses[-1] = kind
+
+        if kind in LITERAL_KINDS and clauses[-1] in PARAMETERIZED_CLAUSES:
+            value = literal_value(token.value)
+            slot = (type(value), value)
+            index = slots.get(slot)
+            if index is None:
+                index = slots[slot] = len(values)
+                values.append(value)
+            token = Token("PARAM", str(index))
+
+        template.append(token)
+        key.append((token.kind, token.value))
+
+    return tuple(key), template, values
+
+
+@dataclass
+class CachedPlan:
+    plan: Operator
+    name: str
+    """Name of the result table"""
+    database: "weakref.ref[Database]"
+    database_version: int
+    tables: list[tuple[Table, int]]
+    """Tables the plan reads and their schema_version when it was planned"""
+
+    def is_valid(self, database: Database) -> bool:
+        return (
+            self.database() is database
+            and database.schema_version == self.database_version
+            and all(table.schema_version == version for table, version in self.tables)
+        )
+
+
+def _scanned_tables(plan: Operator) -> list[Table]:
+    tables = [plan.table] if isinstance(plan, (TableScan, IndexScan)) else []
+    for child in plan.children():
+        tables += _scanned_tables(child)
+    return tables
+
+
+class PlanCache:
+    """
+    LRU cache of query plans keyed by normalized SQL
+
+    Queries differing only in predicate literals share a plan, the literals are
+    bound as parameters when it runs. A plan is dropped once the database gets a
+    new or replaced table, or one of the tables it reads changes its indexes.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_PLAN_CACHE_SIZE,
+        parallelism: int = DEFAULT_PARALLELISM,
+        profile_rate: float = 0.0,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("Plan cache capacity must be at least 1")
+        if not 0.0 <= profile_rate <= 1.0:
+            raise ValueError("Profile rate must be between 0 and 1")
+        self.capacity = capacity
+        self.parallelism = parallelism
+        """Passed to the Planner, plans are built for this many worker processes"""
+        self.profile_rate = profile_rate
+        """
+        Fraction of the queries run through execute that are profiled, see
+        profiler. Their SQL and profile go to profiles, the latest ones kept.
+        """
+        self.profiles: deque[tuple[str, QueryProfile]] = deque(maxlen=PROFILES_KEPT)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._plans: OrderedDict[Hashable, CachedPlan] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def __repr__(self) -> str:
+        return (
+            f"PlanCache(size={len(self._plans)}, capacity={self.capacity},"
+            f" hits={self.hits}, misses={self.misses})"
+        )
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._plans),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def lookup(self, sql: str, database: Database) -> tuple[CachedPlan, list[Any]]:
+        """Cached (or freshly built) plan for sql and the parameter values to run it"""
+        shape, template, values = normalize(tokenize(sql))
+        key = (id(database), shape)
+
+        with self._lock:
+            entry = self._plans.get(key)
+            if entry is not None:
+                if entry.is_valid(database):
+                    self._plans.move_to_end(key)
+                    self.hits += 1
+                    return entry, values
+                del self._plans[key]
+                self.invalidations += 1
+            self.misses += 1
+
+        entry = self._prepare(Parser(template).parse(), database)
+
+        with self._lock:
+            self._plans[key] = entry
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.capacity:
+                self._plans.popitem(last=False)
+                self.evictions += 1
+
+        return entry, values
+
+    def execute(self, sql: str, database: Database) -> Table:
+        # Planning statistics and execution read the same snapshot
+        with database.snapshot():
+            entry, values = self.lookup(sql, database)
+            with bind_parameters(values):
+                if self.profile_rate and random.random() < self.profile_rate:
+                    return self._profiled(sql, entry)
+                return materialize(entry.plan, entry.name)
+
+    def _profiled(self, sql: str, entry: CachedPlan) -> Table:
+        profile = instrument(entry.plan)
+        started = perf_counter()
+        result = materialize(profile.plan, entry.name)
+        profile.execution_time = perf_counter() - started
+        self.profiles.append((sql, profile))
+        return result
+
+    def invalidate(self, database: Database | None = None) -> int:
+        """Drops the plans of database (every plan when None), returns how many"""
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._plans.items()
+                if database is None or entry.database() is database
+            ]
+            for key in stale:
+                del self._plans[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def _prepare(self, query: Any, database: Database) -> CachedPlan:
+        if not isinstance(query, (SelectQuery, ExplainQuery)):
+            raise SyntaxError("Only SELECT and EXPLAIN queries can be executed")
+
+        version = database.schema_version
+        plan = Planner(database, parallelism=self.parallelism).plan(query)
+        return CachedPlan(
+            plan=plan,
+            name=result_name(query),
+            database=weakref.ref(database),
+            database_version=version,
+            tables=[(table, table.schema_version) for table in _scanned_tables(plan)],
+        )
+
+
+DEFAULT_PLAN_CACHE = PlanCache()
@@ -1,2 +1,759 @@
 # Takes query object and creates engine function calls
+import math
+import weakref
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Any
 
+from PQL.engine_v1.engine import (
+    Filter,
+    HashAggregate,
+    IndexScan,
+    HashJoin,
+    Limit,
+    NestedLoopJoin,
+    Operator,
+    Project,
+    Sort,
+    SubqueryScan,
+    TableScan,
+    TopN,
+    equi_join_keys,
+    find_table,
+)
+from PQL.engine_v1.models.parser_models import (
+    BinaryExpr,
+    ColumnExpr,
+    ExplainQuery,
+    Expr,
+    FromItem,
+    FunctionCall,
+    LiteralExpr,
+    OrderByItem,
+    ParamExpr,
+    SelectItem,
+    SelectQuery,
+    StarExpr,
+    SubqueryRef,
+    TableRef,
+    UnaryExpr,
+)
+from PQL.engine_v1.models.index_models import Index
+from PQL.engine_v1.models.schema_models import FLIPPED_OPERATIONS, Database, Table
+from PQL.engine_v1.parallel import DEFAULT_MORSEL_SIZE, DEFAULT_PARALLELISM, parallelize
+from PQL.engine_v1.profiler import Explain, estimates, format_plan
+from PQL.engine_v1.rewriter import rewrite
+from PQL.engine_v1.semantic_resolver import (
+    COMPARISON_OPERATORS,
+    SlotExpr,
+    find_aggregates,
+    format_expr,
+    literal_value,
+    referenced_columns,
+    split_conjuncts,
+)
+
+STATS_SAMPLE_SIZE = 10_000
+"""Rows sampled per table when collecting column statistics"""
+
+MAX_REORDERED_JOINS = 8
+"""Join order is searched exhaustively up to this many relations"""
+
+DEFAULT_SELECTIVITY = 1 / 3
+DEFAULT_EQUALITY_SELECTIVITY = 0.1
+
+# Relative cost of the work done per row
+HASH_BUILD_COST = 2.0
+HASH_PROBE_COST = 1.0
+NESTED_LOOP_PAIR_COST = 1.0
+FILTER_ROW_COST = 0.2
+INDEX_ROW_COST = 1.0
+PROJECT_ROW_COST = 0.1
+AGGREGATE_ROW_COST = 1.0
+SORT_ROW_COST = 1.0
+
+
+@dataclass
+class ColumnStats:
+    distinct: int
+    null_count: int
+    min: Any = None
+    max: Any = None
+
+
+@dataclass
+class TableStats:
+    row_count: int
+    columns: dict[str, ColumnStats]
+    """Keyed by upper cased column name"""
+
+    @classmethod
+    def collect(
+        cls, table: Table, sample_size: int = STATS_SAMPLE_SIZE
+    ) -> "TableStats":
+        """Estimates column statistics from an evenly spaced sample of the rows"""
+        # Sampled by position so tables on disk don't have to be read in full
+        row_count = table.count_rows()
+        step = max(1, row_count // sample_size)
+        sample = [table[position] for position in range(0, row_count, step)]
+        scale = row_count / len(sample) if sample else 0.0
+
+        columns: dict[str, ColumnStats] = {}
+        for index, column in enumerate(table.columns):
+            values = [row.row[index] for row in sample]
+            present = [value for value in values if value is not None]
+
+            distinct = len(set(present))
+            if present and distinct == len(present):
+                # Every sampled value was unique, assume the column is unique
+                distinct = round(len(present) * scale)
+
+            try:
+                low, high = (min(present), max(present)) if present else (None, None)
+            except TypeError:
+                low = high = None
+
+            columns[column.name.upper()] = ColumnStats(
+                distinct=max(distinct, 1),
+                null_count=round((len(values) - len(present)) * scale),
+                min=low,
+                max=high,
+            )
+
+        return cls(row_count=row_count, columns=columns)
+
+
+class Statistics:
+    """Caches TableStats per table, a table is analyzed again once its size changes"""
+
+    def __init__(self) -> None:
+        self._tables: weakref.WeakKeyDictionary[Table, TableStats] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def table_stats(self, table: Table) -> TableStats:
+        stats = self._tables.get(table)
+        if stats is None or stats.row_count != table.count_rows():
+            stats = self._tables[table] = TableStats.collect(table)
+        return stats
+
+
+DEFAULT_STATISTICS = Statistics()
+
+
+@dataclass
+class _Relation:
+    """A FROM or JOIN item while planning, stats is None for derived subqueries"""
+
+    plan: Operator
+    stats: TableStats | None
+
+
+def _annotate(operator: Operator, rows: float, cost: float) -> Operator:
+    operator.estimated_rows = max(rows, 0.0)
+    operator.estimated_cost = cost
+    return operator
+
+
+def _rows(operator: Operator) -> float:
+    return operator.estimated_rows or 0.0
+
+
+def _cost(operator: Operator) -> float:
+    return operator.estimated_cost or 0.0
+
+
+def _conjunction(conjuncts: list[Expr]) -> Expr | None:
+    if not conjuncts:
+        return None
+    expr = conjuncts[0]
+    for conjunct in conjuncts[1:]:
+        expr = BinaryExpr(expr, "AND", conjunct)
+    return expr
+
+
+def explain(plan: Operator) -> str:
+    """EXPLAIN style dump of an operator tree with the planner's estimates"""
+    return "\n".join(format_plan(plan, estimates))
+
+
+class Planner:
+    """
+    Turns a SelectQuery into a tree of engine operators
+
+    Alternatives (join order, hash join or nested loop, build side) are compared
+    with a cost model fed by cardinality estimates from table statistics
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        statistics: Statistics | None = None,
+        parallelism: int = DEFAULT_PARALLELISM,
+        morsel_size: int = DEFAULT_MORSEL_SIZE,
+    ) -> None:
+        self.database = database
+        self.statistics = statistics or DEFAULT_STATISTICS
+        self.parallelism = parallelism
+        """Worker processes scans of large tables are spread over, see parallel"""
+        self.morsel_size = morsel_size
+
+    def explain(self, query: SelectQuery) -> str:
+        return explain(self.plan(query))
+
+    def plan(self, query: SelectQuery | ExplainQuery) -> Operator:
+        """
+        Rewrites the query (see rewriter.Rewriter), plans the result and
+        parallelizes its scans when parallelism is above 1
+        """
+        if isinstance(query, ExplainQuery):
+            return Explain(self.plan(query.query), query.analyze, query.memory)
+        plan = self._plan_query(rewrite(query, self.database))
+        return parallelize(plan, self.parallelism, self.morsel_size)
+
+    def _plan_query(self, query: SelectQuery) -> Operator:
+        """
+        scan -> joins -> WHERE -> GROUP BY -> HAVING -> ORDER BY -> SELECT -> LIMIT
+        """
+        joins = query.joins or []
+        relations = [self._plan_from_item(query.from_)] + [
+            self._plan_from_item(join.right) for join in joins
+        ]
+        where = split_conjuncts(query.where) if query.where is not None else []
+
+        if not joins:
+            plan = self._plan_access(relations[0], where)
+            where = []
+        elif all(join.type == "INNER" for join in joins) and (
+            len(relations) <= MAX_REORDERED_JOINS
+        ):
+            conjuncts = [
+                conjunct
+                for join in joins
+                for conjunct in split_conjuncts(join.condition)
+            ]
+            plan = self._order_joins(relations, conjuncts)
+            if any(isinstance(item.expr, StarExpr) for item in query.select):
+                plan = self._restore_column_order(plan, relations)
+        else:
+            plan = relations[0].plan
+            for join, relation in zip(joins, relations[1:]):
+                plan = self._plan_join(
+                    plan, relation.plan, join.type, join.condition, relations
+                )
+
+        if where:
+            plan = self._filter(plan, where, relations)
+
+        return self._plan_output(query, plan, relations)
+
+    # -------------------------
+    # Relations and access paths
+    # -------------------------
+    def _plan_from_item(self, item: FromItem) -> _Relation:
+        if isinstance(item, TableRef):
+            table = find_table(self.database, item.name)
+            stats = self.statistics.table_stats(table)
+            scan = TableScan(table, item.alias)
+            return _Relation(_annotate(scan, stats.row_count, stats.row_count), stats)
+
+        if isinstance(item, SubqueryRef):
+            if not isinstance(item.query, SelectQuery) or not item.alias:
+                raise SyntaxError("Subqueries in FROM must be aliased SELECT queries")
+            child = self._plan_query(item.query)
+            scan = SubqueryScan(child, item.alias)
+            return _Relation(
+                _annotate(scan, _rows(child), _cost(child)),
+                self._passthrough_stats(item.query),
+            )
+
+        raise TypeError(f"Unsupported FROM item: {item!r}")
+
+    def _passthrough_stats(self, query: SelectQuery) -> TableStats | None:
+        """
+        Base table statistics for a subquery that only filters and narrows a table,
+        like the ones pushdown wraps tables in
+        """
+        if (
+            query.joins
+            or query.group_by
+            or query.having is not None
+            or not isinstance(query.from_, TableRef)
+            or any(find_aggregates(item.expr) for item in query.select)
+        ):
+            return None
+        table = find_table(self.database, query.from_.name)
+        return self.statistics.table_stats(table)
+
+    def _plan_access(self, relation: _Relation, predicates: list[Expr]) -> Operator:
+        """
+        Access path for a single relation, predicates are the conjuncts that only
+        refer to it
+
+        Base tables are read through an index when one covers a predicate and beats
+        a full scan, the remaining predicates are applied on top
+        """
+        if not predicates:
+            return relation.plan
+
+        plan = relation.plan
+        if isinstance(plan, TableScan) and plan.table.indexes:
+            access = self._index_access(plan, relation, predicates)
+            if access is not None:
+                plan, predicates = access
+                if not predicates:
+                    return plan
+
+        if isinstance(plan, TableScan):
+            plan = self._zone_scan(plan, predicates)
+        return self._filter(plan, predicates, [relation])
+
+    def _zone_scan(self, scan: TableScan, predicates: list[Expr]) -> TableScan:
+        """scan skipping the chunks whose zone maps rule out predicates"""
+        comparisons = [
+            comparison
+            for predicate in predicates
+            if (comparison := self._index_comparison(predicate, scan)) is not None
+        ]
+        if not comparisons:
+            return scan
+        pruned = TableScan(scan.table, scan.alias, comparisons)
+        _annotate(pruned, _rows(scan), _cost(scan))
+        return pruned
+
+    def _index_access(
+        self, scan: TableScan, relation: _Relation, predicates: list[Expr]
+    ) -> tuple[Operator, list[Expr]] | None:
+        """Cheapest index scan for predicates and the predicates it leaves over"""
+        columns: dict[int, list[tuple[Expr, str, Expr]]] = {}
+        for predicate in predicates:
+            comparison = self._index_comparison(predicate, scan)
+            if comparison is not None:
+                position, op, value = comparison
+                columns.setdefault(position, []).append((predicate, op, value))
+
+        best: tuple[float, Index, list[tuple[Expr, str, Expr]]] | None = None
+        for position, comparisons in columns.items():
+            ranged = all(op != "=" for _, op, _ in comparisons)
+            index = scan.table.find_index(position, ranged)
+            if index is None:
+                continue
+            condition = _conjunction([predicate for predicate, _, _ in comparisons])
+            assert condition is not None
+            rows = _rows(scan) * self._selectivity(condition, [relation])
+            if best is None or rows < best[0]:
+                best = (rows, index, comparisons)
+
+        if best is None:
+            return None
+
+        rows, index, comparisons = best
+        cost = math.log2(_rows(scan) + 1) + rows * INDEX_ROW_COST
+        if cost >= _cost(scan) + _rows(scan) * FILTER_ROW_COST:
+            return None
+
+        index_scan = IndexScan(
+            scan.table,
+            index,
+            [(op, value) for _, op, value in comparisons],
+            scan.alias,
+        )
+        plan = _annotate(index_scan, rows, cost)
+        remaining = [
+            predicate
+            for predicate in predicates
+            if not any(predicate is used for used, _, _ in comparisons)
+        ]
+        return plan, remaining
+
+    @staticmethod
+    def _index_comparison(
+        predicate: Expr, scan: TableScan
+    ) -> tuple[int, str, Expr] | None:
+        """
+        (column position, operator, bound value) for `column op literal` and
+        `column op parameter` predicates
+        """
+        if not isinstance(predicate, BinaryExpr):
+            return None
+
+        constants = (LiteralExpr, ParamExpr)
+        left, op, right = predicate.left, predicate.op, predicate.right
+        if isinstance(left, constants) and isinstance(right, ColumnExpr):
+            left, op, right = right, FLIPPED_OPERATIONS.get(op, ""), left
+        if not (isinstance(left, ColumnExpr) and isinstance(right, constants)):
+            return None
+        if op not in FLIPPED_OPERATIONS:
+            return None
+
+        try:
+            position = scan.scope.find_column(left)
+        except ValueError:
+            return None
+        if position is None:
+            return None
+        return position, op, scan.scope.bind(right)
+
+    def _filter(
+        self, plan: Operator, predicates: list[Expr], relations: list[_Relation]
+    ) -> Operator:
+        condition = _conjunction(predicates)
+        assert condition is not None
+        rows = _rows(plan) * self._selectivity(condition, relations)
+        cost = _cost(plan) + _rows(plan) * FILTER_ROW_COST
+        return _annotate(Filter(plan, condition), rows, cost)
+
+    # -------------------------
+    # Joins
+    # -------------------------
+    def _plan_join(
+        self,
+        left: Operator,
+        right: Operator,
+        join_type: str,
+        condition: Expr | None,
+        relations: list[_Relation],
+    ) -> Operator:
+        """Cheapest of hash join and nested loop join for the two inputs"""
+        if condition is None:
+            condition = LiteralExpr(True)
+
+        left_rows, right_rows = _rows(left), _rows(right)
+        inputs_cost = _cost(left) + _cost(right)
+
+        rows = left_rows * right_rows * self._selectivity(condition, relations)
+        if join_type in ("LEFT", "FULL"):
+            rows = max(rows, left_rows)
+        if join_type in ("RIGHT", "FULL"):
+            rows = max(rows, right_rows)
+
+        nested_loop_cost = inputs_cost + left_rows * right_rows * NESTED_LOOP_PAIR_COST
+
+        left_keys, right_keys, residual = equi_join_keys(
+            condition, left.scope, right.scope
+        )
+        if left_keys and (not residual or join_type == "INNER"):
+            build_side = "LEFT" if left_rows < right_rows else "RIGHT"
+            build_rows, probe_rows = sorted((left_rows, right_rows))
+            hash_cost = (
+                inputs_cost
+                + build_rows * HASH_BUILD_COST
+                + probe_rows * HASH_PROBE_COST
+            )
+
+            if hash_cost <= nested_loop_cost:
+                residual_selectivity = (
+                    self._selectivity(_conjunction(residual), relations)  # type: ignore
+                    if residual
+                    else 1.0
+                )
+                join = HashJoin(
+                    left, right, join_type, left_keys, right_keys, build_side
+                )
+                join_rows = (
+                    rows / residual_selectivity if residual_selectivity else rows
+                )
+                plan: Operator = _annotate(join, join_rows, hash_cost)
+                if residual:
+                    plan = self._filter(plan, residual, relations)
+                return plan
+
+        join = NestedLoopJoin(left, right, join_type, condition)
+        return _annotate(join, rows, nested_loop_cost)
+
+    def _relations_of(self, expr: Expr, relations: list[_Relation]) -> frozenset[int]:
+        found: set[int] = set()
+        for column in referenced_columns(expr):
+            for index, relation in enumerate(relations):
+                if relation.plan.scope.find_column(column) is not None:
+                    found.add(index)
+                    break
+            else:
+                raise ValueError(f"Column '{format_expr(column)}' does not exist")
+        return frozenset(found)
+
+    def _order_joins(
+        self, relations: list[_Relation], conjuncts: list[Expr]
+    ) -> Operator:
+        """
+        Picks the cheapest left deep order for inner joins by dynamic programming
+        over relation subsets, cross products are only used when unavoidable
+        """
+        count = len(relations)
+        leaves = [relation.plan for relation in relations]
+        connecting: list[tuple[Expr, frozenset[int]]] = []
+        constant: list[Expr] = []
+
+        for conjunct in conjuncts:
+            referenced = self._relations_of(conjunct, relations)
+            if len(referenced) == 1:
+                # Only touches one relation, apply it before joining
+                (index,) = referenced
+                leaves[index] = self._filter(leaves[index], [conjunct], relations)
+            elif referenced:
+                connecting.append((conjunct, referenced))
+            else:
+                constant.append(conjunct)
+
+        best: dict[frozenset[int], Operator] = {
+            frozenset([index]): leaf for index, leaf in enumerate(leaves)
+        }
+
+        for size in range(2, count + 1):
+            for subset in combinations(range(count), size):
+                members = frozenset(subset)
+                candidates: list[tuple[frozenset[int], int, list[Expr]]] = []
+                for index in subset:
+                    rest = members - {index}
+                    applicable = [
+                        conjunct
+                        for conjunct, referenced in connecting
+                        if referenced <= members and not referenced <= rest
+                    ]
+                    candidates.append((rest, index, applicable))
+
+                connected = [candidate for candidate in candidates if candidate[2]]
+                for rest, index, applicable in connected or candidates:
+                    plan = self._plan_join(
+                        best[rest],
+                        best[frozenset([index])],
+                        "INNER",
+                        _conjunction(applicable),
+                        relations,
+                    )
+                    current = best.get(members)
+                    if current is None or _cost(plan) < _cost(current):
+                        best[members] = plan
+
+        plan = best[frozenset(range(count))]
+        if constant:
+            plan = self._filter(plan, constant, relations)
+        return plan
+
+    def _restore_column_order(
+        self, plan: Operator, relations: list[_Relation]
+    ) -> Operator:
+        """SELECT * lists columns in FROM order, undo any join reordering"""
+        positions = {
+            id(column): index for index, column in enumerate(plan.scope.columns)
+        }
+        order = [
+            positions[id(column)]
+            for relation in relations
+            for column in relation.plan.scope.columns
+        ]
+        if order == list(range(len(order))):
+            return plan
+        project = Project(plan, [SelectItem(SlotExpr(index)) for index in order])
+        return _annotate(
+            project, _rows(plan), _cost(plan) + _rows(plan) * PROJECT_ROW_COST
+        )
+
+    # -------------------------
+    # Aggregation, ordering and output
+    # -------------------------
+    def _plan_output(
+        self, query: SelectQuery, plan: Operator, relations: list[_Relation]
+    ) -> Operator:
+        order_by = self._resolve_order_aliases(query.order_by or [], query.select)
+
+        aggregates: list[FunctionCall] = []
+        expressions = [item.expr for item in query.select] + [
+            item.expr for item in order_by
+        ]
+        if query.having is not None:
+            expressions.append(query.having)
+        for expr in expressions:
+            for aggregate in find_aggregates(expr):
+                if aggregate not in aggregates:
+                    aggregates.append(aggregate)
+
+        if query.group_by or aggregates:
+            input_rows = _rows(plan)
+            groups = self._estimate_groups(query.group_by or [], input_rows, relations)
+            plan = _annotate(
+                HashAggregate(plan, query.group_by or [], aggregates),
+                groups,
+                _cost(plan) + input_rows * AGGREGATE_ROW_COST,
+            )
+            if query.having is not None:
+                plan = self._filter(plan, [query.having], [])
+        elif query.having is not None:
+            raise SyntaxError("HAVING requires GROUP BY or an aggregate")
+
+        if order_by and query.limit is not None:
+            plan = self._top_n(plan, order_by, query.limit)
+        elif order_by:
+            rows = _rows(plan)
+            plan = _annotate(
+                Sort(plan, order_by),
+                rows,
+                _cost(plan) + rows * math.log2(max(rows, 2)) * SORT_ROW_COST,
+            )
+
+        rows = _rows(plan)
+        plan = _annotate(
+            Project(plan, query.select), rows, _cost(plan) + rows * PROJECT_ROW_COST
+        )
+
+        if query.limit is not None and not order_by:
+            plan = _annotate(
+                Limit(plan, query.limit), min(rows, query.limit), _cost(plan)
+            )
+
+        return plan
+
+    def _top_n(
+        self, plan: Operator, order_by: list[OrderByItem], count: int
+    ) -> Operator:
+        """ORDER BY with a LIMIT, see TopN"""
+        rows = _rows(plan)
+        if self._presorted(plan, order_by):
+            return _annotate(
+                TopN(plan, order_by, count, presorted=True),
+                min(rows, count),
+                _cost(plan),
+            )
+        return _annotate(
+            TopN(plan, order_by, count),
+            min(rows, count),
+            _cost(plan) + rows * math.log2(max(count, 2)) * SORT_ROW_COST,
+        )
+
+    @staticmethod
+    def _presorted(plan: Operator, order_by: list[OrderByItem]) -> bool:
+        """
+        Whether plan produces its rows in order_by order: filters over a scan of
+        an ordered index on the one ascending key
+        """
+        if len(order_by) != 1 or order_by[0].direction != "ASC":
+            return False
+        key = order_by[0].expr
+        while isinstance(plan, Filter):
+            plan = plan.child
+        if not (
+            isinstance(plan, IndexScan)
+            and plan.index.supports_ranges
+            and isinstance(key, ColumnExpr)
+        ):
+            return False
+        # The index scan's own predicates exclude NULL keys, which sort last
+        try:
+            return plan.scope.find_column(key) == plan.index.position
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _resolve_order_aliases(
+        order_by: list[OrderByItem], select: list[SelectItem]
+    ) -> list[OrderByItem]:
+        """ORDER BY may refer to select list aliases, swap them for the expression"""
+        aliases = {item.alias.upper(): item.expr for item in select if item.alias}
+        resolved: list[OrderByItem] = []
+        for item in order_by:
+            expr = item.expr
+            if (
+                isinstance(expr, ColumnExpr)
+                and expr.table is None
+                and expr.name.upper() in aliases
+            ):
+                expr = aliases[expr.name.upper()]
+            resolved.append(OrderByItem(expr, item.direction))
+        return resolved
+
+    # -------------------------
+    # Cardinality estimation
+    # -------------------------
+    def _estimate_groups(
+        self, group_by: list[Expr], input_rows: float, relations: list[_Relation]
+    ) -> float:
+        if not group_by:
+            return 1.0
+        groups = 1.0
+        for expr in group_by:
+            stats = None
+            if isinstance(expr, ColumnExpr):
+                stats = self._column_stats(expr, relations)
+            if stats is None:
+                return max(1.0, input_rows / 10)
+            groups *= stats.distinct
+        return max(1.0, min(groups, input_rows))
+
+    def _column_stats(
+        self, column: ColumnExpr, relations: list[_Relation]
+    ) -> ColumnStats | None:
+        for relation in relations:
+            try:
+                index = relation.plan.scope.find_column(column)
+            except ValueError:
+                return None
+            if index is not None:
+                if relation.stats is None:
+                    return None
+                return relation.stats.columns.get(column.name.upper())
+        return None
+
+    def _selectivity(self, expr: Expr, relations: list[_Relation]) -> float:
+        """Estimated fraction of rows for which expr is true"""
+        if isinstance(expr, LiteralExpr):
+            return 1.0 if literal_value(expr.value) else 0.0
+
+        if isinstance(expr, UnaryExpr) and expr.op == "NOT":
+            return 1.0 - self._selectivity(expr.operand, relations)
+
+        if not isinstance(expr, BinaryExpr):
+            return DEFAULT_SELECTIVITY
+
+        if expr.op == "AND":
+            return self._selectivity(expr.left, relations) * self._selectivity(
+                expr.right, relations
+            )
+        if expr.op == "OR":
+            left = self._selectivity(expr.left, relations)
+            right = self._selectivity(expr.right, relations)
+            return left + right - left * right
+
+        if expr.op not in COMPARISON_OPERATORS:
+            return DEFAULT_SELECTIVITY
+
+        left, op, right = expr.left, expr.op, expr.right
+        if isinstance(left, ColumnExpr) and isinstance(right, ColumnExpr):
+            left_stats = self._column_stats(left, relations)
+            right_stats = self._column_stats(right, relations)
+            if op != "=":
+                return DEFAULT_SELECTIVITY
+            if left_stats is None or right_stats is None:
+                return DEFAULT_EQUALITY_SELECTIVITY
+            return 1.0 / max(left_stats.distinct, right_stats.distinct)
+
+        constants = (LiteralExpr, ParamExpr)
+        if isinstance(left, constants) and isinstance(right, ColumnExpr):
+            left, op, right = right, FLIPPED_OPERATIONS.get(op, op), left
+
+        if not (isinstance(left, ColumnExpr) and isinstance(right, constants)):
+            return DEFAULT_SELECTIVITY
+
+        stats = self._column_stats(left, relations)
+        if op in ("=", "!="):
+            equal = (
+                1.0 / stats.distinct if stats else DEFAULT_EQUALITY_SELECTIVITY
+            )
+            return equal if op == "=" else 1.0 - equal
+
+        # Cached plans are reused for any parameter value, estimate generically
+        if isinstance(right, ParamExpr):
+            return DEFAULT_SELECTIVITY
+
+        value = literal_value(right.value)
+        if (
+            stats is None
+            or not isinstance(value, (int, float))
+            or not isinstance(stats.min, (int, float))
+            or not isinstance(stats.max, (int, float))
+            or stats.max <= stats.min
+        ):
+            return DEFAULT_SELECTIVITY
+
+        below = (value - stats.min) / (stats.max - stats.min)
+        below = min(max(below, 0.0), 1.0)
+        return below if op in ("<", "<=") else 1.0 - below
@@ -0,0 +1,355 @@
+"""
+Per-operator profiling of engine_v1 plans, behind EXPLAIN ANALYZE
+
+instrument copies a plan and wraps every operator's rows() so the copy records,
+per operator, how often it ran, the rows it produced and the time spent pulling
+them. The plan itself is left untouched, cached plans can be shared by other
+queries running at the same time. Counting rows and reading the clock around
+each pulled row is cheap enough to profile a sample of production queries (see
+PlanCache.profile_rate). Peak memory needs tracemalloc, which slows every
+allocation of the process down, so it is only measured when asked for and in a
+run of its own.
+
+    EXPLAIN SELECT ...                  the plan with the planner's estimates
+    EXPLAIN ANALYZE SELECT ...          runs the query, then the plan with actual
+                                        figures
+    EXPLAIN ANALYZE MEMORY SELECT ...   also runs it a second time to measure
+                                        peak memory
+"""
+
+import copy
+import threading
+import tracemalloc
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable, Iterator
+
+from PQL.engine_v1.engine import Operator
+from PQL.engine_v1.models.schema_models import Row
+from PQL.engine_v1.parallel import MorselScan
+from PQL.engine_v1.semantic_resolver import OutputColumn, Scope
+
+# tracemalloc is process wide, one traced run at a time
+_tracing_lock = threading.Lock()
+
+
+@dataclass
+class OperatorProfile:
+    loops: int = 0
+    """Times the operator's rows() was run"""
+    rows: int = 0
+    """Rows produced over every loop"""
+    time: float = 0.0
+    """Seconds spent producing them, including the time spent in the inputs"""
+    scanned: int = 0
+    """Rows the workers read over every loop, for a MorselScan"""
+    peak_memory: int | None = None
+    """
+    Most memory allocated and still held during one pull of a row, including the
+    inputs, in bytes. This is where sorts, aggregates and join builds show the
+    memory they materialize. None unless memory was measured.
+    """
+
+
+@dataclass
+class _Pull:
+    baseline: int
+    peak: int
+
+
+@dataclass
+class QueryProfile:
+    plan: Operator
+    """The instrumented copy of the plan"""
+    memory: bool = False
+    operators: dict[int, OperatorProfile] = field(default_factory=dict)
+    """Keyed by id() of the operators of plan"""
+    execution_time: float | None = None
+    _pulls: list[_Pull] = field(default_factory=list)
+
+    def of(self, operator: Operator) -> OperatorProfile:
+        return self.operators[id(operator)]
+
+    def rows_in(self, operator: Operator) -> int:
+        if isinstance(operator, MorselScan):
+            # The workers read the table, the scan below never runs here
+            return self.of(operator).scanned
+        return sum(self.of(child).rows for child in operator.children())
+
+    def annotate(self, operator: Operator) -> str:
+        """EXPLAIN ANALYZE figures of one operator"""
+        profile = self.of(operator)
+        if not profile.loops:
+            return f"{estimates(operator)}  (never executed)"
+
+        children = operator.children()
+        inputs = sum(self.of(child).time for child in children)
+        text = f"{estimates(operator)}  (actual rows={profile.rows}"
+        if children:
+            text += f" in={self.rows_in(operator)}"
+        if profile.loops > 1:
+            text += f" loops={profile.loops}"
+        text += (
+            f" time={profile.time * 1000:.3f}ms"
+            f" self={max(profile.time - inputs, 0.0) * 1000:.3f}ms"
+        )
+        if profile.peak_memory is not None:
+            text += f" memory={format_bytes(profile.peak_memory)}"
+        if operator.estimated_rows is not None:
+            actual = profile.rows / profile.loops
+            estimate = max(operator.estimated_rows, 1.0)
+            text += f" estimate={max(actual, 1.0) / estimate:.2f}x"
+        return text + ")"
+
+    def report(self) -> str:
+        """The plan with estimated and actual figures, see planner.explain"""
+        lines = format_plan(self.plan, self.annotate)
+        if self.execution_time is not None:
+            lines.append(f"Execution time: {self.execution_time * 1000:.3f}ms")
+        return "\n".join(lines)
+
+    # -------------------------
+    # Memory, see OperatorProfile.peak_memory
+
+    def _sample(self) -> int:
+        current, peak = tracemalloc.get_traced_memory()
+        for pull in self._pulls:
+            pull.peak = max(pull.peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def _enter(self) -> None:
+        current = self._sample()
+        self._pulls.append(_Pull(current, current))
+
+    def _exit(self, profile: OperatorProfile) -> None:
+        self._sample()
+        pull = self._pulls.pop()
+        used = pull.peak - pull.baseline
+        profile.peak_memory = max(profile.peak_memory or 0, used)
+
+
+def format_bytes(size: int) -> str:
+    if size < 1024:
+        return f"{size}B"
+    scaled = size / 1024
+    for unit in ("KiB", "MiB"):
+        if scaled < 1024:
+            return f"{scaled:.1f}{unit}"
+        scaled /= 1024
+    return f"{scaled:.1f}GiB"
+
+
+def format_plan(
+    plan: Operator, annotate: Callable[[Operator], str] | None = None
+) -> list[str]:
+    """One indented line per operator, annotate adds to the end of each line"""
+    lines: list[str] = []
+
+    def visit(operator: Operator, depth: int) -> None:
+        line = "  " * depth + operator.describe()
+        if annotate is not None:
+            line += annotate(operator)
+        lines.append(line)
+        for child in operator.children():
+            visit(child, depth + 1)
+
+    visit(plan, 0)
+    return lines
+
+
+def estimates(operator: Operator) -> str:
+    """The planner's estimates of one operator, as EXPLAIN shows them"""
+    if operator.estimated_rows is None:
+        return ""
+    cost = operator.estimated_cost or 0.0
+    return f"  (rows={operator.estimated_rows:.0f} cost={cost:.0f})"
+
+
+def _copy_plan(operator: Operator) -> Operator:
+    """Copies the operator nodes, compiled expressions and tables are shared"""
+    clone = copy.copy(operator)
+    for name, value in list(vars(clone).items()):
+        if isinstance(value, Operator):
+            setattr(clone, name, _copy_plan(value))
+    return clone
+
+
+def _timed(
+    operator: Operator, profile: OperatorProfile
+) -> Callable[[], Iterator[Row]]:
+    rows = type(operator).rows
+    clock = perf_counter
+
+    def timed() -> Iterator[Row]:
+        profile.loops += 1
+        _start_loop(operator)
+        started = clock()
+        iterator = iter(rows(operator))
+        elapsed = clock() - started
+        count = 0
+        try:
+            while True:
+                started = clock()
+                try:
+                    row = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += clock() - started
+                count += 1
+                yield row
+        finally:
+            profile.rows += count
+            profile.time += elapsed
+            _close(iterator)
+            _end_loop(operator, profile)
+
+    return timed
+
+
+def _traced(
+    operator: Operator, profile: OperatorProfile, query: QueryProfile
+) -> Callable[[], Iterator[Row]]:
+    rows = type(operator).rows
+
+    def traced() -> Iterator[Row]:
+        profile.loops += 1
+        _start_loop(operator)
+        iterator = iter(rows(operator))
+        count = 0
+        # Only pulls 1, 2, 4, 8, ... of a loop are measured, sorts, aggregates
+        # and join builds materialize their input on the first one
+        measured = 1
+        try:
+            while True:
+                if count + 1 == measured:
+                    measured *= 2
+                    query._enter()
+                    try:
+                        row = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        query._exit(profile)
+                else:
+                    try:
+                        row = next(iterator)
+                    except StopIteration:
+                        return
+                count += 1
+                yield row
+        finally:
+            profile.rows += count
+            _close(iterator)
+            _end_loop(operator, profile)
+
+    return traced
+
+
+def _start_loop(operator: Operator) -> None:
+    # A loop that never pulled a row must not count the previous loop's morsels
+    if isinstance(operator, MorselScan):
+        operator.rows_scanned = 0
+
+
+def _end_loop(operator: Operator, profile: OperatorProfile) -> None:
+    if isinstance(operator, MorselScan):
+        profile.scanned += operator.rows_scanned
+
+
+def _close(iterator: Iterator[Row]) -> None:
+    close = getattr(iterator, "close", None)
+    if close is not None:
+        close()
+
+
+def instrument(plan: Operator, memory: bool = False) -> QueryProfile:
+    """
+    Profile of an instrumented copy of plan, run profile.plan instead of plan.
+    With memory tracemalloc must be tracing while it runs, see run.
+    """
+    query = QueryProfile(_copy_plan(plan), memory)
+
+    def visit(operator: Operator) -> None:
+        profile = query.operators[id(operator)] = OperatorProfile()
+        # An instance attribute, so parents calling child.rows() get the wrapper
+        if memory:
+            operator.rows = _traced(operator, profile, query)  # type: ignore
+        else:
+            operator.rows = _timed(operator, profile)  # type: ignore
+        for child in operator.children():
+            visit(child)
+
+    visit(query.plan)
+    return query
+
+
+def _preorder(plan: Operator) -> list[Operator]:
+    operators = [plan]
+    for child in plan.children():
+        operators += _preorder(child)
+    return operators
+
+
+def run(plan: Operator, memory: bool = False) -> QueryProfile:
+    """
+    Runs an instrumented copy of plan, discarding its rows, returns the profile
+
+    With memory the query runs a second time with tracemalloc tracing, whose
+    overhead would otherwise distort the timings, to fill in peak_memory. Traced
+    runs wait for each other, tracemalloc's peak is shared by the whole process.
+    """
+    profile = instrument(plan)
+    started = perf_counter()
+    for _ in profile.plan.rows():
+        pass
+    profile.execution_time = perf_counter() - started
+    if memory:
+        traced = instrument(plan, memory=True)
+        with _tracing_lock:
+            tracing = not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+            try:
+                for _ in traced.plan.rows():
+                    pass
+            finally:
+                if tracing:
+                    tracemalloc.stop()
+        for operator, copy_ in zip(_preorder(profile.plan), _preorder(traced.plan)):
+            profile.of(operator).peak_memory = traced.of(copy_).peak_memory
+    return profile
+
+
+class Explain(Operator):
+    """
+    Result of EXPLAIN, one row per line of the plan dump. With analyze the
+    query runs first (its rows are discarded) and the dump shows what happened,
+    with memory also the peak memory of each operator, see run.
+    """
+
+    def __init__(
+        self, child: Operator, analyze: bool = False, memory: bool = False
+    ) -> None:
+        self.child = child
+        self.analyze = analyze
+        self.memory = memory
+        self.scope = Scope([OutputColumn(None, "plan", "STR")])
+
+    def rows(self) -> Iterator[Row]:
+        if self.analyze:
+            profile = run(self.child, memory=self.memory)
+            report = profile.report()
+        else:
+            report = "\n".join(format_plan(self.child, estimates))
+        for line in report.splitlines():
+            yield Row((line,))
+
+    def children(self) -> list[Operator]:
+        return [self.child]
+
+    def describe(self) -> str:
+        if self.memory:
+            return "Explain Analyze Memory"
+        return "Explain Analyze" if self.analyze else "Explain"
@@ -0,0 +1,91 @@
+"""
+Wire protocol of the query server (server.py) and its client (client.py)
+
+Every message is one frame, `length, request id, kind` followed by a JSON payload
+of length bytes. Clients may send any number of requests without waiting for
+their responses (pipelining), the server answers them in the order they were
+sent and tags every frame of a response with its request's id.
+
+    QUERY    "SELECT ..."                 client -> server
+    PING     null                         client -> server
+    CANCEL   null                         client -> server, stops a streaming result
+    COLUMNS  {"name", "columns"}          first frame of a query result
+    ROWS     [[value, ...], ...]          a chunk of result rows, any number of them
+    DONE     {"rows", "cancelled"}        last frame of a successful response
+    ERROR    {"type", "message"}          last frame of a failed response
+"""
+
+import asyncio
+import json
+import struct
+from typing import Any
+
+FRAME = struct.Struct("<IIB")
+"""payload length, request id, message kind"""
+
+MAX_PAYLOAD = 64 * 1024 * 1024
+"""Larger frames are rejected, results are split into ROWS chunks well below this"""
+
+QUERY = 1
+PING = 2
+CANCEL = 3
+COLUMNS = 4
+ROWS = 5
+DONE = 6
+ERROR = 7
+
+MESSAGE_KINDS = {
+    QUERY: "QUERY",
+    PING: "PING",
+    CANCEL: "CANCEL",
+    COLUMNS: "COLUMNS",
+    ROWS: "ROWS",
+    DONE: "DONE",
+    ERROR: "ERROR",
+}
+
+DEFAULT_PORT = 7878
+
+
+class ProtocolError(ValueError):
+    """The peer sent something that isn't a valid frame"""
+
+
+def encode_payload(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def encode_frame(request_id: int, kind: int, payload: bytes) -> bytes:
+    """Frame of an already encoded payload, see encode_payload"""
+    if len(payload) > MAX_PAYLOAD:
+        raise ProtocolError(f"Payload of {len(payload)} bytes is too large")
+    return FRAME.pack(len(payload), request_id, kind) + payload
+
+
+def encode_message(request_id: int, kind: int, payload: Any) -> bytes:
+    return encode_frame(request_id, kind, encode_payload(payload))
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[int, int, Any] | None:
+    """Next (request id, kind, payload), None once the peer closed the stream"""
+    try:
+        header = await reader.readexactly(FRAME.size)
+    except asyncio.IncompleteReadError as error:
+        if error.partial:
+            raise ProtocolError("Connection closed inside a frame header")
+        return None
+
+    length, request_id, kind = FRAME.unpack(header)
+    if kind not in MESSAGE_KINDS:
+        raise ProtocolError(f"Unknown message kind {kind}")
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f"Payload of {length} bytes is too large")
+
+    try:
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("Connection closed inside a frame")
+    try:
+        return request_id, kind, json.loads(payload)
+    except ValueError:
+        raise ProtocolError("Payload is not valid JSON")
@@ -0,0 +1,349 @@
+from dataclasses import dataclass, replace
+
+from PQL.engine_v1.engine import find_table
+from PQL.engine_v1.models.parser_models import (
+    BinaryExpr,
+    ColumnExpr,
+    Expr,
+    FromItem,
+    FunctionCall,
+    Join,
+    LiteralExpr,
+    SelectItem,
+    SelectQuery,
+    StarExpr,
+    SubqueryRef,
+    TableRef,
+    UnaryExpr,
+)
+from PQL.engine_v1.models.schema_models import Database
+from PQL.engine_v1.semantic_resolver import (
+    _same_name,
+    find_aggregates,
+    format_expr,
+    referenced_columns,
+    split_conjuncts,
+)
+
+
+@dataclass
+class _Relation:
+    """A FROM or JOIN item, name is the alias columns are qualified with"""
+
+    name: str
+    columns: list[str]
+
+
+def _conjunction(conjuncts: list[Expr]) -> Expr | None:
+    if not conjuncts:
+        return None
+    expr = conjuncts[0]
+    for conjunct in conjuncts[1:]:
+        expr = BinaryExpr(expr, "AND", conjunct)
+    return expr
+
+
+def _substitute(expr: Expr, mapping: dict[str, Expr], relation: str) -> Expr:
+    """Replaces references to relation's columns with the expressions behind them"""
+    if isinstance(expr, ColumnExpr):
+        if expr.table is None or _same_name(expr.table, relation):
+            return mapping.get(expr.name.upper(), expr)
+        return expr
+    if isinstance(expr, BinaryExpr):
+        return BinaryExpr(
+            _substitute(expr.left, mapping, relation),
+            expr.op,
+            _substitute(expr.right, mapping, relation),
+        )
+    if isinstance(expr, UnaryExpr):
+        return UnaryExpr(expr.op, _substitute(expr.operand, mapping, relation))
+    if isinstance(expr, FunctionCall):
+        return FunctionCall(
+            expr.name, [_substitute(arg, mapping, relation) for arg in expr.args]
+        )
+    return expr
+
+
+class Rewriter:
+    """
+    Logical rewrites applied to a parsed query before planning
+
+    Predicate pushdown: WHERE and ON conjuncts are moved to the lowest FROM or JOIN
+    item they reference, a base table receiving predicates is wrapped in a subquery
+    filtering it. Conjuncts joining two relations move into the ON clause of the
+    inner join that brings them together. Outer joins are respected, nothing is
+    pushed to the side of an outer join that gets NULL padded.
+
+    Projection pushdown: base tables of joins are narrowed to the columns the rest
+    of the query references.
+
+    The input query is never modified, rewritten parts are new nodes.
+    """
+
+    def __init__(self, database: Database) -> None:
+        self.database = database
+
+    def rewrite(self, query: SelectQuery) -> SelectQuery:
+        from_ = self._rewrite_item(query.from_)
+        joins = [
+            replace(join, right=self._rewrite_item(join.right))
+            for join in query.joins or []
+        ]
+        query = replace(query, from_=from_, joins=joins)
+
+        # A single relation already has its predicates and projection right above
+        # the scan, pushdown only pays off with joins
+        if not joins:
+            return query
+
+        items = [from_] + [join.right for join in joins]
+        relations = [self._describe(item) for item in items]
+        null_supplied = self._null_supplied(joins)
+
+        pushed: list[list[Expr]] = [[] for _ in relations]
+        join_conditions: list[list[Expr]] = [
+            split_conjuncts(join.condition) for join in joins
+        ]
+
+        where: list[Expr] = []
+        for conjunct in split_conjuncts(query.where) if query.where else []:
+            owners = self._owners(conjunct, relations)
+            if owners is None or not owners or any(null_supplied[i] for i in owners):
+                where.append(conjunct)
+            elif len(owners) == 1:
+                pushed[next(iter(owners))].append(conjunct)
+            elif joins[max(owners) - 1].type == "INNER":
+                join_conditions[max(owners) - 1].append(conjunct)
+            else:
+                where.append(conjunct)
+
+        for position, join in enumerate(joins):
+            relation = position + 1
+            remaining: list[Expr] = []
+            for conjunct in join_conditions[position]:
+                owners = self._owners(conjunct, relations)
+                if owners is None or len(owners) != 1:
+                    remaining.append(conjunct)
+                    continue
+
+                (owner,) = owners
+                if owner == relation and join.type in ("INNER", "LEFT"):
+                    # The join's own inner side, filtering it early is equivalent
+                    pushed[owner].append(conjunct)
+                elif join.type == "INNER" and not null_supplied[owner]:
+                    pushed[owner].append(conjunct)
+                else:
+                    remaining.append(conjunct)
+            join_conditions[position] = remaining
+
+        joins = [
+            replace(join, condition=_conjunction(conditions) or LiteralExpr("TRUE"))
+            for join, conditions in zip(joins, join_conditions)
+        ]
+        query = replace(query, joins=joins, where=_conjunction(where))
+
+        needed = self._needed_columns(query, relations)
+        items = [
+            self._push_into(item, relation, predicates, columns)
+            for item, relation, predicates, columns in zip(
+                items, relations, pushed, needed
+            )
+        ]
+
+        return replace(
+            query,
+            from_=items[0],
+            joins=[replace(join, right=item) for join, item in zip(joins, items[1:])],
+        )
+
+    def _rewrite_item(self, item: FromItem) -> FromItem:
+        if isinstance(item, SubqueryRef) and isinstance(item.query, SelectQuery):
+            return replace(item, query=self.rewrite(item.query))
+        return item
+
+    # -------------------------
+    # Relation bookkeeping
+    # -------------------------
+    def _describe(self, item: FromItem) -> _Relation:
+        if isinstance(item, TableRef):
+            table = find_table(self.database, item.name)
+            return _Relation(
+                item.alias or item.name, [column.name for column in table.columns]
+            )
+        if isinstance(item, SubqueryRef) and isinstance(item.query, SelectQuery):
+            return _Relation(item.alias or "", self._output_names(item.query))
+        raise TypeError(f"Unsupported FROM item: {item!r}")
+
+    def _output_names(self, query: SelectQuery) -> list[str]:
+        names: list[str] = []
+        items = [query.from_] + [join.right for join in query.joins or []]
+        for select in query.select:
+            if isinstance(select.expr, StarExpr):
+                for item in items:
+                    relation = self._describe(item)
+                    if select.expr.table is None or _same_name(
+                        select.expr.table, relation.name
+                    ):
+                        names += relation.columns
+            elif select.alias:
+                names.append(select.alias)
+            elif isinstance(select.expr, ColumnExpr):
+                names.append(select.expr.name)
+            else:
+                names.append(format_expr(select.expr))
+        return names
+
+    @staticmethod
+    def _null_supplied(joins: list[Join]) -> list[bool]:
+        """Whether each relation can be NULL padded by an outer join"""
+        supplied = [any(join.type in ("RIGHT", "FULL") for join in joins)]
+        for position, join in enumerate(joins):
+            later = joins[position + 1 :]
+            supplied.append(
+                join.type in ("LEFT", "FULL")
+                or any(other.type in ("RIGHT", "FULL") for other in later)
+            )
+        return supplied
+
+    @staticmethod
+    def _column_owners(column: ColumnExpr, relations: list[_Relation]) -> list[int]:
+        if column.table is not None:
+            return [
+                index
+                for index, relation in enumerate(relations)
+                if _same_name(relation.name, column.table)
+            ]
+        return [
+            index
+            for index, relation in enumerate(relations)
+            if any(_same_name(name, column.name) for name in relation.columns)
+        ]
+
+    def _owners(
+        self, expr: Expr, relations: list[_Relation]
+    ) -> frozenset[int] | None:
+        """Relations expr refers to, None when a reference isn't unambiguous"""
+        if find_aggregates(expr):
+            return None
+        owners: set[int] = set()
+        for column in referenced_columns(expr):
+            found = self._column_owners(column, relations)
+            if len(found) != 1:
+                return None
+            owners.add(found[0])
+        return frozenset(owners)
+
+    def _needed_columns(
+        self, query: SelectQuery, relations: list[_Relation]
+    ) -> list[set[str] | None]:
+        """Upper cased column names each relation must provide, None for all"""
+        needed: list[set[str] | None] = [set() for _ in relations]
+
+        expressions: list[Expr] = []
+        for item in query.select:
+            if isinstance(item.expr, StarExpr):
+                for index, relation in enumerate(relations):
+                    if item.expr.table is None or _same_name(
+                        item.expr.table, relation.name
+                    ):
+                        needed[index] = None
+            else:
+                expressions.append(item.expr)
+        expressions += [join.condition for join in query.joins or []]
+        expressions += query.group_by or []
+        expressions += [item.expr for item in query.order_by or []]
+        for expr in (query.where, query.having):
+            if expr is not None:
+                expressions.append(expr)
+
+        for expr in expressions:
+            for column in referenced_columns(expr):
+                # Unknown references are ORDER BY aliases or errors the planner reports
+                for index in self._column_owners(column, relations):
+                    columns = needed[index]
+                    if columns is not None:
+                        columns.add(column.name.upper())
+
+        return needed
+
+    # -------------------------
+    # Pushdown
+    # -------------------------
+    def _push_into(
+        self,
+        item: FromItem,
+        relation: _Relation,
+        predicates: list[Expr],
+        needed: set[str] | None,
+    ) -> FromItem:
+        if isinstance(item, TableRef):
+            columns = [
+                name
+                for name in relation.columns
+                if needed is None or name.upper() in needed
+            ]
+            # SELECT needs at least one column, e.g. for a bare COUNT(*)
+            columns = columns or relation.columns[:1]
+            if not predicates and len(columns) == len(relation.columns):
+                return item
+
+            scan = SelectQuery(
+                select=[
+                    SelectItem(ColumnExpr(table=relation.name, name=name))
+                    for name in columns
+                ],
+                from_=item,
+                joins=[],
+                where=_conjunction(predicates),
+            )
+            return SubqueryRef(query=scan, alias=relation.name)
+
+        if isinstance(item, SubqueryRef) and predicates:
+            return self._push_into_subquery(item, predicates)
+
+        return item
+
+    def _push_into_subquery(
+        self, item: SubqueryRef, predicates: list[Expr]
+    ) -> SubqueryRef:
+        query = item.query
+        assert isinstance(query, SelectQuery)
+
+        aggregates = [
+            aggregate
+            for select in query.select
+            for aggregate in find_aggregates(select.expr)
+        ]
+        if (
+            query.group_by
+            or query.having is not None
+            or query.limit is not None
+            or aggregates
+            or any(isinstance(select.expr, StarExpr) for select in query.select)
+        ):
+            # Filtering the input would change the result, filter right above it
+            wrapper = SelectQuery(
+                select=[SelectItem(StarExpr())],
+                from_=item,
+                joins=[],
+                where=_conjunction(predicates),
+            )
+            return SubqueryRef(query=wrapper, alias=item.alias)
+
+        outputs = self._output_names(query)
+        mapping = {
+            name.upper(): select.expr for name, select in zip(outputs, query.select)
+        }
+        substituted = [
+            _substitute(predicate, mapping, item.alias or "")
+            for predicate in predicates
+        ]
+        if query.where is not None:
+            substituted.insert(0, query.where)
+
+        inner = replace(query, where=_conjunction(substituted))
+        return replace(item, query=self.rewrite(inner))
+
+
+def rewrite(query: SelectQuery, database: Database) -> SelectQuery:
+    return Rewriter(database).rewrite(query)
@@ -0,0 +1,313 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator, Sequence
+
+from PQL.engine_v1.models.parser_models import (
+    BinaryExpr,
+    ColumnExpr,
+    Expr,
+    FunctionCall,
+    LiteralExpr,
+    ParamExpr,
+    StarExpr,
+    UnaryExpr,
+)
+
+AGGREGATE_FUNCTIONS = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+SCALAR_FUNCTIONS = ("COALESCE",)
+NULL_TESTS = ("IS NULL", "IS NOT NULL")
+COMPARISON_OPERATORS = ("=", "!=", "<", "<=", ">", ">=")
+
+
+@dataclass
+class OutputColumn:
+    """A column produced by an operator, table is the name or alias qualifying it"""
+
+    table: str | None
+    name: str
+    col_type: str | None = None
+
+
+@dataclass
+class SlotExpr(Expr):
+    """A bound column reference, index is the position of the value in a row"""
+
+    index: int
+
+
+@dataclass
+class ConstExpr(Expr):
+    """A bound literal holding its Python value"""
+
+    value: Any
+
+
+QUERY_PARAMETERS: ContextVar[Sequence[Any]] = ContextVar("QUERY_PARAMETERS")
+"""Values of the ParamExpr nodes of the query being executed"""
+
+
+@contextmanager
+def bind_parameters(values: Sequence[Any]) -> Iterator[None]:
+    """Makes values visible to ParamExpr evaluation while the block runs"""
+    token = QUERY_PARAMETERS.set(values)
+    try:
+        yield
+    finally:
+        QUERY_PARAMETERS.reset(token)
+
+
+def parameter_value(index: int) -> Any:
+    try:
+        return QUERY_PARAMETERS.get()[index]
+    except (LookupError, IndexError):
+        raise ValueError(f"No value bound for parameter ${index + 1}")
+
+
+def resolve_parameters(bound: Expr) -> Expr:
+    """bound with its ParamExpr nodes replaced by ConstExpr of their current values"""
+    if isinstance(bound, ParamExpr):
+        return ConstExpr(parameter_value(bound.index))
+    if isinstance(bound, BinaryExpr):
+        left, right = resolve_parameters(bound.left), resolve_parameters(bound.right)
+        return BinaryExpr(left, bound.op, right)
+    if isinstance(bound, UnaryExpr):
+        return UnaryExpr(bound.op, resolve_parameters(bound.operand))
+    if isinstance(bound, FunctionCall):
+        return FunctionCall(bound.name, [resolve_parameters(arg) for arg in bound.args])
+    return bound
+
+
+def has_parameters(bound: Expr) -> bool:
+    """Whether bound holds a ParamExpr"""
+    if isinstance(bound, ParamExpr):
+        return True
+    if isinstance(bound, BinaryExpr):
+        return has_parameters(bound.left) or has_parameters(bound.right)
+    if isinstance(bound, UnaryExpr):
+        return has_parameters(bound.operand)
+    if isinstance(bound, FunctionCall):
+        return any(has_parameters(arg) for arg in bound.args)
+    return False
+
+
+def literal_value(value: Any) -> Any:
+    """
+    Converts the token text the parser stores in LiteralExpr into a Python value
+
+    '...' -> str, TRUE / FALSE -> bool, NULL -> None, digits -> int or float.
+    Values that are not strings were built programmatically and are returned as is.
+    """
+    if not isinstance(value, str):
+        return value
+    if value.startswith("'") and value.endswith("'") and len(value) >= 2:
+        return value[1:-1]
+    if value.upper() == "NULL":
+        return None
+    if value.upper() == "TRUE":
+        return True
+    if value.upper() == "FALSE":
+        return False
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid literal: {value!r}")
+
+
+def is_aggregate(expr: Expr) -> bool:
+    return isinstance(expr, FunctionCall) and expr.name.upper() in AGGREGATE_FUNCTIONS
+
+
+def find_aggregates(expr: Expr) -> list[FunctionCall]:
+    """Aggregate calls in expr, nested aggregates are not looked into"""
+    if is_aggregate(expr):
+        return [expr]  # type: ignore
+    found: list[FunctionCall] = []
+    if isinstance(expr, BinaryExpr):
+        found += find_aggregates(expr.left)
+        found += find_aggregates(expr.right)
+    elif isinstance(expr, UnaryExpr):
+        found += find_aggregates(expr.operand)
+    elif isinstance(expr, FunctionCall):
+        for arg in expr.args:
+            found += find_aggregates(arg)
+    return found
+
+
+def referenced_columns(expr: Expr) -> list[ColumnExpr]:
+    """Every column reference in expr, including the ones inside aggregates"""
+    if isinstance(expr, ColumnExpr):
+        return [expr]
+    if isinstance(expr, BinaryExpr):
+        return referenced_columns(expr.left) + referenced_columns(expr.right)
+    if isinstance(expr, UnaryExpr):
+        return referenced_columns(expr.operand)
+    if isinstance(expr, FunctionCall):
+        return [column for arg in expr.args for column in referenced_columns(arg)]
+    return []
+
+
+def split_conjuncts(expr: Expr) -> list[Expr]:
+    """a AND (b AND c) -> [a, b, c]"""
+    if isinstance(expr, BinaryExpr) and expr.op == "AND":
+        return split_conjuncts(expr.left) + split_conjuncts(expr.right)
+    return [expr]
+
+
+def format_expr(expr: Expr) -> str:
+    """SQL text for an expression, used for output column names and plan dumps"""
+    if isinstance(expr, ColumnExpr):
+        return f"{expr.table}.{expr.name}" if expr.table else expr.name
+    if isinstance(expr, LiteralExpr):
+        value = expr.value
+        if isinstance(value, str) and not value.startswith("'"):
+            try:
+                literal_value(value)
+            except ValueError:
+                return f"'{value}'"
+        return str(value)
+    if isinstance(expr, SlotExpr):
+        return f"#{expr.index}"
+    if isinstance(expr, ParamExpr):
+        # Plans dumped while a cached plan runs show the values it runs with
+        values = QUERY_PARAMETERS.get(())
+        if expr.index < len(values):
+            return format_expr(ConstExpr(values[expr.index]))
+        return f"${expr.index + 1}"
+    if isinstance(expr, ConstExpr):
+        if expr.value is None:
+            return "NULL"
+        return f"'{expr.value}'" if isinstance(expr.value, str) else str(expr.value)
+    if isinstance(expr, StarExpr):
+        return f"{expr.table}.*" if expr.table else "*"
+    if isinstance(expr, BinaryExpr):
+        return f"({format_expr(expr.left)} {expr.op} {format_expr(expr.right)})"
+    if isinstance(expr, UnaryExpr):
+        if expr.op in NULL_TESTS:
+            return f"{format_expr(expr.operand)} {expr.op}"
+        separator = " " if expr.op == "NOT" else ""
+        return f"{expr.op}{separator}{format_expr(expr.operand)}"
+    if isinstance(expr, FunctionCall):
+        return f"{expr.name}({', '.join(format_expr(arg) for arg in expr.args)})"
+    return repr(expr)
+
+
+def _same_name(left: str | None, right: str | None) -> bool:
+    # The lexer upper cases identifiers, so names are matched case insensitively
+    return left is not None and right is not None and left.upper() == right.upper()
+
+
+class Scope:
+    """
+    The columns visible to expressions evaluated against an operator's output
+
+    computed holds expressions already evaluated by the operator (GROUP BY keys and
+    aggregates), any expression equal to one of them binds to its slot.
+    """
+
+    def __init__(
+        self, columns: list[OutputColumn], computed: list[Expr] | None = None
+    ) -> None:
+        self.columns = columns
+        self.computed = computed or []
+
+    def __repr__(self) -> str:
+        return f"Scope(columns={[column.name for column in self.columns]})"
+
+    def __add__(self, other: "Scope") -> "Scope":
+        return Scope(self.columns + other.columns)
+
+    def find_column(self, expr: ColumnExpr) -> int | None:
+        """Index of the column expr refers to, None when it isn't in this scope"""
+        matches = [
+            index
+            for index, column in enumerate(self.columns)
+            if _same_name(column.name, expr.name)
+            and (expr.table is None or _same_name(column.table, expr.table))
+        ]
+        if len(matches) > 1:
+            raise ValueError(f"Column reference '{format_expr(expr)}' is ambiguous")
+        return matches[0] if matches else None
+
+    def resolve_column(self, expr: ColumnExpr) -> int:
+        index = self.find_column(expr)
+        if index is None:
+            raise ValueError(f"Column '{format_expr(expr)}' does not exist")
+        return index
+
+    def expand_star(self, star: StarExpr) -> list[int]:
+        indices = [
+            index
+            for index, column in enumerate(self.columns)
+            if star.table is None or _same_name(column.table, star.table)
+        ]
+        if not indices:
+            raise ValueError(f"Table '{star.table}' does not exist")
+        return indices
+
+    def bind(self, expr: Expr) -> Expr:
+        """
+        Resolves column references to slots and literal text to values
+
+        The returned expression only contains SlotExpr, ConstExpr, ParamExpr,
+        BinaryExpr, UnaryExpr and scalar FunctionCall (COALESCE) nodes.
+        """
+        for index, computed in enumerate(self.computed):
+            if expr == computed:
+                return SlotExpr(index)
+
+        if isinstance(expr, (SlotExpr, ConstExpr, ParamExpr)):
+            return expr
+        if isinstance(expr, ColumnExpr):
+            return SlotExpr(self.resolve_column(expr))
+        if isinstance(expr, LiteralExpr):
+            return ConstExpr(literal_value(expr.value))
+        if isinstance(expr, BinaryExpr):
+            return BinaryExpr(self.bind(expr.left), expr.op, self.bind(expr.right))
+        if isinstance(expr, UnaryExpr):
+            return UnaryExpr(expr.op, self.bind(expr.operand))
+        if isinstance(expr, FunctionCall):
+            name = expr.name.upper()
+            if name in SCALAR_FUNCTIONS:
+                if not expr.args:
+                    raise ValueError(f"{name} needs at least one argument")
+                return FunctionCall(name, [self.bind(arg) for arg in expr.args])
+            if is_aggregate(expr):
+                raise ValueError(
+                    f"Aggregate '{format_expr(expr)}' is not allowed here"
+                )
+            raise ValueError(f"Unknown function: {expr.name}")
+        if isinstance(expr, StarExpr):
+            raise ValueError("* is not allowed in an expression")
+        raise TypeError(f"Unsupported expression: {expr!r}")
+
+    def infer_type(self, bound: Expr) -> str | None:
+        """Column type of a bound expression, None when it can't be known"""
+        if isinstance(bound, SlotExpr):
+            return self.columns[bound.index].col_type
+        if isinstance(bound, ConstExpr):
+            return {bool: "BOOL", int: "INT", float: "FLOAT", str: "STR"}.get(
+                type(bound.value)
+            )
+        if isinstance(bound, UnaryExpr):
+            if bound.op == "NOT" or bound.op in NULL_TESTS:
+                return "BOOL"
+            return self.infer_type(bound.operand)
+        if isinstance(bound, FunctionCall):
+            # COALESCE, the type of its first argument that has one
+            types = (self.infer_type(arg) for arg in bound.args)
+            return next((kind for kind in types if kind is not None), None)
+        if isinstance(bound, BinaryExpr):
+            if bound.op in COMPARISON_OPERATORS or bound.op in ("AND", "OR"):
+                return "BOOL"
+            if bound.op == "/":
+                return "FLOAT"
+            left, right = self.infer_type(bound.left), self.infer_type(bound.right)
+            if left == right == "STR" and bound.op == "+":
+                return "STR"
+            return "INT" if left == right == "INT" else "FLOAT"
+        return None
@@ -0,0 +1,303 @@
+"""
+asyncio query server for engine_v1 databases
+
+    server = QueryServer(database)
+    await server.start_tcp("127.0.0.1", 7878)
+    await server.start_unix("/tmp/pql.sock")
+    await server.serve_forever()
+
+Queries run through the plan cache on an executor (a thread pool unless one is
+given), each inside a database snapshot, so a slow query never stalls the event
+loop or the other connections. Results are streamed in chunks of chunk_rows
+rows: the next chunk is computed while the current one is written, and not
+before, so large results are never held whole and a slow client only slows down
+its own query.
+
+Requests pipelined on one connection start running as soon as they arrive, up
+to pipeline_depth of them, and their responses are written in request order.
+See protocol.py for the wire format.
+
+    python -m PQL.engine_v1.server data/shop --port 7878
+"""
+
+import argparse
+import asyncio
+import contextvars
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterator
+
+from PQL.engine_v1.models.schema_models import Database
+from PQL.engine_v1.plan_cache import DEFAULT_PLAN_CACHE, PlanCache
+from PQL.engine_v1.protocol import (
+    CANCEL,
+    COLUMNS,
+    DEFAULT_PORT,
+    DONE,
+    ERROR,
+    PING,
+    QUERY,
+    ROWS,
+    ProtocolError,
+    encode_frame,
+    encode_message,
+    encode_payload,
+    read_message,
+)
+from PQL.engine_v1.semantic_resolver import bind_parameters
+
+DEFAULT_CHUNK_ROWS = 1024
+"""Result rows per ROWS frame"""
+
+DEFAULT_PIPELINE_DEPTH = 16
+"""Requests of one connection running ahead of the response being written"""
+
+
+class _Query:
+    """
+    A query's result generator, advanced on the executor one chunk at a time
+
+    Every step runs in the same Context, the snapshot and parameters the
+    generator binds stay bound in between steps whatever thread runs them
+    """
+
+    def __init__(self, executor: Executor, chunks: Iterator[Any]) -> None:
+        self.executor = executor
+        self.chunks = chunks
+        self.context = contextvars.Context()
+        self._step = self._advance()
+
+    def _advance(self) -> Future:
+        return self.executor.submit(self.context.run, next, self.chunks, None)
+
+    async def fetch(self) -> Any:
+        """The next item, None at the end, the one after it is computed meanwhile"""
+        item = await asyncio.wrap_future(self._step)
+        if item is not None:
+            self._step = self._advance()
+        return item
+
+    def close(self) -> None:
+        """Closes the generator once the step in flight, if any, is done"""
+        self._step.add_done_callback(lambda _: self.context.run(self.chunks.close))
+
+
+class _Request:
+    def __init__(self, request_id: int, kind: int, query: _Query | None) -> None:
+        self.request_id = request_id
+        self.kind = kind
+        self.query = query
+        self.cancelled = False
+
+
+class QueryServer:
+    """Serves queries against one database over TCP and Unix sockets"""
+
+    def __init__(
+        self,
+        database: Database,
+        executor: Executor | None = None,
+        plan_cache: PlanCache = DEFAULT_PLAN_CACHE,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        pipeline_depth: int = DEFAULT_PIPELINE_DEPTH,
+    ) -> None:
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+        if pipeline_depth < 1:
+            raise ValueError("pipeline_depth must be at least 1")
+        self.database = database
+        self.plan_cache = plan_cache
+        self.chunk_rows = chunk_rows
+        self.pipeline_depth = pipeline_depth
+        self.executor = executor or ThreadPoolExecutor(thread_name_prefix="pql-query")
+        self._owns_executor = executor is None
+        self._servers: list[asyncio.Server] = []
+        self._connections: set[asyncio.Task] = set()
+
+        self.requests = 0
+        self.errors = 0
+
+    async def start_tcp(
+        self, host: str = "127.0.0.1", port: int = DEFAULT_PORT
+    ) -> asyncio.Server:
+        server = await asyncio.start_server(self._serve, host, port)
+        self._servers.append(server)
+        return server
+
+    async def start_unix(self, path: str | Path) -> asyncio.Server:
+        server = await asyncio.start_unix_server(self._serve, str(path))
+        self._servers.append(server)
+        return server
+
+    async def serve_forever(self) -> None:
+        await asyncio.gather(*(server.serve_forever() for server in self._servers))
+
+    async def close(self) -> None:
+        """Stops listening and drops every connection"""
+        for server in self._servers:
+            server.close()
+        for connection in list(self._connections):
+            connection.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers.clear()
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _chunks(self, sql: str) -> Iterator[tuple[int, int, bytes]]:
+        """
+        (kind, row count, encoded payload) of the COLUMNS frame then of every
+        ROWS frame, runs on the executor so encoding does too
+        """
+        with self.database.snapshot():
+            entry, values = self.plan_cache.lookup(sql, self.database)
+            with bind_parameters(values):
+                columns = [
+                    [column.name, column.col_type or "STR"]
+                    for column in entry.plan.scope.columns
+                ]
+                header = {"name": entry.name, "columns": columns}
+                yield COLUMNS, 0, encode_payload(header)
+
+                rows = (row.row for row in entry.plan.rows())
+                while chunk := list(islice(rows, self.chunk_rows)):
+                    yield ROWS, len(chunk), encode_payload(chunk)
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections.add(task)
+        responses: asyncio.Queue[_Request | None] = asyncio.Queue(self.pipeline_depth)
+        running: dict[int, _Request] = {}
+        responder = asyncio.create_task(self._respond(responses, running, writer))
+        try:
+            while (message := await read_message(reader)) is not None:
+                request_id, kind, payload = message
+                if kind == CANCEL:
+                    request = running.get(request_id)
+                    if request is not None:
+                        request.cancelled = True
+                    continue
+
+                request = self._start(request_id, kind, payload)
+                running[request_id] = request
+                await responses.put(request)
+            await responses.put(None)
+            await responder
+        except (ConnectionError, ProtocolError, asyncio.CancelledError):
+            responder.cancel()
+        finally:
+            while not responses.empty():
+                request = responses.get_nowait()
+                if request is not None and request.query is not None:
+                    request.query.close()
+            writer.close()
+            self._connections.discard(task)
+
+    def _start(self, request_id: int, kind: int, payload: Any) -> _Request:
+        self.requests += 1
+        if kind != QUERY or not isinstance(payload, str):
+            return _Request(request_id, kind, None)
+        return _Request(request_id, kind, _Query(self.executor, self._chunks(payload)))
+
+    async def _respond(
+        self,
+        responses: "asyncio.Queue[_Request | None]",
+        running: dict[int, _Request],
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        while (request := await responses.get()) is not None:
+            try:
+                await self._write_response(request, writer)
+            finally:
+                running.pop(request.request_id, None)
+                if request.query is not None:
+                    request.query.close()
+        await writer.drain()
+
+    async def _write_response(
+        self, request: _Request, writer: asyncio.StreamWriter
+    ) -> None:
+        request_id, query = request.request_id, request.query
+        if query is None:
+            if request.kind == PING:
+                writer.write(encode_message(request_id, DONE, {"rows": 0}))
+            else:
+                self.errors += 1
+                error = {"type": "ProtocolError", "message": "Unsupported request"}
+                writer.write(encode_message(request_id, ERROR, error))
+            return
+
+        rows = 0
+        try:
+            while not request.cancelled and (item := await query.fetch()) is not None:
+                kind, count, payload = item
+                writer.write(encode_frame(request_id, kind, payload))
+                rows += count
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as error:
+            self.errors += 1
+            failure = {"type": type(error).__name__, "message": str(error)}
+            writer.write(encode_message(request_id, ERROR, failure))
+            return
+
+        done = {"rows": rows, "cancelled": request.cancelled}
+        writer.write(encode_message(request_id, DONE, done))
+
+
+async def serve(
+    database: Database,
+    host: str | None = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    path: str | Path | None = None,
+    **options: Any,
+) -> None:
+    """Serves database until cancelled, on host:port and/or the Unix socket path"""
+    server = QueryServer(database, **options)
+    try:
+        if host is not None:
+            await server.start_tcp(host, port)
+        if path is not None:
+            await server.start_unix(path)
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main() -> None:
+    from PQL.engine_v1.wal import DurableStore
+
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arguments.add_argument("directory", help="DurableStore directory to serve")
+    arguments.add_argument("--host", default="127.0.0.1")
+    arguments.add_argument("--port", type=int, default=DEFAULT_PORT)
+    arguments.add_argument("--unix", help="also listen on this Unix socket")
+    arguments.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    options = arguments.parse_args()
+
+    store = DurableStore(options.directory)
+    database = store.open()
+    try:
+        asyncio.run(
+            serve(
+                database,
+                options.host,
+                options.port,
+                options.unix,
+                chunk_rows=options.chunk_rows,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,502 @@
+"""
+Paged on-disk table format
+
+    page 0            header: magic, format version, page size, row and page
+                      counts, then the table name and schema
+    pages 1..n        data pages: row count, row offsets, encoded rows
+    after page n      page directory: the position of the first row of each page
+    after that        page zones: the smallest and largest value of every column
+                      of each page, as two length prefixed rows
+
+Rows never span pages. A row stores a NULL bitmask and its fixed width (INT,
+FLOAT, BOOL) values in one struct, followed by its STR values as length prefixed
+UTF-8. Files are opened through mmap, opening only reads the header, pages are
+decoded straight from the mapping when they are scanned. Scans given key ranges
+skip the pages whose zones rule them out, like Table.scan skips chunks.
+"""
+
+import mmap
+import os
+import struct
+from itertools import chain
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+from PQL.engine_v1.models.dictionary_models import encode_rows
+from PQL.engine_v1.models.index_models import KeyRange
+from PQL.engine_v1.models.mvcc_models import TableState, visible_state
+from PQL.engine_v1.models.schema_models import Column, Database, Row, Scehma, Table
+from PQL.engine_v1.models.zone_models import may_match
+
+MAGIC = b"PQLPAGES"
+FORMAT_VERSION = 2
+"""Version 1 files have no page zones, their scans read every page"""
+
+PAGE_SIZE = 8192
+MAX_PAGE_SIZE = 65536
+"""Row offsets inside a page are stored as u16"""
+
+TABLE_SUFFIX = ".pqlt"
+
+HEADER = struct.Struct("<8sHIQII")
+"""magic, version, page_size, row_count, page_count, column_count"""
+NAME_LENGTH = struct.Struct("<H")
+COLUMN_TYPE = struct.Struct("<B")
+PAGE_ROWS = struct.Struct("<H")
+ROW_OFFSET = struct.Struct("<H")
+STR_LENGTH = struct.Struct("<I")
+DIRECTORY_ENTRY = struct.Struct("<Q")
+
+FIXED_CODES = {"INT": "q", "FLOAT": "d", "BOOL": "?"}
+NULL_PLACEHOLDERS = {"INT": 0, "FLOAT": 0.0, "BOOL": False}
+MAX_COLUMNS = 64
+"""The NULL bitmask of a row is at most a u64"""
+
+
+class RowCodec:
+    """Encodes rows of a schema to bytes and decodes them from a buffer"""
+
+    def __init__(self, columns: tuple[Column, ...]) -> None:
+        if len(columns) > MAX_COLUMNS:
+            raise ValueError(f"Paged tables support at most {MAX_COLUMNS} columns")
+
+        self.columns = columns
+        self.width = len(columns)
+        self.fixed_positions = [
+            position
+            for position, column in enumerate(columns)
+            if column.col_type != "STR"
+        ]
+        self.string_positions = [
+            position
+            for position, column in enumerate(columns)
+            if column.col_type == "STR"
+        ]
+        mask_code = next(
+            code
+            for code, bits in (("B", 8), ("H", 16), ("I", 32), ("Q", 64))
+            if self.width <= bits
+        )
+        self.fixed = struct.Struct(
+            "<"
+            + mask_code
+            + "".join(
+                FIXED_CODES[columns[position].col_type]
+                for position in self.fixed_positions
+            )
+        )
+
+    def encode(self, values: tuple[Any, ...]) -> bytes:
+        if len(values) != self.width:
+            raise ValueError("Row length does not match table schema length")
+
+        mask = 0
+        fixed: list[Any] = []
+        for position in self.fixed_positions:
+            value = values[position]
+            if value is None:
+                mask |= 1 << position
+                value = NULL_PLACEHOLDERS[self.columns[position].col_type]
+            fixed.append(value)
+
+        strings: list[bytes] = []
+        for position in self.string_positions:
+            value = values[position]
+            if value is None:
+                mask |= 1 << position
+                value = ""
+            elif not isinstance(value, str):
+                raise ValueError(
+                    f"Column '{self.columns[position].name}' expects STR,"
+                    f" got {value!r}"
+                )
+            encoded = value.encode("utf-8")
+            strings.append(STR_LENGTH.pack(len(encoded)))
+            strings.append(encoded)
+
+        try:
+            head = self.fixed.pack(mask, *fixed)
+        except struct.error as error:
+            raise ValueError(f"Row {values!r} does not fit the schema: {error}")
+        return head + b"".join(strings)
+
+    def decode(self, buffer: Any, offset: int) -> tuple[Any, ...]:
+        fields = self.fixed.unpack_from(buffer, offset)
+        mask = fields[0]
+        if not self.string_positions and not mask:
+            return fields[1:]
+
+        values: list[Any] = [None] * self.width
+        for position, value in zip(self.fixed_positions, fields[1:]):
+            values[position] = value
+
+        offset += self.fixed.size
+        for position in self.string_positions:
+            (length,) = STR_LENGTH.unpack_from(buffer, offset)
+            offset += STR_LENGTH.size
+            values[position] = str(buffer[offset : offset + length], "utf-8")
+            offset += length
+
+        if mask:
+            for position in range(self.width):
+                if mask >> position & 1:
+                    values[position] = None
+        return tuple(values)
+
+
+def _encode_header(
+    table: Table, page_size: int, row_count: int, page_count: int
+) -> bytes:
+    parts = [
+        HEADER.pack(
+            MAGIC, FORMAT_VERSION, page_size, row_count, page_count, len(table.columns)
+        ),
+        _encode_name(table.name),
+    ]
+    for column in table.columns:
+        parts.append(COLUMN_TYPE.pack(Column.SUPPORTED_TYPES.index(column.col_type)))
+        parts.append(_encode_name(column.name))
+
+    header = b"".join(parts)
+    if len(header) > page_size:
+        raise ValueError(f"Schema of table '{table.name}' does not fit in one page")
+    return header.ljust(page_size, b"\0")
+
+
+def _encode_name(name: str) -> bytes:
+    encoded = name.encode("utf-8")
+    return NAME_LENGTH.pack(len(encoded)) + encoded
+
+
+def _decode_name(buffer: Any, offset: int) -> tuple[str, int]:
+    (length,) = NAME_LENGTH.unpack_from(buffer, offset)
+    offset += NAME_LENGTH.size
+    return str(buffer[offset : offset + length], "utf-8"), offset + length
+
+
+def _write_page(file: BinaryIO, rows: list[bytes], page_size: int) -> None:
+    offset = PAGE_ROWS.size + ROW_OFFSET.size * len(rows)
+    offsets = []
+    for encoded in rows:
+        offsets.append(ROW_OFFSET.pack(offset))
+        offset += len(encoded)
+    page = PAGE_ROWS.pack(len(rows)) + b"".join(offsets) + b"".join(rows)
+    file.write(page.ljust(page_size, b"\0"))
+
+
+def _encode_zone(codec: RowCodec, values: list[tuple[Any, ...]]) -> bytes:
+    """The smallest and largest value of each column of a page's rows"""
+    lows, highs = [], []
+    for column in zip(*values):
+        present = [value for value in column if value is not None]
+        lows.append(min(present) if present else None)
+        highs.append(max(present) if present else None)
+    low, high = codec.encode(tuple(lows)), codec.encode(tuple(highs))
+    return STR_LENGTH.pack(len(low)) + low + STR_LENGTH.pack(len(high)) + high
+
+
+def _write_pages(
+    file: BinaryIO, table: Table, page_size: int
+) -> tuple[int, list[int], list[bytes]]:
+    """Writes the data pages, returns the row count, page directory and zones"""
+    codec = RowCodec(table.columns)
+    directory: list[int] = []
+    zones: list[bytes] = []
+    row_count = 0
+    page: list[bytes] = []
+    values: list[tuple[Any, ...]] = []
+    used = PAGE_ROWS.size
+
+    for row in table.scan():
+        encoded = codec.encode(row.row)
+        size = ROW_OFFSET.size + len(encoded)
+        if PAGE_ROWS.size + size > page_size:
+            raise ValueError(f"Row {row.row!r} does not fit in a {page_size}B page")
+        if used + size > page_size:
+            directory.append(row_count - len(page))
+            zones.append(_encode_zone(codec, values))
+            _write_page(file, page, page_size)
+            page, values, used = [], [], PAGE_ROWS.size
+        page.append(encoded)
+        values.append(row.row)
+        used += size
+        row_count += 1
+
+    if page:
+        directory.append(row_count - len(page))
+        zones.append(_encode_zone(codec, values))
+        _write_page(file, page, page_size)
+    return row_count, directory, zones
+
+
+def write_table(table: Table, path: str | Path, page_size: int = PAGE_SIZE) -> None:
+    """
+    Writes table to path in the paged format
+
+    The file is written next to path and renamed over it once it is synced, so
+    a crash never leaves a half written table behind
+    """
+    smallest = PAGE_ROWS.size + ROW_OFFSET.size + 1
+    if not smallest <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(
+            f"Page size must be between {smallest} and {MAX_PAGE_SIZE} bytes"
+        )
+
+    path = Path(path)
+    temporary = path.with_name(path.name + ".tmp")
+    try:
+        with open(temporary, "wb") as file:
+            # Reserve the header page, it is written once the counts are known
+            file.write(b"\0" * page_size)
+            row_count, directory, zones = _write_pages(file, table, page_size)
+            file.write(b"".join(DIRECTORY_ENTRY.pack(first) for first in directory))
+            file.write(b"".join(zones))
+            file.seek(0)
+            file.write(_encode_header(table, page_size, row_count, len(directory)))
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+    os.replace(temporary, path)
+
+
+class PagedTable(Table):
+    """
+    Table backed by a memory mapped file written by write_table
+
+    Opening costs O(1): only the header is read. scan decodes rows page by page
+    from the mapping and indexing looks the page up in the page directory.
+    Anything that needs the rows as a list (mutations, create_index, rows) loads
+    them once, after which the table behaves like an in-memory Table and the
+    file is no longer read.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self.file_id = os.fstat(self._file.fileno()).st_ino
+        """Inode of the mapped file, tells whether path was replaced since"""
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"'{self.path}' is not a paged table file")
+
+        try:
+            name, schema = self._read_header()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+        super().__init__(name, schema)
+        self._state = None
+        self._codec = RowCodec(self.columns)
+
+    def _read_header(self) -> tuple[str, Scehma]:
+        buffer = self._buffer
+        if len(buffer) < HEADER.size:
+            raise ValueError(f"'{self.path}' is not a paged table file")
+
+        magic, version, page_size, row_count, page_count, column_count = (
+            HEADER.unpack_from(buffer, 0)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"'{self.path}' is not a paged table file")
+        if version not in (1, FORMAT_VERSION):
+            raise ValueError(f"Unsupported paged table version {version}")
+
+        self.page_size = page_size
+        self.page_count = page_count
+        self._row_count = row_count
+        self._directory_offset = (page_count + 1) * page_size
+        self._has_zones = version >= 2
+        self._file_zones: list[tuple[tuple[Any, ...], tuple[Any, ...]]] | None = None
+        """(lows, highs) of each page, decoded on first use"""
+
+        name, offset = _decode_name(buffer, HEADER.size)
+        columns = []
+        for _ in range(column_count):
+            (type_code,) = COLUMN_TYPE.unpack_from(buffer, offset)
+            column_name, offset = _decode_name(buffer, offset + COLUMN_TYPE.size)
+            columns.append(Column(column_name, Column.SUPPORTED_TYPES[type_code]))
+        return name, Scehma(columns)
+
+    def _published_state(self) -> TableState:
+        if self._state is None:
+            with self._write_lock:
+                if self._state is None:
+                    rows = encode_rows(list(self._scan_pages()), self.dictionaries)
+                    # Same rows as the file, so the same version
+                    self._state = TableState(rows, len(rows), 0)
+        return self._state
+
+    def _visible_state(self) -> TableState:
+        state = visible_state(self)
+        if state is not None:
+            return state
+        if self._state is None or self._state.version == 0:
+            return self._published_state()
+        # A snapshot from before the table was loaded and changed
+        rows = list(self._scan_pages())
+        return TableState(rows, len(rows), 0)
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the rows were loaded into memory and the file is no longer read"""
+        return self._state is not None
+
+    @property
+    def is_mapped(self) -> bool:
+        """Whether the file is still mapped, until close"""
+        return not self._buffer.closed
+
+    @property
+    def reads_file(self) -> bool:
+        """Whether the current snapshot reads the rows from the file"""
+        return visible_state(self) is None
+
+    def count_rows(self) -> int:
+        state = visible_state(self)
+        if state is not None:
+            return len(state)
+        return self._row_count
+
+    def _rows_in(self, state: TableState | None) -> Iterator[Row]:
+        if state is not None:
+            return iter(state)
+        return self._scan_pages()
+
+    def scan(self, ranges: dict[int, KeyRange] | None = None) -> Iterator[Row]:
+        if not ranges or visible_state(self) is not None:
+            return super().scan(ranges)
+        return chain.from_iterable(
+            self._scan_pages(first, last) for first, last in self.page_spans(ranges)
+        )
+
+    def scan_pages(self, first: int, last: int) -> Iterator[Row]:
+        """Rows of data pages first to last (exclusive) as written to the file"""
+        return self._scan_pages(first, last)
+
+    def page_spans(self, ranges: dict[int, KeyRange]) -> Iterator[tuple[int, int]]:
+        """
+        [first, last) data pages of the file that may hold rows with a key in
+        every range, keyed by column. Adjacent pages are merged.
+        """
+        zones = self._page_zones()
+        if zones is None:
+            yield 0, self.page_count
+            return
+
+        first: int | None = None
+        for page, (lows, highs) in enumerate(zones):
+            keep = all(
+                may_match(key_range, lows[column], highs[column])
+                for column, key_range in ranges.items()
+            )
+            if keep and first is None:
+                first = page
+            elif not keep and first is not None:
+                yield first, page
+                first = None
+        if first is not None:
+            yield first, self.page_count
+
+    def _page_zones(self) -> list[tuple[tuple[Any, ...], tuple[Any, ...]]] | None:
+        if not self._has_zones:
+            return None
+        if self._file_zones is None:
+            buffer, decode = self._buffer, self._codec.decode
+            offset = self._directory_offset + DIRECTORY_ENTRY.size * self.page_count
+            zones = []
+            for _ in range(self.page_count):
+                (length,) = STR_LENGTH.unpack_from(buffer, offset)
+                lows = decode(buffer, offset + STR_LENGTH.size)
+                offset += STR_LENGTH.size + length
+                (length,) = STR_LENGTH.unpack_from(buffer, offset)
+                highs = decode(buffer, offset + STR_LENGTH.size)
+                offset += STR_LENGTH.size + length
+                zones.append((lows, highs))
+            self._file_zones = zones
+        return self._file_zones
+
+    def __getitem__(self, row_ident: str | int) -> Row:
+        if not self.reads_file or not isinstance(row_ident, int):
+            return super().__getitem__(row_ident)
+        if row_ident < 0 or row_ident >= self._row_count:
+            raise IndexError(f"Row index {row_ident} out of range")
+
+        # Last page whose first row is at or before row_ident
+        low, high = 0, self.page_count - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._first_row(middle) <= row_ident:
+                low = middle
+            else:
+                high = middle - 1
+
+        start = (low + 1) * self.page_size
+        slot = row_ident - self._first_row(low)
+        (offset,) = ROW_OFFSET.unpack_from(
+            self._buffer, start + PAGE_ROWS.size + ROW_OFFSET.size * slot
+        )
+        return Row(self._codec.decode(self._buffer, start + offset))
+
+    def _first_row(self, page: int) -> int:
+        return DIRECTORY_ENTRY.unpack_from(
+            self._buffer, self._directory_offset + DIRECTORY_ENTRY.size * page
+        )[0]
+
+    def _scan_pages(self, first: int = 0, last: int | None = None) -> Iterator[Row]:
+        buffer, decode, page_size = self._buffer, self._codec.decode, self.page_size
+        last = self.page_count if last is None else min(last, self.page_count)
+        for page in range(first, last):
+            start = (page + 1) * page_size
+            (count,) = PAGE_ROWS.unpack_from(buffer, start)
+            offsets = struct.unpack_from(f"<{count}H", buffer, start + PAGE_ROWS.size)
+            for offset in offsets:
+                yield Row(decode(buffer, start + offset))
+
+    def close(self) -> None:
+        """Unmaps the file, rows already loaded stay usable"""
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self) -> "PagedTable":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"Paged{super().__repr__()}"
+
+
+def open_table(path: str | Path) -> PagedTable:
+    return PagedTable(path)
+
+
+def table_path(directory: str | Path, name: str) -> Path:
+    return Path(directory) / f"{name}{TABLE_SUFFIX}"
+
+
+def save_database(
+    database: Database, directory: str | Path, page_size: int = PAGE_SIZE
+) -> None:
+    """Writes every table of database to directory, one paged file per table"""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    with database.snapshot():
+        for table in database.tables.values():
+            write_table(table, table_path(directory, table.name), page_size)
+
+
+def open_database(directory: str | Path, name: str | None = None) -> Database:
+    """
+    Opens the tables save_database wrote to directory, this maps the files but
+    doesn't read any rows
+    """
+    directory = Path(directory)
+    database = Database(name or directory.name)
+    for path in sorted(directory.glob(f"*{TABLE_SUFFIX}")):
+        database.add_table(open_table(path))
+    return database
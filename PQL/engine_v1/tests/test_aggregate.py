@@ -0,0 +1,61 @@
+from PQL.engine_v1.models.schema_models import Row
+from PQL.engine_v1.operators.aggregate import hash_aggregate
+
+EMPLOYEES = [
+    Row(("ENG", "Alice", 100)),
+    Row(("ENG", "Bob", 80)),
+    Row(("SALES", "Charlie", 60)),
+    Row(("SALES", "Dana", None)),
+    Row(("HR", "Eve", 50)),
+]
+
+
+def test_group_by_aggregates():
+    rows = hash_aggregate(
+        EMPLOYEES,
+        [0],
+        [("COUNT", None), ("COUNT", 2), ("SUM", 2), ("AVG", 2), ("MIN", 2), ("MAX", 2)],
+    )
+
+    assert [row.row for row in rows] == [
+        ("ENG", 2, 2, 180, 90.0, 80, 100),
+        ("SALES", 2, 1, 60, 60.0, 60, 60),
+        ("HR", 1, 1, 50, 50.0, 50, 50),
+    ]
+
+
+def test_having_filters_groups():
+    rows = hash_aggregate(
+        EMPLOYEES, [0], [("COUNT", None)], having=lambda row: row.row[1] > 1
+    )
+
+    assert [row.row for row in rows] == [("ENG", 2), ("SALES", 2)]
+
+
+def test_global_aggregate_on_empty_input():
+    rows = list(hash_aggregate([], [], [("COUNT", None), ("SUM", 0)]))
+
+    assert [row.row for row in rows] == [(0, None)]
+
+
+def test_streams_input():
+    consumed = 0
+
+    def stream():
+        nonlocal consumed
+        for i in range(1_000):
+            consumed += 1
+            yield Row((i % 3, i))
+
+    rows = hash_aggregate(stream(), [0], [("MAX", 1)])
+
+    assert [row.row for row in rows] == [(0, 999), (1, 997), (2, 998)]
+    assert consumed == 1_000
+
+
+def test_unknown_aggregate():
+    try:
+        list(hash_aggregate(EMPLOYEES, [0], [("MEDIAN", 2)]))  # type: ignore
+        assert False
+    except ValueError:
+        pass
@@ -0,0 +1,80 @@
+import pytest
+
+from PQL.engine_v1.compiler import compile_expr, compile_row, prepare_expr
+from PQL.engine_v1.engine import Filter, TableScan
+from PQL.engine_v1.models.parser_models import (
+    BinaryExpr,
+    ColumnExpr,
+    ParamExpr,
+    UnaryExpr,
+)
+from PQL.engine_v1.models.schema_models import Column, Row, Scehma, Table
+from PQL.engine_v1.semantic_resolver import ConstExpr, SlotExpr, bind_parameters
+
+
+@pytest.mark.parametrize(
+    "expr, values, expected",
+    [
+        (BinaryExpr(SlotExpr(0), ">", ConstExpr(3)), (5,), True),
+        (BinaryExpr(ConstExpr(3), ">", SlotExpr(0)), (5,), False),
+        (BinaryExpr(SlotExpr(0), "+", SlotExpr(1)), (2, 3), 5),
+        (BinaryExpr(SlotExpr(0), "%", ConstExpr(4)), (10,), 2),
+        (BinaryExpr(SlotExpr(0), "=", ConstExpr(1)), (None,), None),
+        (BinaryExpr(SlotExpr(0), "=", SlotExpr(1)), (1, None), None),
+        (UnaryExpr("-", BinaryExpr(SlotExpr(0), "*", ConstExpr(2))), (4,), -8),
+        (UnaryExpr("NOT", SlotExpr(0)), (None,), None),
+    ],
+)
+def test_compiled_expressions(expr, values, expected):
+    assert compile_expr(expr)(values) == expected
+
+
+def test_three_valued_logic():
+    null_or_true = compile_expr(BinaryExpr(SlotExpr(0), "OR", ConstExpr(True)))
+    null_and_false = compile_expr(BinaryExpr(SlotExpr(0), "AND", ConstExpr(False)))
+    null_and_true = compile_expr(BinaryExpr(SlotExpr(0), "AND", ConstExpr(True)))
+
+    assert null_or_true((None,)) is True
+    assert null_and_false((None,)) is False
+    assert null_and_true((None,)) is None
+
+
+def test_compile_row():
+    assert compile_row([SlotExpr(2), SlotExpr(0)])((1, 2, 3)) == (3, 1)
+    assert compile_row([SlotExpr(1)])((1, 2, 3)) == (2,)
+    assert compile_row([])((1, 2, 3)) == ()
+    assert compile_row([SlotExpr(0), ConstExpr("X")])((1, 2)) == (1, "X")
+
+
+def test_filter_binds_once():
+    table = Table(
+        name="t",
+        schema=Scehma(
+            columns=[Column(name="a", col_type="INT"), Column(name="b", col_type="INT")]
+        ),
+    )
+    table.rows = tuple(Row((i, i % 3)) for i in range(10))
+
+    predicate = BinaryExpr(
+        BinaryExpr(ColumnExpr(None, "B"), "=", ConstExpr(0)),
+        "AND",
+        BinaryExpr(ColumnExpr("T", "A"), ">", ConstExpr(2)),
+    )
+    plan = Filter(TableScan(table, None), predicate)
+
+    assert [row.row for row in plan.rows()] == [(3, 0), (6, 0), (9, 0)]
+
+
+def test_prepared_parameters_are_read_once_per_execution():
+    prepared = prepare_expr(BinaryExpr(SlotExpr(0), "=", ParamExpr(0)))
+
+    with bind_parameters([3]):
+        equals_three = prepared()
+    with bind_parameters([4]):
+        equals_four = prepared()
+
+    # Bound to a constant, so the slot / constant closure is used
+    assert equals_three.__name__ == "slot_const"
+    assert equals_three((3,)) is True and equals_four((3,)) is False
+    with pytest.raises(ValueError):
+        prepared()
@@ -0,0 +1,130 @@
+from PQL.engine_v1.engine import run_query
+from PQL.engine_v1.models.dictionary_models import (
+    DICTIONARY_SAMPLE,
+    ColumnDictionary,
+    encode_rows,
+)
+from PQL.engine_v1.models.index_models import KeyRange
+from PQL.engine_v1.models.schema_models import (
+    Column,
+    Condition,
+    Database,
+    Literal,
+    Row,
+    Scehma,
+    Table,
+)
+
+
+def make_orders(count: int = 1_000) -> Table:
+    table = Table("orders", Scehma([Column("id", "INT"), Column("status", "STR")]))
+    # "".join builds a new str object for every row
+    table.bulk_load(
+        (number, "".join(["OPEN", "SHIPPED"][number % 2])) for number in range(count)
+    )
+    return table
+
+
+def test_rows_share_one_object_per_value():
+    table = make_orders()
+
+    statuses = [row.row[1] for row in table.rows]
+
+    assert list(table.dictionaries) == [1]
+    assert len(table.dictionaries[1]) == 2
+    assert len({id(status) for status in statuses}) == 2
+    assert statuses[:3] == ["OPEN", "SHIPPED", "OPEN"]
+
+
+def test_encode_rows_keeps_nulls_and_other_types():
+    dictionary = ColumnDictionary()
+    rows = [Row((None,)), Row((1,)), Row(("a",))]
+
+    encoded = encode_rows(rows, {0: dictionary})
+
+    assert [row.row for row in encoded] == [(None,), (1,), ("a",)]
+    assert list(dictionary.values) == ["a"]
+
+
+def test_encode_rows_copies_the_rows_it_changes():
+    dictionary = ColumnDictionary()
+    first, second = Row(("".join(["a", "b"]), 1)), Row(("".join(["a", "b"]), 2))
+    value = second.row[0]
+
+    encoded = encode_rows([first, second], {0: dictionary})
+
+    assert encoded[0] is first and encoded[1] is not second
+    assert second.row[0] is value
+    assert encoded[1].row == ("ab", 2) and encoded[1].row[0] is first.row[0]
+
+
+def test_full_dictionary_stores_new_values_as_they_come():
+    dictionary = ColumnDictionary(limit=2)
+
+    codes = [dictionary.encode(value) for value in ("a", "b", "c", "a")]
+
+    assert codes == ["a", "b", "c", "a"]
+    assert len(dictionary) == 2
+    assert not dictionary.complete
+
+
+def test_missing_key_skips_the_scan():
+    table = make_orders()
+
+    # Zones can't rule PENDING out, it sorts between OPEN and SHIPPED
+    assert list(table.scan({1: KeyRange.point("PENDING")})) == []
+    assert len(list(table.scan({1: KeyRange.point("OPEN")}))) == 1_000
+    condition = Condition(Column("status", "STR"), "=", Literal("", "PENDING"))
+    assert table.filter([condition]).count_rows() == 0
+
+    table.dictionaries[1].complete = False
+    assert len(list(table.scan({1: KeyRange.point("PENDING")}))) == 1_000
+
+
+def test_pending_rows_are_not_ruled_out():
+    database = Database("shop")
+    table = make_orders(10)
+    database.add_table(table)
+
+    with database.transaction():
+        table.add_row(Row((10, "PENDING")))
+        assert len(list(table.scan({1: KeyRange.point("PENDING")}))) == 11
+
+    assert "PENDING" in table.dictionaries[1]
+    assert len(list(table.scan({1: KeyRange.point("PENDING")}))) == 11
+
+
+def test_queries_over_encoded_columns():
+    database = Database("shop")
+    database.add_table(make_orders(10))
+
+    grouped = run_query(
+        "SELECT status, COUNT(*) AS n FROM orders GROUP BY status ORDER BY status",
+        database,
+    )
+    missing = run_query("SELECT id FROM orders WHERE status = 'PENDING'", database)
+
+    assert [row.row for row in grouped.rows] == [("OPEN", 5), ("SHIPPED", 5)]
+    assert missing.count_rows() == 0
+
+
+def test_high_cardinality_columns_drop_their_dictionary():
+    table = Table("events", Scehma([Column("id", "INT"), Column("token", "STR")]))
+    table.bulk_load((number, f"t{number}") for number in range(DICTIONARY_SAMPLE))
+    dictionary = table.dictionaries[1]
+
+    table.add_row(Row((-1, "new")))
+
+    assert dictionary.dropped and not dictionary.complete
+    assert len(dictionary) == 0
+    assert len(list(table.scan({1: KeyRange.point("t7")}))) > 0
+
+
+def test_results_are_not_encoded():
+    database = Database("shop")
+    database.add_table(make_orders(10))
+
+    result = run_query("SELECT status FROM orders", database)
+
+    assert result.dictionaries == {}
+    assert result.count_rows() == 10
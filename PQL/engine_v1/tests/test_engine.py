@@ -0,0 +1,170 @@
+from typing import Iterator
+
+from PQL.engine_v1.engine import Filter, Limit, Operator, run_query
+from PQL.engine_v1.models.parser_models import BinaryExpr, ColumnExpr, LiteralExpr
+from PQL.engine_v1.models.schema_models import Column, Database, Row, Scehma, Table
+from PQL.engine_v1.semantic_resolver import OutputColumn, Scope
+
+
+def make_database() -> Database:
+    db = Database(name="test_db")
+
+    users = Table(
+        name="users",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="name", col_type="STR"),
+                Column(name="age", col_type="INT"),
+                Column(name="dept", col_type="STR"),
+            ]
+        ),
+    )
+    users.rows = (
+        Row((1, "ALICE", 30, "ENG")),
+        Row((2, "BOB", 25, "ENG")),
+        Row((3, "CHARLIE", 35, "HR")),
+        Row((4, "DANA", 41, "SALES")),
+    )
+
+    orders = Table(
+        name="orders",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="user_id", col_type="INT"),
+                Column(name="amount", col_type="FLOAT"),
+            ]
+        ),
+    )
+    orders.rows = (
+        Row((10, 1, 5.0)),
+        Row((11, 1, 7.5)),
+        Row((12, 3, 2.0)),
+        Row((13, 9, 1.0)),
+    )
+
+    db.add_table(users)
+    db.add_table(orders)
+    return db
+
+
+def values(table: Table) -> list[tuple]:
+    return [row.row for row in table.rows]
+
+
+def test_select_where():
+    result = run_query(
+        "SELECT * FROM users WHERE age > 28 AND dept = 'ENG'", make_database()
+    )
+
+    assert [col.name for col in result.columns] == ["id", "name", "age", "dept"]
+    assert values(result) == [(1, "ALICE", 30, "ENG")]
+
+
+def test_expressions_order_by_and_limit():
+    result = run_query(
+        "SELECT name, age * 2 AS doubled FROM users ORDER BY age DESC LIMIT 2",
+        make_database(),
+    )
+
+    assert [col.name for col in result.columns] == ["name", "DOUBLED"]
+    assert values(result) == [("DANA", 82), ("CHARLIE", 70)]
+
+
+def test_inner_and_outer_joins():
+    db = make_database()
+
+    inner = run_query(
+        "SELECT u.name, o.amount FROM users AS u JOIN orders AS o ON u.id = o.user_id",
+        db,
+    )
+    assert values(inner) == [("ALICE", 5.0), ("ALICE", 7.5), ("CHARLIE", 2.0)]
+
+    left = run_query(
+        "SELECT u.name, o.amount FROM users u LEFT JOIN orders o "
+        "ON u.id = o.user_id AND o.amount > 3",
+        db,
+    )
+    assert ("CHARLIE", None) in values(left)
+    assert len(values(left)) == 5
+
+    full = run_query(
+        "SELECT u.name, o.id FROM users u FULL OUTER JOIN orders o ON u.id = o.user_id",
+        db,
+    )
+    assert (None, 13) in values(full)
+    assert len(values(full)) == 6
+
+
+def test_group_by_having():
+    result = run_query(
+        "SELECT dept, COUNT(*), AVG(age) AS avg_age FROM users "
+        "GROUP BY dept HAVING COUNT(*) > 1",
+        make_database(),
+    )
+
+    assert values(result) == [("ENG", 2, 27.5)]
+
+
+def test_subquery_in_from():
+    result = run_query(
+        "SELECT s.name FROM (SELECT name, age FROM users WHERE age > 26) AS s "
+        "ORDER BY s.name",
+        make_database(),
+    )
+
+    assert values(result) == [("ALICE",), ("CHARLIE",), ("DANA",)]
+
+
+def test_unknown_column_and_table():
+    db = make_database()
+    for sql in ("SELECT missing FROM users", "SELECT id FROM missing"):
+        try:
+            run_query(sql, db)
+            assert False
+        except ValueError:
+            pass
+
+
+class CountingScan(Operator):
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.pulled = 0
+        self.scope = Scope([OutputColumn("t", "n", "INT")])
+
+    def rows(self) -> Iterator[Row]:
+        for i in range(self.count):
+            self.pulled += 1
+            yield Row((i,))
+
+
+def test_limit_stops_pulling_rows():
+    scan = CountingScan(1_000_000)
+    predicate = BinaryExpr(ColumnExpr(None, "n"), "%", LiteralExpr("2"))
+    plan = Limit(Filter(scan, BinaryExpr(predicate, "=", LiteralExpr("0"))), 10)
+
+    assert [row.row[0] for row in plan] == list(range(0, 20, 2))
+    assert scan.pulled == 19
+
+
+def test_null_tests_and_coalesce():
+    db = make_database()
+    db.get_table("orders").add_row(Row((14, None, None)))  # type: ignore
+
+    missing = run_query("SELECT id FROM orders WHERE user_id IS NULL", db)
+    present = run_query(
+        "SELECT COUNT(*) AS n FROM orders WHERE NOT amount IS NULL", db
+    )
+    filled = run_query(
+        "SELECT id, COALESCE(user_id, amount, -1) AS owner FROM orders "
+        "WHERE id > 12 ORDER BY id",
+        db,
+    )
+    unknown = run_query("SELECT id FROM orders WHERE NOT user_id = NULL", db)
+
+    assert values(missing) == [(14,)]
+    assert values(present) == [(4,)]
+    assert values(filled) == [(13, 9), (14, -1)]
+    assert [col.name for col in filled.columns] == ["id", "OWNER"]
+    assert values(unknown) == []
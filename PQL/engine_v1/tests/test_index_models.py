@@ -0,0 +1,180 @@
+import random
+
+import pytest
+
+from PQL.engine_v1.engine import IndexScan, run_query
+from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.models.index_models import KeyRange, SortedIndex
+from PQL.engine_v1.models.schema_models import (
+    Column,
+    Condition,
+    Database,
+    Literal,
+    Row,
+    Scehma,
+    Table,
+)
+from PQL.engine_v1.parser import Parser
+from PQL.engine_v1.planner import Planner, Statistics
+
+
+def make_table(count: int = 1_000) -> Table:
+    table = Table(
+        name="accounts",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="balance", col_type="INT"),
+            ]
+        ),
+    )
+    table.rows = tuple(Row((i, (i * 37) % 101)) for i in range(count))
+    return table
+
+
+def test_key_range_intersection():
+    combined = KeyRange.from_comparison(">", 3).intersect(  # type: ignore
+        KeyRange.from_comparison("<=", 9)  # type: ignore
+    )
+
+    assert combined == KeyRange(3, 9, low_inclusive=False, high_inclusive=True)
+    assert KeyRange.point(5).intersect(KeyRange(low=2)).is_point
+    assert KeyRange.from_comparison("!=", 1) is None
+
+
+def in_range(key, key_range: KeyRange) -> bool:
+    if key is None:
+        return False
+    low, high = key_range.low, key_range.high
+    above = low is None or key > low or (key_range.low_inclusive and key == low)
+    below = high is None or key < high or (key_range.high_inclusive and key == high)
+    return above and below
+
+
+def test_sorted_index_matches_brute_force(monkeypatch):
+    # Small blocks so inserts split them and deletes empty them
+    monkeypatch.setattr(SortedIndex, "BLOCK_SIZE", 8)
+    rng = random.Random(7)
+    index = SortedIndex("idx", "key", 0)
+    live: list[Row] = []
+    for _ in range(500):
+        if live and rng.random() < 0.3:
+            row = live.pop(rng.randrange(len(live)))
+            index.remove(row)
+        else:
+            row = Row((rng.choice([None, *range(40)]),))
+            live.append(row)
+            index.insert(row)
+
+    for key_range in (
+        KeyRange.point(7),
+        KeyRange(low=10, high=20, low_inclusive=False),
+        KeyRange(high=5, high_inclusive=False),
+        KeyRange(low=35),
+        KeyRange(),
+    ):
+        expected = sorted(
+            row.row[0] for row in live if in_range(row.row[0], key_range)
+        )
+        assert [row.row[0] for row in index.scan(key_range)] == expected
+
+
+def test_indexes_follow_row_changes():
+    table = make_table(10)
+    hash_index = table.create_index("id")
+    sorted_index = table.create_index("balance", "SORTED")
+
+    new_row = Row((42, 1_000))
+    table.add_row(new_row)
+    assert list(hash_index.scan(KeyRange.point(42))) == [new_row]
+    assert list(sorted_index.scan(KeyRange(low=500))) == [new_row]
+
+    table.delete_row_by_index(0)
+    assert list(hash_index.scan(KeyRange.point(0))) == []
+    assert len(hash_index) == len(sorted_index) == 10
+
+    table.rows = (Row((1, 1)),)
+    assert len(hash_index) == len(sorted_index) == 1
+
+
+def test_create_index_validation():
+    table = make_table(10)
+    table.create_index("id")
+
+    with pytest.raises(ValueError):
+        table.create_index("id")
+    with pytest.raises(ValueError):
+        table.create_index("missing")
+    with pytest.raises(ValueError):
+        table.create_index("id", "BITMAP", name="other")
+
+    table.drop_index("accounts_id_hash")
+    assert table.indexes == {}
+
+
+def test_table_filter_uses_index():
+    table = make_table()
+    table.create_index("balance", "SORTED")
+
+    conditions = [
+        Condition(Column("balance", "INT"), ">=", Literal("low", 50)),
+        Condition(Literal("high", 52), ">", Column("balance", "INT")),
+    ]
+    candidates = table._index_candidates(conditions)
+    filtered = table.filter(conditions)
+
+    assert candidates is not None and len(candidates) < table.count_rows()
+    assert sorted(row.row for row in filtered.rows) == sorted(
+        row.row for row in table.rows if 50 <= row.row[1] < 52
+    )
+
+
+def test_filter_keeps_table_order_with_a_sorted_index():
+    table = make_table()
+    table.create_index("balance", "SORTED")
+    table.add_row(Row((2_000, 50)))
+    condition = Condition(Column("balance", "INT"), "<", Literal("high", 60))
+    expected = [row.row for row in table.rows if row.row[1] < 60]
+
+    assert [row.row for row in table.filter([condition]).rows] == expected
+    db = Database(name="test_db")
+    db.add_table(table)
+    with db.snapshot():
+        table.delete_row_by_index(0)
+        assert [row.row for row in table.filter([condition]).rows] == expected
+    assert [row.row for row in table.filter([condition]).rows] == expected[1:]
+
+
+def test_planner_picks_index_scan():
+    table = make_table()
+    table.create_index("id")
+    db = Database(name="test_db")
+    db.add_table(table)
+
+    query = Parser(tokenize("SELECT balance FROM accounts WHERE id = 500")).parse()
+    plan = Planner(db, Statistics()).plan(query)  # type: ignore
+
+    assert "IndexScan" in Planner(db, Statistics()).explain(query)  # type: ignore
+    assert [row.row for row in plan.rows()] == [((500 * 37) % 101,)]
+    assert isinstance(plan.children()[0], IndexScan)
+
+    result = run_query("SELECT id FROM accounts WHERE balance = 3 AND id < 200", db)
+    assert sorted(row.row for row in result.rows) == sorted(
+        (row.row[0],) for row in table.rows if row.row[1] == 3 and row.row[0] < 200
+    )
+
+
+@pytest.mark.parametrize("kind", ["SORTED", "HASH"])
+def test_key_of_another_type_matches_nothing(kind):
+    table = make_table()
+    db = Database(name="test_db")
+    db.add_table(table)
+    sql = "SELECT id FROM accounts WHERE id = 'x'"
+
+    without_index = run_query(sql, db).count_rows()
+    table.create_index("id", kind)
+
+    assert "IndexScan" in Planner(db, Statistics()).explain(
+        Parser(tokenize(sql)).parse()  # type: ignore
+    )
+    assert without_index == run_query(sql, db).count_rows() == 0
@@ -0,0 +1,78 @@
+from PQL.engine_v1.models.schema_models import Row
+from PQL.engine_v1.operators.join import hash_join
+
+ACCOUNTS = [
+    Row((1, "Alice")),
+    Row((2, "Bob")),
+    Row((3, "Charlie")),
+]
+
+PURCHASES = [
+    Row((100, 1, 20)),
+    Row((101, 1, 35)),
+    Row((102, 3, 10)),
+    Row((103, 4, 50)),
+    Row((104, None, 5)),
+]
+
+
+def join(join_type: str, build_side: str | None = None) -> list[tuple]:
+    rows = hash_join(
+        ACCOUNTS,
+        PURCHASES,
+        [0],
+        [1],
+        join_type,  # type: ignore
+        left_width=2,
+        right_width=3,
+        build_side=build_side,  # type: ignore
+    )
+    return sorted((row.row for row in rows), key=repr)
+
+
+def test_inner_join():
+    assert join("INNER") == sorted(
+        [
+            (1, "Alice", 100, 1, 20),
+            (1, "Alice", 101, 1, 35),
+            (3, "Charlie", 102, 3, 10),
+        ],
+        key=repr,
+    )
+
+
+def test_outer_joins():
+    left = join("LEFT")
+    assert (2, "Bob", None, None, None) in left
+    assert len(left) == 4
+
+    right = join("RIGHT")
+    assert (None, None, 103, 4, 50) in right
+    assert (None, None, 104, None, 5) in right
+    assert len(right) == 5
+
+    assert len(join("FULL")) == 6
+
+
+def test_build_side_does_not_change_result():
+    for join_type in ("INNER", "LEFT", "RIGHT", "FULL"):
+        assert join(join_type, "LEFT") == join(join_type, "RIGHT")
+
+
+def test_multi_column_keys():
+    left = [Row((1, "A", "x")), Row((1, "B", "y"))]
+    right = [Row(("B", 1, True)), Row(("A", 2, False))]
+
+    rows = list(
+        hash_join(left, right, [0, 1], [1, 0], left_width=3, right_width=3)
+    )
+
+    assert [row.row for row in rows] == [(1, "B", "y", "B", 1, True)]
+
+
+def test_mismatched_key_counts():
+    try:
+        list(hash_join(ACCOUNTS, PURCHASES, [0], [0, 1], left_width=2, right_width=3))
+        assert False
+    except ValueError:
+        pass
@@ -1,4 +1,4 @@
-from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.lexer import scan, tokenize
 from PQL.engine_v1.models.lexer_models import Token
 
 """
@@ -7,7 +7,7 @@ Test cases to ensure tokenizer extracts tokens from strings properly
 
 
 def test_invalid_tokens():
-    test_cases: list[str] = ["123ABC"]
+    test_cases: list[str] = ["123ABC", "SELECT #", "SELECT 'open"]
 
     for test_case in test_cases:
         try:
@@ -80,3 +80,63 @@ def test_valid_query_tokenization():
             result_tokens, expected_result_tokens
         ):
             assert result_token == expected_result_token
+
+
+def test_keywords_are_case_insensitive():
+    assert tokenize("select Name from accounts Where flag = True") == [
+        Token("SELECT", "SELECT"),
+        Token("IDENT", "NAME"),
+        Token("FROM", "FROM"),
+        Token("IDENT", "ACCOUNTS"),
+        Token("WHERE", "WHERE"),
+        Token("IDENT", "FLAG"),
+        Token("OP", "="),
+        Token("BOOLEAN", "TRUE"),
+    ]
+
+
+def test_string_literals_keep_case():
+    tokens = tokenize("SELECT * FROM ACCOUNT WHERE NAME = 'Alice Smith'")
+
+    assert tokens[-1] == Token("STRING", "'Alice Smith'")
+
+
+def test_keyword_prefixes_are_identifiers():
+    kinds = [token.kind for token in tokenize("SELECT ORDERS, TRUEISH, ASCII FROM T")]
+
+    assert kinds == [
+        "SELECT",
+        "IDENT",
+        "COMMA",
+        "IDENT",
+        "COMMA",
+        "IDENT",
+        "FROM",
+        "IDENT",
+    ]
+
+
+def test_scan_yields_spans_into_text():
+    text = "SELECT a.b,  -1.5\nFROM t"
+
+    spans = list(scan(text))
+
+    assert spans == [
+        ("SELECT", 0, 6),
+        ("IDENT", 7, 8),
+        ("DOT", 8, 9),
+        ("IDENT", 9, 10),
+        ("COMMA", 10, 11),
+        ("ARITH", 13, 14),
+        ("NUMBER", 14, 17),
+        ("FROM", 18, 22),
+        ("IDENT", 23, 24),
+    ]
+    assert [text[start:end] for _, start, end in spans][5:7] == ["-", "1.5"]
+
+
+def test_trailing_whitespace_is_ignored():
+    tokens = tokenize("SELECT a FROM t \n\t")
+
+    assert [token.value for token in tokens] == ["SELECT", "A", "FROM", "T"]
+    assert tokenize("  \n") == []
@@ -0,0 +1,200 @@
+import threading
+
+import pytest
+
+from PQL.engine_v1.engine import run_query
+from PQL.engine_v1.models.mvcc_models import TransactionConflict
+from PQL.engine_v1.models.schema_models import Column, Database, Row, Scehma, Table
+from PQL.engine_v1.storage import open_table, write_table
+from PQL.engine_v1.wal import LOG_NAME, DurableStore, read_log
+
+
+def make_accounts(count: int = 10, balance: int = 100) -> Table:
+    table = Table(
+        "accounts",
+        Scehma([Column("id", "INT"), Column("balance", "INT")]),
+    )
+    table.bulk_load((number, balance) for number in range(count))
+    return table
+
+
+def make_database() -> Database:
+    db = Database("bank")
+    db.add_table(make_accounts())
+    db.add_table(
+        Table("ledger", Scehma([Column("id", "INT"), Column("amount", "INT")]))
+    )
+    return db
+
+
+def values(table: Table | None) -> list[tuple]:
+    assert table is not None
+    return [row.row for row in table.scan()]
+
+
+def test_scan_keeps_its_state_while_the_table_changes():
+    table = make_accounts(count=3)
+    scan = table.scan()
+    first = next(scan)
+
+    table.delete_row_by_index(1)
+    table.add_row(Row((9, 0)))
+
+    assert [first.row, *(row.row for row in scan)] == [(0, 100), (1, 100), (2, 100)]
+    assert values(table) == [(0, 100), (2, 100), (9, 0)]
+
+
+def test_snapshot_sees_every_table_as_of_entering():
+    db = make_database()
+    accounts, ledger = db.get_table("accounts"), db.get_table("ledger")
+    assert accounts is not None and ledger is not None
+
+    with db.snapshot():
+        accounts.delete_row_by_index(0)
+        ledger.add_row(Row((0, -100)))
+
+        assert accounts.count_rows() == 10
+        assert ledger.count_rows() == 0
+        assert accounts[0].row == (0, 100)
+
+    assert accounts.count_rows() == 9
+    assert values(ledger) == [(0, -100)]
+
+
+def test_transaction_commits_atomically():
+    db = make_database()
+    accounts, ledger = db.get_table("accounts"), db.get_table("ledger")
+    assert accounts is not None and ledger is not None
+    seen: list[tuple[int, int]] = []
+
+    def read() -> None:
+        seen.append((accounts.count_rows(), ledger.count_rows()))
+
+    with db.transaction():
+        accounts.delete_row_by_index(0)
+        ledger.add_row(Row((0, -100)))
+        # Own changes are visible inside, other threads still see the old state
+        assert (accounts.count_rows(), ledger.count_rows()) == (9, 1)
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join()
+
+    read()
+    assert seen == [(10, 0), (9, 1)]
+
+
+def test_failed_transaction_changes_nothing():
+    db = make_database()
+    accounts = db.get_table("accounts")
+    assert accounts is not None
+
+    with pytest.raises(IndexError):
+        with db.transaction():
+            accounts.add_row(Row((10, 100)))
+            accounts.delete_row_by_index(50)
+
+    assert accounts.count_rows() == 10
+
+
+def test_first_committer_wins():
+    db = make_database()
+    accounts = db.get_table("accounts")
+    assert accounts is not None
+
+    with pytest.raises(TransactionConflict):
+        with db.transaction():
+            accounts.delete_row_by_index(0)
+            # Committed by another writer while the transaction is open
+            worker = threading.Thread(target=accounts.add_row, args=(Row((10, 0)),))
+            worker.start()
+            worker.join()
+
+    assert [row[0] for row in values(accounts)] == [*range(10), 10]
+
+
+def test_index_lookups_respect_the_snapshot():
+    db = make_database()
+    accounts = db.get_table("accounts")
+    assert accounts is not None
+    accounts.create_index("id", "SORTED")
+
+    with db.snapshot():
+        accounts.add_row(Row((5, 0)))
+        result = run_query("SELECT balance FROM accounts WHERE id = 5", db)
+        assert [row.row for row in result.rows] == [(100,)]
+        assert run_query("SELECT id FROM accounts WHERE id >= 5", db).count_rows() == 5
+
+    result = run_query("SELECT balance FROM accounts WHERE id = 5", db)
+    assert sorted(row.row for row in result.rows) == [(0,), (100,)]
+
+
+def test_readers_see_consistent_totals_during_transfers():
+    db = make_database()
+    accounts = db.get_table("accounts")
+    assert accounts is not None
+    totals: set[int] = set()
+    done = threading.Event()
+
+    def transfer(seed: int) -> None:
+        for step in range(50):
+            source, target = (seed + step) % 10, (seed + step + 3) % 10
+            while True:
+                try:
+                    with db.transaction():
+                        rows = {row.row[0]: row.row for row in accounts.scan()}
+                        rows[source] = (source, rows[source][1] - 1)
+                        rows[target] = (target, rows[target][1] + 1)
+                        accounts.rows = [Row(rows[key]) for key in sorted(rows)]
+                    break
+                except TransactionConflict:
+                    continue
+
+    def dashboard() -> None:
+        while not done.is_set():
+            result = run_query("SELECT SUM(balance) AS total FROM accounts", db)
+            totals.add(result.rows[0].row[0])
+
+    readers = [threading.Thread(target=dashboard) for _ in range(3)]
+    writers = [threading.Thread(target=transfer, args=(seed,)) for seed in range(3)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    assert totals == {1000}
+    assert sum(row[1] for row in values(accounts)) == 1000
+
+
+def test_snapshot_of_a_paged_table_outlives_loading(tmp_path):
+    path = tmp_path / "accounts.pqlt"
+    write_table(make_accounts(count=3), path)
+    db = Database("bank")
+
+    with open_table(path) as accounts:
+        db.add_table(accounts)
+        with db.snapshot():
+            accounts.delete_row_by_index(0)
+            assert values(accounts) == [(0, 100), (1, 100), (2, 100)]
+
+        assert values(accounts) == [(1, 100), (2, 100)]
+
+
+def test_transaction_is_logged_as_one_record(tmp_path):
+    store = DurableStore(tmp_path, fsync=False)
+    db = store.open()
+    db.add_table(make_accounts(count=2))
+    accounts = db.get_table("accounts")
+    assert accounts is not None
+
+    with db.transaction():
+        accounts.add_row(Row((2, 100)))
+        accounts.delete_row_by_index(0)
+    store.close()
+
+    records = [record["op"] for _, record, _ in read_log(tmp_path / LOG_NAME)]
+    assert records == ["create", "transaction"]
+    reopened = DurableStore(tmp_path).open()
+    assert values(reopened.get_table("accounts")) == [(1, 100), (2, 100)]
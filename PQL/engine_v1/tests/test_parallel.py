@@ -0,0 +1,157 @@
+import pytest
+
+from PQL.engine_v1.engine import materialize
+from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.models.schema_models import Column, Database, Scehma, Table
+from PQL.engine_v1.parallel import ParallelAggregate, ParallelScan, shutdown_pools
+from PQL.engine_v1.parser import Parser
+from PQL.engine_v1.plan_cache import normalize
+from PQL.engine_v1.planner import Planner, Statistics
+from PQL.engine_v1.profiler import run as profile_run
+from PQL.engine_v1.semantic_resolver import bind_parameters
+from PQL.engine_v1.storage import open_table, write_table
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pools():
+    yield
+    shutdown_pools()
+
+
+def make_table(count: int = 1_000) -> Table:
+    table = Table(
+        name="sales",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="region", col_type="STR"),
+                Column(name="amount", col_type="INT"),
+            ]
+        ),
+    )
+    table.bulk_load(
+        (i, ["north", "south", "east"][i % 3], None if i % 11 == 0 else i % 97)
+        for i in range(count)
+    )
+    return table
+
+
+def run(sql: str, db: Database, parallelism: int) -> list[tuple]:
+    # Predicate literals become parameters the workers have to receive
+    _, template, values = normalize(tokenize(sql))
+    query = Parser(template).parse()
+    planner = Planner(db, Statistics(), parallelism=parallelism, morsel_size=64)
+    with bind_parameters(values):
+        plan = planner.plan(query)  # type: ignore
+        return [row.row for row in materialize(plan, "result").rows]
+
+
+QUERIES = [
+    "SELECT id, amount * 2 FROM sales WHERE amount > 50 AND region = 'north'",
+    "SELECT * FROM sales WHERE amount < 10 ORDER BY amount DESC LIMIT 7",
+    "SELECT region, COUNT(*), SUM(amount), AVG(amount), MIN(id) FROM sales"
+    " WHERE id > 100 GROUP BY region",
+    "SELECT COUNT(*), MAX(amount) FROM sales WHERE id < 0",
+    "SELECT id FROM sales LIMIT 3",
+]
+
+
+@pytest.mark.parametrize("sql", QUERIES)
+def test_parallel_matches_serial(sql):
+    db = Database(name="test_db")
+    db.add_table(make_table())
+
+    assert run(sql, db, parallelism=2) == run(sql, db, parallelism=1)
+
+
+def test_plan_uses_parallel_operators():
+    db = Database(name="test_db")
+    db.add_table(make_table())
+    planner = Planner(db, Statistics(), parallelism=4, morsel_size=64)
+
+    def plan(sql: str):
+        return planner.plan(Parser(tokenize(sql)).parse())  # type: ignore
+
+    assert isinstance(plan("SELECT id FROM sales WHERE amount = 3"), ParallelScan)
+    assert isinstance(
+        plan("SELECT region, COUNT(*) FROM sales GROUP BY region").children()[0],
+        ParallelAggregate,
+    )
+    assert "ParallelScan workers=4" in planner.explain(
+        Parser(tokenize("SELECT id FROM sales")).parse()  # type: ignore
+    )
+
+    small = Planner(db, Statistics(), parallelism=4, morsel_size=10_000)
+    assert not isinstance(
+        small.plan(Parser(tokenize("SELECT id FROM sales")).parse()),  # type: ignore
+        ParallelScan,
+    )
+
+
+def test_paged_tables_are_split_by_page(tmp_path):
+    path = tmp_path / "sales.pqlt"
+    write_table(make_table(), path, page_size=1024)
+    db = Database(name="test_db")
+    sql = "SELECT region, SUM(amount) FROM sales WHERE amount > 20 GROUP BY region"
+
+    with open_table(path) as sales:
+        db.add_table(sales)
+        parallel = run(sql, db, parallelism=2)
+
+        assert parallel == run(sql, db, parallelism=1)
+        assert not sales.is_loaded
+
+
+def test_explain_analyze_reports_morsel_input_rows():
+    db = Database(name="test_db")
+    db.add_table(make_table())
+    planner = Planner(db, Statistics(), parallelism=2, morsel_size=64)
+    query = Parser(tokenize("SELECT id FROM sales WHERE amount < 10")).parse()
+    plan = planner.plan(query)  # type: ignore
+
+    profile = profile_run(plan)
+    for _ in range(2):
+        materialize(plan, "sales")
+    again = profile_run(plan)
+
+    assert isinstance(profile.plan, ParallelScan)
+    assert profile.rows_in(profile.plan) == again.rows_in(again.plan) == 1_000
+    assert plan.rows_scanned == 1_000
+    rows = profile.of(profile.plan).rows
+    assert f"actual rows={rows} in=1000 " in profile.report()
+
+
+def test_morsels_skip_the_chunks_zone_maps_rule_out():
+    table = make_table()
+    table.zone_rows = 100
+    db = Database(name="test_db")
+    db.add_table(table)
+    planner = Planner(db, Statistics(), parallelism=2, morsel_size=64)
+    query = Parser(tokenize("SELECT id FROM sales WHERE id >= 850")).parse()
+    plan = planner.plan(query)  # type: ignore
+
+    rows = materialize(plan, "sales").rows
+    profile = profile_run(plan)
+
+    assert isinstance(plan, ParallelScan) and plan.scan.comparisons
+    assert [row.row for row in rows] == [(i,) for i in range(850, 1_000)]
+    assert profile.rows_in(profile.plan) == 200
+
+
+def test_paged_morsels_skip_the_pages_zones_rule_out(tmp_path):
+    path = tmp_path / "sales.pqlt"
+    write_table(make_table(), path, page_size=1024)
+    db = Database(name="test_db")
+    query = Parser(tokenize("SELECT id FROM sales WHERE id >= 850")).parse()
+
+    with open_table(path) as sales:
+        db.add_table(sales)
+        planner = Planner(db, Statistics(), parallelism=2, morsel_size=64)
+        plan = planner.plan(query)  # type: ignore
+        rows = materialize(plan, "sales").rows
+        profile = profile_run(plan)
+
+        assert isinstance(plan, ParallelScan) and sales.page_count > 5
+        assert [row.row for row in rows] == [(i,) for i in range(850, 1_000)]
+        assert 150 <= profile.rows_in(profile.plan) < 300
+        assert not sales.is_loaded
@@ -1,11 +1,19 @@
+from PQL.engine_v1.lexer import tokenize
 from PQL.engine_v1.models.lexer_models import Token
 from PQL.engine_v1.parser import Parser
 from PQL.engine_v1.models.parser_models import (
+    BinaryExpr,
     ColumnExpr,
+    FunctionCall,
+    Join,
     LiteralExpr,
+    OrderByItem,
     SelectItem,
     SelectQuery,
+    StarExpr,
+    SubqueryRef,
     TableRef,
+    UnaryExpr,
 )
 
 
@@ -145,3 +153,98 @@ def test_invalid_select_item():
         assert False
     except SyntaxError:
         pass
+
+
+def test_select_where_order_by_limit():
+    tokens = tokenize(
+        "SELECT NAME FROM USERS WHERE AGE >= 18 AND NOT ACTIVE = FALSE "
+        "ORDER BY AGE DESC, NAME LIMIT 5"
+    )
+
+    query: SelectQuery = Parser(tokens).parse()  # type: ignore
+
+    assert query.where == BinaryExpr(
+        BinaryExpr(ColumnExpr(None, "AGE"), ">=", LiteralExpr("18")),
+        "AND",
+        UnaryExpr(
+            "NOT", BinaryExpr(ColumnExpr(None, "ACTIVE"), "=", LiteralExpr("FALSE"))
+        ),
+    )
+    assert query.order_by == [
+        OrderByItem(ColumnExpr(None, "AGE"), "DESC"),
+        OrderByItem(ColumnExpr(None, "NAME"), "ASC"),
+    ]
+    assert query.limit == 5
+
+
+def test_arithmetic_precedence():
+    tokens = tokenize("SELECT A + B * 2 AS X FROM T")
+
+    query: SelectQuery = Parser(tokens).parse()  # type: ignore
+
+    assert query.select[0] == SelectItem(
+        BinaryExpr(
+            ColumnExpr(None, "A"),
+            "+",
+            BinaryExpr(ColumnExpr(None, "B"), "*", LiteralExpr("2")),
+        ),
+        "X",
+    )
+
+
+def test_joins_and_group_by():
+    tokens = tokenize(
+        "SELECT U.DEPT, COUNT(*) FROM USERS U LEFT OUTER JOIN ORDERS AS O "
+        "ON U.ID = O.USER_ID GROUP BY U.DEPT HAVING COUNT(*) > 1"
+    )
+
+    query: SelectQuery = Parser(tokens).parse()  # type: ignore
+
+    assert query.from_ == TableRef(name="USERS", alias="U")
+    assert query.joins == [
+        Join(
+            "LEFT",
+            TableRef(name="ORDERS", alias="O"),
+            BinaryExpr(ColumnExpr("U", "ID"), "=", ColumnExpr("O", "USER_ID")),
+        )
+    ]
+    assert query.select[1].expr == FunctionCall("COUNT", [StarExpr()])
+    assert query.group_by == [ColumnExpr("U", "DEPT")]
+    assert query.having == BinaryExpr(
+        FunctionCall("COUNT", [StarExpr()]), ">", LiteralExpr("1")
+    )
+
+
+def test_subquery_in_from():
+    tokens = tokenize("SELECT * FROM (SELECT ID FROM USERS) AS S")
+
+    query: SelectQuery = Parser(tokens).parse()  # type: ignore
+
+    assert isinstance(query.from_, SubqueryRef)
+    assert query.from_.alias == "S"
+    assert query.select == [SelectItem(StarExpr())]
+
+
+def test_trailing_tokens_are_rejected():
+    try:
+        Parser(tokenize("SELECT ID FROM USERS USERS2 EXTRA")).parse()
+        assert False
+    except SyntaxError:
+        pass
+
+
+def test_null_tests_and_literal():
+    tokens = tokenize(
+        "SELECT COALESCE(A, NULL) FROM T WHERE A IS NOT NULL OR B IS NULL"
+    )
+
+    query: SelectQuery = Parser(tokens).parse()  # type: ignore
+
+    assert query.select[0].expr == FunctionCall(
+        "COALESCE", [ColumnExpr(None, "A"), LiteralExpr("NULL")]
+    )
+    assert query.where == BinaryExpr(
+        UnaryExpr("IS NOT NULL", ColumnExpr(None, "A")),
+        "OR",
+        UnaryExpr("IS NULL", ColumnExpr(None, "B")),
+    )
@@ -0,0 +1,124 @@
+from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.models.schema_models import Column, Database, Row, Scehma, Table
+from PQL.engine_v1.plan_cache import PlanCache, normalize
+
+
+def make_database() -> Database:
+    db = Database(name="test_db")
+    users = Table(
+        name="users",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="name", col_type="STR"),
+                Column(name="age", col_type="INT"),
+            ]
+        ),
+    )
+    users.rows = tuple(Row((i, f"U{i}", 20 + i % 30)) for i in range(100))
+    db.add_table(users)
+    return db
+
+
+def values(table: Table) -> list[tuple]:
+    return [row.row for row in table.rows]
+
+
+def test_normalize_lifts_predicate_literals():
+    key_5, _, params_5 = normalize(tokenize("SELECT name FROM users WHERE id = 5"))
+    key_7, template, params_7 = normalize(tokenize("SELECT name FROM users WHERE id = 7"))
+
+    assert key_5 == key_7
+    assert params_5 == [5] and params_7 == [7]
+    assert template[-1].kind == "PARAM"
+
+
+def test_normalize_keeps_structural_literals():
+    key_a, _, params = normalize(
+        tokenize("SELECT age + 1 FROM users WHERE name = 'A' OR age = 1 LIMIT 3")
+    )
+    key_b, _, _ = normalize(
+        tokenize("SELECT age + 2 FROM users WHERE name = 'A' OR age = 1 LIMIT 3")
+    )
+    key_c, _, _ = normalize(
+        tokenize("SELECT age + 1 FROM users WHERE name = 'A' OR age = 1 LIMIT 4")
+    )
+
+    assert params == ["A", 1]
+    assert len({key_a, key_b, key_c}) == 3
+
+
+def test_cached_plan_runs_with_new_parameters():
+    db = make_database()
+    cache = PlanCache()
+
+    first = cache.execute("SELECT name FROM users WHERE id = 5", db)
+    second = cache.execute("SELECT name FROM users WHERE id = 7", db)
+    third = cache.execute(
+        "SELECT name FROM users WHERE age >= 48 AND id > 80", db
+    )
+
+    assert values(first) == [("U5",)]
+    assert values(second) == [("U7",)]
+    assert values(third) == [("U88",), ("U89",)]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_parameters_reach_index_scans():
+    db = make_database()
+    db.tables["users"].create_index("id", "SORTED")
+    cache = PlanCache()
+
+    for low in (10, 50, 95):
+        result = cache.execute(f"SELECT id FROM users WHERE id > {low}", db)
+        assert values(result) == [(i,) for i in range(low + 1, 100)]
+    assert cache.hits == 2
+
+
+def test_explain_shows_the_bound_values():
+    db = make_database()
+    cache = PlanCache()
+
+    for sql in ("EXPLAIN", "EXPLAIN ANALYZE"):
+        for low, name in ((10, "A"), (50, "B")):
+            query = f"{sql} SELECT id FROM users WHERE id > {low} AND name = '{name}'"
+            plan = "\n".join(row.row[0] for row in cache.execute(query, db).rows)
+            assert f"(ID > {low})" in plan and f"(NAME = '{name}')" in plan
+            assert "$" not in plan
+    assert cache.hits == 2
+
+
+def test_lru_eviction():
+    db = make_database()
+    cache = PlanCache(capacity=2)
+
+    cache.execute("SELECT id FROM users WHERE id = 1", db)
+    cache.execute("SELECT name FROM users WHERE id = 1", db)
+    cache.execute("SELECT id FROM users WHERE id = 2", db)
+    cache.execute("SELECT age FROM users WHERE id = 1", db)
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    cache.execute("SELECT id FROM users WHERE id = 3", db)
+    assert cache.stats()["hits"] == 2
+
+
+def test_schema_changes_invalidate_plans():
+    db = make_database()
+    cache = PlanCache()
+    sql = "SELECT id FROM users WHERE id = 3"
+
+    cache.execute(sql, db)
+    db.tables["users"].create_index("id")
+    cache.execute(sql, db)
+    assert cache.invalidations == 1
+
+    replacement = Table(
+        name="users", schema=Scehma(columns=[Column(name="id", col_type="INT")])
+    )
+    replacement.rows = (Row((3,)), Row((3,)))
+    db.add_table(replacement)
+
+    assert values(cache.execute(sql, db)) == [(3,), (3,)]
+    assert cache.invalidations == 2
+    assert cache.misses == 3
@@ -0,0 +1,161 @@
+from PQL.engine_v1.engine import (
+    HashJoin,
+    Limit,
+    NestedLoopJoin,
+    Operator,
+    Sort,
+    TopN,
+    execute,
+)
+from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.models.schema_models import Column, Database, Row, Scehma, Table
+from PQL.engine_v1.parser import Parser
+from PQL.engine_v1.planner import Planner, Statistics, TableStats
+
+
+def make_database() -> Database:
+    db = Database(name="test_db")
+
+    fact = Table(
+        name="fact",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="cust", col_type="INT"),
+                Column(name="amount", col_type="INT"),
+            ]
+        ),
+    )
+    fact.rows = tuple(Row((i, i % 100, i % 7)) for i in range(2_000))
+
+    cust = Table(
+        name="cust",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="region", col_type="STR"),
+            ]
+        ),
+    )
+    cust.rows = tuple(Row((i, f"R{i % 4}")) for i in range(100))
+
+    db.add_table(fact)
+    db.add_table(cust)
+    return db
+
+
+def plan_for(sql: str, db: Database) -> Operator:
+    return Planner(db, Statistics()).plan(Parser(tokenize(sql)).parse())  # type: ignore
+
+
+def find(plan: Operator, kind: type) -> list[Operator]:
+    found = [plan] if isinstance(plan, kind) else []
+    for child in plan.children():
+        found += find(child, kind)
+    return found
+
+
+def test_table_statistics():
+    stats = TableStats.collect(make_database().tables["fact"])
+
+    assert stats.row_count == 2_000
+    assert stats.columns["CUST"].distinct == 100
+    assert stats.columns["AMOUNT"].min == 0
+    assert stats.columns["AMOUNT"].max == 6
+
+
+def test_hash_join_builds_on_smaller_input():
+    db = make_database()
+
+    plan = plan_for("SELECT * FROM fact f JOIN cust c ON f.cust = c.id", db)
+
+    (join,) = find(plan, HashJoin)
+    build = join.left if join.build_side == "LEFT" else join.right
+    assert build.estimated_rows == 100
+
+
+def test_join_order_keeps_select_star_column_order():
+    db = make_database()
+
+    result = execute(
+        Parser(
+            tokenize("SELECT * FROM cust c JOIN fact f ON f.cust = c.id WHERE f.id < 3")
+        ).parse(),
+        db,
+    )
+
+    assert [col.name for col in result.columns] == [
+        "id",
+        "region",
+        "id",
+        "cust",
+        "amount",
+    ]
+    assert [row.row for row in result.rows] == [
+        (0, "R0", 0, 0, 0),
+        (1, "R1", 1, 1, 1),
+        (2, "R2", 2, 2, 2),
+    ]
+
+
+def test_non_equi_join_uses_nested_loop():
+    db = make_database()
+
+    plan = plan_for("SELECT * FROM cust a JOIN cust b ON a.id < b.id", db)
+
+    assert find(plan, NestedLoopJoin)
+    assert not find(plan, HashJoin)
+
+
+def test_selectivity_estimates():
+    db = make_database()
+
+    equality = plan_for("SELECT * FROM fact WHERE cust = 5", db)
+    range_ = plan_for("SELECT * FROM fact WHERE amount >= 3", db)
+
+    assert equality.estimated_rows == 20
+    assert 800 <= range_.estimated_rows <= 1_500  # type: ignore
+
+
+def test_explain_dump():
+    db = make_database()
+    sql = (
+        "SELECT c.region, COUNT(*) FROM fact f JOIN cust c ON f.cust = c.id "
+        "GROUP BY c.region"
+    )
+    query = Parser(tokenize(sql)).parse()
+
+    dump = Planner(db, Statistics()).explain(query)  # type: ignore
+
+    lines = dump.splitlines()
+    assert lines[0].startswith("Project")
+    assert lines[1].strip().startswith("HashAggregate")
+    assert "HashJoin INNER" in dump
+    assert all("rows=" in line for line in lines)
+
+
+def test_order_by_with_limit_plans_a_top_n():
+    db = make_database()
+    db.tables["fact"].create_index("id", "SORTED")
+
+    top = plan_for("SELECT id, amount FROM fact ORDER BY amount DESC, id LIMIT 5", db)
+    ranged = plan_for(
+        "SELECT id FROM fact WHERE id >= 1990 AND amount > 2 ORDER BY id LIMIT 3", db
+    )
+    [heap], [streamed] = find(top, TopN), find(ranged, TopN)
+
+    assert not find(top, Sort) and not find(top, Limit)
+    assert not heap.presorted and streamed.presorted
+    assert top.estimated_rows == 5
+    assert [row.row for row in top.rows()] == [
+        (6, 6),
+        (13, 6),
+        (20, 6),
+        (27, 6),
+        (34, 6),
+    ]
+    assert [row.row for row in ranged.rows()] == [
+        (1991,),
+        (1992,),
+        (1993,),
+    ]
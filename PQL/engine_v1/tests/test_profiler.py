@@ -0,0 +1,103 @@
+from PQL.engine_v1.engine import run_query
+from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.models.parser_models import ExplainQuery
+from PQL.engine_v1.models.schema_models import Column, Database, Scehma, Table
+from PQL.engine_v1.parser import Parser
+from PQL.engine_v1.plan_cache import PlanCache
+from PQL.engine_v1.planner import Planner, Statistics
+from PQL.engine_v1.profiler import run
+
+
+def make_database() -> Database:
+    users = Table(
+        "users",
+        Scehma([Column("id", "INT"), Column("name", "STR"), Column("age", "INT")]),
+    )
+    users.bulk_load((number, f"U{number}", 20 + number % 40) for number in range(200))
+    orders = Table("orders", Scehma([Column("user_id", "INT"), Column("total", "INT")]))
+    orders.bulk_load((number % 50, number) for number in range(500))
+    db = Database("shop")
+    db.add_table(users)
+    db.add_table(orders)
+    return db
+
+
+def lines(table: Table) -> list[str]:
+    return [row.row[0] for row in table.rows]
+
+
+def test_parse_explain():
+    query = Parser(tokenize("EXPLAIN ANALYZE SELECT id FROM users")).parse()
+
+    assert isinstance(query, ExplainQuery)
+    assert query.analyze and not query.memory
+    assert not Parser(tokenize("explain SELECT id FROM users")).parse().analyze
+    memory = Parser(tokenize("EXPLAIN ANALYZE MEMORY SELECT memory FROM t")).parse()
+    assert memory.memory and memory.query.select[0].expr.name == "MEMORY"
+
+
+def test_explain_shows_estimates_without_running():
+    db = make_database()
+    result = run_query("EXPLAIN SELECT name FROM users WHERE age > 50", db)
+
+    assert [column.name for column in result.columns] == ["plan"]
+    plan = lines(result)
+    assert plan[0].startswith("Project")
+    assert plan[-1].strip().startswith("TableScan users")
+    assert all("rows=" in line and "actual" not in line for line in plan)
+
+
+def test_explain_analyze_reports_actual_rows():
+    db = make_database()
+    sql = (
+        "EXPLAIN ANALYZE SELECT u.name, SUM(o.total) FROM users u"
+        " JOIN orders o ON u.id = o.user_id WHERE u.age < 30 GROUP BY u.name"
+    )
+    plan = lines(run_query(sql, db))
+    traced = lines(run_query(sql.replace("ANALYZE", "ANALYZE MEMORY"), db))
+
+    assert plan[-1].startswith("Execution time: ")
+    operators = plan[:-1]
+    assert all("actual rows=" in line and "memory=" not in line for line in operators)
+    assert all("memory=" in line for line in traced[1:-1])
+    orders_scan = next(line for line in operators if "TableScan orders" in line)
+    assert "actual rows=500 " in orders_scan
+    join = next(line for line in operators if "HashJoin" in line)
+    assert " in=" in join and "estimate=" in join
+
+
+def test_profile_counts_rows_in_and_out():
+    db = make_database()
+    query = Parser(tokenize("SELECT id FROM users WHERE age = 21 LIMIT 3")).parse()
+    plan = Planner(db, Statistics()).plan(query)  # type: ignore
+
+    profile = run(plan, memory=True)
+
+    limit = profile.plan
+    assert profile.of(limit).rows == 3
+    assert profile.rows_in(limit) == 3
+    # LIMIT stops the scan early
+    scan = limit.children()[0].children()[0].children()[0]
+    assert profile.of(scan).rows < 200
+    assert all(
+        operator.peak_memory is not None and operator.time >= 0
+        for operator in profile.operators.values()
+    )
+    # The cached plan itself is never instrumented
+    assert "rows" not in vars(plan)
+
+
+def test_plan_cache_samples_profiles():
+    db = make_database()
+    cache = PlanCache(profile_rate=1.0)
+
+    result = cache.execute("SELECT id FROM users WHERE age = 21", db)
+
+    sql, profile = cache.profiles[-1]
+    assert sql == "SELECT id FROM users WHERE age = 21"
+    assert profile.of(profile.plan).rows == len(result.rows) == 5
+    assert profile.execution_time is not None
+
+    unsampled = PlanCache()
+    unsampled.execute("SELECT id FROM users", db)
+    assert not unsampled.profiles
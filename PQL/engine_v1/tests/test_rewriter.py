@@ -0,0 +1,170 @@
+from PQL.engine_v1.engine import execute
+from PQL.engine_v1.lexer import tokenize
+from PQL.engine_v1.models.parser_models import SelectQuery, SubqueryRef, TableRef
+from PQL.engine_v1.models.schema_models import Column, Database, Row, Scehma, Table
+from PQL.engine_v1.parser import Parser
+from PQL.engine_v1.rewriter import rewrite
+from PQL.engine_v1.semantic_resolver import format_expr
+
+
+def make_database() -> Database:
+    db = Database(name="test_db")
+
+    users = Table(
+        name="users",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="name", col_type="STR"),
+                Column(name="age", col_type="INT"),
+            ]
+        ),
+    )
+    users.rows = (
+        Row((1, "ANN", 30)),
+        Row((2, "BOB", 17)),
+        Row((3, "CID", 45)),
+    )
+
+    orders = Table(
+        name="orders",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="user_id", col_type="INT"),
+                Column(name="total", col_type="INT"),
+                Column(name="note", col_type="STR"),
+            ]
+        ),
+    )
+    orders.rows = (
+        Row((10, 1, 50, "A")),
+        Row((11, 1, 5, "B")),
+        Row((12, 2, 70, "C")),
+        Row((13, 9, 80, "D")),
+    )
+
+    db.add_table(users)
+    db.add_table(orders)
+    return db
+
+
+def parse(sql: str) -> SelectQuery:
+    return Parser(tokenize(sql)).parse()  # type: ignore
+
+
+def run(sql: str, db: Database) -> list[tuple]:
+    return [row.row for row in execute(parse(sql), db).rows]
+
+
+def test_single_relation_predicates_move_below_join():
+    db = make_database()
+    query = parse(
+        "SELECT u.name, o.total FROM users u JOIN orders o ON u.id = o.user_id"
+        " WHERE u.age >= 18 AND o.total > 10"
+    )
+
+    rewritten = rewrite(query, db)
+
+    assert rewritten.where is None
+    left, right = rewritten.from_, rewritten.joins[0].right
+    assert isinstance(left, SubqueryRef) and isinstance(right, SubqueryRef)
+    assert format_expr(left.query.where) == "(U.AGE >= 18)"
+    assert format_expr(right.query.where) == "(O.TOTAL > 10)"
+
+    # The parsed query is left untouched
+    assert isinstance(query.from_, TableRef) and query.where is not None
+
+
+def test_unreferenced_columns_are_pruned():
+    db = make_database()
+    query = parse("SELECT u.name FROM users u JOIN orders o ON u.id = o.user_id")
+
+    rewritten = rewrite(query, db)
+
+    left, right = rewritten.from_, rewritten.joins[0].right
+    assert [item.expr.name for item in left.query.select] == ["id", "name"]
+    assert [item.expr.name for item in right.query.select] == ["user_id"]
+
+
+def test_select_star_keeps_every_column():
+    db = make_database()
+    query = parse("SELECT * FROM users u JOIN orders o ON u.id = o.user_id")
+
+    rewritten = rewrite(query, db)
+
+    assert rewritten.from_ == query.from_
+    assert rewritten.joins[0].right == query.joins[0].right
+
+
+def test_two_relation_predicate_moves_into_join_condition():
+    db = make_database()
+    query = parse(
+        "SELECT u.name FROM users u JOIN orders o ON u.id = o.user_id"
+        " WHERE o.total < u.age"
+    )
+
+    rewritten = rewrite(query, db)
+
+    assert rewritten.where is None
+    assert format_expr(rewritten.joins[0].condition) == (
+        "((U.ID = O.USER_ID) AND (O.TOTAL < U.AGE))"
+    )
+    assert run(
+        "SELECT u.name FROM users u JOIN orders o ON u.id = o.user_id"
+        " WHERE o.total < u.age",
+        db,
+    ) == [("ANN",)]
+
+
+def test_outer_join_null_side_is_not_filtered_early():
+    db = make_database()
+    query = parse(
+        "SELECT u.name, o.total FROM users u LEFT JOIN orders o"
+        " ON u.id = o.user_id AND o.total > 10 WHERE o.total > 60"
+    )
+
+    rewritten = rewrite(query, db)
+
+    # WHERE on the NULL padded side stays above the join, its ON conjunct moves
+    assert format_expr(rewritten.where) == "(O.TOTAL > 60)"
+    assert format_expr(rewritten.joins[0].right.query.where) == "(O.TOTAL > 10)"
+    assert run(
+        "SELECT u.name, o.total FROM users u LEFT JOIN orders o"
+        " ON u.id = o.user_id AND o.total > 10 ORDER BY u.name",
+        db,
+    ) == [("ANN", 50), ("BOB", 70), ("CID", None)]
+
+
+def test_predicates_reach_through_subqueries():
+    db = make_database()
+    query = parse(
+        "SELECT s.who, o.total FROM (SELECT name AS who, id FROM users) s"
+        " JOIN orders o ON s.id = o.user_id WHERE s.who = 'ANN'"
+    )
+
+    rewritten = rewrite(query, db)
+
+    assert format_expr(rewritten.from_.query.where) == "(NAME = 'ANN')"
+    assert sorted(
+        run(
+            "SELECT s.who, o.total FROM (SELECT name AS who, id FROM users) s"
+            " JOIN orders o ON s.id = o.user_id WHERE s.who = 'ANN'",
+            db,
+        )
+    ) == [("ANN", 5), ("ANN", 50)]
+
+
+def test_aggregating_subquery_is_filtered_above():
+    db = make_database()
+    sql = (
+        "SELECT t.user_id, t.n FROM (SELECT user_id, COUNT(*) AS n FROM orders"
+        " GROUP BY user_id) t JOIN users u ON t.user_id = u.id WHERE t.n > 1"
+    )
+
+    rewritten = rewrite(parse(sql), db)
+
+    wrapper = rewritten.from_.query
+    assert isinstance(wrapper.from_, SubqueryRef)
+    assert wrapper.from_.query.group_by is not None
+    assert run(sql, db) == [(1, 2)]
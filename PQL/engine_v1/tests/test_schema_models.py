@@ -186,3 +186,113 @@ def test_expression_resolution():
     )
     result = expr.resolve()
     assert result == 15
+
+
+def test_condition_compile_matches_evaluate():
+    schema = Scehma(
+        columns=[Column(name="id", col_type="INT"), Column(name="age", col_type="INT")]
+    )
+    rows = [Row((1, 30)), Row((2, 25)), Row((3, 35))]
+    condition = Condition(
+        left=Column(name="age", col_type="INT"),
+        operation=">=",
+        right=Literal(name="value", value=30),
+    )
+
+    compiled = condition.compile(schema)
+
+    assert [compiled(row) for row in rows] == [
+        condition.evaluate(row, schema) for row in rows
+    ]
+
+
+def test_expression_compile_reads_columns():
+    schema = Scehma(
+        columns=[Column(name="id", col_type="INT"), Column(name="age", col_type="INT")]
+    )
+    expr = Expression(
+        left=Column(name="age", col_type="INT"),
+        operation=Operation("*"),
+        right=Literal(name="factor", value=2),
+    )
+    condition = Condition(
+        left=expr, operation=">", right=Literal(name="value", value=60)
+    )
+
+    assert expr.compile(schema)(Row((1, 30))) == 60
+    assert condition.compile(schema)(Row((1, 31))) is True
+    assert condition.compile(schema)(Row((1, 30))) is False
+
+
+def test_condition_compile_invalid_column():
+    schema = Scehma(columns=[Column(name="id", col_type="INT")])
+    condition = Condition(
+        left=Column(name="nonexistent", col_type="INT"),
+        operation="=",
+        right=Literal(name="value", value=1),
+    )
+    try:
+        condition.compile(schema)
+        assert False
+    except ValueError:
+        pass
+
+
+def test_table_bulk_load():
+    schema = Scehma(
+        columns=[Column(name="id", col_type="INT"), Column(name="name", col_type="STR")]
+    )
+    table = Table(name="users", schema=schema)
+    table.create_index("id")
+    table.add_row(Row((0, "Zero")))
+
+    loaded = table.bulk_load(
+        ((i, f"User{i}") for i in range(1, 2_501)), batch_size=1000
+    )
+    lookup = Condition(Column("id", "INT"), "=", Literal("id", 1_234))
+
+    assert loaded == 2_500
+    assert table.count_rows() == 2_501
+    assert table.rows[2_500].row == (2_500, "User2500")
+    assert [row.row for row in table.filter([lookup]).rows] == [(1_234, "User1234")]
+
+
+def test_table_load_batch_rejects_whole_batch():
+    schema = Scehma(columns=[Column(name="id", col_type="INT")])
+    table = Table(name="ids", schema=schema)
+
+    try:
+        table.load_batch([Row((1,)), Row((2, "extra"))])
+        assert False
+    except ValueError:
+        pass
+    assert table.count_rows() == 0
+
+
+def test_table_rows_snapshot_tracks_changes():
+    schema = Scehma(columns=[Column(name="id", col_type="INT")])
+    table = Table(name="ids", schema=schema)
+    table.bulk_load([(1,), (2,)])
+    before = table.rows
+
+    table.add_row(Row((3,)))
+    table.delete_row_by_index(0)
+
+    assert [row.row for row in before] == [(1,), (2,)]
+    assert [row.row for row in table.rows] == [(2,), (3,)]
+
+
+def test_results_and_unlogged_tables_build_no_log_records():
+    db = Database(name="test_db")
+    schema = Scehma(columns=[Column(name="id", col_type="INT")])
+    table = Table(name="ids", schema=schema)
+    db.add_table(table)
+
+    with db.transaction() as transaction:
+        table.rows = [Row((1,))]
+        table.load_batch([(2,), (3,)])
+        assert transaction.records == []
+    result = Table.from_result("ids", schema, table.scan())
+
+    assert [row.row for row in table.rows] == [(1,), (2,), (3,)]
+    assert result.rows == table.rows and result.rows[0] is table.rows[0]
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from PQL.engine_v1.client import Connection, ConnectionPool, QueryError
+from PQL.engine_v1.engine import run_query
+from PQL.engine_v1.models.schema_models import Column, Database, Scehma, Table
+from PQL.engine_v1.server import QueryServer
+
+
+def make_database(count: int = 95) -> Database:
+    users = Table(
+        "users",
+        Scehma([Column("id", "INT"), Column("name", "STR"), Column("age", "INT")]),
+    )
+    users.bulk_load((number, f"U{number}", 20 + number % 40) for number in range(count))
+    db = Database("shop")
+    db.add_table(users)
+    return db
+
+
+def values(table: Table) -> list[tuple]:
+    return [row.row for row in table.rows]
+
+
+async def start(db: Database, **options) -> tuple[QueryServer, int]:
+    server = QueryServer(db, **options)
+    listener = await server.start_tcp("127.0.0.1", 0)
+    return server, listener.sockets[0].getsockname()[1]
+
+
+def test_query_round_trip():
+    db = make_database()
+    sql = "SELECT name, age FROM users WHERE age > 50 ORDER BY age DESC LIMIT 5"
+
+    async def scenario() -> Table:
+        server, port = await start(db)
+        try:
+            connection = await Connection.open(port=port)
+            result = await connection.query(sql)
+            await connection.close()
+            return result
+        finally:
+            await server.close()
+
+    result = asyncio.run(scenario())
+    expected = run_query(sql, db)
+    assert [column.name for column in result.columns] == [
+        column.name for column in expected.columns
+    ]
+    assert values(result) == values(expected)
+
+
+def test_results_are_streamed_in_chunks():
+    db = make_database()
+
+    async def scenario() -> list[int]:
+        server, port = await start(db, chunk_rows=10)
+        try:
+            connection = await Connection.open(port=port)
+            stream = await connection.stream("SELECT id FROM users")
+            sizes = [len(chunk) async for chunk in stream]
+            await connection.close()
+            return sizes
+        finally:
+            await server.close()
+
+    assert asyncio.run(scenario()) == [10] * 9 + [5]
+
+
+def test_pipelined_requests_and_errors():
+    db = make_database()
+    queries = [f"SELECT id FROM users WHERE id = {number}" for number in range(20)]
+
+    async def scenario() -> tuple[list[Table], QueryError]:
+        server, port = await start(db)
+        try:
+            connection = await Connection.open(port=port)
+            results = await asyncio.gather(*map(connection.query, queries))
+            with pytest.raises(QueryError) as failure:
+                await connection.query("SELECT missing FROM users")
+            # The connection survives a failed query
+            await connection.ping()
+            await connection.close()
+            return results, failure.value
+        finally:
+            await server.close()
+
+    results, error = asyncio.run(scenario())
+    assert [values(result) for result in results] == [[(n,)] for n in range(20)]
+    assert error.kind == "ValueError"
+
+
+def test_cancelled_stream_leaves_the_connection_usable():
+    db = make_database(count=2000)
+
+    async def scenario() -> tuple[int, list[tuple]]:
+        server, port = await start(db, chunk_rows=1)
+        try:
+            connection = await Connection.open(port=port)
+            async with await connection.stream("SELECT id FROM users") as stream:
+                await stream.__anext__()
+            result = await connection.query("SELECT id FROM users WHERE id = 7")
+            await connection.close()
+            return stream.rows, values(result)
+        finally:
+            await server.close()
+
+    received, result = asyncio.run(scenario())
+    assert received < 2000
+    assert result == [(7,)]
+
+
+def test_pool_over_unix_socket(tmp_path):
+    db = make_database()
+    path = tmp_path / "pql.sock"
+
+    async def scenario() -> tuple[list[Table], int]:
+        server = QueryServer(db)
+        await server.start_unix(path)
+        try:
+            async with ConnectionPool(path=path, size=2) as pool:
+                queries = [f"SELECT name FROM users WHERE id = {n}" for n in range(8)]
+                results = await asyncio.gather(*map(pool.query, queries))
+                return results, len(pool.connections)
+        finally:
+            await server.close()
+
+    results, connections = asyncio.run(scenario())
+    assert [values(result) for result in results] == [[(f"U{n}",)] for n in range(8)]
+    assert 1 <= connections <= 2
@@ -0,0 +1,78 @@
+import random
+
+from PQL.engine_v1.models.schema_models import Row
+from PQL.engine_v1.operators import sort as sort_module
+from PQL.engine_v1.operators.sort import external_sort, top_n
+
+
+def make_rows(count: int) -> list[Row]:
+    rng = random.Random(42)
+    return [Row((rng.randint(0, 50), f"name_{i}", i)) for i in range(count)]
+
+
+def test_in_memory_sort():
+    rows = [Row((3, "c")), Row((1, "a")), Row((2, "b"))]
+
+    result = list(external_sort(rows, [(0, "ASC")]))
+
+    assert [row.row[0] for row in result] == [1, 2, 3]
+
+
+def test_descending_sort_with_nulls():
+    rows = [Row((3,)), Row((None,)), Row((1,)), Row((2,))]
+
+    assert [row.row[0] for row in external_sort(rows, [(0, "ASC")])] == [
+        1,
+        2,
+        3,
+        None,
+    ]
+    assert [row.row[0] for row in external_sort(rows, [(0, "DESC")])] == [
+        None,
+        3,
+        2,
+        1,
+    ]
+
+
+def test_spilled_sort_matches_in_memory_sort(tmp_path):
+    rows = make_rows(2_500)
+
+    spilled = list(
+        external_sort(
+            rows, [(0, "ASC")], max_rows_in_memory=100, spill_dir=str(tmp_path)
+        )
+    )
+    expected = sorted(rows, key=lambda row: row.row[0])
+
+    assert [row.row for row in spilled] == [row.row for row in expected]
+
+
+def test_mixed_directions_with_multi_pass_merge(monkeypatch):
+    monkeypatch.setattr(sort_module, "MERGE_FAN_IN", 3)
+    rows = make_rows(1_000)
+
+    result = list(
+        external_sort(rows, [(0, "DESC"), (2, "ASC")], max_rows_in_memory=50)
+    )
+    expected = sorted(rows, key=lambda row: (-row.row[0], row.row[2]))
+
+    assert [row.row for row in result] == [row.row for row in expected]
+
+
+def test_invalid_direction():
+    try:
+        list(external_sort([Row((1,))], [(0, "SIDEWAYS")]))  # type: ignore
+        assert False
+    except ValueError:
+        pass
+
+
+def test_top_n_matches_the_sorted_prefix():
+    rows = make_rows(1_000) + [Row((None, "null", -1))]
+
+    for keys in ([(0, "ASC")], [(0, "DESC")], [(0, "DESC"), (2, "ASC")]):
+        expected = [row.row for row in external_sort(rows, keys)]  # type: ignore
+        for count in (0, 1, 20, 2_000):
+            result = top_n(rows, keys, count)  # type: ignore
+            assert [row.row for row in result] == expected[:count], (keys, count)
@@ -0,0 +1,163 @@
+import pytest
+
+from PQL.engine_v1.engine import run_query
+from PQL.engine_v1.models.index_models import KeyRange
+from PQL.engine_v1.models.schema_models import Column, Database, Row, Scehma, Table
+from PQL.engine_v1.storage import (
+    MAX_PAGE_SIZE,
+    PagedTable,
+    RowCodec,
+    open_database,
+    open_table,
+    save_database,
+    write_table,
+)
+
+
+def make_table(count: int = 1_000) -> Table:
+    table = Table(
+        name="people",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="name", col_type="STR"),
+                Column(name="score", col_type="FLOAT"),
+                Column(name="active", col_type="BOOL"),
+            ]
+        ),
+    )
+    table.bulk_load(
+        (
+            i,
+            None if i % 7 == 0 else f"Person {i} ünï",
+            None if i % 5 == 0 else i / 4,
+            i % 2 == 0,
+        )
+        for i in range(count)
+    )
+    return table
+
+
+def test_row_codec_round_trip():
+    table = make_table(0)
+    codec = RowCodec(table.columns)
+
+    for values in [
+        (1, "Ann", 2.5, True),
+        (None, None, None, None),
+        (-(2**63), "", 0.0, False),
+    ]:
+        assert codec.decode(codec.encode(values), 0) == values
+
+    with pytest.raises(ValueError):
+        codec.encode((1.5, "Ann", 2.5, True))
+    with pytest.raises(ValueError):
+        codec.encode((1, 2, 2.5, True))
+
+
+def test_write_and_open_table(tmp_path):
+    table = make_table()
+    path = tmp_path / "people.pqlt"
+    write_table(table, path, page_size=512)
+
+    with open_table(path) as opened:
+        assert opened.name == "people"
+        assert [(col.name, col.col_type) for col in opened.columns] == [
+            ("id", "INT"),
+            ("name", "STR"),
+            ("score", "FLOAT"),
+            ("active", "BOOL"),
+        ]
+        assert opened.count_rows() == 1_000
+        assert opened.page_count > 1
+        assert [row.row for row in opened.scan()] == [row.row for row in table.rows]
+        assert opened[0].row == table[0].row
+        assert opened[999].row == table[999].row
+        assert opened[437].row == table[437].row
+        with pytest.raises(IndexError):
+            opened[1_000]
+        # Scans and lookups are served from the mapping
+        assert not opened.is_loaded
+    assert not opened.is_mapped
+
+
+def test_page_size_is_validated(tmp_path):
+    path = tmp_path / "people.pqlt"
+
+    for page_size in (4, MAX_PAGE_SIZE + 1):
+        with pytest.raises(ValueError, match=f"between 5 and {MAX_PAGE_SIZE} bytes"):
+            write_table(make_table(10), path, page_size=page_size)
+    assert not path.exists()
+
+
+def test_paged_table_loads_on_mutation(tmp_path):
+    path = tmp_path / "people.pqlt"
+    write_table(make_table(10), path)
+    opened = open_table(path)
+
+    opened.add_row(Row((10, "New", 1.0, True)))
+    opened.create_index("id")
+
+    assert opened.is_loaded
+    assert opened.count_rows() == 11
+    assert opened[10].row == (10, "New", 1.0, True)
+
+    # The file still holds what was written, rewriting it persists the change
+    opened.close()
+    write_table(opened, path)
+    with open_table(path) as reopened:
+        assert reopened.count_rows() == 11
+
+
+def test_empty_table(tmp_path):
+    path = tmp_path / "empty.pqlt"
+    write_table(make_table(0), path)
+
+    with open_table(path) as opened:
+        assert opened.count_rows() == 0
+        assert list(opened.scan()) == []
+
+
+def test_scans_skip_the_pages_zones_rule_out(tmp_path):
+    path = tmp_path / "people.pqlt"
+    write_table(make_table(), path, page_size=512)
+
+    with open_table(path) as opened:
+        spans = list(opened.page_spans({0: KeyRange(low=500, high=509)}))
+        rows = list(opened.scan({0: KeyRange(low=500, high=509)}))
+
+        assert len(spans) == 1 and spans[0][1] - spans[0][0] <= 2
+        assert set(range(500, 510)) <= {row.row[0] for row in rows}
+        assert len(rows) < 100
+        # Every page's names sort after this one
+        assert list(opened.scan({1: KeyRange.point("Nobody")})) == []
+
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "other.pqlt"
+    path.write_bytes(b"not a table" * 100)
+
+    with pytest.raises(ValueError):
+        open_table(path)
+
+
+def test_queries_over_opened_database(tmp_path):
+    db = Database(name="test_db")
+    db.add_table(make_table())
+    save_database(db, tmp_path)
+
+    opened = open_database(tmp_path, name="test_db")
+    with opened.get_table("people") as table:  # type: ignore
+        result = run_query(
+            "SELECT id, name FROM people WHERE active = TRUE AND id < 10", opened
+        )
+
+        assert isinstance(table, PagedTable)
+        assert [row.row for row in result.rows] == [
+            (0, None),
+            (2, "Person 2 ünï"),
+            (4, "Person 4 ünï"),
+            (6, "Person 6 ünï"),
+            (8, "Person 8 ünï"),
+        ]
+        assert not table.is_loaded
@@ -0,0 +1,260 @@
+import os
+import threading
+
+from PQL.engine_v1.models.schema_models import Column, Row, Scehma, Table
+from PQL.engine_v1.storage import PagedTable
+from PQL.engine_v1.wal import (
+    LOG_NAME,
+    DurableStore,
+    WriteAheadLog,
+    encode_frame,
+    read_log,
+)
+
+
+def make_table() -> Table:
+    table = Table(
+        name="events",
+        schema=Scehma(
+            columns=[
+                Column(name="id", col_type="INT"),
+                Column(name="kind", col_type="STR"),
+            ]
+        ),
+    )
+    table.bulk_load([(1, "open"), (2, None)])
+    return table
+
+
+def values(table: Table | None) -> list[tuple]:
+    assert table is not None
+    return [row.row for row in table.scan()]
+
+
+def test_read_log_stops_at_corruption(tmp_path):
+    path = tmp_path / LOG_NAME
+    frames = [encode_frame(lsn, {"op": "delete", "index": lsn}) for lsn in (1, 2, 3)]
+    damaged = bytearray(frames[2])
+    damaged[-2] ^= 0xFF
+    path.write_bytes(frames[0] + frames[1] + bytes(damaged))
+
+    assert [lsn for lsn, _, _ in read_log(path)] == [1, 2]
+
+
+def test_mutations_survive_reopen(tmp_path):
+    store = DurableStore(tmp_path, fsync=False)
+    db = store.open()
+    db.add_table(make_table())
+    events = db.get_table("events")
+    assert events is not None
+
+    events.add_row(Row((3, "close")))
+    events.bulk_load([(4, "a"), (5, "b")])
+    events.delete_row_by_index(0)
+    store.close()
+
+    reopened = DurableStore(tmp_path).open()
+
+    assert values(reopened.get_table("events")) == [
+        (2, None),
+        (3, "close"),
+        (4, "a"),
+        (5, "b"),
+    ]
+
+
+def test_torn_tail_is_discarded(tmp_path):
+    store = DurableStore(tmp_path, fsync=False)
+    store.open().add_table(make_table())
+    store.close()
+    frame = encode_frame(9, {"op": "delete", "table": "events", "index": 0})
+    with open(tmp_path / LOG_NAME, "ab") as file:
+        file.write(frame[:-3])
+
+    store = DurableStore(tmp_path, fsync=False)
+    events = store.open().get_table("events")
+    assert events is not None
+    events.add_row(Row((3, "after")))
+    store.close()
+
+    assert values(DurableStore(tmp_path).open().get_table("events")) == [
+        (1, "open"),
+        (2, None),
+        (3, "after"),
+    ]
+
+
+def test_checkpoint_truncates_log(tmp_path):
+    store = DurableStore(tmp_path, fsync=False)
+    db = store.open()
+    db.add_table(make_table())
+    events = db.get_table("events")
+    assert events is not None
+    events.add_row(Row((3, "close")))
+
+    lsn = store.checkpoint()
+    events.delete_row_by_index(1)
+    store.close()
+
+    assert lsn == 2
+    assert [lsn for lsn, _, _ in read_log(tmp_path / LOG_NAME)] == [3]
+    assert values(DurableStore(tmp_path).open().get_table("events")) == [
+        (1, "open"),
+        (3, "close"),
+    ]
+
+
+def test_log_older_than_checkpoint_is_skipped(tmp_path):
+    store = DurableStore(tmp_path, fsync=False)
+    store.open().add_table(make_table())
+    store.wal.commit(store.wal.last_lsn)  # type: ignore
+    log = (tmp_path / LOG_NAME).read_bytes()
+    store.checkpoint()
+    store.close()
+
+    # A crash after the checkpoint was published but before the log was cut
+    (tmp_path / LOG_NAME).write_bytes(log)
+
+    assert values(DurableStore(tmp_path).open().get_table("events")) == [
+        (1, "open"),
+        (2, None),
+    ]
+
+
+def test_concurrent_writers_share_syncs(tmp_path):
+    store = DurableStore(tmp_path, fsync=False, commit_delay=0.005)
+    db = store.open()
+    db.add_table(make_table())
+    events = db.get_table("events")
+    assert events is not None
+    wal = store.wal
+    assert wal is not None
+    syncs, records = wal.syncs, wal.records
+
+    def insert(offset: int) -> None:
+        for i in range(20):
+            events.add_row(Row((offset + i, "thread")))
+
+    threads = [threading.Thread(target=insert, args=(n * 100,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert wal.records - records == 160
+    assert wal.syncs - syncs < 160
+    store.close()
+    assert events.count_rows() == 162
+    assert DurableStore(tmp_path).open().tables["events"].count_rows() == 162
+
+
+def test_changes_are_published_once_synced(tmp_path, monkeypatch):
+    store = DurableStore(tmp_path)
+    db = store.open()
+    db.add_table(make_table())
+    events = db.get_table("events")
+    assert events is not None
+    seen = []
+    fsync = os.fsync
+
+    def observe(descriptor: int) -> None:
+        seen.append(events.count_rows())
+        fsync(descriptor)
+
+    monkeypatch.setattr(os, "fsync", observe)
+    events.add_row(Row((3, "close")))
+
+    assert seen == [2]
+    assert events.count_rows() == 3
+    store.close()
+
+
+def test_batched_writes_are_published_together(tmp_path):
+    store = DurableStore(tmp_path, fsync=False)
+    db = store.open()
+    db.add_table(make_table())
+    events = db.get_table("events")
+    wal = store.wal
+    assert events is not None and wal is not None
+
+    with wal.batch():
+        events.add_row(Row((3, "a")))
+        events.delete_row_by_index(0)
+        events.add_row(Row((4, "b")))
+        assert values(events) == [(1, "open"), (2, None)]
+
+    assert values(events) == [(2, None), (3, "a"), (4, "b")]
+    store.close()
+
+
+def test_checkpoint_inside_a_batch_keeps_its_writes(tmp_path):
+    store = DurableStore(tmp_path, fsync=False)
+    db = store.open()
+    db.add_table(make_table())
+    events = db.get_table("events")
+    wal = store.wal
+    assert events is not None and wal is not None
+
+    with wal.batch():
+        events.add_row(Row((3, "a")))
+        store.checkpoint()
+        assert values(events) == [(1, "open"), (2, None), (3, "a")]
+        events.add_row(Row((4, "b")))
+    store.close()
+
+    assert values(DurableStore(tmp_path).open().get_table("events")) == [
+        (1, "open"),
+        (2, None),
+        (3, "a"),
+        (4, "b"),
+    ]
+
+
+def test_checkpoints_mapped_by_paged_tables_are_kept(tmp_path):
+    store = DurableStore(tmp_path, fsync=False)
+    store.open().add_table(make_table())
+    first = tmp_path / f"checkpoint-{store.checkpoint():020d}"
+    store.close()
+
+    store = DurableStore(tmp_path, fsync=False)
+    events = store.open().get_table("events")
+    assert isinstance(events, PagedTable)
+    events.add_row(Row((3, "close")))
+    second = tmp_path / f"checkpoint-{store.checkpoint():020d}"
+    assert first.exists() and second.exists()
+
+    events.close()
+    events.add_row(Row((4, "later")))
+    store.checkpoint()
+    assert not first.exists() and not second.exists()
+    store.close()
+    assert DurableStore(tmp_path).open().tables["events"].count_rows() == 4
+
+
+def test_batch_syncs_once(tmp_path):
+    wal = WriteAheadLog(tmp_path / LOG_NAME, fsync=False)
+    applied = []
+
+    with wal.batch():
+        for i in range(100):
+            wal.write({"op": "noop", "i": i}, lambda: applied.append(1))
+
+    assert len(applied) == 100
+    assert wal.syncs == 1
+    assert len(list(read_log(tmp_path / LOG_NAME))) == 100
+
+
+def test_log_checkpoints_when_full(tmp_path):
+    store = DurableStore(tmp_path, fsync=False, checkpoint_bytes=2_000)
+    db = store.open()
+    db.add_table(make_table())
+    events = db.get_table("events")
+    assert events is not None
+
+    for i in range(200):
+        events.add_row(Row((i, "row")))
+
+    assert (tmp_path / "CURRENT").exists()
+    assert (tmp_path / LOG_NAME).stat().st_size < 2_000
+    store.close()
+    assert DurableStore(tmp_path).open().tables["events"].count_rows() == 202
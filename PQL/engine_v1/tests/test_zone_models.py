@@ -0,0 +1,127 @@
+import random
+
+from PQL.engine_v1.engine import run_query
+from PQL.engine_v1.models.index_models import KeyRange
+from PQL.engine_v1.models.schema_models import (
+    Column,
+    Condition,
+    Database,
+    Literal,
+    Row,
+    Scehma,
+    Table,
+)
+from PQL.engine_v1.models.zone_models import UNORDERED, ZoneMap
+
+
+def make_events(count: int = 10_000, zone_rows: int = 100) -> Table:
+    table = Table(
+        "events",
+        Scehma([Column("ts", "INT"), Column("kind", "STR"), Column("score", "INT")]),
+    )
+    table.zone_rows = zone_rows
+    table.bulk_load(
+        (ts, f"K{ts % 3}", None if ts % 10 == 0 else ts % 7) for ts in range(count)
+    )
+    return table
+
+
+def values(rows) -> list[tuple]:
+    return [row.row for row in rows]
+
+
+def test_zones_track_min_max_and_nulls():
+    rows = [Row((number, None if number % 4 == 0 else -number)) for number in range(10)]
+    zones = ZoneMap.build(rows, len(rows), 2, chunk_rows=4)
+
+    assert len(zones) == 3
+    assert zones.zone(0, 1) == (4, 7, 0)
+    assert zones.zone(1, 1) == (-7, -5, 1)
+
+    rows.append(Row((3, 1)))
+    zones.extend(len(rows))
+    assert zones.zone(0, 2) == (3, 9, 0)
+    assert zones.zone(1, 2) == (-9, 1, 1)
+
+
+def test_spans_skip_ruled_out_chunks():
+    rows = [Row((number,)) for number in range(100)]
+    zones = ZoneMap.build(rows, 90, 1, chunk_rows=10)
+
+    between = KeyRange(25, 41, low_inclusive=True, high_inclusive=False)
+    assert list(zones.spans({0: between}, 90)) == [(20, 50)]
+    assert list(zones.spans({0: KeyRange.point(200)}, 90)) == []
+    # Rows past the covered length can't be ruled out
+    assert list(zones.spans({0: KeyRange.point(95)}, 100)) == [(90, 100)]
+
+
+def test_unordered_and_null_only_chunks():
+    rows = [Row((None,)), Row((None,)), Row((1,)), Row(("a",))]
+    zones = ZoneMap.build(rows, 4, 1, chunk_rows=2)
+
+    assert zones.zone(0, 1) == (UNORDERED, UNORDERED, 0)
+    assert list(zones.spans({0: KeyRange.point(1)}, 4)) == [(2, 4)]
+
+
+def test_filter_reads_only_matching_chunks():
+    table = make_events()
+    conditions = [
+        Condition(Column("ts", "INT"), ">=", Literal("low", 4_050)),
+        Condition(Column("ts", "INT"), "<", Literal("high", 4_120)),
+    ]
+
+    result = table.filter(conditions)
+
+    assert values(result.rows) == [
+        row.row for row in table.rows if 4_050 <= row.row[0] < 4_120
+    ]
+    ranges = table._condition_ranges(conditions)
+    assert len(list(table.scan(ranges))) == 200
+
+
+def test_zones_follow_appends_and_deletes():
+    table = make_events(count=1_000)
+    ranges = {0: KeyRange.point(5_000)}
+    assert list(table.scan(ranges)) == []
+
+    table.add_row(Row((5_000, "K0", 1)))
+    assert values(table.scan(ranges)) == [(5_000, "K0", 1)]
+
+    # The delete shifts the new row into the last full chunk
+    table.delete_row_by_index(0)
+    scanned = values(table.scan(ranges))
+    assert len(scanned) == 100 and scanned[-1] == (5_000, "K0", 1)
+
+
+def test_older_snapshot_scans_its_own_rows():
+    table = make_events(count=500)
+    db = Database("log")
+    db.add_table(table)
+    ranges = {0: KeyRange(high=10)}
+
+    def matching() -> list[tuple]:
+        return [row for row in values(table.scan(ranges)) if row[0] <= 10]
+
+    with db.snapshot():
+        before = matching()
+        table.delete_row_by_index(3)
+        table.add_row(Row((-1, "K0", 0)))
+        assert matching() == before
+    assert len(matching()) == len(before)
+
+
+def test_sql_range_query_uses_zone_maps():
+    rng = random.Random(7)
+    table = make_events()
+    db = Database("log")
+    db.add_table(table)
+    sql = "SELECT ts, kind FROM events WHERE ts >= 2500 AND ts < 2600 AND kind = 'K1'"
+
+    plan = [row.row[0] for row in run_query("EXPLAIN " + sql, db).rows]
+    assert "zones (ts >= 2500 AND ts < 2600 AND kind = 'K1')" in plan[-1]
+
+    for _ in range(5):
+        low = rng.randrange(10_000)
+        query = f"SELECT ts FROM events WHERE ts > {low} AND ts <= {low + 50}"
+        expected = [(ts,) for ts in range(low + 1, min(low + 51, 10_000))]
+        assert values(run_query(query, db).rows) == expected
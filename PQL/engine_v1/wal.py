@@ -0,0 +1,462 @@
+"""
+Write-ahead log for engine_v1 databases
+
+Every mutation of a durable database (Database.add_table, Table.add_row,
+load_batch, delete_row_by_index and assigning Table.rows) is appended to the log
+as a logical record and synced before the call returns. Readers only see a
+change once its record is synced, so nothing they saw is lost in a crash. The
+mutations of a
+Database.transaction are logged as one record when it commits, so recovery
+redoes all of them or none. Writers that commit at
+the same time share one fsync (group commit), and WriteAheadLog.batch defers the
+sync of a single writer to the end of a block.
+
+A checkpoint writes every table to a new directory in the paged format of
+storage.py, points CURRENT at it and truncates the log. Older checkpoints are
+removed once no paged table maps their files. Opening a DurableStore maps the
+current checkpoint and replays the records logged after it.
+
+Log frames are `length, crc32, lsn` followed by a JSON payload, the checksum
+covers the lsn and the payload. Recovery stops at the first torn or corrupt
+frame and cuts the log there.
+"""
+
+import json
+import os
+import shutil
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+from PQL.engine_v1.models.schema_models import Column, Database, Row, Scehma, Table
+from PQL.engine_v1.storage import PAGE_SIZE, PagedTable, open_database, save_database
+
+T = TypeVar("T")
+
+FRAME = struct.Struct("<IIQ")
+"""payload length, crc32 of lsn and payload, lsn"""
+LSN = struct.Struct("<Q")
+
+LOG_NAME = "wal.log"
+CURRENT_NAME = "CURRENT"
+CHECKPOINT_PREFIX = "checkpoint-"
+
+DEFAULT_CHECKPOINT_BYTES = 64 * 1024 * 1024
+"""Log size after which a DurableStore checkpoints on its own"""
+
+
+def encode_frame(lsn: int, record: dict[str, Any]) -> bytes:
+    payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    checksum = zlib.crc32(payload, zlib.crc32(LSN.pack(lsn)))
+    return FRAME.pack(len(payload), checksum, lsn) + payload
+
+
+def read_log(path: str | Path) -> Iterator[tuple[int, dict[str, Any], int]]:
+    """
+    Yields (lsn, record, end offset) for every intact frame of the log at path,
+    stops at the end of the file or at the first torn or corrupt frame
+    """
+    try:
+        data = Path(path).read_bytes()
+    except FileNotFoundError:
+        return
+
+    offset = 0
+    while offset + FRAME.size <= len(data):
+        length, checksum, lsn = FRAME.unpack_from(data, offset)
+        start, end = offset + FRAME.size, offset + FRAME.size + length
+        if end > len(data):
+            return
+        payload = data[start:end]
+        if zlib.crc32(payload, zlib.crc32(LSN.pack(lsn))) != checksum:
+            return
+        try:
+            record = json.loads(payload)
+        except ValueError:
+            return
+        yield lsn, record, end
+        offset = end
+
+
+class WriteAheadLog:
+    """
+    Append only log of logical records with group commit
+
+    write appends a record and applies its change under one lock, so the log
+    order is the order changes were applied in, then waits until the record is
+    synced. The first waiter becomes the leader and syncs everything appended so
+    far, waiters arriving meanwhile are covered by the next sync. The leader then
+    publishes the changes it synced, in log order.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        next_lsn: int = 1,
+        fsync: bool = True,
+        commit_delay: float = 0.0,
+    ) -> None:
+        self.path = Path(path)
+        self.fsync = fsync
+        self.commit_delay = commit_delay
+        """Seconds a leader waits for more writers to join its sync"""
+        self.on_full: Callable[[], Any] | None = None
+        """Called after a commit once size reaches checkpoint_bytes"""
+        self.checkpoint_bytes = DEFAULT_CHECKPOINT_BYTES
+
+        self.records = 0
+        self.syncs = 0
+
+        self._file = open(self.path, "ab")
+        self.size = self._file.tell()
+        self._next_lsn = next_lsn
+        self._durable_lsn = next_lsn - 1
+        self._pending: list[bytes] = []
+        self._unpublished: list[tuple[int, Callable[[], Any]]] = []
+        self._flushing = False
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._local = threading.local()
+
+    @property
+    def last_lsn(self) -> int:
+        return self._next_lsn - 1
+
+    def append(self, record: dict[str, Any]) -> int:
+        """Buffers record without syncing it, returns its lsn"""
+        with self._lock:
+            return self._append(record)
+
+    def _append(self, record: dict[str, Any]) -> int:
+        lsn = self._next_lsn
+        self._pending.append(encode_frame(lsn, record))
+        self._next_lsn += 1
+        self.records += 1
+        return lsn
+
+    def write(
+        self,
+        record: dict[str, Any],
+        apply: Callable[[], T],
+        publish: Callable[[T], Any] | None = None,
+    ) -> T:
+        """
+        Logs record, applies the change it describes and waits until it's durable.
+        publish is called with the result of apply once record is synced, it makes
+        the change visible to readers.
+        """
+        with self._lock:
+            lsn = self._append(record)
+            try:
+                result = apply()
+            except BaseException:
+                # Nothing was flushed since, the lock is still held
+                self._pending.pop()
+                self._next_lsn -= 1
+                self.records -= 1
+                raise
+            if publish is not None:
+                self._unpublished.append((lsn, partial(publish, result)))
+
+        if getattr(self._local, "depth", 0):
+            self._local.last_lsn = lsn
+        else:
+            self.commit(lsn)
+        return result
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Writes inside the block are synced once, when it exits"""
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        if not depth:
+            self._local.last_lsn = 0
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+        if not depth and self._local.last_lsn:
+            self.commit(self._local.last_lsn)
+
+    def commit(self, lsn: int) -> None:
+        """Blocks until every record up to lsn is synced"""
+        with self._synced:
+            while self._durable_lsn < lsn:
+                if self._flushing:
+                    self._synced.wait()
+                    continue
+                self._flush()
+
+        on_full = self.on_full
+        if on_full is not None and self.size >= self.checkpoint_bytes:
+            on_full()
+
+    def _flush(self) -> None:
+        """Syncs everything appended so far, called with the lock held"""
+        self._flushing = True
+        try:
+            if self.commit_delay:
+                self._synced.wait(self.commit_delay)
+            frames, self._pending = self._pending, []
+            last = self._next_lsn - 1
+
+            self._lock.release()
+            try:
+                data = self._write(frames)
+            finally:
+                self._lock.acquire()
+            self._synced_up_to(last, len(data))
+        finally:
+            self._flushing = False
+            self._synced.notify_all()
+
+    def _write(self, frames: list[bytes]) -> bytes:
+        data = b"".join(frames)
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        return data
+
+    def _synced_up_to(self, lsn: int, written: int) -> None:
+        self.size += written
+        self._durable_lsn = max(self._durable_lsn, lsn)
+        self.syncs += 1
+        self._publish()
+
+    def _publish(self) -> None:
+        """Publishes the changes of synced records in log order, lock held"""
+        durable = self._durable_lsn
+        ready = [publish for lsn, publish in self._unpublished if lsn <= durable]
+        if not ready:
+            return
+        self._unpublished = [
+            entry for entry in self._unpublished if entry[0] > durable
+        ]
+        for publish in ready:
+            publish()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[int]:
+        """
+        Blocks every writer for the duration of the block, yields the last lsn,
+        used to take a consistent checkpoint
+        """
+        with self._synced:
+            while self._flushing:
+                self._synced.wait()
+            yield self._next_lsn - 1
+
+    def sync_pending(self) -> None:
+        """
+        Syncs and publishes the records appended so far without letting writers
+        in, has to be called inside exclusive. A checkpoint calls it first, so it
+        saves every change a writer was told about, batched ones included.
+        """
+        if self._pending:
+            frames, self._pending = self._pending, []
+            self._synced_up_to(self._next_lsn - 1, len(self._write(frames)))
+            self._synced.notify_all()
+
+    def reset(self) -> None:
+        """
+        Empties the log once a checkpoint covers all of it, has to be called
+        inside exclusive after sync_pending
+        """
+        if self._pending:
+            raise ValueError("Log records would be dropped, call sync_pending first")
+        self._file.truncate(0)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            pending = self._next_lsn - 1
+        self.commit(pending)
+        self._file.close()
+
+
+def apply_record(database: Database, record: dict[str, Any]) -> None:
+    """Redoes the change a log record describes"""
+    op = record["op"]
+    if op == "create":
+        table = Table(
+            record["table"],
+            Scehma(Column(name, col_type) for name, col_type in record["columns"]),
+        )
+        table.load_batch(record["rows"])
+        database.add_table(table)
+        return
+
+    if op == "transaction":
+        for change in record["records"]:
+            apply_record(database, change)
+        return
+
+    table = database.get_table(record["table"])
+    if table is None:
+        raise ValueError(f"Log references unknown table '{record['table']}'")
+    if op == "insert":
+        table.add_row(Row(tuple(record["row"])))
+    elif op == "load":
+        table.load_batch(record["rows"])
+    elif op == "delete":
+        table.delete_row_by_index(record["index"])
+    elif op == "replace":
+        table.rows = [Row(tuple(values)) for values in record["rows"]]
+    else:
+        raise ValueError(f"Unknown log record: {op}")
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Makes renames inside directory durable"""
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class DurableStore:
+    """
+    Directory holding a database's latest checkpoint and the log of changes made
+    since
+
+        store = DurableStore("data/shop")
+        db = store.open()
+        db.add_table(...)        # logged and synced
+        store.checkpoint()       # or automatically once the log is large
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        name: str | None = None,
+        checkpoint_bytes: int = DEFAULT_CHECKPOINT_BYTES,
+        commit_delay: float = 0.0,
+        fsync: bool = True,
+        page_size: int = PAGE_SIZE,
+    ) -> None:
+        self.directory = Path(directory)
+        self.name = name or self.directory.name
+        self.checkpoint_bytes = checkpoint_bytes
+        self.commit_delay = commit_delay
+        self.fsync = fsync
+        self.page_size = page_size
+        self.database: Database | None = None
+        self.wal: WriteAheadLog | None = None
+        self._checkpointing = threading.Lock()
+
+    def open(self) -> Database:
+        """Recovers the database from the last checkpoint and the log"""
+        if self.database is not None:
+            return self.database
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        checkpoint_lsn, checkpoint = self._current_checkpoint()
+        if checkpoint is None:
+            database = Database(self.name)
+        else:
+            database = open_database(checkpoint, self.name)
+
+        log_path = self.directory / LOG_NAME
+        last_lsn, valid_end = checkpoint_lsn, 0
+        for lsn, record, end in read_log(log_path):
+            if lsn > checkpoint_lsn:
+                apply_record(database, record)
+            last_lsn, valid_end = max(last_lsn, lsn), end
+
+        # Drop a torn tail so new frames are appended after intact ones
+        if log_path.exists() and log_path.stat().st_size != valid_end:
+            with open(log_path, "r+b") as file:
+                file.truncate(valid_end)
+
+        wal = WriteAheadLog(log_path, last_lsn + 1, self.fsync, self.commit_delay)
+        wal.checkpoint_bytes = self.checkpoint_bytes
+        wal.on_full = self._checkpoint_when_idle
+        database.wal = wal
+        for table in database.tables.values():
+            table.wal = wal
+
+        self.database, self.wal = database, wal
+        self._retire_checkpoints(checkpoint)
+        return database
+
+    def _current_checkpoint(self) -> tuple[int, Path | None]:
+        current = self.directory / CURRENT_NAME
+        if not current.exists():
+            return 0, None
+        name = current.read_text().strip()
+        return int(name.removeprefix(CHECKPOINT_PREFIX)), self.directory / name
+
+    def checkpoint(self) -> int:
+        """
+        Writes every table to a new checkpoint and empties the log, returns the
+        lsn the checkpoint covers. Writers are blocked while it runs.
+        """
+        with self._checkpointing:
+            return self._checkpoint()
+
+    def _checkpoint_when_idle(self) -> None:
+        if self._checkpointing.acquire(blocking=False):
+            try:
+                self._checkpoint()
+            finally:
+                self._checkpointing.release()
+
+    def _checkpoint(self) -> int:
+        if self.database is None or self.wal is None:
+            raise ValueError("Store is not open")
+
+        with self.wal.exclusive() as lsn:
+            # Staged changes are only in the snapshot once published
+            self.wal.sync_pending()
+            name = f"{CHECKPOINT_PREFIX}{lsn:020d}"
+            target = self.directory / name
+            # An existing one covers the same records and may be mapped
+            if not target.exists():
+                staging = self.directory / f"{name}.tmp"
+                shutil.rmtree(staging, ignore_errors=True)
+                save_database(self.database, staging, self.page_size)
+                os.replace(staging, target)
+
+            current = self.directory / f"{CURRENT_NAME}.tmp"
+            with open(current, "w") as file:
+                file.write(name)
+                file.flush()
+                if self.fsync:
+                    os.fsync(file.fileno())
+            os.replace(current, self.directory / CURRENT_NAME)
+            if self.fsync:
+                _fsync_directory(self.directory)
+            self.wal.reset()
+
+        self._retire_checkpoints(target)
+        return lsn
+
+    def _retire_checkpoints(self, current: Path | None) -> None:
+        """
+        Removes the checkpoints before current, except those paged tables of the
+        database still map. They are retried by the next checkpoint.
+        """
+        mapped = set()
+        if self.database is not None:
+            mapped = {
+                table.path.parent
+                for table in self.database.tables.values()
+                if isinstance(table, PagedTable) and table.is_mapped
+            }
+        for old in self.directory.glob(f"{CHECKPOINT_PREFIX}*"):
+            if old != current and old not in mapped:
+                shutil.rmtree(old, ignore_errors=True)
+
+    def close(self) -> None:
+        if self.wal is not None:
+            self.wal.close()
+        self.database = self.wal = None
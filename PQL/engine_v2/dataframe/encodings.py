@@ -0,0 +1,383 @@
+"""
+Compressed encodings of INT and BOOL column vectors
+
+A compressed vector is cut into chunks of CHUNK_ROWS values and every chunk
+picks the smallest of the encodings that fit it:
+
+    BitPacked       BOOL, one bit per value in an int
+    FrameOfReference INT, offsets from the chunk minimum in the narrowest array
+    RunLength       INT and BOOL, (value, run end) pairs for repetitive data
+    Delta           INT, non-decreasing chunks (ids, timestamps) as offsets
+                    from the previous value
+
+Offsets are packed to whole bytes (1, 2, 4 or 8 per value), decoding arbitrary
+bit widths one value at a time would cost more in Python than it saves.
+
+Every chunk keeps its minimum and maximum, comparisons that hold for all or
+none of a chunk's values are answered without decoding it, and sum/min/max
+read the encoded form directly.
+"""
+
+import operator
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, groupby, repeat
+from typing import Any, Callable, Iterator
+
+CHUNK_ROWS = 1 << 14
+"""Values per compressed chunk"""
+
+COMPRESSED_TYPES = ("INT", "BOOL")
+
+DELTA_CHECKPOINT = 128
+"""Delta chunks keep every this many-th value, reading one sums fewer gaps"""
+
+# Narrowest unsigned array typecode holding offsets below each limit
+_WIDTHS = ((1 << 8, "B"), (1 << 16, "H"), (1 << 32, "I"), (1 << 64, "Q"))
+
+Compare = Callable[[Any, Any], Any]
+
+
+def _offsets(values: Any, reference: int) -> "array[int]":
+    """values - reference, all non-negative, in the narrowest unsigned array"""
+    offsets = [value - reference for value in values]
+    top = max(offsets, default=0)
+    typecode = next(code for limit, code in _WIDTHS if top < limit)
+    return array(typecode, offsets)
+
+
+def _selectors(selected: bool, length: int) -> bytes:
+    return (b"\x01" if selected else b"\x00") * length
+
+
+def _decided(op: Compare, value: Any, low: Any, high: Any) -> bool | None:
+    """Whether `x op value` holds for every / no x in [low, high], None if unsure"""
+    try:
+        return _bounds_decide(op, value, low, high)
+    except TypeError:
+        # Not comparable with the chunk's values, left to the values themselves
+        return None
+
+
+def _bounds_decide(op: Compare, value: Any, low: Any, high: Any) -> bool | None:
+    if op is operator.eq:
+        if value < low or value > high:
+            return False
+        return True if low == high == value else None
+    if op is operator.ne:
+        decided = _bounds_decide(operator.eq, value, low, high)
+        return None if decided is None else not decided
+    if op(low, value) and op(high, value):
+        # lt, le, gt and ge are monotonic, both ends agreeing covers the middle
+        return True
+    if not op(low, value) and not op(high, value):
+        return False
+    return None
+
+
+class Chunk(ABC):
+    """Encoded values of one chunk, see the encodings below"""
+
+    __slots__ = ("length", "low", "high")
+
+    typecode = "q"
+    """Typecode of the decoded array"""
+
+    def __init__(self, length: int, low: Any, high: Any) -> None:
+        self.length = length
+        self.low = low
+        self.high = high
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """Size of the encoded values"""
+
+    @abstractmethod
+    def decode(self) -> "array[Any]":
+        """The chunk's values"""
+
+    def get(self, index: int) -> Any:
+        return self.decode()[index]
+
+    def select(self, op: Compare, value: Any) -> bytes:
+        """0/1 selector byte per value of `value op other`"""
+        if self.length:
+            decided = _decided(op, value, self.low, self.high)
+            if decided is not None:
+                return _selectors(decided, self.length)
+        return self._select(op, value)
+
+    def _select(self, op: Compare, value: Any) -> bytes:
+        return bytes(map(op, self.decode(), repeat(value)))
+
+    def sum(self) -> int:
+        return sum(self.decode())
+
+
+class FrameOfReference(Chunk):
+    """INT values as offsets from the chunk minimum"""
+
+    __slots__ = ("offsets",)
+
+    def __init__(self, values: "array[int]") -> None:
+        low, high = (min(values), max(values)) if values else (0, 0)
+        super().__init__(len(values), low, high)
+        self.offsets = _offsets(values, low)
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.itemsize * len(self.offsets) + 8
+
+    def decode(self) -> "array[int]":
+        low = self.low
+        return array("q", [offset + low for offset in self.offsets])
+
+    def get(self, index: int) -> int:
+        return self.low + self.offsets[index]
+
+    def _select(self, op: Compare, value: Any) -> bytes:
+        # Comparing offsets saves adding the reference back to every value
+        if isinstance(value, int):
+            return bytes(map(op, self.offsets, repeat(value - self.low)))
+        return super()._select(op, value)
+
+    def sum(self) -> int:
+        return sum(self.offsets) + self.low * self.length
+
+
+class Delta(Chunk):
+    """
+    Non-decreasing INT values as the first one and the gaps after it, plus every
+    DELTA_CHECKPOINT-th value
+    """
+
+    __slots__ = ("gaps", "checkpoints")
+
+    def __init__(self, values: "array[int]") -> None:
+        super().__init__(len(values), values[0], values[-1])
+        self.gaps = _offsets(map(operator.sub, values[1:], values), 0)
+        self.checkpoints = values[::DELTA_CHECKPOINT]
+
+    @property
+    def nbytes(self) -> int:
+        checkpoints = self.checkpoints
+        return self.gaps.itemsize * len(self.gaps) + 8 * len(checkpoints) + 8
+
+    def decode(self) -> "array[int]":
+        return array("q", accumulate(self.gaps, initial=self.low))
+
+    def get(self, index: int) -> int:
+        checkpoint = index // DELTA_CHECKPOINT
+        start = checkpoint * DELTA_CHECKPOINT
+        return self.checkpoints[checkpoint] + sum(self.gaps[start:index])
+
+    def _select(self, op: Compare, value: Any) -> bytes:
+        # Sorted, so every comparison selects one or two contiguous runs
+        values = self.decode()
+        try:
+            first, last = bisect_left(values, value), bisect_right(values, value)
+        except TypeError:
+            return super()._select(op, value)
+        if op is operator.ne:
+            selected, start, stop = False, first, last
+        else:
+            selected = True
+            start, stop = {
+                operator.lt: (0, first),
+                operator.le: (0, last),
+                operator.gt: (last, self.length),
+                operator.ge: (first, self.length),
+                operator.eq: (first, last),
+            }[op]
+        return (
+            _selectors(not selected, start)
+            + _selectors(selected, stop - start)
+            + _selectors(not selected, self.length - stop)
+        )
+
+    def sum(self) -> int:
+        return sum(accumulate(self.gaps, initial=self.low))
+
+
+class RunLength(Chunk):
+    """Repetitive values as one value per run and the position the run ends at"""
+
+    __slots__ = ("values", "ends", "typecode")
+
+    def __init__(self, values: "array[Any]") -> None:
+        runs = [(value, len(list(run))) for value, run in groupby(values)]
+        super().__init__(len(values), min(values), max(values))
+        self.typecode = values.typecode
+        self.values = array(values.typecode, [value for value, _ in runs])
+        self.ends = _offsets(accumulate(count for _, count in runs), 0)
+
+    @property
+    def nbytes(self) -> int:
+        values, ends = self.values, self.ends
+        return values.itemsize * len(values) + ends.itemsize * len(ends)
+
+    def _runs(self) -> Iterator[tuple[Any, int]]:
+        return zip(self.values, map(operator.sub, self.ends, [0, *self.ends]))
+
+    def decode(self) -> "array[Any]":
+        decoded = array(self.typecode)
+        for value, count in self._runs():
+            decoded.extend(repeat(value, count))
+        return decoded
+
+    def get(self, index: int) -> Any:
+        return self.values[bisect_right(self.ends, index)]
+
+    def _select(self, op: Compare, value: Any) -> bytes:
+        # One comparison per run
+        return b"".join(
+            _selectors(bool(op(run_value, value)), count)
+            for run_value, count in self._runs()
+        )
+
+    def sum(self) -> int:
+        return sum(value * count for value, count in self._runs())
+
+
+class BitPacked(Chunk):
+    """BOOL values as the bits of an int, bit i is value i"""
+
+    __slots__ = ("bits",)
+
+    typecode = "b"
+
+    # 0/1 bytes <-> "0"/"1" digits, as in Mask
+    _TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+    _TO_SELECTORS = bytes.maketrans(b"01", b"\x00\x01")
+
+    def __init__(self, values: "array[int]") -> None:
+        selectors = bytes(map(bool, values))
+        super().__init__(len(values), min(selectors), max(selectors))
+        digits = selectors.translate(self._TO_DIGITS)[::-1]
+        self.bits = int(digits, 2)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.length + 7) // 8
+
+    def _bytes(self, bits: int) -> bytes:
+        digits = format(bits, f"0{self.length}b")[::-1]
+        return digits.encode().translate(self._TO_SELECTORS)
+
+    def decode(self) -> "array[int]":
+        return array("b", self._bytes(self.bits))
+
+    def get(self, index: int) -> int:
+        return self.bits >> index & 1
+
+    def _select(self, op: Compare, value: Any) -> bytes:
+        # Bit operations instead of one comparison per value
+        if value is True or value is False:
+            flipped = self.bits ^ ((1 << self.length) - 1)
+            if op is operator.eq:
+                return self._bytes(self.bits if value else flipped)
+            if op is operator.ne:
+                return self._bytes(flipped if value else self.bits)
+        return super()._select(op, value)
+
+    def sum(self) -> int:
+        return self.bits.bit_count()
+
+
+def _non_decreasing(values: "array[int]") -> bool:
+    return all(map(operator.le, values, values[1:]))
+
+
+def _runs(values: "array[Any]") -> int:
+    return 1 + sum(map(operator.ne, values, values[1:]))
+
+
+def encode_chunk(col_type: str, values: "array[Any]") -> Chunk:
+    """The smallest encoding of one chunk of a typed INT or BOOL buffer"""
+    if col_type == "BOOL":
+        candidates: list[Chunk] = [BitPacked(values)]
+    else:
+        candidates = [FrameOfReference(values)]
+        if len(values) > 1 and _non_decreasing(values):
+            candidates.append(Delta(values))
+    # A run costs a value and an end, only worth building when runs are long
+    if _runs(values) * 2 < len(values):
+        candidates.append(RunLength(values))
+    return min(candidates, key=lambda chunk: chunk.nbytes)
+
+
+class Compressed:
+    """
+    Read-only buffer of a compressed column vector, chunk by chunk
+
+    Supports the parts of the array interface vectors read through
+    """
+
+    __slots__ = ("chunks", "length", "chunk_rows", "typecode")
+
+    def __init__(self, chunks: list[Chunk], chunk_rows: int, typecode: str) -> None:
+        self.chunks = chunks
+        self.length = sum(len(chunk) for chunk in chunks)
+        self.chunk_rows = chunk_rows
+        self.typecode = typecode
+
+    @classmethod
+    def encode(
+        cls, col_type: str, data: "array[Any]", chunk_rows: int = CHUNK_ROWS
+    ) -> "Compressed":
+        if col_type not in COMPRESSED_TYPES:
+            raise ValueError(f"Unsupported column type for compression: {col_type}")
+        if chunk_rows < 1:
+            raise ValueError("Compressed chunks need at least one row")
+        chunks = [
+            encode_chunk(col_type, data[start : start + chunk_rows])
+            for start in range(0, len(data), chunk_rows)
+        ]
+        return cls(chunks, chunk_rows, data.typecode)
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def nbytes(self) -> int:
+        return sum(chunk.nbytes for chunk in self.chunks)
+
+    def encodings(self) -> list[str]:
+        """Encoding picked for every chunk"""
+        return [type(chunk).__name__ for chunk in self.chunks]
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("Compressed index out of range")
+        chunk, offset = divmod(index, self.chunk_rows)
+        return self.chunks[chunk].get(offset)
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self.chunks:
+            yield from chunk.decode()
+
+    def decode(self) -> "array[Any]":
+        decoded = array(self.typecode)
+        for chunk in self.chunks:
+            decoded.extend(chunk.decode())
+        return decoded
+
+    def select(self, op: Compare, value: Any) -> bytes:
+        """0/1 selector byte per value of `value op other`, see Chunk.select"""
+        return b"".join(chunk.select(op, value) for chunk in self.chunks)
+
+    def sum(self) -> int:
+        return sum(chunk.sum() for chunk in self.chunks)
+
+    def min(self) -> Any:
+        return min((chunk.low for chunk in self.chunks if len(chunk)), default=None)
+
+    def max(self) -> Any:
+        return max((chunk.high for chunk in self.chunks if len(chunk)), default=None)
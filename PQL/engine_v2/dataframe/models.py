@@ -1,5 +1,11 @@
+import operator
+import warnings
+from array import array
 from dataclasses import dataclass
-from typing import Any, Callable, Tuple, Union
+from itertools import compress, islice, repeat
+from typing import Any, Callable, Iterable, Iterator, Tuple, Union
+
+from PQL.engine_v2.dataframe.encodings import CHUNK_ROWS, COMPRESSED_TYPES, Compressed
 
 
 @dataclass(frozen=True)
@@ -155,36 +161,749 @@ class Schema:
         return Schema(columns=self.columns)
 
 
-@dataclass
+class Mask:
+    """
+    Row selection produced by column comparisons, bit i is set when row i is selected
+
+    Masks combine with & | ~ as single big int operations instead of per row checks
+
+        (df.column("salary") > 30000) & (df.column("age") == 30)
+
+    Comparisons involving NULL are UNKNOWN rather than true or false, their bit
+    is set in unknown instead. & | ~ follow SQL three valued logic, so NOT of an
+    UNKNOWN row is still UNKNOWN, and only true rows are selected.
+    """
+
+    __slots__ = ("bits", "length", "unknown")
+
+    # 0/1 selector bytes <-> "0"/"1" digit bytes
+    _TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+    _TO_SELECTORS = bytes.maketrans(b"01", b"\x00\x01")
+
+    def __init__(self, bits: int, length: int, unknown: int = 0) -> None:
+        self.bits = bits
+        self.length = length
+        self.unknown = unknown
+        """Rows that are neither true nor false, never set together with bits"""
+
+    @classmethod
+    def from_selectors(cls, selectors: bytes) -> "Mask":
+        """Builds a mask from one 0/1 byte per row"""
+        digits = selectors.translate(cls._TO_DIGITS)[::-1]
+        return cls(int(digits, 2) if digits else 0, len(selectors))
+
+    @classmethod
+    def from_bools(cls, flags: Iterable[Any]) -> "Mask":
+        return cls.from_selectors(bytes(map(bool, flags)))
+
+    def selectors(self) -> bytes:
+        """One 0/1 byte per row, usable with itertools.compress"""
+        if not self.length:
+            return b""
+        digits = format(self.bits, f"0{self.length}b")[::-1]
+        return digits.encode().translate(self._TO_SELECTORS)
+
+    def count(self) -> int:
+        """Number of selected rows"""
+        return self.bits.bit_count()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bool]:
+        return map(bool, self.selectors())
+
+    def __repr__(self) -> str:
+        unknown = f", unknown={self.unknown.bit_count()}" if self.unknown else ""
+        return f"Mask(selected={self.count()}, length={self.length}{unknown})"
+
+    @property
+    def _all(self) -> int:
+        return (1 << self.length) - 1
+
+    def _check(self, other: "Mask") -> None:
+        if not isinstance(other, Mask):  # type: ignore
+            raise TypeError(f"Unsupported operand type: {type(other)!r}")
+        if self.length != other.length:
+            raise ValueError("Mask lengths must match")
+
+    # Logical (SQL: AND OR NOT)
+    def __and__(self, other: "Mask") -> "Mask":
+        self._check(other)
+        # UNKNOWN unless the other side is false
+        unknown = (
+            (self.unknown | other.unknown)
+            & (self.bits | self.unknown)
+            & (other.bits | other.unknown)
+        )
+        return Mask(self.bits & other.bits, self.length, unknown)
+
+    def __or__(self, other: "Mask") -> "Mask":
+        self._check(other)
+        # UNKNOWN unless the other side is true
+        bits = self.bits | other.bits
+        return Mask(bits, self.length, (self.unknown | other.unknown) & ~bits)
+
+    def __invert__(self) -> "Mask":
+        return Mask(self._all ^ (self.bits | self.unknown), self.length, self.unknown)
+
+
+BULK_LOAD_BATCH_SIZE = 10_000
+"""Rows validated and appended together by Dataframe.bulk_load"""
+
+# array typecodes for fixed width column types, anything else is stored in a list
+TYPECODES = {"INT": "q", "FLOAT": "d", "BOOL": "b"}
+
+DICTIONARY_TYPES = ("STR",)
+"""Column types stored as codes into a Dictionary"""
+
+DICTIONARY_LIMIT = 1 << 16
+"""Distinct values a dictionary takes, columns with more fall back to a list"""
+
+# Codes fit in a byte until the dictionary outgrows it
+CODE_TYPECODES = ("B", "H")
+
+
+class Dictionary:
+    """
+    Distinct values of a column in first seen order, a value's code is its position
+
+    Only ever appended to, so vectors copied or selected from one another share
+    it and their codes stay valid whichever of them adds values
+    """
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self) -> None:
+        self.values: list[Any] = []
+        self.codes: dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: Any) -> int:
+        """Code of value, added when new, OverflowError once the dictionary is full"""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if code >= DICTIONARY_LIMIT:
+                raise OverflowError("Dictionary is full")
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, predicate: Callable[[Any], Any]) -> bytes:
+        """predicate of every value as one 0/1 byte per code, NULL is never selected"""
+        return bytes(
+            value is not None and bool(predicate(value)) for value in self.values
+        )
+
+
+def _validity(values: list[Any]) -> bytearray | None:
+    """Validity bytes of values, 1 when value i isn't NULL, None if none is"""
+    if None not in values:
+        return None
+    return bytearray(value is not None for value in values)
+
+
+def _filled(values: list[Any]) -> list[Any]:
+    """values with NULLs replaced by a placeholder an array can hold"""
+    return [0 if value is None else value for value in values]
+
+
+def _null_unless(value: Any, valid: int) -> Any:
+    return value if valid else None
+
+
+def _validity_of(valid: bytes) -> bytearray | None:
+    """Validity of one 0/1 byte per value, None when every value is valid"""
+    if b"\x00" not in valid:
+        return None
+    return bytearray(valid)
+
+
+class ColumnVector:
+    """
+    Contiguous storage for every value of a single column
+
+    INT, FLOAT and BOOL columns are backed by an `array` buffer, STR columns by an
+    array of codes into a Dictionary of their distinct values. Other types (and
+    columns holding values their buffer can't represent, like too many distinct
+    strings) use a list.
+
+    NULLs are tracked in a validity bytearray, byte i is 1 when row i has a value.
+    Arrays hold a placeholder 0 at NULL rows, so NULLs don't force a typed column
+    back to a list, and IS NULL, IS NOT NULL and COALESCE are bitmap operations.
+
+    compress() gives a read-only copy of an INT or BOOL vector in the chunked
+    encodings of encodings.py, appending to it decodes it back to an array.
+    """
+
+    def __init__(self, col_type: str, values: Iterable[Any] = ()) -> None:
+        self.type = col_type
+        self.shared = False
+        """Set once the buffer is referenced by more than one Dataframe"""
+        self.dictionary: Dictionary | None = None
+        values = list(values)
+        self.validity = _validity(values)
+        """None when no value is NULL"""
+
+        if col_type in DICTIONARY_TYPES:
+            try:
+                self.dictionary = Dictionary()
+                self.data: array[Any] | list[Any] = self._codes(values)
+            except (TypeError, OverflowError):
+                self.dictionary = None
+                self.data = values
+            return
+
+        typecode = TYPECODES.get(col_type)
+        if typecode is None:
+            self.data = values
+            return
+
+        try:
+            filled = values if self.validity is None else _filled(values)
+            self.data = array(typecode, filled)
+        except (TypeError, OverflowError):
+            self.data = values
+
+    @classmethod
+    def from_buffer(
+        cls,
+        col_type: str,
+        data: "array[Any] | list[Any] | Compressed",
+        dictionary: Dictionary | None = None,
+        validity: bytearray | None = None,
+    ) -> "ColumnVector":
+        """Wraps an existing buffer without copying it, codes into dictionary if any"""
+        vector = cls.__new__(cls)
+        vector.type = col_type
+        vector.shared = False
+        vector.data = data  # type: ignore
+        vector.dictionary = dictionary
+        vector.validity = validity
+        return vector
+
+    @property
+    def is_typed(self) -> bool:
+        return isinstance(self.data, array)
+
+    @property
+    def is_compressed(self) -> bool:
+        return isinstance(self.data, Compressed)
+
+    @property
+    def is_encoded(self) -> bool:
+        """Whether data holds dictionary codes"""
+        return self.dictionary is not None
+
+    @property
+    def null_count(self) -> int:
+        if self.validity is None:
+            return 0
+        return self.validity.count(0)
+
+    def _codes(self, values: Iterable[Any], start: Any = None) -> "array[Any]":
+        """values encoded into an array of codes, widened from bytes when needed"""
+        assert self.dictionary is not None
+        codes = list(map(self.dictionary.encode, values))
+        typecode = CODE_TYPECODES[0] if start is None else start.typecode
+        if typecode == "B" and len(self.dictionary) > 256:
+            typecode = CODE_TYPECODES[1]
+        return array(typecode, codes)
+
+    def _decode(self) -> None:
+        """Falls back from codes or an array to a list of the values"""
+        self.data = list(self)
+        self.dictionary = None
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index: int) -> Any:
+        value = self.data[index]
+        if self.validity is not None and not self.validity[index]:
+            return None
+        if self.dictionary is not None:
+            return self.dictionary.values[value]
+        if self.type == "BOOL" and not isinstance(self.data, list):
+            return bool(value)
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.dictionary is not None:
+            # NULL has a code of its own
+            return map(self.dictionary.values.__getitem__, self.data)
+        if isinstance(self.data, list):
+            return iter(self.data)
+        values: Iterator[Any] = iter(self.data)
+        if self.type == "BOOL":
+            values = map(bool, self.data)
+        if self.validity is not None:
+            # Placeholders of the NULL rows
+            values = map(_null_unless, values, self.validity)
+        return values
+
+    def __repr__(self) -> str:
+        return f"ColumnVector(type={self.type}, length={len(self.data)})"
+
+    def append(self, value: Any) -> None:
+        self.extend((value,))
+
+    def extend(self, values: Iterable[Any]) -> None:
+        """Appends many values at once, amortized O(1) per value like append"""
+        if isinstance(self.data, Compressed):
+            self.data = self.data.decode()
+        values = list(values)
+        length = len(self.data)
+
+        if self.dictionary is not None:
+            try:
+                codes = self._codes(values, self.data)
+            except (TypeError, OverflowError):
+                self._decode()
+            else:
+                if codes.typecode != self.data.typecode:  # type: ignore
+                    self.data = array(codes.typecode, self.data)
+                self.data.extend(codes)  # type: ignore
+                self._extend_validity(values, length)
+                return
+        if self.is_typed:
+            try:
+                self.data.extend(_filled(values))  # type: ignore
+                self._extend_validity(values, length)
+                return
+            except (TypeError, OverflowError):
+                # array.extend stops at the bad value, drop what it already added
+                del self.data[length:]
+                self._decode()
+        self.data.extend(values)  # type: ignore
+        self._extend_validity(values, length)
+
+    def _extend_validity(self, values: list[Any], length: int) -> None:
+        """Validity of values appended after the first length rows"""
+        added = _validity(values)
+        if self.validity is None:
+            if added is None:
+                return
+            # First NULL, the bitmap is only built now
+            self.validity = bytearray(b"\x01") * length
+        self.validity += b"\x01" * len(values) if added is None else added
+
+    def _select_codes(self, lookup: bytes) -> Mask:
+        """Mask of the rows whose code is selected by lookup, see Dictionary.lookup"""
+        data: array[Any] = self.data  # type: ignore
+        if data.typecode == "B":
+            # The dictionary may have grown past a byte through a vector sharing it
+            table = lookup[:256].ljust(256, b"\x00")
+            return Mask.from_selectors(data.tobytes().translate(table))
+        return Mask.from_selectors(bytes(map(lookup.__getitem__, self.data)))
+
+    def _unknown(self, result: Mask, other: Any = None) -> Mask:
+        """result with the rows where either side is NULL made UNKNOWN"""
+        other_validity = other.validity if isinstance(other, ColumnVector) else None
+        if self.validity is None and other_validity is None:
+            return result
+        known = self.is_not_null().bits
+        if other_validity is not None:
+            known &= other.is_not_null().bits
+        return Mask(result.bits & known, result.length, known ^ result._all)
+
+    def _compare(self, other: Any, op: Callable[[Any, Any], Any]) -> Mask:
+        if other is None:
+            # = NULL is UNKNOWN for every row, see is_null
+            length = len(self.data)
+            return Mask(0, length, (1 << length) - 1)
+        if self.dictionary is not None and not isinstance(other, ColumnVector):
+            # Compared once per distinct value instead of once per row
+            selected = self._select_codes(
+                self.dictionary.lookup(lambda a: op(a, other))
+            )
+            return self._unknown(selected)
+        if isinstance(self.data, Compressed) and not isinstance(other, ColumnVector):
+            # Chunks whose min and max decide the comparison aren't decoded
+            return self._unknown(Mask.from_selectors(self.data.select(op, other)))
+
+        if isinstance(other, ColumnVector):
+            if len(other) != len(self):
+                raise ValueError("Column lengths must match")
+            typed = not isinstance(other.data, list) and not other.is_encoded
+            operands: Iterable[Any] = other.data if typed else other
+        else:
+            operands = repeat(other, len(self.data))
+        values: Iterable[Any] = self if self.is_encoded else self.data
+
+        if isinstance(self.data, list) or self.is_encoded or (
+            isinstance(other, ColumnVector) and not typed
+        ):
+            # Values read through lists are None at NULL rows
+            compare = op
+
+            def op(a: Any, b: Any) -> Any:
+                return a is not None and b is not None and compare(a, b)
+
+        selected = Mask.from_selectors(bytes(map(op, values, operands)))
+        return self._unknown(selected, other)
+
+    def isin(self, values: Iterable[Any]) -> Mask:
+        """SQL IN, UNKNOWN for NULL rows and, when values has NULL, for misses"""
+        wanted = set(values)
+        if self.dictionary is not None:
+            selected = self._select_codes(self.dictionary.lookup(wanted.__contains__))
+        else:
+            selected = Mask.from_bools(
+                value is not None and value in wanted for value in self
+            )
+        result = self._unknown(selected)
+        if None in wanted:
+            misses = result._all ^ (result.bits | result.unknown)
+            return Mask(result.bits, result.length, result.unknown | misses)
+        return result
+
+    # Comparison (SQL: = != < <= > >=)
+    # Result: Mask
+    def __eq__(self, other: Any) -> Mask:  # type: ignore
+        return self._compare(other, operator.eq)
+
+    def __ne__(self, other: Any) -> Mask:  # type: ignore
+        return self._compare(other, operator.ne)
+
+    def __lt__(self, other: Any) -> Mask:
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other: Any) -> Mask:
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other: Any) -> Mask:
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other: Any) -> Mask:
+        return self._compare(other, operator.ge)
+
+    __hash__ = None  # type: ignore
+
+    # NULL tests (SQL: IS NULL, IS NOT NULL, COALESCE), read from the bitmap
+    def is_null(self) -> Mask:
+        return ~self.is_not_null()
+
+    def is_not_null(self) -> Mask:
+        if self.validity is None:
+            length = len(self.data)
+            return Mask((1 << length) - 1, length)
+        return Mask.from_selectors(self.validity)
+
+    def coalesce(self, other: Any) -> "ColumnVector":
+        """New vector with the NULLs replaced by other's values, a vector or a scalar"""
+        length = len(self.data)
+        if isinstance(other, ColumnVector) and len(other) != length:
+            raise ValueError("Column lengths must match")
+        if self.validity is None:
+            # Nothing to replace, a compressed vector stays compressed
+            return self.copy()
+        if isinstance(self.data, Compressed):
+            result = ColumnVector.from_buffer(
+                self.type, self.data.decode(), validity=self.validity[:]
+            )
+        else:
+            result = self.copy()
+
+        positions = list(compress(range(length), self.is_null().selectors()))
+        if isinstance(other, ColumnVector):
+            fills = [other[position] for position in positions]
+            valid = self.is_not_null() | other.is_not_null()
+            validity = _validity_of(valid.selectors())
+        else:
+            fills = [other] * len(positions)
+            validity = result.validity if other is None else None
+        result._fill(positions, fills)
+        result.validity = validity
+        return result
+
+    def _fill(self, positions: list[int], values: list[Any]) -> None:
+        """Overwrites the NULL rows at positions, validity is left to the caller"""
+        if self.dictionary is not None:
+            try:
+                codes = self._codes(values, self.data)
+            except (TypeError, OverflowError):
+                self._decode()
+            else:
+                if codes.typecode != self.data.typecode:  # type: ignore
+                    self.data = array(codes.typecode, self.data)
+                for position, code in zip(positions, codes):
+                    self.data[position] = code
+                return
+        if self.is_typed:
+            try:
+                for position, value in zip(positions, _filled(values)):
+                    self.data[position] = value
+                return
+            except (TypeError, OverflowError):
+                self._decode()
+        for position, value in zip(positions, values):
+            self.data[position] = value
+
+    def copy(self) -> "ColumnVector":
+        validity = None if self.validity is None else self.validity[:]
+        if isinstance(self.data, Compressed):
+            # Read-only, appends to the copy decode it into a buffer of its own
+            return ColumnVector.from_buffer(self.type, self.data, None, validity)
+        return ColumnVector.from_buffer(
+            self.type, self.data[:], self.dictionary, validity
+        )
+
+    def select(self, selectors: Iterable[Any]) -> "ColumnVector":
+        """Returns a new vector holding the values whose selector is truthy"""
+        validity = None
+        if self.validity is not None:
+            if not isinstance(selectors, (bytes, bytearray)):
+                selectors = bytes(map(bool, selectors))
+            kept_validity = bytes(compress(self.validity, selectors))
+            validity = _validity_of(kept_validity)
+
+        kept = compress(self.data, selectors)
+        if self.is_typed or self.is_compressed:
+            data = array(self.data.typecode, kept)  # type: ignore
+            return ColumnVector.from_buffer(self.type, data, self.dictionary, validity)
+        return ColumnVector.from_buffer(self.type, list(kept), None, validity)
+
+    def compress(self, chunk_rows: int = CHUNK_ROWS) -> "ColumnVector":
+        """
+        Compressed copy of an INT or BOOL array vector, see encodings.py. Other
+        vectors are returned as they are.
+        """
+        if self.type not in COMPRESSED_TYPES or not self.is_typed:
+            return self
+        data: array[Any] = self.data  # type: ignore
+        return ColumnVector.from_buffer(
+            self.type,
+            Compressed.encode(self.type, data, chunk_rows),
+            validity=None if self.validity is None else self.validity[:],
+        )
+
+    # Aggregates (SQL: SUM MIN MAX), NULLs are skipped, None when nothing is left
+    def _present(self) -> list[Any]:
+        return [value for value in self if value is not None]
+
+    def sum(self) -> Any:
+        if self.null_count == len(self.data):
+            return None
+        if isinstance(self.data, (Compressed, array)):
+            # NULL placeholders are 0
+            return self.data.sum() if self.is_compressed else sum(self.data)
+        return sum(self._present())
+
+    def min(self) -> Any:
+        if isinstance(self.data, Compressed) and self.validity is None:
+            return self._aggregate(self.data.min())
+        return self._aggregate(min(self._present(), default=None))
+
+    def max(self) -> Any:
+        if isinstance(self.data, Compressed) and self.validity is None:
+            return self._aggregate(self.data.max())
+        return self._aggregate(max(self._present(), default=None))
+
+    def _aggregate(self, value: Any) -> Any:
+        if self.type == "BOOL" and value is not None:
+            return bool(value)
+        return value
+
+
+@dataclass(init=False)
 class Dataframe:
+    """
+    Column oriented table, each column of the schema is stored in its own ColumnVector
+
+    Projections reuse the existing vectors, a vector is only copied when a
+    Dataframe sharing it is appended to
+
+    Dataframe(schema, rows=rows) still builds a frame from rows like it did
+    before frames were column oriented, it's deprecated in favour of from_rows
+    """
+
     schema: Schema
-    rows: tuple[Row, ...]
+    vectors: tuple[ColumnVector, ...]
+
+    def __init__(
+        self,
+        schema: Schema,
+        vectors: Iterable[ColumnVector] | None = None,
+        rows: Iterable[Row | tuple[Any, ...]] | None = None,
+    ) -> None:
+        vectors = None if vectors is None else tuple(vectors)
+        if vectors and not all(isinstance(vector, ColumnVector) for vector in vectors):
+            # Dataframe(schema, rows) from the row based constructor
+            vectors, rows = None, vectors
+        if rows is not None:
+            if vectors is not None:
+                raise ValueError("Dataframe takes either vectors or rows")
+            warnings.warn(
+                "Dataframe(schema, rows=...) is deprecated, use Dataframe.from_rows",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            vectors = Dataframe.from_rows(schema, rows).vectors
+        elif vectors is None:
+            vectors = Dataframe.from_rows(schema, ()).vectors
+
+        self.schema = schema
+        self.vectors = vectors
+        if len(self.vectors) != len(self.schema.columns):
+            raise ValueError("Vector count does not match schema length")
+        if len({len(vector) for vector in self.vectors}) > 1:
+            raise ValueError("All column vectors must have the same length")
+
+    @classmethod
+    def from_rows(
+        cls, schema: Schema, rows: Iterable[Row | tuple[Any, ...]]
+    ) -> "Dataframe":
+        values = [row.row if isinstance(row, Row) else row for row in rows]
+        columns = zip(*values) if values else [()] * len(schema.columns)
+        vectors = tuple(
+            ColumnVector(column.type, column_values)
+            for column, column_values in zip(schema.columns, columns)
+        )
+        return cls(schema=schema, vectors=vectors)
+
+    @property
+    def rows(self) -> tuple[Row, ...]:
+        """Row view of the frame, materializes every row so avoid on hot paths"""
+        return tuple(Row(values) for values in zip(*self.vectors))
+
+    def __len__(self) -> int:
+        return len(self.vectors[0]) if self.vectors else 0
+
+    def column(self, name: str) -> ColumnVector:
+        return self.vectors[self.schema.get_index(name)]
 
     def __getitem__(self, value: str | list[str]) -> "Dataframe":
         if isinstance(value, str):
             value = [value]
 
         if isinstance(value, list):  # type: ignore
-            schema = self.schema.select_schema(value)
             # use list comprehension to ensure ordering
-            indices = [self.schema.get_indices(value)[column] for column in value]
+            indices = [self.schema.get_index(column) for column in value]
+            schema = Schema(columns=tuple(self.schema.columns[i] for i in indices))
 
-            rows = tuple(Row(tuple(row[i] for i in indices)) for row in self.rows)
+            vectors = tuple(self.vectors[i] for i in indices)
+            for vector in vectors:
+                vector.shared = True
 
-            return Dataframe(schema=schema, rows=rows)
+            return Dataframe(schema=schema, vectors=vectors)
 
         raise SyntaxError
 
     def add_row(self, row: Row) -> None:
-        self.rows += (row,)
+        if len(row.row) != len(self.vectors):
+            raise ValueError("Row length does not match dataframe schema length")
+
+        # Copy on write, projections of this frame keep seeing the old buffers
+        self.vectors = tuple(
+            vector.copy() if vector.shared else vector for vector in self.vectors
+        )
+        for vector, value in zip(self.vectors, row.row):
+            vector.append(value)
+
+    def load_batch(self, batch: Iterable[Row | tuple[Any, ...]]) -> int:
+        """
+        Appends a batch of rows column by column, the batch is validated as a
+        whole before anything is appended. Returns the number of rows loaded.
+        """
+        values = [row.row if isinstance(row, Row) else tuple(row) for row in batch]
+        if not values:
+            return 0
+
+        width = len(self.vectors)
+        if any(len(row) != width for row in values):
+            raise ValueError("Row length does not match dataframe schema length")
+
+        self.vectors = tuple(
+            vector.copy() if vector.shared else vector for vector in self.vectors
+        )
+        for vector, column_values in zip(self.vectors, zip(*values)):
+            vector.extend(column_values)
+        return len(values)
+
+    def bulk_load(
+        self,
+        rows: Iterable[Row | tuple[Any, ...]],
+        batch_size: int = BULK_LOAD_BATCH_SIZE,
+    ) -> int:
+        """Loads rows from any iterable in batches of batch_size, see load_batch"""
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        loaded = 0
+        iterator = iter(rows)
+        while batch := list(islice(iterator, batch_size)):
+            loaded += self.load_batch(batch)
+        return loaded
+
+    def _single_vector(self) -> ColumnVector:
+        if len(self.vectors) != 1:
+            raise ValueError("Column operations require a single column dataframe")
+        return self.vectors[0]
 
-    # TODO Revise into something like (df['salary'] > 30000 & df['age'] == 30), where salary and age resolves to a set of ints, where the and resolves the sets into a singular list
-    def filter(self, condition: bool | list[bool]) -> "Dataframe":
+    def __eq__(self, other: object) -> bool:
+        """
+        Same schema and values, comparisons producing a Mask are made on the
+        vectors instead: df.column("age") == 30
+        """
+        if not isinstance(other, Dataframe):
+            return NotImplemented
+        return (
+            self.schema == other.schema
+            and len(self) == len(other)
+            and all(
+                list(vector) == list(other_vector)
+                for vector, other_vector in zip(self.vectors, other.vectors)
+            )
+        )
+
+    def compress(self, chunk_rows: int = CHUNK_ROWS) -> "Dataframe":
+        """Frame with every INT and BOOL column compressed, see ColumnVector.compress"""
+        vectors = tuple(vector.compress(chunk_rows) for vector in self.vectors)
+        for original, vector in zip(self.vectors, vectors):
+            if vector is original:
+                # Left alone by compress, now referenced by both frames
+                vector.shared = True
+        return Dataframe(schema=self.schema.copy(), vectors=vectors)
+
+    def isin(self, values: Iterable[Any]) -> Mask:
+        """SQL IN on a single column frame, df["city"].isin(["Oslo", "Rome"])"""
+        return self._single_vector().isin(values)
+
+    def is_null(self) -> Mask:
+        return self._single_vector().is_null()
+
+    def is_not_null(self) -> Mask:
+        return self._single_vector().is_not_null()
+
+    def coalesce(self, other: Any) -> "Dataframe":
+        """Single column frame with the NULLs replaced, df["bonus"].coalesce(0)"""
+        if isinstance(other, Dataframe):
+            other = other._single_vector()
+        vector = self._single_vector().coalesce(other)
+        return Dataframe(schema=self.schema.copy(), vectors=(vector,))
+
+    def filter(self, condition: Mask | bool | list[bool]) -> "Dataframe":
+        """
+        Keeps the rows selected by condition, rows a Mask has UNKNOWN are dropped
+
+            df.filter((df.column("salary") > 30000) & (df.column("age") == 30))
+        """
         schema = self.schema.copy()
 
         if isinstance(condition, bool):
             condition = [condition]
 
-        rows = tuple(row for row, cond in zip(self.rows, condition) if cond)
+        if isinstance(condition, Mask):
+            if condition.length != len(self):
+                raise ValueError("Mask length does not match dataframe length")
+            selectors: Iterable[Any] = condition.selectors()
+        else:
+            selectors = bytes(map(bool, condition))
+
+        vectors = tuple(vector.select(selectors) for vector in self.vectors)
 
-        return Dataframe(schema=schema, rows=rows)
+        return Dataframe(schema=schema, vectors=vectors)
@@ -1,8 +1,9 @@
 import re
 from dataclasses import dataclass
+from typing import Iterator
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     kind: str
     value: str
@@ -16,39 +17,65 @@ class Token:
         return f"TOKEN({self.kind}, {self.value})"
 
 
+Span = tuple[str, int, int]
+"""Token kind and its [start, end) offsets in the query text, see Lexer.scan"""
+
+KEYWORDS = (
+    "SELECT",
+    "INSERT",
+    "UPDATE",
+    "DELETE",
+    "FROM",
+    "JOIN",
+    "ON",
+    "WHERE",
+    "GROUP",
+    "BY",
+    "HAVING",
+    "ORDER",
+    "LIMIT",
+    "AS",
+)
+
+KEYWORD_KINDS: dict[str, str] = {
+    **{keyword: keyword for keyword in KEYWORDS},
+    "TRUE": "BOOLEAN",
+    "FALSE": "BOOLEAN",
+}
+"""Identifier text to token kind, keywords are scanned as identifiers"""
+
+# Upper and lower case spellings resolve without building a new string
+KEYWORD_SPELLINGS: dict[str, str] = {
+    **KEYWORD_KINDS,
+    **{word.lower(): kind for word, kind in KEYWORD_KINDS.items()},
+}
+
+PUNCTUATION: dict[str, str] = {
+    ",": "COMMA",
+    "*": "STAR",
+    "(": "LPAREN",
+    ")": "RPAREN",
+    ".": "DOT",
+}
+
 TOKEN_SPEC = [
-    ("SELECT", r"SELECT\b"),
-    ("INSERT", r"INSERT\b"),
-    ("UPDATE", r"UPDATE\b"),
-    ("DELETE", r"DELETE\b"),
-    ("FROM", r"FROM\b"),
-    ("JOIN", r"JOIN\b"),
-    ("ON", r"ON\b"),
-    ("WHERE", r"WHERE\b"),
-    ("GROUP", r"GROUP\b"),
-    ("BY", r"BY\b"),
-    ("HAVING", r"HAVING\b"),
-    ("ORDER", r"ORDER\b"),
-    ("LIMIT", r"LIMIT\b"),
-    ("AS", r"AS\b"),
-    ("COMMA", r","),
-    ("STAR", r"\*"),
-    ("LPAREN", r"\("),
-    ("RPAREN", r"\)"),
-    ("DOT", r"\."),
-    ("BOOLEAN", r"TRUE|FALSE"),
-    ("OP", r"<>|<=|>=|!=|=|<|>"),
+    ("IDENT", r"[a-zA-Z_][a-zA-Z0-9_]*"),
     # Used to catch illegal identifiers before processing to simplify logic
-    ("INVALID_NUMBER", r"\d+[a-zA-Z_]+"),
-    ("NUMBER", r"\d+(\.\d+)?"),
+    ("INVALID_NUMBER", r"\d+[a-zA-Z_]"),
+    ("NUMBER", r"\d+(?:\.\d+)?"),
     ("STRING", r"'[^']*'"),
-    ("IDENT", r"[a-zA-Z_][a-zA-Z0-9_]*"),
-    ("WS", r"\s+"),
+    ("OP", r"<>|<=|>=|!=|=|<|>"),
+    ("PUNCT", r"[,*().]"),
+    ("INVALID", r"."),
 ]
 
+# Leading whitespace is folded into each match instead of being a token of its
+# own, INVALID matches any other character so finditer never skips input. Trailing
+# whitespace matches the end of the text, with no group set.
 MASTER_RE = re.compile(
-    "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPEC),
-    re.IGNORECASE,
+    r"\s*(?:%s|\Z)"
+    % "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPEC),
+    re.DOTALL,
 )
 
 
@@ -76,30 +103,46 @@ class Lexer:
             ]
         """
 
-        text = text.upper()
-        tokens: list[Token] = []
-        pos = 0
-        length = len(text)
+        token_value = self.token_value
+        return [Token(span[0], token_value(text, span)) for span in self.scan(text)]
 
-        while pos < length:
-            match = MASTER_RE.match(text, pos)
-            if not match:
-                raise SyntaxError(
-                    f"Invalid token at position {pos}: {text[pos : pos + 10]!r}"
-                )
+    def scan(self, text: str) -> Iterator[Span]:
+        """
+        Lazily yields the (kind, start, end) span of every token in text
 
+        Nothing is copied or case folded, keywords are found by looking identifiers
+        up in KEYWORD_KINDS
+        """
+        for match in MASTER_RE.finditer(text):
             kind = match.lastgroup
-            value = match.group()
-
-            if not kind:
-                raise SyntaxError("Unkown argument")
-
-            if kind == "INVALID_NUMBER":
+            if kind is None:
+                return
+            start, end = match.span(kind)
+            if kind == "IDENT":
+                word = match.group(kind)
+                kind = KEYWORD_SPELLINGS.get(word) or KEYWORD_KINDS.get(
+                    word.upper(), "IDENT"
+                )
+            elif kind == "PUNCT":
+                kind = PUNCTUATION[text[start]]
+            elif kind == "INVALID_NUMBER":
                 raise SyntaxError("Numbers + Letters string detected")
+            elif kind == "INVALID":
+                raise SyntaxError(
+                    f"Invalid token at position {start}: {text[start : start + 10]!r}"
+                )
 
-            if kind != "WS":
-                tokens.append(Token(kind, value))
-
-            pos = match.end()
+            yield kind, start, end  # type: ignore
 
-        return tokens
+    @staticmethod
+    def token_value(text: str, span: Span) -> str:
+        """
+        Token text for span, upper cased except for string literals which keep the
+        case they were written in
+        """
+        kind, start, end = span
+        if kind in KEYWORD_KINDS:
+            return kind
+        if kind == "STRING":
+            return text[start:end]
+        return text[start:end].upper()
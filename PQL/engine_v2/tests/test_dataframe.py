@@ -0,0 +1,308 @@
+from array import array
+
+import pytest
+
+from PQL.engine_v2.dataframe.models import (
+    DICTIONARY_LIMIT,
+    Column,
+    ColumnVector,
+    Dataframe,
+    Mask,
+    Row,
+    Schema,
+)
+
+
+def make_frame() -> Dataframe:
+    schema = Schema(
+        columns=(
+            Column(name="id", type="INT"),
+            Column(name="name", type="STR"),
+            Column(name="salary", type="FLOAT"),
+            Column(name="active", type="BOOL"),
+        )
+    )
+    return Dataframe.from_rows(
+        schema,
+        [
+            (1, "Alice", 50000.0, True),
+            (2, "Bob", 25000.0, False),
+            (3, "Charlie", 40000.0, True),
+        ],
+    )
+
+
+def test_typed_columns_use_array_buffers():
+    df = make_frame()
+
+    assert isinstance(df.column("id").data, array)
+    assert isinstance(df.column("salary").data, array)
+    assert isinstance(df.column("active").data, array)
+    assert df.column("name").is_encoded
+    assert list(df.column("active")) == [True, False, True]
+
+
+def test_projection_shares_buffers():
+    df = make_frame()
+
+    projected = df[["salary", "id"]]
+
+    assert [column.name for column in projected.schema.columns] == ["salary", "id"]
+    assert projected.column("id") is df.column("id")
+    assert projected.rows[0] == (50000.0, 1)
+
+
+def test_add_row_does_not_leak_into_projection():
+    df = make_frame()
+    projected = df["id"]
+
+    df.add_row(Row((4, "Dana", 10000.0, False)))
+    projected.add_row(Row((5,)))
+
+    assert len(df) == 4
+    assert list(df.column("id")) == [1, 2, 3, 4]
+    assert list(projected.column("id")) == [1, 2, 3, 5]
+
+
+def test_filter_with_bool_list():
+    df = make_frame()
+
+    filtered = df.filter([True, False, True])
+
+    assert len(filtered) == 2
+    assert filtered.rows[1] == (3, "Charlie", 40000.0, True)
+    assert isinstance(filtered.column("id").data, array)
+
+
+def test_typed_column_falls_back_for_unrepresentable_values():
+    vector = ColumnVector("INT", [1, 2])
+    vector.append(None)
+
+    assert isinstance(vector.data, array)
+    assert list(vector) == [1, 2, None]
+
+    vector.append("3")
+
+    assert isinstance(vector.data, list)
+    assert list(vector) == [1, 2, None, "3"]
+    assert vector.null_count == 1
+
+
+def test_column_comparisons_build_masks():
+    df = make_frame()
+
+    mask = df.column("salary") > 30000
+
+    assert isinstance(mask, Mask)
+    assert list(mask) == [True, False, True]
+    assert mask.count() == 2
+    assert list(df.column("name") == "Bob") == [False, True, False]
+
+
+def test_mask_logical_operators():
+    df = make_frame()
+
+    high = df.column("salary") >= 40000
+    active = df.column("active") == True  # noqa: E712
+
+    assert (high & ~active).count() == 0
+    assert list(~high | (df.column("id") == 3)) == [False, True, True]
+    assert (high & active).count() == 2
+
+
+def test_filter_with_mask():
+    df = make_frame()
+
+    filtered = df.filter((df.column("salary") > 30000) & (df.column("id") != 1))
+
+    assert len(filtered) == 1
+    assert filtered.rows[0] == (3, "Charlie", 40000.0, True)
+
+
+def test_row_based_constructor_is_deprecated():
+    df = make_frame()
+    rows = tuple(df.rows)
+
+    with pytest.warns(DeprecationWarning):
+        by_keyword = Dataframe(schema=df.schema, rows=rows)
+    with pytest.warns(DeprecationWarning):
+        by_position = Dataframe(df.schema, rows)
+
+    assert by_keyword == df and by_position == df
+    assert len(Dataframe(df.schema)) == 0
+    with pytest.raises(ValueError):
+        Dataframe(df.schema, df.vectors, rows=rows)
+
+
+def test_frames_compare_structurally():
+    df = make_frame()
+    other = make_frame()
+
+    assert df == other and df in [other]
+    other.add_row(Row((4, "Dana", 1.0, True)))
+    assert df != other
+    assert df["name"] != df["id"]
+    assert df == make_frame().compress()
+
+
+def test_filter_mask_length_mismatch():
+    df = make_frame()
+
+    try:
+        df.filter(Mask.from_bools([True]))
+        assert False
+    except ValueError:
+        pass
+
+
+def test_compare_column_holding_none():
+    vector = ColumnVector("INT", [1, None, 3])
+
+    assert list(vector > 1) == [False, False, True]
+
+
+def test_bulk_load_appends_columnwise():
+    df = make_frame()
+    projected = df["id"]
+
+    loaded = df.bulk_load(
+        ((i, f"User{i}", float(i), i % 2 == 0) for i in range(4, 1_004)),
+        batch_size=300,
+    )
+
+    assert loaded == 1_000
+    assert len(df) == 1_003
+    assert isinstance(df.column("id").data, array)
+    assert df.rows[-1] == (1_003, "User1003", 1003.0, False)
+    assert len(projected) == 3
+
+
+def test_load_batch_falls_back_and_validates():
+    df = make_frame()
+
+    df.load_batch([(4, "Dana", None, True)])
+
+    assert isinstance(df.column("salary").data, array)
+    assert list(df.column("salary")) == [50000.0, 25000.0, 40000.0, None]
+
+    try:
+        df.load_batch([(5, "Eve", 1.0, True), (6, "Fay")])
+        assert False
+    except ValueError:
+        pass
+    assert len(df) == 4
+
+
+def test_string_columns_are_dictionary_encoded():
+    vector = ColumnVector("STR", ["red", "blue", None, "red", "blue"])
+
+    assert vector.is_encoded
+    assert vector.data.typecode == "B"
+    assert vector.dictionary.values == ["red", "blue", None]
+    assert list(vector.data) == [0, 1, 2, 0, 1]
+    assert list(vector) == ["red", "blue", None, "red", "blue"]
+    assert vector[3] == "red"
+
+
+def test_dictionary_predicates_run_on_codes():
+    vector = ColumnVector("STR", ["red", "blue", None, "red", "green"])
+
+    assert list(vector == "red") == [True, False, False, True, False]
+    assert list(vector != "red") == [False, True, False, False, True]
+    assert list(vector == "purple") == [False] * 5
+    assert list(vector > "green") == [True, False, False, True, False]
+    assert list(vector.isin(["blue", "green", None])) == [
+        False, True, False, False, True
+    ]
+    assert (vector == ColumnVector("STR", ["red"] * 5)).count() == 2
+
+
+def test_dictionary_is_shared_by_selected_vectors():
+    df = make_frame()
+    filtered = df.filter(df.column("name") != "Bob")
+
+    filtered.add_row(Row((4, "Dana", 1.0, True)))
+    df.add_row(Row((5, "Eve", 2.0, False)))
+
+    assert filtered.column("name").dictionary is df.column("name").dictionary
+    assert list(filtered.column("name")) == ["Alice", "Charlie", "Dana"]
+    assert list(df.column("name")) == ["Alice", "Bob", "Charlie", "Eve"]
+    assert list(df["name"].isin(["Dana", "Eve"])) == [False, False, False, True]
+
+
+def test_dictionary_codes_widen_then_fall_back():
+    vector = ColumnVector("STR", [f"v{i}" for i in range(200)])
+    vector.extend(f"v{i}" for i in range(200, 300))
+    assert vector.data.typecode == "H"
+    assert vector[299] == "v299"
+
+    vector.extend(f"w{i}" for i in range(DICTIONARY_LIMIT))
+
+    assert not vector.is_encoded
+    assert isinstance(vector.data, list)
+    assert vector[-1] == f"w{DICTIONARY_LIMIT - 1}"
+    assert list(vector == "v1").count(True) == 1
+
+
+def test_nulls_are_tracked_in_a_validity_bitmap():
+    vector = ColumnVector("FLOAT", [1.5, None, 3.0, None])
+
+    assert isinstance(vector.data, array)
+    assert vector.validity == b"\x01\x00\x01\x00"
+    assert vector[1] is None and vector[-2] == 3.0
+    assert list(vector) == [1.5, None, 3.0, None]
+    assert list(vector.is_null()) == [False, True, False, True]
+    assert vector.is_not_null().count() == 2
+    assert (vector.sum(), vector.min(), vector.max()) == (4.5, 1.5, 3.0)
+
+
+def test_comparisons_follow_three_valued_logic():
+    vector = ColumnVector("INT", [1, None, 3])
+
+    greater = vector > 1
+    equal_null = vector == None  # noqa: E711
+
+    assert list(greater) == [False, False, True]
+    assert greater.unknown == 0b010
+    assert list(~greater) == [True, False, False]
+    assert list(greater | ~greater) == [True, False, True]
+    assert list((vector > 5) & (vector == None)) == [False] * 3  # noqa: E711
+    assert ((vector > 5) & equal_null).unknown == 0b010
+    assert ((vector < 5) | equal_null).count() == 2
+    assert equal_null.unknown == 0b111
+    assert list(vector.isin([3, None])) == [False, False, True]
+    assert vector.isin([3, None]).unknown == 0b011
+
+
+def test_coalesce_fills_nulls():
+    df = Dataframe.from_rows(
+        Schema(columns=(Column(name="bonus", type="INT"),)),
+        [(None,), (10,), (None,)],
+    )
+    other = ColumnVector("INT", [1, 2, None])
+
+    assert list(df.coalesce(0).column("bonus")) == [0, 10, 0]
+    assert df.coalesce(0).column("bonus").validity is None
+    assert list(df["bonus"].column("bonus").coalesce(other)) == [1, 10, None]
+    assert list(df.is_null()) == [True, False, True]
+    assert list(df.column("bonus")) == [None, 10, None]
+
+
+def test_nulls_survive_filter_append_and_compress():
+    df = Dataframe.from_rows(
+        Schema(
+            columns=(Column(name="id", type="INT"), Column(name="city", type="STR"))
+        ),
+        [(1, "Oslo"), (None, None), (3, "Rome"), (4, None)],
+    )
+
+    filtered = df.filter(df.column("id") != 3)
+    df.load_batch([(None, "Oslo")])
+    compressed = df.column("id").compress()
+
+    assert [row.row for row in filtered.rows] == [(1, "Oslo"), (4, None)]
+    assert list(df.column("id")) == [1, None, 3, 4, None]
+    assert list(df.column("city").is_null()) == [False, True, False, True, False]
+    assert list(compressed) == [1, None, 3, 4, None]
+    assert list(compressed >= 3) == [False, False, True, True, False]
+    assert (compressed.sum(), compressed.min()) == (8, 1)
@@ -0,0 +1,117 @@
+import operator
+import random
+from array import array
+
+from PQL.engine_v2.dataframe.encodings import (
+    BitPacked,
+    Compressed,
+    Delta,
+    FrameOfReference,
+    RunLength,
+    encode_chunk,
+)
+from PQL.engine_v2.dataframe.models import (
+    Column,
+    ColumnVector,
+    Dataframe,
+    Row,
+    Schema,
+)
+
+OPERATORS = (
+    operator.eq,
+    operator.ne,
+    operator.lt,
+    operator.le,
+    operator.gt,
+    operator.ge,
+)
+
+
+def test_chunks_pick_the_smallest_encoding():
+    ids = array("q", range(1_000, 2_000))
+    scattered = array("q", random.Random(0).choices(range(-100, 100), k=1_000))
+    repeated = array("q", [7] * 500 + [-3] * 500)
+    flags = array("b", [number % 3 == 0 for number in range(1_000)])
+
+    assert isinstance(encode_chunk("INT", ids), Delta)
+    assert isinstance(encode_chunk("INT", scattered), FrameOfReference)
+    assert isinstance(encode_chunk("INT", repeated), RunLength)
+    assert isinstance(encode_chunk("BOOL", flags), BitPacked)
+    assert encode_chunk("INT", scattered).nbytes < len(scattered) * 8
+    assert encode_chunk("BOOL", flags).nbytes == 125
+
+
+def test_encodings_round_trip_and_compare():
+    rng = random.Random(1)
+    chunks = {
+        "delta": array("q", sorted(rng.choices(range(50), k=300))),
+        "reference": array("q", rng.choices(range(-(1 << 40), 1 << 40), k=300)),
+        "runs": array("q", [1] * 100 + [5] * 150 + [2] * 50),
+        "bools": array("b", rng.choices([0, 1], k=300)),
+    }
+
+    for name, values in chunks.items():
+        chunk = encode_chunk("BOOL" if name == "bools" else "INT", values)
+        assert chunk.decode() == values, name
+        assert [chunk.get(index) for index in range(len(values))] == list(values)
+        assert chunk.sum() == sum(values)
+        for op in OPERATORS:
+            for value in (values[0], values[150], -1, 1 << 41):
+                expected = bytes(op(item, value) for item in values)
+                assert chunk.select(op, value) == expected, (name, op, value)
+
+
+def test_compressed_vector_reads_like_the_array():
+    values = [number // 10 for number in range(5_000)]
+    vector = ColumnVector("INT", values).compress(chunk_rows=1_024)
+
+    assert vector.is_compressed
+    assert len(vector.data.chunks) == 5
+    assert vector.data.nbytes * 4 < len(values) * 8
+    assert list(vector) == values
+    assert vector[-1] == 499 and vector[2_048] == 204
+    assert list(vector > 250) == [value > 250 for value in values]
+    assert (vector == None).count() == 0  # noqa: E711
+    assert (vector.sum(), vector.min(), vector.max()) == (sum(values), 0, 499)
+
+
+def test_dataframe_compress_and_append():
+    schema = Schema(
+        columns=(Column(name="id", type="INT"), Column(name="ok", type="BOOL"))
+    )
+    frame = Dataframe.from_rows(schema, [(n, n % 2 == 0) for n in range(100)])
+
+    compressed = frame.compress()
+    ok = compressed.column("ok") == True  # noqa: E712
+    filtered = compressed.filter((compressed.column("id") >= 90) & ok)
+    compressed.add_row(Row((100, True)))
+
+    assert isinstance(compressed.column("ok").data, array)
+    assert frame.column("id").is_typed and len(frame) == 100
+    assert [row.row for row in filtered.rows] == [(n, True) for n in range(90, 100, 2)]
+    assert compressed.column("ok").sum() == 51
+    assert Compressed.encode("INT", array("q")).sum() == 0
+
+
+def test_values_of_another_type_compare_like_the_array():
+    values = list(range(0, 3_000, 3))
+    vector = ColumnVector("INT", values)
+    compressed = vector.compress(chunk_rows=256)
+
+    assert "Delta" in compressed.data.encodings()
+    for op in (operator.eq, operator.ne):
+        assert list(op(compressed, "a")) == list(op(vector, "a"))
+    assert [compressed[index] for index in (0, 127, 128, 129, 999)] == [
+        values[index] for index in (0, 127, 128, 129, 999)
+    ]
+
+
+def test_coalesce_of_a_compressed_column_without_nulls():
+    frame = Dataframe.from_rows(
+        Schema(columns=(Column(name="a", type="INT"),)), [(n,) for n in range(500)]
+    )
+    column = frame.compress()["a"].coalesce(0).column("a")
+
+    assert column.is_compressed and column.validity is None
+    assert list(column) == list(range(500))
@@ -0,0 +1,52 @@
+from PQL.engine_v2.lexer import Lexer, Token
+
+
+def test_tokenize_query():
+    tokens = Lexer().tokenize("select Age, salary FROM accounts where name = 'Bob'")
+
+    assert tokens == [
+        Token("SELECT", "SELECT"),
+        Token("IDENT", "AGE"),
+        Token("COMMA", ","),
+        Token("IDENT", "SALARY"),
+        Token("FROM", "FROM"),
+        Token("IDENT", "ACCOUNTS"),
+        Token("WHERE", "WHERE"),
+        Token("IDENT", "NAME"),
+        Token("OP", "="),
+        Token("STRING", "'Bob'"),
+    ]
+
+
+def test_booleans_need_a_word_boundary():
+    tokens = Lexer().tokenize("SELECT TRUE, TRUEX FROM T")
+
+    kinds = [token.kind for token in tokens]
+
+    assert kinds == ["SELECT", "BOOLEAN", "COMMA", "IDENT", "FROM", "IDENT"]
+
+
+def test_invalid_tokens():
+    for text in ("123ABC", "SELECT 1 + 2", "SELECT 'open"):
+        try:
+            Lexer().tokenize(text)
+            assert False
+        except SyntaxError:
+            pass
+
+
+def test_scan_is_lazy():
+    spans = Lexer().scan("SELECT A FROM T WHERE #")
+
+    assert next(spans) == ("SELECT", 0, 6)
+    assert next(spans) == ("IDENT", 7, 8)
+
+
+def test_trailing_whitespace_is_ignored():
+    assert Lexer().tokenize("SELECT a FROM t \n") == [
+        Token("SELECT", "SELECT"),
+        Token("IDENT", "A"),
+        Token("FROM", "FROM"),
+        Token("IDENT", "T"),
+    ]
+    assert Lexer().tokenize(" ") == []